@@ -4,14 +4,17 @@
 Identifies resources that should be consolidated into single pipelines
 """
 
-import json
 from pathlib import Path
 from collections import defaultdict
+import sys
+
+# Repo root on sys.path so the stdlib-only spec cache in tests/shared is importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from tests.shared.spec_cache import load_spec  # noqa: E402
 
 def load_openapi_spec():
     """Load and parse the OpenAPI specification"""
-    with open("schema/openapi.json", 'r', encoding='utf-8') as f:
-        return json.load(f)
+    return load_spec("schema/openapi.json")
 
 def analyze_consolidation_opportunities():
     """Find resources that should be consolidated"""
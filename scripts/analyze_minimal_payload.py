@@ -3,6 +3,11 @@
 
 import json
 from pathlib import Path
+import sys
+
+# Repo root on sys.path so the stdlib-only spec cache in tests/shared is importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from tests.shared.spec_cache import load_spec  # noqa: E402
 
 def analyze_schema(schema_name, components):
     schema = components['schemas'][schema_name]
@@ -98,8 +103,7 @@ def create_minimal_payload(components):
 def main():
     schema_path = Path(__file__).parent.parent / "schema" / "openapi.json"
     
-    with open(schema_path, 'r', encoding='utf-8') as f:
-        spec = json.load(f)
+    spec = load_spec(schema_path)
     
     components = spec['components']
     
@@ -1,14 +1,18 @@
 #!/usr/bin/env python3
 """Analyze OpenAPI schema to identify resource groupings for test organization."""
 
-import json
 import os
+import sys
+from pathlib import Path
+
+# Repo root on sys.path so the stdlib-only spec cache in tests/shared is importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from tests.shared.spec_cache import load_spec  # noqa: E402
 
 def analyze_resources():
     schema_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "schema", "openapi.json")
     
-    with open(schema_path, 'r', encoding='utf-8') as f:
-        spec = json.load(f)
+    spec = load_spec(schema_path)
 
     # Group endpoints by resource
     resources = {}
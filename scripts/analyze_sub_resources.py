@@ -1,16 +1,19 @@
 #!/usr/bin/env python3
 """Analyze API endpoints for sub-resource pipeline organization."""
 
-import json
 from pathlib import Path
 from collections import defaultdict
+import sys
+
+# Repo root on sys.path so the stdlib-only spec cache in tests/shared is importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from tests.shared.spec_cache import load_spec  # noqa: E402
 
 def get_sub_resource_groups():
     """Group endpoints by sub-resource paths (before /query, /create, etc.)."""
     schema_path = Path(__file__).parent.parent / "schema" / "openapi.json"
     
-    with open(schema_path, 'r', encoding='utf-8') as f:
-        spec = json.load(f)
+    spec = load_spec(schema_path)
     
     # Common endpoint action patterns
     action_patterns = {
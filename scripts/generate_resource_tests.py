@@ -1,10 +1,14 @@
 #!/usr/bin/env python3
 """Generate resource-specific test files from the unified test suite."""
 
-import json
 import os
 import re
 from pathlib import Path
+import sys
+
+# Repo root on sys.path so the stdlib-only spec cache in tests/shared is importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from tests.shared.spec_cache import load_spec  # noqa: E402
 
 def normalize_resource_name(resource: str) -> str:
     """Normalize resource names for consistent file naming."""
@@ -32,8 +36,7 @@ def group_endpoints_by_resource() -> dict:
     """Group API endpoints by normalized resource name."""
     schema_path = Path(__file__).parent.parent / "schema" / "openapi.json"
     
-    with open(schema_path, 'r', encoding='utf-8') as f:
-        spec = json.load(f)
+    spec = load_spec(schema_path)
     
     resources = {}
     for path in spec['paths'].keys():
@@ -124,8 +127,7 @@ def generate_resource_test_files():
     resources = group_endpoints_by_resource()
     schema_path = Path(__file__).parent.parent / "schema" / "openapi.json"
     
-    with open(schema_path, 'r', encoding='utf-8') as f:
-        spec = json.load(f)
+    spec = load_spec(schema_path)
     
     tests_dir = Path(__file__).parent.parent / "tests"
     
@@ -1,9 +1,13 @@
 #!/usr/bin/env python3
 """Complete resource organization script based on OpenAPI spec."""
 
-import json
 import os
 from pathlib import Path
+import sys
+
+# Repo root on sys.path so the stdlib-only spec cache in tests/shared is importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from tests.shared.spec_cache import load_spec  # noqa: E402
 
 def normalize_resource_name(resource: str) -> str:
     """Normalize resource names for consistent folder naming."""
@@ -32,8 +36,7 @@ def get_all_resources_from_openapi():
     """Get all resource groups from OpenAPI spec."""
     schema_path = Path(__file__).parent.parent / "schema" / "openapi.json"
     
-    with open(schema_path, 'r', encoding='utf-8') as f:
-        spec = json.load(f)
+    spec = load_spec(schema_path)
     
     resources = {}
     for path in spec['paths'].keys():
@@ -1,37 +1,29 @@
 # tests/conftest.py
-import os, time, threading, requests, pytest
+import os, sqlite3, subprocess, time, threading, requests, pytest
 from dotenv import load_dotenv; load_dotenv()
 load_dotenv()
 
-_cache = {"tok": None, "exp": 0.0}
-_lock = threading.Lock()
-
-def _fetch_token() -> tuple[str, float]:
-    url = os.environ["TOKEN_URL"]  # e.g., https://identity-qa.testsys.io/connect/token
-    data = {
-        "grant_type": "client_credentials",
-        "client_id": os.environ["CLIENT_ID"],
-        "client_secret": os.environ["CLIENT_SECRET"],
-    }
-    if scope := os.getenv("SCOPE"):
-        data["scope"] = scope
-    r = requests.post(url, data=data, timeout=20)
-    if r.status_code >= 400:
-        raise RuntimeError(f"Token request failed {r.status_code}: {r.text[:400]}")
-    p = r.json()
-    tok = p.get("access_token")
-    if not tok:
-        raise RuntimeError(f"No access_token in response: {p}")
-    ttl = int(p.get("expires_in", 3600))
-    exp = time.time() + max(300, ttl - 300)  # refresh ~5 min early
-    return tok, exp
+from tests.shared.duration_store import TestDuration, get_duration_store, request_durations
+from tests.shared.http_session import get_session_manager
+from tests.shared.impact import analyse as analyse_impact
+from tests.shared.lifecycle import active_lifecycle_run
+from tests.shared.spec_registry import loaded_registries
+from tests.shared.timing import collector as timing_collector
+from tests.shared.token_provider import active_token_provider, get_token_provider, prewarm_identity
+from tests.shared.validation_policy import active_validation_policies, get_validation_policies
+from tests.shared.validation_pool import active_validation_pool
+from tests.shared import token_server as local_token_server
+
+_HTTP_TIMINGS = pytest.StashKey[list]()
+_VALIDATION = pytest.StashKey[list]()
+_prewarm = {"thread": None, "summary": None, "token_summary": None}
+_history = {"tests": {}, "requests": [], "summary": None}
+_token_server = {"server": None}
+_impact = {"lines": []}
 
 def _get_token() -> str:
-    with _lock:
-        now = time.time()
-        if not _cache["tok"] or now >= _cache["exp"]:
-            _cache["tok"], _cache["exp"] = _fetch_token()
-        return _cache["tok"]  # type: ignore[return-value]
+    # Shared with APITestBase and the light run; cached on disk across workers and runs.
+    return get_token_provider().token()
 
 @pytest.fixture(scope="session")
 def base_url() -> str:
@@ -43,4 +35,161 @@ def base_url() -> str:
 
 @pytest.fixture(scope="session")
 def auth_headers() -> dict:
-    return {"Authorization": f"Bearer {_get_token()}"}
+    # Live dict: the provider's background refresh swaps in renewed tokens.
+    return get_token_provider().headers()
+
+
+@pytest.fixture(scope="session")
+def token_server():
+    # The LOCAL_TOKEN_SERVER instance if one is running, otherwise a dedicated one for this session.
+    if _token_server["server"] is not None:
+        yield _token_server["server"]
+        return
+    with local_token_server.from_env() as server:
+        yield server
+
+
+def pytest_addoption(parser):
+    parser.addoption("--changed-since", metavar="REF", default=os.getenv("IMPACT_BASE"),
+                     help="run only the tests that changes since git REF can affect (tests/shared/impact.py)")
+
+
+def pytest_sessionstart(session):
+    # Stand-in identity server for offline runs: every token fixture then talks to it.
+    if os.getenv("LOCAL_TOKEN_SERVER", "false").lower() == "true" and not session.config.option.collectonly:
+        _token_server["server"] = local_token_server.from_env().start()
+        os.environ["TOKEN_URL"] = _token_server["server"].url
+        os.environ.setdefault("CLIENT_ID", "local-client")
+        os.environ.setdefault("CLIENT_SECRET", "local-secret")
+
+    # Resolve DNS and open warm connections (TLS included) while tests are collected,
+    # so the first timed request measures the API rather than connection setup.
+    connections = int(os.getenv("PREWARM_CONNECTIONS", "2"))
+    if connections <= 0 or session.config.option.collectonly:
+        return
+
+    def run():
+        _prewarm["summary"] = get_session_manager().prewarm([os.getenv("BASE_URL")], connections)
+        # Token requests have their own session, so warm that one for the identity server
+        if os.getenv("TOKEN_URL"):
+            _prewarm["token_summary"] = prewarm_identity(os.getenv("TOKEN_URL"), connections)
+
+    _prewarm["thread"] = threading.Thread(target=run, name="prewarm", daemon=True)
+    _prewarm["thread"].start()
+
+
+def pytest_collection_modifyitems(config, items):
+    # Change-impact selection: changed tests, api_test_base rules and spec operations
+    base = config.getoption("changed_since")
+    if not base:
+        return
+    try:
+        impact = analyse_impact(base)
+    except subprocess.CalledProcessError as e:
+        raise pytest.UsageError(f"--changed-since {base}: {e.stderr.strip() or e}")
+    selected, deselected = [], []
+    for item in items:
+        params = getattr(getattr(item, "callspec", None), "params", None)
+        (selected if impact.selects(item.nodeid, params) else deselected).append(item)
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
+    _impact["lines"] = [f"Change impact since {base}: {len(selected)} of {len(selected) + len(deselected)} "
+                        f"tests selected"] + [f"  {line}" for line in impact.describe()]
+
+
+def pytest_collection_finish(session):
+    if _prewarm["thread"] is not None:
+        _prewarm["thread"].join(timeout=float(os.getenv("PREWARM_TIMEOUT", "15")))
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    # Collect the DNS/connect/TLS/TTFB/download breakdown of every request this test makes
+    item.stash[_HTTP_TIMINGS] = timing_collector.start()
+    # ... and the validation level applied to each response it checks
+    item.stash[_VALIDATION] = get_validation_policies().start()
+    yield
+    timing_collector.stop()
+    get_validation_policies().stop()
+    _history["requests"].extend(item.stash.get(_HTTP_TIMINGS, []))
+
+
+def pytest_runtest_logreport(report):
+    # Setup, call and teardown together, for the duration history
+    seconds, outcome = _history["tests"].get(report.nodeid, (0.0, "passed"))
+    if report.failed:
+        outcome = "failed"
+    elif report.skipped and outcome == "passed":
+        outcome = "skipped"
+    _history["tests"][report.nodeid] = (seconds + report.duration, outcome)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    if call.when == "call":
+        item.user_properties.append(("http_timings", item.stash.get(_HTTP_TIMINGS, [])))
+        item.user_properties.append(("response_validation", item.stash.get(_VALIDATION, [])))
+    yield
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_json_runtest_metadata(item, call):
+    # pytest-json-report: lands under "metadata" for each test in reports/report.json
+    if call.when != "call":
+        return {}
+    return {"http_timings": item.stash.get(_HTTP_TIMINGS, []),
+            "response_validation": item.stash.get(_VALIDATION, [])}
+
+
+def pytest_terminal_summary(terminalreporter):
+    manager = get_session_manager()
+    for line in (_prewarm["summary"], _prewarm["token_summary"]):
+        if line:
+            terminalreporter.write_line(line)
+    terminalreporter.write_line(manager.summary())
+    terminalreporter.write_line(manager.setup_summary())
+    terminalreporter.write_line(manager.transport_stats.summary())
+    terminalreporter.write_line(manager.flow.summary())
+    terminalreporter.write_line(manager.retry.summary())
+    terminalreporter.write_line(manager.breaker.summary())
+    if (provider := active_token_provider()) is not None:
+        terminalreporter.write_line(provider.summary())
+    if _token_server["server"] is not None:
+        terminalreporter.write_line(_token_server["server"].summary())
+    if (policies := active_validation_policies()) is not None:
+        terminalreporter.write_line(policies.summary())
+    if (pool := active_validation_pool()) is not None:
+        terminalreporter.write_line(pool.summary())
+    if (lifecycles := active_lifecycle_run()) is not None:
+        terminalreporter.write_line(lifecycles.summary())
+    for registry in loaded_registries():
+        terminalreporter.write_line(registry.summary())
+        for line in registry.validation_summaries():
+            terminalreporter.write_line(line)
+    if _history["summary"]:
+        terminalreporter.write_line(_history["summary"])
+    for line in _impact["lines"]:
+        terminalreporter.write_line(line)
+
+
+def pytest_sessionfinish(session):
+    if (provider := active_token_provider()) is not None:
+        provider.close()
+    if _token_server["server"] is not None:
+        _token_server["server"].stop()
+    if (pool := active_validation_pool()) is not None:
+        pool.close()
+    for registry in loaded_registries():
+        registry.save()
+    if _history["tests"] and (store := get_duration_store()) is not None:
+        # Durations for longest-first scheduling (suite_runner, concurrent light run)
+        tests = [TestDuration(nodeid, outcome, seconds) for nodeid, (seconds, outcome) in _history["tests"].items()]
+        calls = request_durations(_history["requests"], os.getenv("BASE_URL", ""))
+        try:
+            run_id = store.record_run(tests, calls, os.getenv("BASE_URL"))
+            _history["summary"] = (f"Duration history: {len(tests)} tests and {len(calls)} requests "
+                                   f"recorded as run {run_id} in {store.path}")
+        except sqlite3.Error as e:
+            _history["summary"] = f"Duration history: not recorded ({e})"
+    get_session_manager().close()
@@ -12,20 +12,6 @@ class TestEventclassEndpoints(APITestBase):
         """Get all GET endpoints for this resource."""
         return ['/event-class/Query', '/event-class/examinees/query']
     
-    def get_endpoint_params(self, path: str) -> list:
-        """Get query parameters for a specific endpoint."""
-        params = []
-        path_spec = self.spec['paths'].get(path, {})
-        op_spec = path_spec.get('get', {})
-        
-        # Collect parameters from both path and operation levels
-        for param_source in [path_spec.get('parameters', []), op_spec.get('parameters', [])]:
-            for param in param_source:
-                if isinstance(param, dict) and param.get('in') == 'query':
-                    params.append(param['name'])
-        
-        return params
-
     def test_event_class_query(self, auth_headers):
         """Test /event-class/Query endpoint."""
         path = "/event-class/Query"
@@ -48,7 +34,7 @@ class TestEventclassEndpoints(APITestBase):
         self.assert_response_success(response, path, expected_status)
         
         # Log the response for debugging
-        print(f"\n{path}: {response.status_code} - {len(response.text)} chars")
+        print(f"\n{path}: {response.status_code} - {self.response_size(response)} bytes")
 
     def test_event_class_examinees_query(self, auth_headers):
         """Test /event-class/examinees/query endpoint."""
@@ -72,4 +58,4 @@ class TestEventclassEndpoints(APITestBase):
         self.assert_response_success(response, path, expected_status)
         
         # Log the response for debugging
-        print(f"\n{path}: {response.status_code} - {len(response.text)} chars")
+        print(f"\n{path}: {response.status_code} - {self.response_size(response)} bytes")
@@ -1,7 +1,6 @@
 """Test suite for EXAMINEE API endpoints (consolidated)."""
 
 import pytest
-import requests
 from tests.shared import APITestBase
 
 
@@ -19,20 +18,6 @@ class TestExamineeEndpoints(APITestBase):
             '/examinee/record/query'
         ]
     
-    def get_endpoint_params(self, path: str) -> list:
-        """Get query parameters for a specific endpoint."""
-        params = []
-        path_spec = self.spec['paths'].get(path, {})
-        op_spec = path_spec.get('get', {})
-        
-        # Collect parameters from both path and operation levels
-        for param_source in [path_spec.get('parameters', []), op_spec.get('parameters', [])]:
-            for param in param_source:
-                if isinstance(param, dict) and param.get('in') == 'query':
-                    params.append(param['name'])
-        
-        return params
-
     # GET endpoint tests
     def test_examinee_audit_query(self, auth_headers):
         """Test /examinee/audit/query endpoint."""
@@ -56,7 +41,7 @@ class TestExamineeEndpoints(APITestBase):
         self.assert_response_success(response, path, expected_status)
         
         # Log the response for debugging
-        print(f"\n{path}: {response.status_code} - {len(response.text)} chars")
+        print(f"\n{path}: {response.status_code} - {self.response_size(response)} bytes")
 
     def test_examinee_events_query(self, auth_headers):
         """Test /examinee/events/query endpoint."""
@@ -80,7 +65,7 @@ class TestExamineeEndpoints(APITestBase):
         self.assert_response_success(response, path, expected_status)
         
         # Log the response for debugging
-        print(f"\n{path}: {response.status_code} - {len(response.text)} chars")
+        print(f"\n{path}: {response.status_code} - {self.response_size(response)} bytes")
 
     def test_examinee_longitudinal_segment_detail_query(self, auth_headers):
         """Test /examinee/longitudinal-segment-detail/query endpoint."""
@@ -107,7 +92,7 @@ class TestExamineeEndpoints(APITestBase):
         self.assert_response_success(response, path, expected_status)
         
         # Log the response for debugging
-        print(f"\n{path}: {response.status_code} - {len(response.text)} chars")
+        print(f"\n{path}: {response.status_code} - {self.response_size(response)} bytes")
 
     def test_examinee_longitudinal_segments_query(self, auth_headers):
         """Test /examinee/longitudinal-segments/query endpoint."""
@@ -131,7 +116,7 @@ class TestExamineeEndpoints(APITestBase):
         self.assert_response_success(response, path, expected_status)
         
         # Log the response for debugging
-        print(f"\n{path}: {response.status_code} - {len(response.text)} chars")
+        print(f"\n{path}: {response.status_code} - {self.response_size(response)} bytes")
 
     def test_examinee_query(self, auth_headers):
         """Test /examinee/query endpoint."""
@@ -155,7 +140,7 @@ class TestExamineeEndpoints(APITestBase):
         self.assert_response_success(response, path, expected_status)
         
         # Log the response for debugging
-        print(f"\n{path}: {response.status_code} - {len(response.text)} chars")
+        print(f"\n{path}: {response.status_code} - {self.response_size(response)} bytes")
 
     def test_examinee_record_query(self, auth_headers):
         """Test /examinee/record/query endpoint."""
@@ -179,7 +164,7 @@ class TestExamineeEndpoints(APITestBase):
         self.assert_response_success(response, path, expected_status)
         
         # Log the response for debugging
-        print(f"\n{path}: {response.status_code} - {len(response.text)} chars")
+        print(f"\n{path}: {response.status_code} - {self.response_size(response)} bytes")
 
     # POST/PATCH/DELETE endpoint payload methods
     def get_event_examinee_import_payload(self) -> dict:
@@ -228,7 +213,7 @@ class TestExamineeEndpoints(APITestBase):
         )
         
         # Log the response for verification
-        print(f"\n{path} POST: {response.status_code} - {len(response.text)} chars")
+        print(f"\n{path} POST: {response.status_code} - {self.response_size(response)} bytes")
 
     def test_event_examinee_import_patch(self, auth_headers):
         """Test PATCH /event/examinee/import endpoint."""
@@ -241,15 +226,8 @@ class TestExamineeEndpoints(APITestBase):
         # Get the minimal viable payload
         payload = self.get_event_examinee_import_payload()
         
-        # Make the PATCH request using requests directly
-        url = f"{self.base_url}{path}"
-        response = requests.patch(
-            url, 
-            headers=auth_headers, 
-            json=payload, 
-            params=query_params,
-            timeout=30
-        )
+        # Make the PATCH request
+        response = self.make_patch_request(path, auth_headers, payload, query_params)
         
         # Assert successful response (could be 200 or 422 for missing data)
         assert response.status_code in [200, 422], (
@@ -258,7 +236,7 @@ class TestExamineeEndpoints(APITestBase):
         )
         
         # Log the response for verification
-        print(f"\n{path} PATCH: {response.status_code} - {len(response.text)} chars")
+        print(f"\n{path} PATCH: {response.status_code} - {self.response_size(response)} bytes")
 
     def test_examinee_import_post(self, auth_headers):
         """Test POST /examinee/import endpoint."""
@@ -281,7 +259,7 @@ class TestExamineeEndpoints(APITestBase):
         )
         
         # Log the response for verification
-        print(f"\n{path} POST: {response.status_code} - {len(response.text)} chars")
+        print(f"\n{path} POST: {response.status_code} - {self.response_size(response)} bytes")
 
     def test_examinee_import_patch(self, auth_headers):
         """Test PATCH /examinee/import endpoint."""
@@ -294,15 +272,8 @@ class TestExamineeEndpoints(APITestBase):
         # Get the minimal viable payload
         payload = self.get_examinee_import_payload()
         
-        # Make the PATCH request using requests directly
-        url = f"{self.base_url}{path}"
-        response = requests.patch(
-            url, 
-            headers=auth_headers, 
-            json=payload, 
-            params=query_params,
-            timeout=30
-        )
+        # Make the PATCH request
+        response = self.make_patch_request(path, auth_headers, payload, query_params)
         
         # Assert successful response (could be 200 or 422 for missing data)
         assert response.status_code in [200, 422], (
@@ -311,7 +282,7 @@ class TestExamineeEndpoints(APITestBase):
         )
         
         # Log the response for verification
-        print(f"\n{path} PATCH: {response.status_code} - {len(response.text)} chars")
+        print(f"\n{path} PATCH: {response.status_code} - {self.response_size(response)} bytes")
 
     def test_examinee_delete(self, auth_headers):
         """Test DELETE /examinee/delete endpoint."""
@@ -324,14 +295,8 @@ class TestExamineeEndpoints(APITestBase):
             "program-examinee-system-id": "NONEXISTENT_USER_FOR_DELETE_TEST"
         }
         
-        # Make the DELETE request using requests directly
-        url = f"{self.base_url}{path}"
-        response = requests.delete(
-            url, 
-            headers=auth_headers, 
-            params=query_params,
-            timeout=30
-        )
+        # Make the DELETE request
+        response = self.make_delete_request(path, auth_headers, query_params)
         
         # Assert response (could be 200 if deleted, 404 if not found, or 422 for missing data)
         assert response.status_code in [200, 404, 422], (
@@ -340,4 +305,4 @@ class TestExamineeEndpoints(APITestBase):
         )
         
         # Log the response for verification
-        print(f"\n{path} DELETE: {response.status_code} - {len(response.text)} chars")
+        print(f"\n{path} DELETE: {response.status_code} - {self.response_size(response)} bytes")
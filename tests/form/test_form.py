@@ -12,20 +12,6 @@ class TestFormEndpoints(APITestBase):
         """Get all GET endpoints for this resource."""
         return ['/form/definition/Query', '/Form/Query', '/form/reports/Query', '/form/res-files/Query']
     
-    def get_endpoint_params(self, path: str) -> list:
-        """Get query parameters for a specific endpoint."""
-        params = []
-        path_spec = self.spec['paths'].get(path, {})
-        op_spec = path_spec.get('get', {})
-        
-        # Collect parameters from both path and operation levels
-        for param_source in [path_spec.get('parameters', []), op_spec.get('parameters', [])]:
-            for param in param_source:
-                if isinstance(param, dict) and param.get('in') == 'query':
-                    params.append(param['name'])
-        
-        return params
-
     def test_form_definition_query(self, auth_headers):
         """Test /form/definition/Query endpoint."""
         path = "/form/definition/Query"
@@ -48,7 +34,7 @@ class TestFormEndpoints(APITestBase):
         self.assert_response_success(response, path, expected_status)
         
         # Log the response for debugging
-        print(f"\n{path}: {response.status_code} - {len(response.text)} chars")
+        print(f"\n{path}: {response.status_code} - {self.response_size(response)} bytes")
 
     def test_form_query(self, auth_headers):
         """Test /Form/Query endpoint."""
@@ -72,7 +58,7 @@ class TestFormEndpoints(APITestBase):
         self.assert_response_success(response, path, expected_status)
         
         # Log the response for debugging
-        print(f"\n{path}: {response.status_code} - {len(response.text)} chars")
+        print(f"\n{path}: {response.status_code} - {self.response_size(response)} bytes")
 
     def test_form_reports_query(self, auth_headers):
         """Test /form/reports/Query endpoint."""
@@ -96,7 +82,7 @@ class TestFormEndpoints(APITestBase):
         self.assert_response_success(response, path, expected_status)
         
         # Log the response for debugging
-        print(f"\n{path}: {response.status_code} - {len(response.text)} chars")
+        print(f"\n{path}: {response.status_code} - {self.response_size(response)} bytes")
 
     def test_form_res_files_query(self, auth_headers):
         """Test /form/res-files/Query endpoint."""
@@ -120,4 +106,4 @@ class TestFormEndpoints(APITestBase):
         self.assert_response_success(response, path, expected_status)
         
         # Log the response for debugging
-        print(f"\n{path}: {response.status_code} - {len(response.text)} chars")
+        print(f"\n{path}: {response.status_code} - {self.response_size(response)} bytes")
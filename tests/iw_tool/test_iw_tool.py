@@ -12,20 +12,6 @@ class TestIwtoolEndpoints(APITestBase):
         """Get all GET endpoints for this resource."""
         return ['/iw-tool/export/tests/query', '/iw-tool/import/query']
     
-    def get_endpoint_params(self, path: str) -> list:
-        """Get query parameters for a specific endpoint."""
-        params = []
-        path_spec = self.spec['paths'].get(path, {})
-        op_spec = path_spec.get('get', {})
-        
-        # Collect parameters from both path and operation levels
-        for param_source in [path_spec.get('parameters', []), op_spec.get('parameters', [])]:
-            for param in param_source:
-                if isinstance(param, dict) and param.get('in') == 'query':
-                    params.append(param['name'])
-        
-        return params
-
     def test_iw_tool_export_tests_query(self, auth_headers):
         """Test /iw-tool/export/tests/query endpoint."""
         path = "/iw-tool/export/tests/query"
@@ -48,7 +34,7 @@ class TestIwtoolEndpoints(APITestBase):
         self.assert_response_success(response, path, expected_status)
         
         # Log the response for debugging
-        print(f"\n{path}: {response.status_code} - {len(response.text)} chars")
+        print(f"\n{path}: {response.status_code} - {self.response_size(response)} bytes")
 
     def test_iw_tool_import_query(self, auth_headers):
         """Test /iw-tool/import/query endpoint."""
@@ -72,4 +58,4 @@ class TestIwtoolEndpoints(APITestBase):
         self.assert_response_success(response, path, expected_status)
         
         # Log the response for debugging
-        print(f"\n{path}: {response.status_code} - {len(response.text)} chars")
+        print(f"\n{path}: {response.status_code} - {self.response_size(response)} bytes")
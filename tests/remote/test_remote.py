@@ -12,20 +12,6 @@ class TestRemoteEndpoints(APITestBase):
         """Get all GET endpoints for this resource."""
         return ['/remote/admin-urls/Query', '/remote/examinee-data/Query', '/remote/practice-checks/Query', '/remote/session-data/Query', '/remote/sessions/query', '/remote/system-checks/Query']
     
-    def get_endpoint_params(self, path: str) -> list:
-        """Get query parameters for a specific endpoint."""
-        params = []
-        path_spec = self.spec['paths'].get(path, {})
-        op_spec = path_spec.get('get', {})
-        
-        # Collect parameters from both path and operation levels
-        for param_source in [path_spec.get('parameters', []), op_spec.get('parameters', [])]:
-            for param in param_source:
-                if isinstance(param, dict) and param.get('in') == 'query':
-                    params.append(param['name'])
-        
-        return params
-
     def test_remote_admin_urls_query(self, auth_headers):
         """Test /remote/admin-urls/Query endpoint."""
         path = "/remote/admin-urls/Query"
@@ -48,7 +34,7 @@ class TestRemoteEndpoints(APITestBase):
         self.assert_response_success(response, path, expected_status)
         
         # Log the response for debugging
-        print(f"\n{path}: {response.status_code} - {len(response.text)} chars")
+        print(f"\n{path}: {response.status_code} - {self.response_size(response)} bytes")
 
     def test_remote_examinee_data_query(self, auth_headers):
         """Test /remote/examinee-data/Query endpoint."""
@@ -72,7 +58,7 @@ class TestRemoteEndpoints(APITestBase):
         self.assert_response_success(response, path, expected_status)
         
         # Log the response for debugging
-        print(f"\n{path}: {response.status_code} - {len(response.text)} chars")
+        print(f"\n{path}: {response.status_code} - {self.response_size(response)} bytes")
 
     def test_remote_practice_checks_query(self, auth_headers):
         """Test /remote/practice-checks/Query endpoint."""
@@ -96,7 +82,7 @@ class TestRemoteEndpoints(APITestBase):
         self.assert_response_success(response, path, expected_status)
         
         # Log the response for debugging
-        print(f"\n{path}: {response.status_code} - {len(response.text)} chars")
+        print(f"\n{path}: {response.status_code} - {self.response_size(response)} bytes")
 
     def test_remote_session_data_query(self, auth_headers):
         """Test /remote/session-data/Query endpoint."""
@@ -120,7 +106,7 @@ class TestRemoteEndpoints(APITestBase):
         self.assert_response_success(response, path, expected_status)
         
         # Log the response for debugging
-        print(f"\n{path}: {response.status_code} - {len(response.text)} chars")
+        print(f"\n{path}: {response.status_code} - {self.response_size(response)} bytes")
 
     def test_remote_sessions_query(self, auth_headers):
         """Test /remote/sessions/query endpoint."""
@@ -144,7 +130,7 @@ class TestRemoteEndpoints(APITestBase):
         self.assert_response_success(response, path, expected_status)
         
         # Log the response for debugging
-        print(f"\n{path}: {response.status_code} - {len(response.text)} chars")
+        print(f"\n{path}: {response.status_code} - {self.response_size(response)} bytes")
 
     def test_remote_system_checks_query(self, auth_headers):
         """Test /remote/system-checks/Query endpoint."""
@@ -168,4 +154,4 @@ class TestRemoteEndpoints(APITestBase):
         self.assert_response_success(response, path, expected_status)
         
         # Log the response for debugging
-        print(f"\n{path}: {response.status_code} - {len(response.text)} chars")
+        print(f"\n{path}: {response.status_code} - {self.response_size(response)} bytes")
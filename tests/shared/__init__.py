@@ -1,4 +1,27 @@
-# Make the shared package importable
-from .api_test_base import APITestBase
+# Make the shared package importable. Exports are resolved on first access so
+# that light modules (e.g. spec_cache, used by scripts/) can be imported
+# without pulling in pytest, requests and schemathesis.
+import importlib
 
-__all__ = ['APITestBase']
+_EXPORTS = {
+    'APITestBase': '.api_test_base',
+    'SessionManager': '.http_session',
+    'get_session_manager': '.http_session',
+    'SpecRegistry': '.spec_registry',
+    'get_spec_registry': '.spec_registry',
+    'OperationIndex': '.operation_index',
+    'TokenPool': '.token_provider',
+    'TokenProvider': '.token_provider',
+    'get_token_provider': '.token_provider',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
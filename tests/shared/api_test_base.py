@@ -2,12 +2,19 @@
 
 
 import os
-import json
 import pytest
 import requests
 from typing import Dict, Any, List, Optional
 import schemathesis
-from schemathesis import openapi as st_openapi
+
+from .http_session import get_session_manager
+from .json_stream import JSONStreamError
+from .response_validators import validate_response
+from .spec_registry import get_spec_registry
+from .stream_validator import validate_stream
+from .streaming import StreamedResponse, response_size, should_stream
+from .token_provider import get_token_provider
+from .validation_policy import get_validation_policies
 
 # Load environment variables
 try:
@@ -19,7 +26,7 @@ except ImportError:
 class APITestBase:
     """Base class for API endpoint testing with shared utilities."""
     
-    st_schema = None  # Schemathesis schema object for validation
+    st_schema = None  # Schemathesis schema object for validation (shared via the spec registry)
 
     @classmethod
     def setup_class(cls):
@@ -27,34 +34,26 @@ class APITestBase:
         cls.base_url = os.environ["BASE_URL"].rstrip("/")
         cls.openapi_path = os.getenv("OPENAPI_PATH", "schema/openapi.json")
         cls.program_id = os.getenv("PROGRAM_ID")
-        cls.spec = cls._load_openapi_spec()
-        if cls.st_schema is None:
-            cls.st_schema = st_openapi.from_path(cls.openapi_path)
-    
-    @classmethod 
-    def _load_openapi_spec(cls) -> Dict[str, Any]:
-        """Load OpenAPI specification."""
-        with open(cls.openapi_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        # Parsed once per process and shared read-only by every resource class
+        registry = cls.spec_registry = get_spec_registry(cls.openapi_path)
+        cls.spec = registry.spec
+        cls.st_schema = registry.schema
+        cls.operation_index = registry.index
         
     @pytest.fixture(scope="session")
     def auth_headers(self):
-        """Get authentication headers using client credentials flow."""
-        data = {
-            "grant_type": "client_credentials",
-            "client_id": os.environ["CLIENT_ID"],
-            "client_secret": os.environ["CLIENT_SECRET"],
-            "scope": os.environ["SCOPE"],
-        }
-        r = requests.post(os.environ["TOKEN_URL"], data=data, timeout=20)
-        r.raise_for_status()
-        token = r.json()["access_token"]
-        return {"Authorization": f"Bearer {token}"}
+        """Get authentication headers using client credentials flow (shared token cache)."""
+        return get_token_provider().headers()
     
     def load_openapi_spec(self) -> Dict[str, Any]:
         """Load OpenAPI specification."""
         return self.spec
     
+    def get_endpoint_params(self, path: str, method: str = "get") -> list:
+        """Get query parameters for a specific endpoint (from the precomputed operation index)."""
+        op = self.operation_index.get(path, method)
+        return list(op.query_names) if op is not None else []
+    
     def get_env_to_query_mapping(self) -> Dict[str, Any]:
         """Map environment variables to query parameter names."""
         return {
@@ -189,18 +188,26 @@ class APITestBase:
         return q
     
     def make_get_request(self, path: str, auth_headers: Dict[str, str], 
-                        query_params: Optional[Dict[str, Any]] = None) -> requests.Response:
-        """Make a GET request to the specified endpoint."""
+                        query_params: Optional[Dict[str, Any]] = None,
+                        stream: Optional[bool] = None) -> requests.Response:
+        """Make a GET request to the specified endpoint.
+        
+        With ``stream`` (default: the path is listed in STREAM_RESPONSES) the body
+        is not buffered; a StreamedResponse is returned instead.
+        """
         url = f"{self.base_url}{path}"
+        if stream is None:
+            stream = should_stream(path)
         
         try:
-            response = requests.get(
+            response = get_session_manager().get(
                 url, 
                 headers=auth_headers, 
                 params=query_params or {}, 
-                timeout=20
+                timeout=20,
+                stream=stream
             )
-            return response
+            return StreamedResponse(response) if stream else response
         except requests.exceptions.RequestException as e:
             pytest.fail(f"Request failed for {path}: {e}")
     
@@ -216,7 +223,7 @@ class APITestBase:
             headers["Content-Type"] = "application/json"
         
         try:
-            response = requests.post(
+            response = get_session_manager().post(
                 url,
                 headers=headers,
                 json=json_data,
@@ -227,8 +234,48 @@ class APITestBase:
         except requests.exceptions.RequestException as e:
             pytest.fail(f"POST request failed for {path}: {e}")
     
+    def make_patch_request(self, path: str, auth_headers: Dict[str, str],
+                          json_data: Optional[Dict[str, Any]] = None,
+                          query_params: Optional[Dict[str, Any]] = None) -> requests.Response:
+        """Make a PATCH request to the specified endpoint."""
+        url = f"{self.base_url}{path}"
+        
+        try:
+            response = get_session_manager().patch(
+                url,
+                headers=auth_headers,
+                json=json_data,
+                params=query_params or {},
+                timeout=30
+            )
+            return response
+        except requests.exceptions.RequestException as e:
+            pytest.fail(f"PATCH request failed for {path}: {e}")
+    
+    def make_delete_request(self, path: str, auth_headers: Dict[str, str],
+                           query_params: Optional[Dict[str, Any]] = None) -> requests.Response:
+        """Make a DELETE request to the specified endpoint."""
+        url = f"{self.base_url}{path}"
+        
+        try:
+            response = get_session_manager().delete(
+                url,
+                headers=auth_headers,
+                params=query_params or {},
+                timeout=30
+            )
+            return response
+        except requests.exceptions.RequestException as e:
+            pytest.fail(f"DELETE request failed for {path}: {e}")
+    
+    def response_size(self, response) -> int:
+        """Body size in bytes, without decoding the body to str."""
+        return response_size(response)
+    
     def assert_response_success(self, response: requests.Response, path: str, expected_status: int = 200, method: str = "POST"):
         """Assert that the response is successful and matches the OpenAPI schema."""
+        if isinstance(response, StreamedResponse):
+            return self._assert_streamed_response_success(response, path, expected_status)
         try:
             # Check status code
             assert response.status_code == expected_status, (
@@ -241,22 +288,67 @@ class APITestBase:
             assert any(json_type in content_type for json_type in valid_json_types), (
                 f"{path} returned non-JSON content-type: {content_type}"
             )
-            # Verify response can be parsed as JSON
-            response.json()
-            # --- Schema validation ---
             # Remove query string from path if present
             clean_path = path.split("?")[0]
-            # Schemathesis expects method in lowercase
-            cls = self.__class__
-            if cls.st_schema is None:
-                cls.st_schema = st_openapi.from_path(cls.openapi_path)
-            st_endpoint = cls.st_schema[clean_path][method.lower()]
-            st_endpoint.validate_response(response)
+            policies = get_validation_policies()
+            # A byte-identical response that already passed needs neither parsing nor validation
+            memo = self.spec_registry.validation_memo
+            memo_key = memo.key(clean_path, method, response, policies.memo_level(clean_path)) if memo is not None else None
+            if memo_key is not None and memo.seen(memo_key):
+                policies.record(method, clean_path, policies.policy_for(clean_path), None, None)
+                return
+            # Verify response can be parsed as JSON
+            data = response.json()
+            # --- Schema validation ---
+            # Large list paths may validate a sample of their arrays, or only the envelope
+            _, checked = policies.apply(method, clean_path, data)
+            # Compiled validators confirm valid bodies; anything else gets
+            # schemathesis' verdict and error message
+            validate_response(self.st_schema, self.spec_registry.validators, clean_path, method,
+                              response, data, checked)
+            if memo_key is not None:
+                memo.add(memo_key)
         except requests.exceptions.JSONDecodeError:
             pytest.fail(f"{path} returned invalid JSON: {response.text[:500]}")
         except Exception as e:
             pytest.fail(f"{path} schema validation failed: {e}\nResponse: {response.text[:500]}")
     
+    def _assert_streamed_response_success(self, response: StreamedResponse, path: str, expected_status: int):
+        """Streaming counterpart of assert_response_success with flat memory use.
+        
+        The body is validated against the response schema as it is parsed, so
+        memory stays flat however large it is; errors carry their JSON path.
+        Responses without a supported schema are checked for well-formed JSON only.
+        """
+        assert response.status_code == expected_status, (
+            f"{path} returned {response.status_code}, expected {expected_status}. "
+            f"Response: {response.text[:500]}"
+        )
+        content_type = response.headers.get("content-type", "")
+        valid_json_types = ["application/json", "application/problem+json"]
+        assert any(json_type in content_type for json_type in valid_json_types), (
+            f"{path} returned non-JSON content-type: {content_type}"
+        )
+        clean_path = path.split("?")[0]
+        # The request knows its method even when the caller relied on the default
+        method = getattr(response.raw_response.request, "method", None) or "GET"
+        stream_schemas = self.spec_registry.stream_schemas
+        root = stream_schemas.root_for(clean_path, method, response.status_code)
+        try:
+            if root is None:
+                response.check_json()
+                stream_schemas.record(None)
+                return
+            policies = get_validation_policies()
+            policy = policies.policy_for(clean_path)
+            result = validate_stream(root, response.json_events(), policy, policies.sampler_for(method, clean_path))
+        except JSONStreamError as e:
+            pytest.fail(f"{path} returned invalid JSON: {e}\nResponse: {response.text[:500]}")
+        stream_schemas.record(result)
+        policies.record(method, clean_path, policy, result.elements, result.checked)
+        if result.errors:
+            pytest.fail(f"{path} schema validation failed: {result.describe()}\nResponse: {response.text[:500]}")
+    
     def get_expected_status_codes(self) -> Dict[str, int]:
         """Get expected status codes for known problematic endpoints."""
         return {
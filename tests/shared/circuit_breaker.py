@@ -0,0 +1,145 @@
+"""Per-host circuit breaker: fail fast while the API is down, probe until it is back.
+
+After ``threshold`` consecutive failed attempts against one host (connection
+errors, timeouts or a gateway status) the host's circuit opens. Requests to
+it then fail at once with ``CircuitOpenError`` naming the cause, instead of
+each one waiting out its own timeout. After ``cooldown`` seconds one request
+is let through as a half-open probe: if it succeeds the circuit closes, and
+if it fails the circuit opens for another cooldown.
+"""
+
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Optional
+from urllib.parse import urlparse
+
+import requests
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+# Statuses that mean the environment rather than one endpoint is failing. Several
+# endpoints answer a plain 500 on a healthy environment, so 500 is not counted by default.
+DEFAULT_FAILURE_STATUSES = frozenset({502, 503, 504})
+FAILURE_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """A request refused without being sent because its host's circuit is open."""
+
+
+@dataclass
+class _Circuit:
+    state: str = CLOSED
+    failures: int = 0               # consecutive failed attempts
+    cause: Optional[str] = None     # the failure that opened the circuit
+    opened_at: float = 0.0
+    probe_started: Optional[float] = None
+    trips: int = 0
+    recoveries: int = 0
+    fast_failed: int = 0
+
+
+def _describe(error: BaseException) -> str:
+    """Exception type and innermost reason, e.g. ``ConnectionError: [Errno 111] Connection refused``."""
+    # urllib3 nests the socket error several wrappers deep; its text comes last
+    reason = str(error).rsplit(": ", 1)[-1]
+    while reason and (reason[-1] in "\"'" or (reason[-1] == ")" and reason.count(")") > reason.count("("))):
+        reason = reason[:-1]
+    return f"{type(error).__name__}: {reason}" if reason else type(error).__name__
+
+
+def _parse_statuses(raw: str) -> FrozenSet[int]:
+    """``502,503,504`` or ``5xx``."""
+    statuses = set()
+    for item in filter(None, (part.strip().lower() for part in raw.split(","))):
+        statuses.update(range(500, 600) if item == "5xx" else {int(item)})
+    return frozenset(statuses)
+
+
+class CircuitBreaker:
+    """One circuit per host, shared by every request of the process.
+
+    Environment:
+      CIRCUIT_BREAKER            set to ``false`` to disable (default true)
+      CIRCUIT_BREAKER_THRESHOLD  consecutive failed attempts that open a circuit (default 5)
+      CIRCUIT_BREAKER_COOLDOWN   seconds before an open circuit lets a probe through (default 30)
+      CIRCUIT_BREAKER_STATUSES   statuses counted as failures, e.g. ``5xx`` (default 502,503,504)
+    """
+
+    def __init__(self, enabled: Optional[bool] = None, threshold: Optional[int] = None,
+                 cooldown: Optional[float] = None, statuses: Optional[FrozenSet[int]] = None):
+        if enabled is None:
+            enabled = os.getenv("CIRCUIT_BREAKER", "true").lower() == "true"
+        self.enabled = enabled
+        self.threshold = max(1, threshold or int(os.getenv("CIRCUIT_BREAKER_THRESHOLD", "5")))
+        self.cooldown = cooldown if cooldown is not None else float(os.getenv("CIRCUIT_BREAKER_COOLDOWN", "30"))
+        self.statuses = statuses if statuses is not None else (
+            _parse_statuses(os.getenv("CIRCUIT_BREAKER_STATUSES", "")) or DEFAULT_FAILURE_STATUSES)
+        self._circuits: Dict[str, _Circuit] = {}
+        self._lock = threading.Lock()
+
+    def before(self, url: str) -> bool:
+        """Admit a request to ``url``; True when it is the half-open probe.
+
+        Raises CircuitOpenError while the host's circuit is open.
+        """
+        if not self.enabled:
+            return False
+        host = urlparse(url).netloc
+        with self._lock:
+            circuit = self._circuits.setdefault(host, _Circuit())
+            if circuit.state == CLOSED:
+                return False
+            now = time.monotonic()
+            # A probe that never reported back (e.g. the caller was interrupted) is given up after a cooldown
+            probe_lost = circuit.probe_started is not None and now - circuit.probe_started >= self.cooldown
+            if now - circuit.opened_at >= self.cooldown and (circuit.probe_started is None or probe_lost):
+                circuit.state = HALF_OPEN
+                circuit.probe_started = now
+                return True
+            circuit.fast_failed += 1
+            retry_in = max(0.0, circuit.opened_at + self.cooldown - now)
+            raise CircuitOpenError(
+                f"Circuit open for {host} after {circuit.failures} consecutive failures "
+                f"(last: {circuit.cause}); failing fast, next probe in {retry_in:.0f}s")
+
+    def record(self, url: str, status: Optional[int], error: Optional[BaseException], probe: bool = False):
+        """Count the outcome of one attempt admitted by ``before``."""
+        if not self.enabled:
+            return
+        failed = isinstance(error, FAILURE_ERRORS) or status in self.statuses
+        host = urlparse(url).netloc
+        with self._lock:
+            circuit = self._circuits.setdefault(host, _Circuit())
+            if probe:
+                circuit.probe_started = None
+            if not failed:
+                if circuit.state != CLOSED and probe:
+                    circuit.recoveries += 1
+                if probe or circuit.state == CLOSED:
+                    circuit.state, circuit.failures, circuit.cause = CLOSED, 0, None
+                return
+            circuit.failures += 1
+            circuit.cause = _describe(error) if error is not None else f"HTTP {status}"
+            if probe or (circuit.state == CLOSED and circuit.failures >= self.threshold):
+                if circuit.state == CLOSED:
+                    circuit.trips += 1
+                circuit.state = OPEN
+                circuit.opened_at = time.monotonic()
+
+    def summary(self) -> str:
+        if not self.enabled:
+            return "Circuit breaker: disabled"
+        with self._lock:
+            tripped = {host: c for host, c in self._circuits.items() if c.trips}
+        if not tripped:
+            return f"Circuit breaker: never tripped (threshold {self.threshold} consecutive failures)"
+        parts = [f"{host} {c.state}, tripped {c.trips}x, {c.fast_failed} requests failed fast, "
+                 f"recovered {c.recoveries}x" + (f" (last cause: {c.cause})" if c.cause else "")
+                 for host, c in tripped.items()]
+        return "Circuit breaker: " + "; ".join(parts)
@@ -0,0 +1,59 @@
+"""Asyncio execution engine that sends a request plan concurrently."""
+
+
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional
+
+
+class CallOutcome(NamedTuple):
+    """Result of one planned call: either a response or the raised exception."""
+    response: Any
+    error: Optional[BaseException]
+    elapsed: float
+
+    def result(self):
+        """Return the response, re-raising the call's exception if it failed."""
+        if self.error is not None:
+            raise self.error
+        return self.response
+
+
+def get_concurrency(env_var: str = "LIGHT_CONCURRENCY", default: int = 1) -> int:
+    """Read a concurrency cap from the environment (1 means sequential)."""
+    try:
+        return max(1, int(os.getenv(env_var, str(default))))
+    except ValueError:
+        return default
+
+
+async def _run_plan(plan: Dict[Hashable, Callable[[], Any]], concurrency: int) -> Dict[Hashable, CallOutcome]:
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="api-call") as executor:
+        async def run_one(key, call):
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await loop.run_in_executor(executor, call)
+                    return key, CallOutcome(response, None, time.perf_counter() - start)
+                except Exception as e:
+                    return key, CallOutcome(None, e, time.perf_counter() - start)
+
+        results = await asyncio.gather(*(run_one(k, c) for k, c in plan.items()))
+    return dict(results)
+
+
+def run_concurrently(plan: Dict[Hashable, Callable[[], Any]], concurrency: int) -> Dict[Hashable, CallOutcome]:
+    """Run every zero-argument call in ``plan`` with at most ``concurrency`` in flight.
+
+    Calls are blocking (they go through the shared pooled session), so each one
+    is dispatched to a worker thread and awaited from a private event loop.
+    Exceptions are captured per key rather than cancelling the whole plan.
+    """
+    if not plan:
+        return {}
+    return asyncio.run(_run_plan(plan, concurrency))
@@ -0,0 +1,241 @@
+"""SQLite history of test and request durations, for longest-first scheduling.
+
+Every pytest run appends the duration of each test and of each request it
+made. Schedulers read estimates back: the mean of a test's (or an
+operation's) last ``HISTORY_RUNS`` durations. A test with no history of its
+own is estimated from the response sizes of the paths it calls, through a
+linear seconds-per-byte fit over all recorded requests. ``pack`` spreads the
+estimates over workers or shards longest-first.
+"""
+
+
+import heapq
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+from typing import Dict, Hashable, Iterable, List, NamedTuple, Optional, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+
+HISTORY_RUNS = 5           # recent durations averaged per test or operation
+DEFAULT_TEST_SECONDS = 1.0  # estimate for a test with neither history nor known paths
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started REAL NOT NULL,
+    base_url TEXT
+);
+CREATE TABLE IF NOT EXISTS test_durations (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    nodeid TEXT NOT NULL,      -- without the parametrize suffix
+    outcome TEXT NOT NULL,
+    seconds REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS test_durations_nodeid ON test_durations (nodeid, run_id);
+CREATE TABLE IF NOT EXISTS request_durations (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    method TEXT NOT NULL,
+    path TEXT NOT NULL,        -- relative to BASE_URL, no query string
+    status INTEGER,
+    seconds REAL NOT NULL,
+    bytes INTEGER
+);
+CREATE INDEX IF NOT EXISTS request_durations_path ON request_durations (path, method, run_id);
+"""
+
+
+class TestDuration(NamedTuple):
+    nodeid: str
+    outcome: str
+    seconds: float
+
+
+class RequestDuration(NamedTuple):
+    method: str
+    path: str
+    status: Optional[int]
+    seconds: float
+    bytes: Optional[int]
+
+
+def history_enabled() -> bool:
+    return os.getenv("DURATION_HISTORY", "true").lower() == "true"
+
+
+def default_db_path() -> Path:
+    """``DURATION_DB``, or ``.cache/durations.sqlite`` at the repository root."""
+    configured = os.getenv("DURATION_DB")
+    return Path(configured) if configured else Path(__file__).resolve().parents[2] / ".cache" / "durations.sqlite"
+
+
+def function_id(nodeid: str) -> str:
+    """Node id without its parametrize suffix, so all cases of a test share one history."""
+    return nodeid.split("[", 1)[0]
+
+
+class DurationStore:
+    """Append-only duration history shared by every run on this machine."""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or default_db_path())
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Parallel suites append at the same time; WAL lets readers carry on meanwhile
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._size_model: Optional[Tuple[float, float]] = None
+
+    def close(self):
+        self._conn.close()
+
+    def record_run(self, tests: Iterable[TestDuration], requests: Iterable[RequestDuration],
+                   base_url: Optional[str] = None) -> int:
+        with self._lock, self._conn:
+            run_id = self._conn.execute("INSERT INTO runs (started, base_url) VALUES (?, ?)",
+                                        (time.time(), base_url)).lastrowid
+            self._conn.executemany(
+                "INSERT INTO test_durations (run_id, nodeid, outcome, seconds) VALUES (?, ?, ?, ?)",
+                [(run_id, function_id(t.nodeid), t.outcome, t.seconds) for t in tests])
+            self._conn.executemany(
+                "INSERT INTO request_durations (run_id, method, path, status, seconds, bytes) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(run_id, r.method.upper(), r.path, r.status, r.seconds, r.bytes) for r in requests])
+        return run_id
+
+    def test_estimates(self, prefix: str = "") -> Dict[str, float]:
+        """Mean recent duration per test function whose node id starts with ``prefix``.
+
+        Parametrized cases of one function run in the same run, so their
+        durations are summed per run before averaging.
+        """
+        rows = self._conn.execute(
+            """SELECT nodeid, AVG(seconds) FROM (
+                   SELECT nodeid, seconds, ROW_NUMBER() OVER (PARTITION BY nodeid ORDER BY run_id DESC) AS age
+                   FROM (SELECT nodeid, run_id, SUM(seconds) AS seconds FROM test_durations
+                         WHERE nodeid LIKE ? ESCAPE '\\' GROUP BY nodeid, run_id))
+               WHERE age <= ? GROUP BY nodeid""",
+            (_like_prefix(prefix), HISTORY_RUNS)).fetchall()
+        return dict(rows)
+
+    def request_estimates(self) -> Dict[Tuple[str, str], float]:
+        """Mean duration per (method, path) over the last ``HISTORY_RUNS`` runs that called it."""
+        rows = self._conn.execute(
+            """SELECT method, path, AVG(seconds) FROM (
+                   SELECT method, path, seconds,
+                          DENSE_RANK() OVER (PARTITION BY method, path ORDER BY run_id DESC) AS age
+                   FROM request_durations)
+               WHERE age <= ? GROUP BY method, path""", (HISTORY_RUNS,)).fetchall()
+        return {(method, path): seconds for method, path, seconds in rows}
+
+    def typical_sizes(self) -> Dict[str, float]:
+        """Mean recorded response size per path, whatever the method."""
+        rows = self._conn.execute(
+            "SELECT path, AVG(bytes) FROM request_durations WHERE bytes IS NOT NULL GROUP BY path").fetchall()
+        return dict(rows)
+
+    def size_model(self) -> Tuple[float, float]:
+        """(seconds, seconds per byte) from a least-squares fit of duration against response size."""
+        if self._size_model is None:
+            n, sx, sy, sxx, sxy = self._conn.execute(
+                "SELECT COUNT(*), SUM(bytes), SUM(seconds), SUM(bytes * bytes), SUM(bytes * seconds) "
+                "FROM request_durations WHERE bytes IS NOT NULL").fetchone()
+            if not n:
+                self._size_model = (DEFAULT_TEST_SECONDS, 0.0)
+            else:
+                spread = n * sxx - sx * sx
+                slope = max(0.0, (n * sxy - sx * sy) / spread) if spread else 0.0
+                self._size_model = (max(0.0, (sy - slope * sx) / n), slope)
+        return self._size_model
+
+    def estimator(self) -> "Estimator":
+        return Estimator(self.test_estimates(), self.request_estimates(), self.typical_sizes(), self.size_model())
+
+
+class Estimator:
+    """Duration estimates from one snapshot of the history."""
+
+    def __init__(self, tests: Dict[str, float], requests: Dict[Tuple[str, str], float],
+                 sizes: Dict[str, float], size_model: Tuple[float, float]):
+        self.tests = tests
+        self.requests = requests
+        self.sizes = sizes
+        self.base, self.per_byte = size_model
+        self._lowered = {path.lower(): size for path, size in sizes.items()}
+        self._slowest: Dict[str, float] = {}  # per path, over all recorded methods
+        for (_, path), seconds in requests.items():
+            self._slowest[path] = max(seconds, self._slowest.get(path, 0.0))
+
+    def request(self, method: str, path: str) -> float:
+        """Recent duration of ``method path``, else its size-based estimate."""
+        seconds = self.requests.get((method.upper(), path))
+        if seconds is not None:
+            return seconds
+        size = self.sizes.get(path, self._lowered.get(path.lower()))
+        if size is None:
+            return self.base
+        return self.base + self.per_byte * size
+
+    def test(self, nodeid: str, paths: Iterable[str] = ()) -> Tuple[float, bool]:
+        """(estimate, from history) for a test that calls ``paths``."""
+        seconds = self.tests.get(function_id(nodeid))
+        if seconds is not None:
+            return seconds, True
+        paths = list(paths)
+        if not paths:
+            return DEFAULT_TEST_SECONDS, False
+        # The method is not known from the source, so take the slowest recorded one
+        return sum(self._slowest.get(path) or self.request("GET", path) for path in paths), False
+
+
+def request_durations(timings: Iterable[Dict], base_url: str) -> List[RequestDuration]:
+    """History rows for timing-collector entries, with URLs made relative to ``base_url``."""
+    base = base_url.rstrip("/")
+    rows = []
+    for entry in timings:
+        url = entry["url"].split("?")[0]
+        path = url[len(base):] if base and url.startswith(base) else urlparse(url).path
+        rows.append(RequestDuration(entry["method"], path or "/", entry.get("status"),
+                                    entry["total"] / 1000, entry.get("bytes")))
+    return rows
+
+
+def _like_prefix(prefix: str) -> str:
+    return prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def longest_first(estimates: Dict[K, float]) -> List[K]:
+    return sorted(estimates, key=lambda key: -estimates[key])
+
+
+def pack(estimates: Dict[K, float], bins: int) -> List[List[K]]:
+    """Longest-processing-time-first bin packing: each item goes to the least-loaded bin."""
+    loads = [(0.0, i) for i in range(bins)]
+    packed: List[List[K]] = [[] for _ in range(bins)]
+    for key in longest_first(estimates):
+        load, i = heapq.heappop(loads)
+        packed[i].append(key)
+        heapq.heappush(loads, (load + estimates[key], i))
+    return packed
+
+
+_store: Optional[DurationStore] = None
+_store_lock = threading.Lock()
+
+
+def get_duration_store() -> Optional[DurationStore]:
+    """Process-wide store, or None when ``DURATION_HISTORY=false`` or the database cannot be opened."""
+    global _store
+    if not history_enabled():
+        return None
+    with _store_lock:
+        if _store is None:
+            try:
+                _store = DurationStore()
+            except (sqlite3.Error, OSError):
+                return None
+        return _store
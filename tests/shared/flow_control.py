@@ -0,0 +1,214 @@
+"""Adaptive concurrency (AIMD) and per-path token buckets for API requests."""
+
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+
+# Heavy operations that the ITS API protects most aggressively: rate/s, burst.
+DEFAULT_TOKEN_BUCKETS: Dict[str, Tuple[float, int]] = {
+    "/result/query": (1.0, 2),
+    "/registration/query": (1.0, 2),
+}
+
+
+class TokenBucket:
+    """Classic token bucket; ``acquire`` blocks until a token is available."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """Take one token, sleeping as needed. Returns the time spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class AIMDLimiter:
+    """In-flight request limit grown additively and cut multiplicatively.
+
+    The limit grows by roughly one slot per window of successful responses and
+    is multiplied by ``decrease`` on a congestion signal: a 429, a 5xx rate over
+    ``error_threshold`` in the last ``window`` responses, or a response slower
+    than ``latency_tolerance`` times the path's typical latency. The typical
+    latency is an exponentially weighted moving average (weight
+    ``latency_smoothing`` per response), only used once ``latency_samples``
+    responses have been seen, so it follows a path that is slower for a while
+    and one lucky fast response does not turn ordinary ones into spikes.
+    Decreases are spaced by ``cooldown`` seconds so one burst of bad responses
+    only counts once.
+    """
+
+    def __init__(self, initial: int = 4, min_limit: int = 1, max_limit: int = 64,
+                 decrease: float = 0.5, error_threshold: float = 0.2, window: int = 20,
+                 latency_tolerance: float = 3.0, latency_smoothing: float = 0.2, latency_samples: int = 5,
+                 cooldown: float = 1.0):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease = decrease
+        self.error_threshold = error_threshold
+        self.latency_tolerance = latency_tolerance
+        self.latency_smoothing = latency_smoothing
+        self.latency_samples = latency_samples
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.decreases = 0
+        self.held = 0  # acquires that had to wait for a slot
+        self._recent = deque(maxlen=window)
+        self._baseline: Dict[str, Tuple[float, int]] = {}  # path -> (smoothed latency, responses seen)
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def raise_to(self, limit: int):
+        """Lift the current limit to ``limit`` (up to ``max_limit``); a higher limit is kept."""
+        with self._cond:
+            self.limit = max(self.limit, float(min(limit, self.max_limit)))
+            self._cond.notify_all()
+
+    def acquire(self):
+        with self._cond:
+            if self.in_flight >= int(self.limit):
+                self.held += 1
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def release(self, path: str, status: Optional[int], latency: float):
+        """Free a slot and adjust the limit from the outcome (status None = transport error)."""
+        with self._cond:
+            self.in_flight -= 1
+            failed = status is None or status >= 500
+            self._recent.append(failed)
+            if self._is_congested(path, status, latency):
+                now = time.monotonic()
+                if now - self._last_decrease >= self.cooldown:
+                    self.limit = max(self.min_limit, self.limit * self.decrease)
+                    self._last_decrease = now
+                    self.decreases += 1
+            elif not failed:
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            if status is not None and status < 500:
+                mean, seen = self._baseline.get(path, (latency, 0))
+                self._baseline[path] = (mean + self.latency_smoothing * (latency - mean), seen + 1)
+            self._cond.notify_all()
+
+    def _is_congested(self, path: str, status: Optional[int], latency: float) -> bool:
+        if status == 429:
+            return True
+        if len(self._recent) >= 5 and sum(self._recent) / len(self._recent) > self.error_threshold:
+            return True
+        mean, seen = self._baseline.get(path, (0.0, 0))
+        return seen >= self.latency_samples and latency > mean * self.latency_tolerance
+
+
+class FlowController:
+    """Gate every request through the AIMD limiter and any matching token bucket.
+
+    Environment:
+      FLOW_CONTROL             set to ``false`` to disable (default true)
+      FLOW_INITIAL_LIMIT       starting in-flight limit (default 4, or a runner's configured concurrency)
+      FLOW_MAX_LIMIT           ceiling for the in-flight limit (default 64)
+      FLOW_TOKEN_BUCKETS       ``/path=rate:burst,...`` overrides for the heavy-path buckets
+    """
+
+    def __init__(self, enabled: Optional[bool] = None, limiter: Optional[AIMDLimiter] = None,
+                 buckets: Optional[Dict[str, Tuple[float, int]]] = None):
+        if enabled is None:
+            enabled = os.getenv("FLOW_CONTROL", "true").lower() == "true"
+        self.enabled = enabled
+        initial = os.getenv("FLOW_INITIAL_LIMIT")
+        self.limiter = limiter or AIMDLimiter(
+            initial=int(initial or "4"),
+            max_limit=int(os.getenv("FLOW_MAX_LIMIT", "64")),
+        )
+        # An explicit starting limit is kept even when a runner asks for more concurrency
+        self._initial_pinned = limiter is not None or initial is not None
+        self.requested = 0
+        if buckets is None:
+            buckets = dict(DEFAULT_TOKEN_BUCKETS)
+            buckets.update(_parse_buckets(os.getenv("FLOW_TOKEN_BUCKETS", "")))
+        self.buckets = {path.lower(): TokenBucket(rate, burst) for path, (rate, burst) in buckets.items()}
+        self.throttled_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def request_concurrency(self, concurrency: int):
+        """Start the limit at a runner's configured concurrency instead of ramping up to it."""
+        self.requested = max(self.requested, concurrency)
+        if self.enabled and not self._initial_pinned:
+            self.limiter.raise_to(concurrency)
+
+    def _bucket_for(self, path: str) -> Optional[TokenBucket]:
+        lowered = path.lower()
+        for suffix, bucket in self.buckets.items():
+            if lowered.endswith(suffix):
+                return bucket
+        return None
+
+    @contextmanager
+    def slot(self, url: str):
+        """Hold a concurrency slot for one request; yields a ``record(status)`` callback."""
+        if not self.enabled:
+            yield lambda status: None
+            return
+        path = urlparse(url).path
+        bucket = self._bucket_for(path)
+        if bucket is not None:
+            waited = bucket.acquire()
+            with self._lock:
+                self.throttled_seconds += waited
+        self.limiter.acquire()
+        start = time.perf_counter()
+        outcome = {"status": None}
+        try:
+            yield lambda status: outcome.__setitem__("status", status)
+        finally:
+            self.limiter.release(path, outcome["status"], time.perf_counter() - start)
+
+    def summary(self) -> str:
+        if not self.enabled:
+            return "Flow control: disabled"
+        lim = self.limiter
+        text = (
+            f"Flow control: final limit {int(lim.limit)}, peak in flight {lim.peak_in_flight}, "
+            f"{lim.decreases} backoffs, {self.throttled_seconds:.1f}s waiting on token buckets"
+        )
+        if self.requested > 1 and lim.held:
+            # A runner never has more than its own concurrency in flight, so any wait means the limit was lower
+            text += (f"; the limit held back {lim.held} requests below the configured concurrency of "
+                     f"{self.requested} (see FLOW_INITIAL_LIMIT / FLOW_MAX_LIMIT)")
+        return text
+
+
+def _parse_buckets(raw: str) -> Dict[str, Tuple[float, int]]:
+    """Parse ``/result/query=1:2,/registration/query=0.5:1`` into bucket settings."""
+    buckets = {}
+    for item in filter(None, (part.strip() for part in raw.split(","))):
+        path, _, spec = item.partition("=")
+        rate, _, burst = spec.partition(":")
+        buckets[path.strip()] = (float(rate), int(burst or 1))
+    return buckets
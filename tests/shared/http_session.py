@@ -0,0 +1,318 @@
+"""Process-wide pooled HTTP session shared by all API tests."""
+
+
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from . import warmup
+from .circuit_breaker import CircuitBreaker
+from .flow_control import FlowController
+from .retry import Attempt, RetryEngine
+from .timing import TimedHTTPConnection, TimedHTTPSConnection, body_size, collector, measure
+from .transports import HTTP2, Http2Transport, TransportSelector, TransportStats, parse_transports, protocol_of
+
+
+class ConnectionStats:
+    """Thread-safe counters for requests sent and connections opened.
+
+    Connections opened while pre-warming are counted in ``prewarmed`` only:
+    no request paid for them, so they are left out of the reuse ratio.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.requests = 0
+        self.connections = 0
+        self.prewarmed = 0
+
+    @contextmanager
+    def prewarming(self):
+        """Count the connections this thread opens as pre-warmed."""
+        self._local.prewarming = True
+        try:
+            yield
+        finally:
+            self._local.prewarming = False
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_connection(self):
+        prewarming = getattr(self._local, "prewarming", False)
+        with self._lock:
+            if prewarming:
+                self.prewarmed += 1
+            else:
+                self.connections += 1
+
+    @property
+    def reuse_ratio(self) -> float:
+        """Share of requests that were served on an already open connection."""
+        if not self.requests:
+            return 0.0
+        return max(0, self.requests - self.connections) / self.requests
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "connections": self.connections,
+            "prewarmed": self.prewarmed,
+            "reuse_ratio": round(self.reuse_ratio, 4),
+        }
+
+
+class _CountingPoolMixin:
+    """Count new connections and requests on a urllib3 connection pool."""
+
+    stats: ConnectionStats = None
+
+    def _new_conn(self):
+        self.stats.record_connection()
+        return super()._new_conn()
+
+    def _make_request(self, *args, **kwargs):
+        self.stats.record_request()
+        return super()._make_request(*args, **kwargs)
+
+
+class _PooledAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools report into a shared ConnectionStats."""
+
+    def __init__(self, stats: ConnectionStats, socket_options=None, ssl_context=None, **kwargs):
+        self._stats = stats
+        self._socket_options = socket_options
+        self._ssl_context = ssl_context
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        if self._socket_options is not None:
+            pool_kwargs.setdefault("socket_options", self._socket_options)
+        if self._ssl_context is not None:
+            pool_kwargs.setdefault("ssl_context", self._ssl_context)
+        super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": type("CountingHTTPConnectionPool", (_CountingPoolMixin, HTTPConnectionPool),
+                         {"stats": self._stats, "ConnectionCls": TimedHTTPConnection}),
+            "https": type("CountingHTTPSConnectionPool", (_CountingPoolMixin, HTTPSConnectionPool),
+                          {"stats": self._stats, "ConnectionCls": TimedHTTPSConnection}),
+        }
+
+
+class SessionManager:
+    """Owns one keep-alive ``requests.Session`` and its connection pools.
+
+    Configuration comes from the environment:
+      HTTP_POOL_SIZE         max open connections kept per host (default 10)
+      HTTP_POOL_CONNECTIONS  number of distinct host pools to cache (default 4)
+      HTTP_POOL_BLOCK        wait for a free connection instead of opening extra ones (default false)
+      HTTP_KEEP_ALIVE        reuse connections between requests (default true)
+      HTTP_TRANSPORT         ``http1``, ``http2`` or ``http1,http2`` to alternate (default http1)
+    """
+
+    def __init__(self, pool_size: Optional[int] = None, pool_connections: Optional[int] = None,
+                 keep_alive: Optional[bool] = None, pool_block: Optional[bool] = None):
+        self.pool_size = pool_size or int(os.getenv("HTTP_POOL_SIZE", "10"))
+        self.pool_connections = pool_connections or int(os.getenv("HTTP_POOL_CONNECTIONS", "4"))
+        if keep_alive is None:
+            keep_alive = os.getenv("HTTP_KEEP_ALIVE", "true").lower() == "true"
+        if pool_block is None:
+            pool_block = os.getenv("HTTP_POOL_BLOCK", "false").lower() == "true"
+        self.keep_alive = keep_alive
+        self.pool_block = pool_block
+        self.stats = ConnectionStats()
+        self.flow = FlowController()
+        self.breaker = CircuitBreaker()
+        self.retry = RetryEngine()
+        self.transports = TransportSelector(parse_transports(os.getenv("HTTP_TRANSPORT", "http1")))
+        self.transport_stats = TransportStats()
+        self.ssl_context = warmup.make_ssl_context()
+        self._session: Optional[requests.Session] = None
+        self._http2: Optional[Http2Transport] = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self) -> requests.Session:
+        """Lazily build the shared session on first use."""
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._build_session()
+        return self._session
+
+    @property
+    def http2(self) -> Http2Transport:
+        """Lazily build the HTTP/2 client on first use."""
+        if self._http2 is None:
+            with self._lock:
+                if self._http2 is None:
+                    self._http2 = Http2Transport(self.pool_size, self.keep_alive)
+        return self._http2
+
+    def _build_session(self) -> requests.Session:
+        socket_options = None
+        if self.keep_alive:
+            socket_options = HTTPConnection.default_socket_options + [
+                (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+            ]
+        adapter = _PooledAdapter(
+            self.stats,
+            socket_options=socket_options,
+            ssl_context=self.ssl_context,
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_size,
+            pool_block=self.pool_block,
+        )
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        if not self.keep_alive:
+            session.headers["Connection"] = "close"
+        return session
+
+    def prewarm(self, urls, connections: int) -> str:
+        """Resolve DNS and open ``connections`` pooled connections per URL host."""
+        with self.stats.prewarming():
+            return warmup.prewarm(self.session, urls, connections)
+
+    def request(self, method: str, url: str, transport: Optional[str] = None, **kwargs) -> requests.Response:
+        """Send a request over the pooled session, gated by the flow controller.
+
+        ``transport`` pins ``http1``/``http2`` for this call; otherwise the
+        configured transports are used in turn. Attempts follow the retry policy
+        for (method, path). Every attempt is logged; the returned response
+        carries them as ``retry_history`` and the final attempt's phase
+        breakdown (DNS, connect, TLS, TTFB, download) as ``timing``.
+
+        Attempts pass the per-host circuit breaker first: while a host's
+        circuit is open they fail at once with ``CircuitOpenError``.
+
+        Headers with a ``for_request`` hook (token provider ``AuthHeaders``)
+        are resolved per attempt, so a credential pool can pick the client. A
+        401 to such a request invalidates the token it carried and the request
+        is sent once more with a fresh one.
+        """
+        transport = self.transports.next(transport)
+        send = self.http2.request if transport == HTTP2 else self.session.request
+        policy = self.retry.policy_for(method, url)
+        if policy.timeout is not None:
+            kwargs["timeout"] = policy.timeout
+        path = urlparse(url).path
+        history = []
+        per_attempt_headers = getattr(kwargs.get("headers"), "for_request", None)
+        token_source = getattr(kwargs.get("headers"), "source", None)
+        reauthenticated = False
+        self.retry.budget.record_request()
+        attempt = 1
+        while True:
+            response, error = None, None
+            # Raises CircuitOpenError without sending while the host is known to be down
+            probe = self.breaker.before(url)
+            if per_attempt_headers is not None:
+                kwargs["headers"] = per_attempt_headers()
+            start = time.perf_counter()
+            try:
+                with self.flow.slot(url) as record, measure() as timing:
+                    if transport == HTTP2:
+                        response = send(method, url, timing=timing, **kwargs)
+                    else:
+                        response = send(method, url, **kwargs)
+                    timing.finish()
+                    record(response.status_code)
+            except requests.exceptions.RequestException as e:
+                error = e
+            latency = time.perf_counter() - start
+            self.breaker.record(url, response.status_code if response is not None else None, error, probe)
+            collector.add(method.upper(), url, response.status_code if response is not None else None,
+                          attempt, timing, size=body_size(response))
+            if response is not None:
+                self.transport_stats.record(transport, protocol_of(response), latency)
+            entry = Attempt(method.upper(), path, attempt, latency,
+                            status=response.status_code if response is not None else None,
+                            error=repr(error) if error is not None else None)
+            self.retry.log.record(entry)
+            history.append(entry)
+
+            # A token revoked or expired early: drop it and resend once, outside the retry policy
+            if (response is not None and response.status_code == 401 and token_source is not None
+                    and not reauthenticated):
+                reauthenticated = True
+                token_source.invalidate(kwargs["headers"].get("Authorization", "").partition(" ")[2])
+                response.close()
+                attempt += 1
+                continue
+
+            retryable = (
+                isinstance(error, policy.retry_errors)
+                or (response is not None and response.status_code in policy.retry_statuses)
+            )
+            if not retryable or attempt >= policy.max_attempts or not self.retry.budget.try_spend():
+                if error is not None:
+                    raise error
+                response.retry_history = history
+                response.timing = timing
+                return response
+            if response is not None:
+                response.close()  # release the connection of a streamed response
+            time.sleep(self.retry.delay_for(policy, attempt, response))
+            attempt += 1
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def patch(self, url: str, **kwargs) -> requests.Response:
+        return self.request("PATCH", url, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> requests.Response:
+        return self.request("DELETE", url, **kwargs)
+
+    def setup_summary(self) -> str:
+        """DNS cache hits and TLS session resumption for the end-of-run report."""
+        return warmup.summary(self.ssl_context)
+
+    def summary(self) -> str:
+        """One-line connection reuse summary for the end-of-run report."""
+        s = self.stats
+        return (
+            f"HTTP connections: {s.requests} requests over {s.connections} connections "
+            + (f"+ {s.prewarmed} pre-warmed " if s.prewarmed else "")
+            + f"(reuse ratio {s.reuse_ratio:.0%}, pool size {self.pool_size}, "
+            f"keep-alive {'on' if self.keep_alive else 'off'})"
+        )
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+            if self._http2 is not None:
+                self._http2.close()
+                self._http2 = None
+
+
+_manager: Optional[SessionManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_session_manager() -> SessionManager:
+    """Return the process-wide SessionManager, creating it on first use."""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = SessionManager()
+    return _manager
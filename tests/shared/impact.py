@@ -0,0 +1,394 @@
+"""Change-impact analysis: which tests a git diff can affect.
+
+Compares the working tree with a git ref (``--changed-since``) and works out:
+
+- test files that changed, narrowed to the test functions whose lines changed
+  (a change outside any test function, e.g. a helper, selects the whole file);
+- paths whose rules in ``api_test_base.py`` changed (a ``path ==`` branch of
+  ``apply_path_specific_rules`` or an entry of ``get_expected_status_codes``);
+- spec operations that changed, directly or through a ``$ref``-reachable
+  component (``components/schemas``, ``parameters``, ``responses``, ...).
+
+A test is affected when its file is selected or it calls an affected path:
+the ``[METHOD /path]`` / ``[/path]`` of a parametrized case, the steps of a
+lifecycle, or the spec paths written in the test function. Changes to other
+shared code, ``conftest.py`` or the pytest configuration can affect anything,
+so they select every test; changes outside the test tree select none::
+
+    pytest --changed-since origin/main
+    python -m tests.shared.impact origin/main
+"""
+
+
+import argparse
+import ast
+import json
+import os
+import re
+import subprocess
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from .suite_runner import _test_functions
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+SPEC_PATH = "schema/openapi.json"
+RULES_FILE = "tests/shared/api_test_base.py"
+# Rule methods whose path-specific entries are mapped to paths; other changes in the file affect every test
+PATH_RULES = ("apply_path_specific_rules", "get_expected_status_codes")
+# Files whose changes can affect any test
+GLOBAL_FILES = ("tests/conftest.py", "pytest.ini", "requirements.txt", ".env.example")
+HTTP_METHODS = ("get", "put", "post", "delete", "options", "head", "patch", "trace")
+
+_HUNK = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+_CASE_ID = re.compile(r"\[(?:(GET|PUT|POST|DELETE|PATCH|HEAD|OPTIONS) )?(/[^\]]*)\]$")
+
+Operation = Tuple[str, str]  # (spec path, METHOD)
+
+
+class FileChange(NamedTuple):
+    old: Set[int]  # changed lines in the base version (deleted or replaced)
+    new: Set[int]  # changed lines in the working tree (added or replaced)
+    added: bool    # not in the base version at all
+
+
+def _git(*args: str) -> str:
+    return subprocess.run(["git", *args], cwd=REPO_ROOT, check=True, capture_output=True, text=True).stdout
+
+
+def _span(start: str, count: Optional[str]) -> Set[int]:
+    # Count 0 is a pure insertion (old side) or deletion (new side): nothing changed on that side
+    lines = int(count) if count is not None else 1
+    return set(range(int(start), int(start) + lines))
+
+
+def git_changes(base: str) -> Dict[str, FileChange]:
+    """Changed lines per file between ``base`` and the working tree, including untracked files."""
+    changes: Dict[str, FileChange] = {}
+    old_name = current = None
+    for line in _git("diff", "--no-renames", "-U0", base, "--").splitlines():
+        if line.startswith("--- "):
+            old_name = None if line == "--- /dev/null" else line[6:]
+        elif line.startswith("+++ "):
+            current = old_name if line == "+++ /dev/null" else line[6:]
+            changes[current] = FileChange(set(), set(), old_name is None)
+        elif (match := _HUNK.match(line)) and current is not None:
+            old_start, old_count, new_start, new_count = match.groups()
+            changes[current].old.update(_span(old_start, old_count))
+            changes[current].new.update(_span(new_start, new_count))
+    for name in _git("ls-files", "--others", "--exclude-standard").splitlines():
+        changes[name] = FileChange(set(), set(), True)
+    return changes
+
+
+def _file_at(base: str, name: str) -> Optional[str]:
+    try:
+        return _git("show", f"{base}:{name}")
+    except subprocess.CalledProcessError:
+        return None
+
+
+def _read(name: str) -> Optional[str]:
+    path = REPO_ROOT / name
+    return path.read_text(encoding="utf-8") if path.exists() else None
+
+
+def _parse(source: Optional[str]) -> Optional[ast.Module]:
+    if source is None:
+        return None
+    try:
+        return ast.parse(source)
+    except SyntaxError:
+        return None
+
+
+def _touches(node: ast.AST, lines: Set[int]) -> bool:
+    start = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+    return any(start <= line <= node.end_lineno for line in lines)
+
+
+# --- Spec -------------------------------------------------------------------------------------
+
+def _refs(node: Any) -> Set[str]:
+    found: Set[str] = set()
+    stack = [node]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            ref = value.get("$ref")
+            if isinstance(ref, str):
+                found.add(ref)
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            stack.extend(value)
+    return found
+
+
+def _operations(spec: Dict[str, Any]) -> Dict[Operation, str]:
+    """Canonical JSON of each operation, including the parameters declared on its path."""
+    ops = {}
+    for path, item in (spec.get("paths") or {}).items():
+        shared = item.get("parameters", [])
+        for method, op in item.items():
+            if method in HTTP_METHODS:
+                ops[(path, method.upper())] = json.dumps({"parameters": shared, "operation": op}, sort_keys=True)
+    return ops
+
+
+def _components(spec: Dict[str, Any]) -> Dict[str, str]:
+    """Canonical JSON of each component, by its ``$ref``."""
+    return {f"#/components/{section}/{name}": json.dumps(value, sort_keys=True)
+            for section, entries in (spec.get("components") or {}).items() if isinstance(entries, dict)
+            for name, value in entries.items()}
+
+
+def _component(spec: Dict[str, Any], ref: str) -> Any:
+    node: Any = spec
+    for part in ref[2:].split("/"):
+        if not isinstance(node, dict):
+            return None
+        node = node.get(part.replace("~1", "/").replace("~0", "~"))
+    return node
+
+
+def changed_operations(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[Operation, str]:
+    """Operations added, removed or changed between two specs, with the reason for each."""
+    old_ops, new_ops = _operations(old), _operations(new)
+    changed: Dict[Operation, str] = {}
+    for key in old_ops.keys() | new_ops.keys():
+        if key not in old_ops:
+            changed[key] = "added"
+        elif key not in new_ops:
+            changed[key] = "removed"
+        elif old_ops[key] != new_ops[key]:
+            changed[key] = "changed"
+    old_components, new_components = _components(old), _components(new)
+    changed_refs = {ref for ref in old_components.keys() | new_components.keys()
+                    if old_components.get(ref) != new_components.get(ref)}
+    if not changed_refs:
+        return changed
+
+    # A component reached through either version of the spec counts, so a dropped $ref is seen too
+    def reachable(spec: Dict[str, Any], roots: Set[str]) -> Set[str]:
+        seen: Set[str] = set()
+        stack = list(roots)
+        while stack:
+            ref = stack.pop()
+            if ref in seen or not ref.startswith("#/"):
+                continue
+            seen.add(ref)
+            stack.extend(_refs(_component(spec, ref)))
+        return seen
+
+    for spec in (old, new):
+        for path, item in (spec.get("paths") or {}).items():
+            for method, op in item.items():
+                key = (path, method.upper())
+                if method not in HTTP_METHODS or key in changed:
+                    continue
+                hit = reachable(spec, _refs(op) | _refs(item.get("parameters", []))) & changed_refs
+                if hit:
+                    changed[key] = f"via {sorted(hit)[0].rsplit('/', 1)[-1]}" + (
+                        f" (+{len(hit) - 1})" if len(hit) > 1 else "")
+    return changed
+
+
+# --- api_test_base rules ----------------------------------------------------------------------
+
+def _branch_paths(test: ast.expr) -> Optional[Set[str]]:
+    """Paths named by ``path == "/x"`` or ``path in ["/x", "/y"]``; None for any other condition."""
+    if not (isinstance(test, ast.Compare) and isinstance(test.left, ast.Name) and test.left.id == "path"
+            and len(test.ops) == 1):
+        return None
+    right = test.comparators[0]
+    if isinstance(test.ops[0], ast.Eq) and isinstance(right, ast.Constant) and isinstance(right.value, str):
+        return {right.value}
+    if isinstance(test.ops[0], ast.In) and isinstance(right, (ast.List, ast.Tuple, ast.Set)):
+        values = [e.value for e in right.elts if isinstance(e, ast.Constant) and isinstance(e.value, str)]
+        return set(values) if len(values) == len(right.elts) else None
+    return None
+
+
+def rule_changes(tree: Optional[ast.Module], lines: Set[int]) -> Tuple[Set[str], bool]:
+    """(paths whose rules changed, whether a change affects every path) for one version of the file."""
+    paths: Set[str] = set()
+    if tree is None:
+        return paths, bool(lines)
+    methods = {fn.name: fn for cls in tree.body if isinstance(cls, ast.ClassDef)
+               for fn in cls.body if isinstance(fn, ast.FunctionDef)}
+    remaining = set(lines)
+    for name in PATH_RULES:
+        fn = methods.get(name)
+        if fn is None:
+            continue
+        body = [node for node in fn.body if _touches(node, remaining)]
+        remaining -= set(range(fn.lineno, fn.end_lineno + 1))
+        for node in body:
+            if isinstance(node, ast.If) and (branch := _branch_paths(node.test)) is not None:
+                paths |= branch
+            elif isinstance(node, ast.Return) and isinstance(node.value, ast.Dict):
+                keys = [k for k, v in zip(node.value.keys, node.value.values) if _touches(v, lines) or
+                        (k is not None and _touches(k, lines))]
+                if any(not (isinstance(k, ast.Constant) and isinstance(k.value, str)) for k in keys):
+                    return paths, True
+                paths |= {k.value for k in keys}
+            else:
+                return paths, True
+        if any(fn.lineno <= line <= fn.end_lineno for line in lines) and not body:
+            return paths, True  # e.g. the signature or docstring
+    return paths, bool(remaining)
+
+
+# --- Tests ------------------------------------------------------------------------------------
+
+def changed_functions(tree: Optional[ast.Module], lines: Set[int]) -> Optional[Set[str]]:
+    """Test functions (``Class::test_x`` or ``test_x``) touched by ``lines``; None for the whole file."""
+    if tree is None:
+        return None
+    functions = _test_functions(tree)
+    touched = {name for name, fn in functions.items() if _touches(fn, lines)}
+    inside = {line for fn in functions.values() for line in lines if _touches(fn, {line})}
+    return touched if inside == lines else None
+
+
+def _module_paths(tree: ast.Module, known: Dict[str, str]) -> Dict[str, Set[str]]:
+    """Spec paths mentioned in each test function, matched case-insensitively against ``known``."""
+    mentioned = {}
+    for name, fn in _test_functions(tree).items():
+        paths = set()
+        for node in ast.walk(fn):
+            if isinstance(node, ast.Constant) and isinstance(node.value, str):
+                value = node.value.split("?")[0].lower()
+                if value in known:
+                    paths.add(value)
+                elif "/" in value:  # a full URL or f-string part ending in a spec path
+                    match = max((p for p in known if value.endswith(p)), key=len, default=None)
+                    if match is not None:
+                        paths.add(match)
+        mentioned[name] = paths
+    return mentioned
+
+
+class Impact(NamedTuple):
+    base: str
+    everything: Optional[str]              # why every test is affected, if it is
+    operations: Dict[Operation, str]       # changed spec operations and why
+    rule_paths: Set[str]                   # paths whose api_test_base rules changed
+    test_files: Dict[str, Optional[Set[str]]]  # changed test files -> changed functions (None: all)
+    known_paths: Dict[str, str]            # lower-cased spec path -> spec path
+
+    @property
+    def affected(self) -> Set[Tuple[str, Optional[str]]]:
+        """(lower-cased path, METHOD) of changed operations, and (path, None) for changed rules."""
+        return ({(path.lower(), method) for path, method in self.operations}
+                | {(path.lower(), None) for path in self.rule_paths})
+
+    def item_calls(self, nodeid: str, params: Optional[Dict[str, Any]] = None) -> Set[Tuple[str, Optional[str]]]:
+        """(lower-cased path, METHOD or None for any) pairs one collected test calls."""
+        params = params or {}
+        if isinstance(params.get("path"), str):
+            return {(params["path"].lower(), "GET")}
+        steps = getattr(params.get("lifecycle"), "steps", None)
+        if steps is not None:
+            return {(step.path.lower(), step.method.upper()) for step in steps}
+        case = _CASE_ID.search(nodeid)
+        if case:
+            return {(case.group(2).lower(), case.group(1))}
+        file, _, function = nodeid.partition("::")
+        return {(path, None) for path in _function_paths(file, function.split("[", 1)[0], self.known_paths)}
+
+    def selects(self, nodeid: str, params: Optional[Dict[str, Any]] = None) -> bool:
+        if self.everything:
+            return True
+        file, _, function = nodeid.partition("::")
+        if file in self.test_files:
+            functions = self.test_files[file]
+            if functions is None or function.split("[", 1)[0] in functions:
+                return True
+        affected = self.affected
+        if not affected:
+            return False
+        affected_paths = {path for path, _ in affected}
+        for path, method in self.item_calls(nodeid, params):
+            # A test whose method is unknown is affected by any of its path's operations
+            if (path, None) in affected or (path, method) in affected or (method is None and path in affected_paths):
+                return True
+        return False
+
+    def describe(self) -> List[str]:
+        if self.everything:
+            return [f"every test ({self.everything})"]
+        lines = [f"{method} {path}: {why}" for (path, method), why in sorted(self.operations.items())]
+        lines += [f"rules for {path} in {RULES_FILE}" for path in sorted(self.rule_paths)]
+        lines += [f"{file}: " + ("whole file" if functions is None else ", ".join(sorted(functions)) or "no tests")
+                  for file, functions in sorted(self.test_files.items())]
+        return lines or ["nothing under tests/ or in the spec"]
+
+
+@lru_cache(maxsize=None)
+def _file_tree(file: str) -> Optional[ast.Module]:
+    return _parse(_read(file))
+
+
+_paths_by_file: Dict[str, Dict[str, Set[str]]] = {}
+
+
+def _function_paths(file: str, function: str, known: Dict[str, str]) -> Set[str]:
+    if file not in _paths_by_file:
+        tree = _file_tree(file)
+        _paths_by_file[file] = _module_paths(tree, known) if tree is not None else {}
+    return _paths_by_file[file].get(function, set())
+
+
+def analyse(base: str, spec_path: Optional[str] = None) -> Impact:
+    """Everything the changes since ``base`` can affect."""
+    spec_path = spec_path or os.getenv("OPENAPI_PATH", SPEC_PATH)
+    changes = git_changes(base)
+    spec = json.loads(_read(spec_path) or "{}")
+    known = {path.lower(): path for path in spec.get("paths", {})}
+    everything = None
+    operations: Dict[Operation, str] = {}
+    rule_paths: Set[str] = set()
+    test_files: Dict[str, Optional[Set[str]]] = {}
+    for name, change in sorted(changes.items()):
+        if name == spec_path:
+            old = _file_at(base, name)
+            operations = changed_operations(json.loads(old) if old else {}, spec)
+        elif name == RULES_FILE:
+            old_paths, old_all = rule_changes(_parse(_file_at(base, name)), change.old)
+            new_paths, new_all = rule_changes(_parse(_read(name)), change.new)
+            rule_paths |= old_paths | new_paths
+            if old_all or new_all:
+                everything = everything or f"{name} changed outside its path rules"
+        elif Path(name).name.startswith("test_") and name.endswith(".py"):
+            if not (REPO_ROOT / name).exists():
+                continue  # deleted: nothing left to run
+            if change.added:
+                test_files[name] = None
+                continue
+            old_functions = changed_functions(_parse(_file_at(base, name)), change.old)
+            new_functions = changed_functions(_file_tree(name), change.new)
+            test_files[name] = (None if old_functions is None or new_functions is None
+                                else old_functions | new_functions)
+        elif name in GLOBAL_FILES or (name.startswith("tests/") and name.endswith(".py")
+                                      and Path(name).name != "__init__.py"):
+            everything = everything or f"{name} changed"
+    return Impact(base, everything, operations, rule_paths, test_files, known)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Show which operations and tests changes since a git ref affect")
+    parser.add_argument("base", nargs="?", default=os.getenv("IMPACT_BASE", "HEAD"),
+                        help="git ref to compare the working tree with (default IMPACT_BASE or HEAD)")
+    args = parser.parse_args(argv)
+    impact = analyse(args.base)
+    print(f"Changes since {args.base} affect:")
+    for line in impact.describe():
+        print(f"  {line}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
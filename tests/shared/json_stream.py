@@ -0,0 +1,193 @@
+"""Incremental JSON event parser for streamed response bodies.
+
+Events follow ijson's ``basic_parse`` vocabulary: ``start_map``, ``map_key``,
+``end_map``, ``start_array``, ``end_array``, ``string``, ``number``,
+``boolean`` and ``null``. When ijson is installed its C backend is used;
+otherwise a pure-Python lexer keeps memory bounded by the largest single token.
+"""
+
+
+import codecs
+import json
+import re
+from typing import Any, Iterable, Iterator, Tuple
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+Event = Tuple[str, Any]
+
+_WHITESPACE = " \t\n\r"
+_NUMBER = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?")
+_NUMBER_CHARS = re.compile(r"[-+.eE0-9]*")
+_LITERALS = {"true": ("boolean", True), "false": ("boolean", False), "null": ("null", None)}
+
+
+class JSONStreamError(ValueError):
+    """Raised when a streamed body is not well-formed JSON."""
+
+
+class _ChunkReader:
+    """Adapt an iterator of byte chunks to the file-like ``read`` ijson expects."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._pending = b""
+
+    def read(self, size: int = -1) -> bytes:
+        """Up to ``size`` bytes (the next chunk when negative); ``b""`` only at the end.
+
+        ijson probes the stream with ``read(0)``, so a chunk must never be
+        pulled and dropped for a request smaller than it.
+        """
+        if size == 0:
+            return b""
+        while not self._pending:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return b""
+            self._pending = chunk
+        if size < 0 or size >= len(self._pending):
+            data, self._pending = self._pending, b""
+        else:
+            data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+
+
+def iter_events(chunks: Iterable[bytes]) -> Iterator[Event]:
+    """Yield parse events from an iterable of UTF-8 byte chunks."""
+    if ijson is not None:
+        try:
+            yield from ijson.basic_parse(_ChunkReader(chunks), use_float=True)
+        except ijson.JSONError as e:
+            raise JSONStreamError(str(e)) from e
+        return
+    yield from _PurePythonParser().parse(chunks)
+
+
+class _PurePythonParser:
+    """Lexer plus a container stack that enforces JSON grammar as tokens arrive."""
+
+    def __init__(self):
+        self.buf = ""
+        self.pos = 0
+        # Stack entries are "map" or "array"; ``expect`` is what may come next.
+        self.stack = []
+        self.expect = "value"
+
+    def parse(self, chunks: Iterable[bytes]) -> Iterator[Event]:
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        for chunk in chunks:
+            try:
+                self.buf = self.buf[self.pos:] + decoder.decode(chunk)
+            except UnicodeDecodeError as e:
+                raise JSONStreamError(f"invalid UTF-8 in body: {e}") from e
+            self.pos = 0
+            yield from self._drain(final=False)
+        self.buf = self.buf[self.pos:] + decoder.decode(b"", final=True)
+        self.pos = 0
+        yield from self._drain(final=True)
+        if self.stack or self.expect != "done":
+            raise JSONStreamError("unexpected end of JSON document")
+
+    def _drain(self, final: bool) -> Iterator[Event]:
+        buf = self.buf
+        while True:
+            while self.pos < len(buf) and buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos >= len(buf):
+                return
+            if self.expect == "done":
+                raise JSONStreamError(f"extra data at offset {self.pos}")
+            ch = buf[self.pos]
+
+            if ch in "{[":
+                self._value_starts()
+                self.stack.append("map" if ch == "{" else "array")
+                self.expect = "key_or_end" if ch == "{" else "value_or_end"
+                self.pos += 1
+                yield ("start_map" if ch == "{" else "start_array", None)
+            elif ch in "}]":
+                kind = "map" if ch == "}" else "array"
+                allowed = ("key_or_end", "comma_or_end") if kind == "map" else ("value_or_end", "comma_or_end")
+                if not self.stack or self.stack[-1] != kind or self.expect not in allowed:
+                    raise JSONStreamError(f"unexpected {ch!r} at offset {self.pos}")
+                self.stack.pop()
+                self.pos += 1
+                self._value_done()
+                yield ("end_map" if kind == "map" else "end_array", None)
+            elif ch == ",":
+                if self.expect != "comma_or_end":
+                    raise JSONStreamError(f"unexpected ',' at offset {self.pos}")
+                self.expect = "key" if self.stack[-1] == "map" else "value"
+                self.pos += 1
+            elif ch == ":":
+                if self.expect != "colon":
+                    raise JSONStreamError(f"unexpected ':' at offset {self.pos}")
+                self.expect = "value"
+                self.pos += 1
+            elif ch == '"':
+                end = self._string_end(buf, self.pos + 1)
+                if end < 0:
+                    return
+                try:
+                    value = json.loads(buf[self.pos:end + 1])
+                except ValueError as e:
+                    raise JSONStreamError(f"bad string at offset {self.pos}: {e}") from e
+                self.pos = end + 1
+                if self.expect in ("key", "key_or_end"):
+                    self.expect = "colon"
+                    yield ("map_key", value)
+                else:
+                    self._value_starts()
+                    self._value_done()
+                    yield ("string", value)
+            elif ch == "-" or ch.isdigit():
+                run = _NUMBER_CHARS.match(buf, self.pos)
+                if run.end() == len(buf) and not final:
+                    return  # the number may continue in the next chunk
+                match = _NUMBER.fullmatch(buf, self.pos, run.end())
+                if match is None:
+                    raise JSONStreamError(f"bad number at offset {self.pos}")
+                text = match.group()
+                self._value_starts()
+                self.pos = match.end()
+                self._value_done()
+                is_float = any(c in text for c in ".eE")
+                yield ("number", float(text) if is_float else int(text))
+            else:
+                word = next((w for w in _LITERALS if buf.startswith(w, self.pos)), None)
+                if word is None:
+                    if not final and any(w.startswith(buf[self.pos:]) for w in _LITERALS):
+                        return
+                    raise JSONStreamError(f"unexpected {ch!r} at offset {self.pos}")
+                self._value_starts()
+                self.pos += len(word)
+                self._value_done()
+                yield _LITERALS[word]
+
+    def _value_starts(self):
+        if self.expect not in ("value", "value_or_end"):
+            raise JSONStreamError(f"unexpected value at offset {self.pos}")
+
+    def _value_done(self):
+        self.expect = "comma_or_end" if self.stack else "done"
+
+    @staticmethod
+    def _string_end(buf: str, i: int) -> int:
+        """Index of the closing quote of a string starting before ``i``, or -1."""
+        while True:
+            i = buf.find('"', i)
+            if i < 0:
+                return -1
+            backslashes = 0
+            j = i - 1
+            while buf[j] == "\\":
+                backslashes += 1
+                j -= 1
+            if backslashes % 2 == 0:
+                return i
+            i += 1
@@ -0,0 +1,234 @@
+"""Create -> update -> delete chains of write calls, run as dependency graphs.
+
+A ``Lifecycle`` is a small DAG of ``Step``s. Each step builds its query and
+body from a shared context and captures values (a created id, a session
+code) from its JSON response into that context for the steps after it, so
+no step relies on a hardcoded id. Steps on the same level of the graph run
+together; independent lifecycles run concurrently, so the wall time is close
+to that of the longest chain.
+
+Cleanup steps (``cleanup=True``) run once their dependencies have finished,
+whether or not those succeeded, and also when the chain is interrupted. A
+cleanup step whose inputs were never captured is skipped. That is only clean
+when the create call (a ``POST`` step) was refused; if the API accepted it,
+the record it made is left behind and the chain reports it.
+"""
+
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import requests
+
+from .concurrent_runner import run_concurrently
+from .http_session import get_session_manager
+
+Context = Dict[str, Any]
+
+PASSED = "passed"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+@dataclass(frozen=True)
+class Step:
+    """One write (or read-back) call in a lifecycle."""
+    name: str
+    method: str
+    path: str
+    after: Tuple[str, ...] = ()
+    query: Optional[Callable[[Context], Dict[str, Any]]] = None
+    body: Optional[Callable[[Context], Any]] = None
+    # context key -> location in the JSON response, e.g. "form-id" or "0/event-id"
+    captures: Dict[str, str] = field(default_factory=dict)
+    cleanup: bool = False
+    expected_status: Tuple[int, ...] = (200,)
+
+
+class Lifecycle:
+    """Steps of one resource's lifecycle, checked to form a DAG."""
+
+    def __init__(self, name: str, steps: Sequence[Step], requires: Sequence[str] = ()):
+        self.name = name
+        self.steps = list(steps)
+        self.requires = tuple(requires)  # context keys the chain needs seeded (e.g. from the environment)
+        self.levels = _levels(self.steps)
+
+    def __repr__(self):
+        return f"Lifecycle({self.name!r}: {' -> '.join(s.name for s in self.steps)})"
+
+
+def _levels(steps: Sequence[Step]) -> List[List[Step]]:
+    """Steps grouped by depth in the graph; every step comes after all of its dependencies."""
+    by_name = {s.name: s for s in steps}
+    if len(by_name) != len(steps):
+        raise ValueError("Lifecycle step names must be unique")
+    for step in steps:
+        unknown = set(step.after) - set(by_name)
+        if unknown:
+            raise ValueError(f"Step {step.name!r} comes after unknown steps: {', '.join(sorted(unknown))}")
+    depth: Dict[str, int] = {}
+    remaining = list(steps)
+    while remaining:
+        ready = [s for s in remaining if all(d in depth for d in s.after)]
+        if not ready:
+            raise ValueError(f"Lifecycle steps form a cycle: {', '.join(s.name for s in remaining)}")
+        for step in ready:
+            depth[step.name] = max((depth[d] + 1 for d in step.after), default=0)
+            remaining.remove(step)
+    levels: List[List[Step]] = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+    for step in steps:
+        levels[depth[step.name]].append(step)
+    return levels
+
+
+def capture(data: Any, location: str) -> Any:
+    """Value at ``location`` ("key", "0/key") in a decoded JSON body; KeyError when absent."""
+    value = data
+    for part in location.split("/"):
+        try:
+            value = value[int(part)] if isinstance(value, list) else value[part]
+        except (IndexError, KeyError, TypeError, ValueError):
+            raise KeyError(f"{location!r} not in response") from None
+    if value is None:
+        raise KeyError(f"{location!r} is null in response")
+    return value
+
+
+class StepOutcome(NamedTuple):
+    step: Step
+    status: str                        # passed, failed or skipped
+    response: Optional[requests.Response]
+    reason: Optional[str]
+    seconds: float
+
+
+class LifecycleResult(NamedTuple):
+    lifecycle: Lifecycle
+    outcomes: Dict[str, StepOutcome]  # by step name, in the order they finished
+    context: Context
+    seconds: float
+
+    @property
+    def ok(self) -> bool:
+        return all(o.status == PASSED for o in self.outcomes.values())
+
+    @property
+    def created(self) -> bool:
+        """The API accepted a create (``POST``) step, whether or not its ids could be captured."""
+        return any(o.step.method.upper() == "POST" and o.response is not None
+                   and o.response.status_code in o.step.expected_status for o in self.outcomes.values())
+
+    @property
+    def cleaned_up(self) -> bool:
+        """Every cleanup step passed, or nothing was created for the skipped ones to remove."""
+        cleanups = [o for o in self.outcomes.values() if o.step.cleanup]
+        if any(o.status == FAILED for o in cleanups):
+            return False
+        return not self.created or all(o.status == PASSED for o in cleanups)
+
+    def describe(self) -> str:
+        return "; ".join(f"{o.step.method} {o.step.path} {o.status}" + (f" ({o.reason})" if o.reason else "")
+                         for o in self.outcomes.values())
+
+
+class LifecycleRunner:
+    """Sends lifecycle steps over the shared session with one set of headers and query parameters."""
+
+    def __init__(self, base_url: str, headers: Dict[str, str], params: Optional[Dict[str, Any]] = None,
+                 context: Optional[Context] = None, timeout: float = 30):
+        self.base_url = base_url.rstrip("/")
+        self.headers = headers
+        self.params = params or {}
+        self.context = context or {}
+        self.timeout = timeout
+
+    def send(self, step: Step, context: Context) -> StepOutcome:
+        start = time.perf_counter()
+        try:
+            params = {**self.params, **(step.query(context) if step.query else {})}
+            body = step.body(context) if step.body else None
+        except KeyError as e:
+            return StepOutcome(step, SKIPPED, None, f"no {e.args[0]} captured", 0.0)
+        headers = self.headers.copy()  # AuthHeaders copies keep the per-request token hook
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+        try:
+            response = get_session_manager().request(step.method, f"{self.base_url}{step.path}", headers=headers,
+                                                     params=params, json=body, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            return StepOutcome(step, FAILED, None, f"request failed: {e}", time.perf_counter() - start)
+        seconds = time.perf_counter() - start
+        if response.status_code not in step.expected_status:
+            return StepOutcome(step, FAILED, response, f"status {response.status_code}", seconds)
+        if step.captures:
+            try:
+                data = response.json()
+                context.update({key: capture(data, location) for key, location in step.captures.items()})
+            except (requests.exceptions.JSONDecodeError, KeyError) as e:
+                return StepOutcome(step, FAILED, response, f"capture failed: {e}", seconds)
+        return StepOutcome(step, PASSED, response, None, seconds)
+
+    def run(self, lifecycle: Lifecycle) -> LifecycleResult:
+        """Run one lifecycle level by level, then any cleanup an interruption left pending."""
+        context = dict(self.context)
+        outcomes: Dict[str, StepOutcome] = {}
+        start = time.perf_counter()
+        try:
+            for level in lifecycle.levels:
+                plan = {}
+                for step in level:
+                    blocked = [d for d in step.after if outcomes[d].status != PASSED]
+                    if blocked and not step.cleanup:
+                        outcomes[step.name] = StepOutcome(step, SKIPPED, None, f"{blocked[0]} did not pass", 0.0)
+                    else:
+                        plan[step.name] = (lambda s=step: self.send(s, context))
+                if len(plan) == 1:
+                    (name, call), = plan.items()
+                    outcomes[name] = call()
+                elif plan:
+                    for name, outcome in run_concurrently(plan, len(plan)).items():
+                        outcomes[name] = outcome.result()
+        finally:
+            # Whatever stopped the chain, remove what it created
+            for step in lifecycle.steps:
+                if step.cleanup and step.name not in outcomes:
+                    outcomes[step.name] = self.send(step, context)
+        return LifecycleResult(lifecycle, outcomes, context, time.perf_counter() - start)
+
+
+class LifecycleRun(NamedTuple):
+    results: Dict[str, LifecycleResult]
+    seconds: float
+
+    def summary(self) -> str:
+        outcomes = [o for r in self.results.values() for o in r.outcomes.values()]
+        counts = {status: sum(o.status == status for o in outcomes) for status in (PASSED, FAILED, SKIPPED)}
+        longest = max((r.seconds for r in self.results.values()), default=0.0)
+        cleaned = sum(r.cleaned_up for r in self.results.values())
+        return (f"Lifecycles: {len(self.results)} chains, {len(outcomes)} steps ({counts[PASSED]} passed, "
+                f"{counts[FAILED]} failed, {counts[SKIPPED]} skipped); {cleaned}/{len(self.results)} cleaned up; "
+                f"{self.seconds:.1f}s wall, longest chain {longest:.1f}s")
+
+
+_last_run: Optional[LifecycleRun] = None
+_last_run_lock = threading.Lock()
+
+
+def run_lifecycles(lifecycles: Sequence[Lifecycle], runner: LifecycleRunner,
+                   concurrency: Optional[int] = None) -> Dict[str, LifecycleResult]:
+    """Run independent lifecycles concurrently (by default all at once) and keep the run for the summary."""
+    global _last_run
+    start = time.perf_counter()
+    plan = {lc.name: (lambda lc=lc: runner.run(lc)) for lc in lifecycles}
+    results = {name: outcome.result() for name, outcome in
+               run_concurrently(plan, concurrency or max(1, len(plan))).items()}
+    with _last_run_lock:
+        _last_run = LifecycleRun(results, time.perf_counter() - start)
+    return results
+
+
+def active_lifecycle_run() -> Optional[LifecycleRun]:
+    return _last_run
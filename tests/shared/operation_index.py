@@ -0,0 +1,146 @@
+"""Operation index: per-(path, method) parameter facts computed once from the spec.
+
+Built from the spec registry's resolved operation table, so path- and
+operation-level parameters are already merged and ``$ref``s followed. Lookups
+are dict hits; nothing walks parameter lists at test time.
+"""
+
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Iterator, Mapping, Optional, Tuple
+
+from .spec_cache import OperationKey, resolve_ref
+
+
+@dataclass(frozen=True)
+class ParamInfo:
+    """One parameter of an operation."""
+    name: str
+    location: str  # "query", "path", "header" or "cookie"
+    required: bool
+    type: Optional[str] = None
+    format: Optional[str] = None
+    enum: Optional[Tuple[Any, ...]] = None
+    item_type: Optional[str] = None  # element type for array parameters
+    item_enum: Optional[Tuple[Any, ...]] = None
+    default: Any = None
+    schema: Mapping[str, Any] = field(default_factory=dict, repr=False)
+
+
+@dataclass(frozen=True)
+class OperationInfo:
+    """Everything the tests look up about one operation."""
+    path: str
+    method: str
+    operation_id: Optional[str]
+    query_names: Tuple[str, ...]
+    path_names: Tuple[str, ...]
+    required_query: Tuple[str, ...]
+    required_path: Tuple[str, ...]
+    params: Mapping[Tuple[str, str], ParamInfo] = field(repr=False)
+    request_body_schema: Optional[Mapping[str, Any]] = field(default=None, repr=False)
+    request_body_required: bool = False
+
+    @property
+    def query_name_set(self) -> FrozenSet[str]:
+        return frozenset(self.query_names)
+
+    @property
+    def required_query_set(self) -> FrozenSet[str]:
+        return frozenset(self.required_query)
+
+    def param(self, name: str, location: str = "query") -> Optional[ParamInfo]:
+        return self.params.get((name, location))
+
+
+def _param_info(spec: Mapping[str, Any], raw: Mapping[str, Any]) -> ParamInfo:
+    schema = raw.get("schema") or {}
+    if "$ref" in schema:
+        schema = resolve_ref(spec, schema["$ref"])
+    items = schema.get("items") or {}
+    if "$ref" in items:
+        items = resolve_ref(spec, items["$ref"])
+    enum = schema.get("enum")
+    item_enum = items.get("enum")
+    return ParamInfo(
+        name=raw["name"],
+        location=raw.get("in", ""),
+        required=bool(raw.get("required")),
+        type=schema.get("type"),
+        format=schema.get("format"),
+        enum=tuple(enum) if enum is not None else None,
+        item_type=items.get("type"),
+        item_enum=tuple(item_enum) if item_enum is not None else None,
+        default=schema.get("default"),
+        schema=schema,
+    )
+
+
+def _request_body(spec: Mapping[str, Any], body: Optional[Mapping[str, Any]]):
+    """(schema, required) of the JSON request body, with a top-level ``$ref`` resolved."""
+    if not body:
+        return None, False
+    content = body.get("content") or {}
+    media = next((content[t] for t in content if "json" in t), None) or next(iter(content.values()), {})
+    schema = media.get("schema")
+    if schema and "$ref" in schema:
+        schema = resolve_ref(spec, schema["$ref"])
+    return schema, bool(body.get("required"))
+
+
+def _names(params: Mapping[Tuple[str, str], ParamInfo], location: str, required_only: bool = False):
+    return tuple(p.name for p in params.values()
+                 if p.location == location and (p.required or not required_only))
+
+
+class OperationIndex:
+    """O(1) lookup of ``OperationInfo`` by (path, method).
+
+    Paths match exactly as written in the spec, falling back to a
+    case-insensitive match (tests use e.g. ``/User/query``).
+    """
+
+    def __init__(self, spec: Mapping[str, Any], operations: Mapping[OperationKey, Mapping[str, Any]]):
+        self._ops: Dict[OperationKey, OperationInfo] = {}
+        for (path, method), op in operations.items():
+            params = {}
+            for raw in op.get("parameters", ()):
+                if isinstance(raw, Mapping) and "name" in raw:
+                    info = _param_info(spec, raw)
+                    params[(info.name, info.location)] = info
+            body_schema, body_required = _request_body(spec, op.get("requestBody"))
+            self._ops[(path, method)] = OperationInfo(
+                path=path,
+                method=method,
+                operation_id=op.get("operationId"),
+                query_names=_names(params, "query"),
+                path_names=_names(params, "path"),
+                required_query=_names(params, "query", required_only=True),
+                required_path=_names(params, "path", required_only=True),
+                params=params,
+                request_body_schema=body_schema,
+                request_body_required=body_required,
+            )
+        self._folded = {(path.lower(), method): info for (path, method), info in self._ops.items()}
+
+    def get(self, path: str, method: str = "get") -> Optional[OperationInfo]:
+        method = method.lower()
+        info = self._ops.get((path, method))
+        if info is None:
+            info = self._folded.get((path.lower(), method))
+        return info
+
+    def __getitem__(self, key: OperationKey) -> OperationInfo:
+        info = self.get(*key)
+        if info is None:
+            raise KeyError(key)
+        return info
+
+    def __contains__(self, key: OperationKey) -> bool:
+        return self.get(*key) is not None
+
+    def __iter__(self) -> Iterator[OperationInfo]:
+        return iter(self._ops.values())
+
+    def __len__(self) -> int:
+        return len(self._ops)
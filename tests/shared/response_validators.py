@@ -0,0 +1,488 @@
+"""Compiled response-schema validators, one per (path, method, status).
+
+schemathesis' ``validate_response`` interprets the response's JSON Schema from
+scratch on every call. Here each response schema is converted the way
+schemathesis converts it (``nullable``, write-only properties) and generated
+into a plain Python function, with ``$ref``s inlined and recursive references
+turned into calls. The generated module is compiled once per spec and its code
+object cached next to the spec cache, keyed by the spec's SHA-256.
+
+A compiled validator only ever answers "valid". Anything it cannot prove valid
+(a schema violation, a missing content type, a construct the compiler does not
+handle) is handed back to schemathesis, so failures carry exactly the same
+errors as before.
+"""
+
+
+import builtins
+import hashlib
+import os
+import re
+import sys
+import time
+from importlib import metadata
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import jsonschema
+# The equality jsonschema itself uses for ``enum`` and ``uniqueItems`` (True != 1)
+from jsonschema._utils import equal as _equal, uniq as _uniq
+from schemathesis.specs.openapi.converter import to_json_schema_recursive
+from schemathesis.transports.content_types import is_json_media_type
+
+from .spec_cache import OperationKey, _read_cache, _write_cache, cache_dir_for, cache_enabled, resolve_ref
+from .validation_policy import response_with_body
+
+
+VALIDATORS_FORMAT_VERSION = 1
+NULLABLE = "nullable"  # the OpenAPI 3.0 keyword schemathesis rewrites to anyOf [..., null]
+FALLBACK = ""  # table marker: this response is always validated by schemathesis
+
+# schemathesis validates with Draft 4 semantics and the Draft 2020-12 format checker
+_VALIDATOR_CLS = jsonschema.Draft4Validator
+_FORMAT_CHECKER = jsonschema.Draft202012Validator.FORMAT_CHECKER
+
+_TYPE_CHECKS = {
+    "object": "isinstance({v}, dict)",
+    "array": "isinstance({v}, list)",
+    "string": "isinstance({v}, str)",
+    "boolean": "isinstance({v}, bool)",
+    "null": "{v} is None",
+    "integer": "(isinstance({v}, int) and not isinstance({v}, bool))",
+    "number": "(isinstance({v}, (int, float)) and not isinstance({v}, bool))",
+}
+_OBJECT_KEYWORDS = ("required", "properties", "patternProperties", "additionalProperties",
+                    "minProperties", "maxProperties")
+_ARRAY_KEYWORDS = ("items", "minItems", "maxItems", "uniqueItems")
+_STRING_KEYWORDS = ("minLength", "maxLength", "pattern")
+_NUMBER_KEYWORDS = ("minimum", "maximum")
+_UNSUPPORTED_KEYWORDS = ("multipleOf", "dependencies")
+# Beyond this many nested blocks a subschema is moved into its own function
+# (CPython allows 20 nested loops and 100 indentation levels).
+_MAX_LOOP_DEPTH = 8
+_MAX_INDENT = 40
+
+
+def compiled_validation_enabled() -> bool:
+    return os.getenv("COMPILED_VALIDATORS", "true").lower() == "true"
+
+
+class Unsupported(Exception):
+    """The schema uses something the compiler does not translate."""
+
+
+def _fingerprint() -> str:
+    """Changes whenever generated code could differ for the same spec."""
+    parts = (VALIDATORS_FORMAT_VERSION, metadata.version("jsonschema"), metadata.version("schemathesis"),
+             sorted(_FORMAT_CHECKER.checkers))
+    return hashlib.sha256(repr(parts).encode()).hexdigest()[:16]
+
+
+def _convert(schema: Any) -> Any:
+    """Response-schema conversion exactly as schemathesis applies it."""
+    return to_json_schema_recursive(schema, NULLABLE, is_response_schema=True, update_quantifiers=False)
+
+
+class _Compiler:
+    """Generates the source of one module holding every response validator."""
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.spec = spec
+        self.functions: List[str] = []
+        self.constants: List[str] = []
+        self._constant_names: Dict[str, str] = {}
+        self._ref_functions: Dict[str, Optional[str]] = {}
+        self._converted: Dict[str, Any] = {}
+        self._counter = 0
+
+    def _next(self, prefix: str) -> str:
+        self._counter += 1
+        return f"{prefix}{self._counter}"
+
+    def _constant(self, expr: str) -> str:
+        name = self._constant_names.get(expr)
+        if name is None:
+            name = self._constant_names[expr] = self._next("_c")
+            self.constants.append(f"{name} = {expr}")
+        return name
+
+    def _regex(self, pattern: str) -> str:
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            raise Unsupported(f"invalid pattern {pattern!r}: {e}") from e
+        return self._constant(f"re.compile({pattern!r})")
+
+    def function(self, name: str, schema: Any, refs: Tuple[str, ...] = ()):
+        body: List[str] = []
+        self._emit(schema, "v", body, 1, 0, refs)
+        self.functions.append("\n".join([f"def {name}(v):", *body, "    return True", ""]))
+
+    def _outline(self, schema: Any, refs: Tuple[str, ...]) -> str:
+        name = self._next("_s")
+        self.function(name, schema, refs)
+        return name
+
+    def _ref_function(self, ref: str) -> str:
+        if ref in self._ref_functions:
+            name = self._ref_functions[ref]
+            if name is None:
+                raise Unsupported(f"{ref} cannot be compiled")
+            return name
+        name = self._ref_functions[ref] = self._next("_ref")
+        try:
+            self.function(name, self._resolve(ref), (ref,))
+        except Unsupported:
+            self._ref_functions[ref] = None
+            raise
+        return name
+
+    def _resolve(self, ref: str) -> Any:
+        if ref not in self._converted:
+            try:
+                target = resolve_ref(self.spec, ref)
+            except (KeyError, TypeError, ValueError) as e:
+                raise Unsupported(f"cannot resolve {ref}: {e}") from e
+            self._converted[ref] = _convert(target)
+        return self._converted[ref]
+
+    def _emit(self, schema: Any, v: str, out: List[str], indent: int, loops: int, refs: Tuple[str, ...]):
+        """Append statements that ``return False`` unless ``v`` satisfies ``schema``."""
+        if not isinstance(schema, dict):
+            raise Unsupported(f"non-object schema {schema!r}")
+        pad = "    " * indent
+        if indent > _MAX_INDENT or loops > _MAX_LOOP_DEPTH:
+            out.append(f"{pad}if not {self._outline(schema, refs)}({v}): return False")
+            return
+        if "$ref" in schema:  # Draft 4 ignores every keyword next to $ref
+            ref = schema["$ref"]
+            if not isinstance(ref, str):
+                raise Unsupported(f"non-string $ref {ref!r}")
+            if ref in refs:
+                out.append(f"{pad}if not {self._ref_function(ref)}({v}): return False")
+            else:
+                self._emit(self._resolve(ref), v, out, indent, loops, refs + (ref,))
+            return
+        for keyword in _UNSUPPORTED_KEYWORDS:
+            if keyword in schema:
+                raise Unsupported(keyword)
+        if isinstance(schema.get("id"), str):
+            raise Unsupported("id changes the $ref resolution scope")
+
+        known = None
+        types = schema.get("type")
+        if types is not None:
+            names = [types] if isinstance(types, str) else types
+            if not isinstance(names, list) or not names or any(t not in _TYPE_CHECKS for t in names):
+                raise Unsupported(f"type {types!r}")
+            check = " or ".join(_TYPE_CHECKS[t].format(v=v) for t in names)
+            out.append(f"{pad}if not ({check}): return False")
+            if len(names) == 1:
+                known = names[0]
+
+        if "enum" in schema:
+            if not isinstance(schema["enum"], list):
+                raise Unsupported("enum")
+            choices = self._constant(repr(tuple(schema["enum"])))
+            out.append(f"{pad}if not any(_equal(e, {v}) for e in {choices}): return False")
+
+        fmt = schema.get("format")
+        if isinstance(fmt, str) and fmt in _FORMAT_CHECKER.checkers:
+            out.append(f"{pad}if not _conforms({v}, {fmt!r}): return False")
+
+        groups = (
+            (_OBJECT_KEYWORDS, "object", f"isinstance({v}, dict)", self._object),
+            (_ARRAY_KEYWORDS, "array", f"isinstance({v}, list)", self._array),
+            (_STRING_KEYWORDS, "string", f"isinstance({v}, str)", self._string),
+            (_NUMBER_KEYWORDS, "number", _TYPE_CHECKS["number"].format(v=v), self._number),
+        )
+        for keywords, type_name, guard, emit in groups:
+            if not any(k in schema for k in keywords):
+                continue
+            unguarded = known == type_name or (type_name == "number" and known == "integer")
+            inner: List[str] = []
+            emit(schema, v, inner, indent if unguarded else indent + 1, loops, refs)
+            if inner and not unguarded:
+                out.append(f"{pad}if {guard}:")
+            out.extend(inner)
+
+        for sub in self._list(schema, "allOf"):
+            self._emit(sub, v, out, indent, loops, refs)
+        if "anyOf" in schema:
+            branches = self._list(schema, "anyOf")
+            others = [b for b in branches if b != {"type": "null"}]
+            if len(branches) == 2 and len(others) == 1:
+                # the shape schemathesis gives ``nullable: true``
+                inner = []
+                self._emit(others[0], v, inner, indent + 1, loops, refs)
+                if inner:
+                    out.append(f"{pad}if {v} is not None:")
+                    out.extend(inner)
+            else:
+                calls = " or ".join(f"{self._outline(b, refs)}({v})" for b in branches)
+                out.append(f"{pad}if not ({calls}): return False")
+        if "oneOf" in schema:
+            calls = ", ".join(f"{self._outline(b, refs)}({v})" for b in self._list(schema, "oneOf"))
+            out.append(f"{pad}if sum(({calls},)) != 1: return False")
+        if "not" in schema:
+            out.append(f"{pad}if {self._outline(schema['not'], refs)}({v}): return False")
+
+    @staticmethod
+    def _list(schema: Dict[str, Any], keyword: str) -> list:
+        value = schema.get(keyword, [])
+        if not isinstance(value, list) or (keyword != "allOf" and not value):
+            raise Unsupported(keyword)
+        return value
+
+    def _object(self, schema, v, out, indent, loops, refs):
+        pad = "    " * indent
+        required = schema.get("required", [])
+        if not isinstance(required, list) or not all(isinstance(n, str) for n in required):
+            raise Unsupported("required")
+        for name in required:
+            out.append(f"{pad}if {name!r} not in {v}: return False")
+        properties = schema.get("properties", {})
+        patterns = schema.get("patternProperties", {})
+        if not isinstance(properties, dict) or not isinstance(patterns, dict):
+            raise Unsupported("properties")
+        for name, sub in properties.items():
+            x = self._next("x")
+            inner: List[str] = []
+            self._emit(sub, x, inner, indent + 1, loops, refs)
+            if inner:
+                out.append(f"{pad}if {name!r} in {v}:")
+                out.append(f"{pad}    {x} = {v}[{name!r}]")
+                out.extend(inner)
+        for pattern, sub in patterns.items():
+            k, x = self._next("k"), self._next("x")
+            inner = []
+            self._emit(sub, x, inner, indent + 2, loops + 1, refs)
+            if inner:
+                out.append(f"{pad}for {k}, {x} in {v}.items():")
+                out.append(f"{pad}    if {self._regex(pattern)}.search({k}):")
+                out.extend(inner)
+        additional = schema.get("additionalProperties", True)
+        if isinstance(additional, dict) or not additional:
+            k, x = self._next("k"), self._next("x")
+            conditions = []
+            if properties:
+                names = self._constant(f"frozenset({sorted(properties)!r})")
+                conditions.append(f"{k} not in {names}")
+            if patterns:
+                conditions.append(f"not {self._regex('|'.join(patterns))}.search({k})")
+            is_extra = " and ".join(conditions) or "True"
+            if isinstance(additional, dict):
+                inner = []
+                self._emit(additional, x, inner, indent + 2, loops + 1, refs)
+                if inner:
+                    out.append(f"{pad}for {k}, {x} in {v}.items():")
+                    out.append(f"{pad}    if {is_extra}:")
+                    out.extend(inner)
+            elif conditions:
+                out.append(f"{pad}for {k} in {v}:")
+                out.append(f"{pad}    if {is_extra}: return False")
+            else:
+                out.append(f"{pad}if {v}: return False")
+        for keyword, op in (("minProperties", "<"), ("maxProperties", ">")):
+            if keyword in schema:
+                out.append(f"{pad}if len({v}) {op} {int(schema[keyword])!r}: return False")
+
+    def _array(self, schema, v, out, indent, loops, refs):
+        pad = "    " * indent
+        items = schema.get("items")
+        if isinstance(items, dict):
+            x = self._next("x")
+            inner: List[str] = []
+            self._emit(items, x, inner, indent + 1, loops + 1, refs)
+            if inner:
+                out.append(f"{pad}for {x} in {v}:")
+                out.extend(inner)
+        elif isinstance(items, list):
+            for i, sub in enumerate(items):
+                x = self._next("x")
+                inner = []
+                self._emit(sub, x, inner, indent + 1, loops, refs)
+                if inner:
+                    out.append(f"{pad}if len({v}) > {i}:")
+                    out.append(f"{pad}    {x} = {v}[{i}]")
+                    out.extend(inner)
+            additional = schema.get("additionalItems", True)
+            if isinstance(additional, dict):
+                x = self._next("x")
+                inner = []
+                self._emit(additional, x, inner, indent + 1, loops + 1, refs)
+                if inner:
+                    out.append(f"{pad}for {x} in {v}[{len(items)}:]:")
+                    out.extend(inner)
+            elif not additional:
+                out.append(f"{pad}if len({v}) > {len(items)}: return False")
+        elif items is not None:
+            raise Unsupported(f"items {items!r}")
+        if "minItems" in schema:
+            out.append(f"{pad}if len({v}) < {int(schema['minItems'])!r}: return False")
+        if "maxItems" in schema:
+            out.append(f"{pad}if len({v}) > {int(schema['maxItems'])!r}: return False")
+        if schema.get("uniqueItems"):
+            out.append(f"{pad}if not _uniq({v}): return False")
+
+    def _string(self, schema, v, out, indent, loops, refs):
+        pad = "    " * indent
+        if "minLength" in schema:
+            out.append(f"{pad}if len({v}) < {int(schema['minLength'])!r}: return False")
+        if "maxLength" in schema:
+            out.append(f"{pad}if len({v}) > {int(schema['maxLength'])!r}: return False")
+        if "pattern" in schema:
+            out.append(f"{pad}if not {self._regex(schema['pattern'])}.search({v}): return False")
+
+    def _number(self, schema, v, out, indent, loops, refs):
+        pad = "    " * indent
+        for keyword, exclusive, op, strict_op in (("minimum", "exclusiveMinimum", "<", "<="),
+                                                  ("maximum", "exclusiveMaximum", ">", ">=")):
+            if keyword in schema:
+                bound = schema[keyword]
+                if not isinstance(bound, (int, float)) or isinstance(bound, bool):
+                    raise Unsupported(keyword)
+                out.append(f"{pad}if {v} {strict_op if schema.get(exclusive, False) else op} {bound!r}: return False")
+
+    def source(self) -> str:
+        return "\n".join(["import re", "", *self.constants, "", "", *self.functions])
+
+
+def compile_validators(spec: Dict[str, Any], operations: Dict[OperationKey, Dict[str, Any]]):
+    """Generated source and ``{(path, method): {status: function name}}`` for every response.
+
+    The status table holds ``None`` where schemathesis has nothing to check and
+    ``FALLBACK`` where the schema could not be compiled.
+    """
+    compiler = _Compiler(spec)
+    table: Dict[OperationKey, Dict[str, Optional[str]]] = {}
+    if not str(spec.get("openapi", "")).startswith("3.0"):
+        return compiler.source(), table  # only the OpenAPI 3.0 response rules are mirrored
+    for key, op in operations.items():
+        statuses = table[key] = {}
+        for status, definition in op.get("responses", {}).items():
+            option = next(iter((definition.get("content") or {}).values()), None)
+            schema = _convert(option["schema"]) if option and "schema" in option else None
+            if not schema:
+                statuses[str(status)] = None
+                continue
+            name = compiler._next("_op")
+            try:
+                _VALIDATOR_CLS.check_schema(schema)  # jsonschema.validate raises SchemaError first
+                compiler.function(name, schema)
+            except (Unsupported, jsonschema.SchemaError, RecursionError):
+                statuses[str(status)] = FALLBACK
+            else:
+                statuses[str(status)] = name
+    return compiler.source(), table
+
+
+class ResponseValidators:
+    """Compiled validators for one spec plus fast-path/fallback counters."""
+
+    def __init__(self, table: Dict[OperationKey, Dict[str, Optional[str]]], code, cache_hit: bool, seconds: float):
+        namespace = {"__builtins__": builtins, "_equal": _equal, "_uniq": _uniq,
+                     "_conforms": _FORMAT_CHECKER.conforms}
+        exec(code, namespace)
+        self._table = {key: {status: (namespace[name] if name else name) for status, name in statuses.items()}
+                       for key, statuses in table.items()}
+        self.compiled = sum(1 for statuses in table.values() for name in statuses.values() if name)
+        self.not_compiled = sum(1 for statuses in table.values() for name in statuses.values() if name == FALLBACK)
+        self.cache_hit = cache_hit
+        self.seconds = seconds
+        self.passed = 0
+        self.handed_off = 0
+
+    def check(self, path: str, method: str, response, data: Any) -> bool:
+        """True when schemathesis' ``validate_response`` is known to accept this response.
+
+        ``False`` means "not proven": the caller runs schemathesis for the verdict
+        and its error message.
+        """
+        valid = self._check(path, method.lower(), response, data)
+        if valid:
+            self.passed += 1
+        else:
+            self.handed_off += 1
+        return valid
+
+    def _check(self, path: str, method: str, response, data: Any) -> bool:
+        statuses = self._table.get((path, method))
+        if statuses is None:
+            return False
+        status = str(response.status_code)
+        if status in statuses:
+            validator = statuses[status]
+        elif "default" in statuses:
+            validator = statuses["default"]
+        else:
+            return True  # undocumented status: schemathesis does not check the body
+        if validator is None:
+            return True
+        if validator == FALLBACK:
+            return False
+        content_type = response.headers.get("Content-Type")
+        if content_type is None:
+            return False
+        if not is_json_media_type(content_type):
+            return True
+        try:
+            return validator(data)
+        except Exception:
+            return False
+
+    def summary(self) -> str:
+        source = "binary cache" if self.cache_hit else "generated, cache rebuilt"
+        return (f"Response validators: {self.compiled} compiled, {self.not_compiled} left to schemathesis "
+                f"({source}, {self.seconds * 1000:.0f}ms); {self.passed} responses passed on the compiled path, "
+                f"{self.handed_off} handed to schemathesis")
+
+
+def validate_response(schema, validators: Optional[ResponseValidators], path: str, method: str,
+                      response, data: Any, checked: Any):
+    """Schema-check ``response`` (decoded as ``data``), validating only ``checked`` of its body.
+
+    ``checked`` is ``data`` itself or the part a validation policy keeps. The
+    compiled validators confirm valid bodies; anything else gets schemathesis'
+    verdict, raised as its exception. Errors in a reduced body are reported
+    against the whole body so their indices are the real ones.
+    """
+    if validators is not None and validators.check(path, method, response, checked):
+        return
+    # Schemathesis expects method in lowercase
+    st_endpoint = schema[path][method.lower()]
+    if checked is data:
+        st_endpoint.validate_response(response)
+        return
+    try:
+        st_endpoint.validate_response(response_with_body(response, checked))
+    except Exception:
+        st_endpoint.validate_response(response)
+
+
+def validators_cache_file(spec_path: str, sha256: str) -> Path:
+    stem = Path(spec_path).stem
+    return cache_dir_for(spec_path) / (
+        f"{stem}.validators-{sha256[:24]}-py{sys.version_info[0]}{sys.version_info[1]}"
+        f"-v{VALIDATORS_FORMAT_VERSION}.bin"
+    )
+
+
+def load_validators(spec_path: str, sha256: str, spec: Dict[str, Any],
+                    operations: Dict[OperationKey, Dict[str, Any]]) -> ResponseValidators:
+    """Validators for ``spec_path``, from the on-disk cache when it matches the spec and toolchain."""
+    start = time.perf_counter()
+    fingerprint = _fingerprint()
+    cache_file = validators_cache_file(spec_path, sha256) if cache_enabled() else None
+    payload = _read_cache(cache_file, sha256, VALIDATORS_FORMAT_VERSION) if cache_file is not None else None
+    if payload is not None and payload.get("fingerprint") != fingerprint:
+        payload = None
+    hit = payload is not None
+    if payload is None:
+        source, table = compile_validators(spec, operations)
+        code = compile(source, f"<response validators for {Path(spec_path).name}>", "exec")
+        payload = {"format": VALIDATORS_FORMAT_VERSION, "sha256": sha256, "fingerprint": fingerprint,
+                   "code": code, "table": table}
+        if cache_file is not None:
+            _write_cache(cache_file, payload, f"{Path(spec_path).stem}.validators-*.bin")
+    return ResponseValidators(payload["table"], payload["code"], hit, time.perf_counter() - start)
@@ -0,0 +1,186 @@
+"""Retry policies with jittered backoff, Retry-After support and a global budget."""
+
+
+import os
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, replace
+from email.utils import parsedate_to_datetime
+from random import Random
+from typing import Deque, Dict, FrozenSet, List, Optional, Tuple, Type
+from urllib.parse import urlparse
+
+import requests
+
+from .validation_policy import Reservoir
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How one kind of request is retried."""
+    max_attempts: int = 3
+    backoff_base: float = 0.5
+    backoff_max: float = 8.0
+    retry_statuses: FrozenSet[int] = frozenset({429, 502, 503, 504})
+    retry_errors: Tuple[Type[BaseException], ...] = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+    timeout: Optional[float] = None  # overrides the caller's timeout when set
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential delay before retry number ``attempt`` (1-based)."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1))))
+
+
+# Idempotent reads retry on throttling, gateway errors and transport failures.
+# Writes only retry when the server cannot have acted on them: 429, or a connect
+# timeout before the request was sent.
+METHOD_POLICIES: Dict[str, RetryPolicy] = {
+    "GET": RetryPolicy(),
+    "DELETE": RetryPolicy(),
+    "POST": RetryPolicy(retry_statuses=frozenset({429}), retry_errors=(requests.exceptions.ConnectTimeout,)),
+    "PATCH": RetryPolicy(retry_statuses=frozenset({429}), retry_errors=(requests.exceptions.ConnectTimeout,)),
+}
+
+# Per-path overrides, matched as a case-insensitive suffix of the URL path.
+PATH_POLICIES: Dict[str, RetryPolicy] = {
+    # Slow exports/audits need room before we call them dead.
+    "/iw-tool/export/tests/query": RetryPolicy(max_attempts=2, timeout=60),
+    "/examinee/audit/query": RetryPolicy(max_attempts=2, timeout=45),
+    # Client-credentials token requests have no side effects, so retry them like reads.
+    "/connect/token": RetryPolicy(),
+}
+
+
+@dataclass
+class Attempt:
+    """One send of a request; attempt 1 is the first try, later ones are retries."""
+    method: str
+    path: str
+    attempt: int
+    latency: float
+    status: Optional[int] = None
+    error: Optional[str] = None
+
+
+class RetryBudget:
+    """Cap retries at ``min_retries`` plus ``ratio`` of all first attempts."""
+
+    def __init__(self, ratio: float = 0.2, min_retries: int = 10):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.requests = 0
+        self.retries = 0
+        self.denied = 0
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self.retries < self.min_retries + self.ratio * self.requests:
+                self.retries += 1
+                return True
+            self.denied += 1
+            return False
+
+
+class AttemptLog:
+    """First attempts and retries kept apart so latency stats stay honest.
+
+    Memory stays flat on long soak runs: attempts are counted, the percentiles
+    come from a uniform sample of ``keep`` first-attempt latencies, and only the
+    last ``keep`` retries are held (``RETRY_LOG_SAMPLE``, default 10000).
+    """
+
+    def __init__(self, keep: Optional[int] = None, rng: Optional[Random] = None):
+        keep = keep or int(os.getenv("RETRY_LOG_SAMPLE", "10000"))
+        self.first_attempt_count = 0
+        self.retry_count = 0
+        self.retries: Deque[Attempt] = deque(maxlen=keep)
+        self._latencies = Reservoir(keep, rng or Random())
+        self._lock = threading.Lock()
+
+    def record(self, attempt: Attempt):
+        with self._lock:
+            if attempt.attempt == 1:
+                self.first_attempt_count += 1
+                slot = self._latencies.slot()
+                if slot is not None:
+                    self._latencies.put(slot, attempt.latency)
+            else:
+                self.retry_count += 1
+                self.retries.append(attempt)
+
+    def first_attempt_latencies(self) -> List[float]:
+        """Every first-attempt latency, or a uniform sample of ``keep`` of them."""
+        with self._lock:
+            return list(self._latencies.items)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryEngine:
+    """Resolve the policy for a request and drive its attempts.
+
+    Environment:
+      RETRY_MAX_ATTEMPTS    override max attempts for every policy
+      RETRY_BUDGET_RATIO    retries allowed per first attempt (default 0.2)
+      RETRY_BUDGET_MIN      retries always allowed regardless of ratio (default 10)
+      RETRY_LOG_SAMPLE      first-attempt latencies and retries kept for the summary (default 10000)
+    """
+
+    def __init__(self, method_policies: Optional[Dict[str, RetryPolicy]] = None,
+                 path_policies: Optional[Dict[str, RetryPolicy]] = None,
+                 budget: Optional[RetryBudget] = None):
+        self.method_policies = method_policies if method_policies is not None else METHOD_POLICIES
+        self.path_policies = {k.lower(): v for k, v in (path_policies if path_policies is not None else PATH_POLICIES).items()}
+        self.budget = budget or RetryBudget(
+            ratio=float(os.getenv("RETRY_BUDGET_RATIO", "0.2")),
+            min_retries=int(os.getenv("RETRY_BUDGET_MIN", "10")),
+        )
+        self.max_attempts_override = os.getenv("RETRY_MAX_ATTEMPTS")
+        self.log = AttemptLog()
+
+    def policy_for(self, method: str, url: str) -> RetryPolicy:
+        path = urlparse(url).path.lower()
+        policy = next((p for suffix, p in self.path_policies.items() if path.endswith(suffix)), None)
+        if policy is None:
+            policy = self.method_policies.get(method.upper(), RetryPolicy(max_attempts=1))
+        if self.max_attempts_override:
+            policy = replace(policy, max_attempts=int(self.max_attempts_override))
+        return policy
+
+    def delay_for(self, policy: RetryPolicy, attempt: int, response: Optional[requests.Response]) -> float:
+        """Backoff before the next attempt, honouring Retry-After up to ``backoff_max``."""
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                return min(retry_after, policy.backoff_max)
+        return policy.backoff(attempt)
+
+    def summary(self) -> str:
+        firsts = sorted(self.log.first_attempt_latencies())
+        if firsts:
+            p50 = firsts[len(firsts) // 2]
+            p95 = firsts[min(len(firsts) - 1, int(len(firsts) * 0.95))]
+            latency = f"first-attempt latency p50 {p50 * 1000:.0f}ms / p95 {p95 * 1000:.0f}ms"
+        else:
+            latency = "no requests"
+        return (
+            f"Retries: {self.log.retry_count} retried attempts over {self.log.first_attempt_count} requests, "
+            f"{self.budget.denied} denied by budget; {latency}"
+        )
@@ -0,0 +1,177 @@
+"""Binary cache of the parsed OpenAPI spec and its resolved operation table.
+
+The cache file holds a ``marshal`` dump of the spec plus one entry per
+operation with its path- and operation-level parameters merged and ``$ref``s
+resolved. It is keyed by the SHA-256 of the spec file, so editing
+``openapi.json`` rebuilds it on the next load, and is read through ``mmap``.
+Only the standard library is used, so scripts can load it without pulling in
+pytest or schemathesis.
+"""
+
+
+import hashlib
+import json
+import marshal
+import mmap
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+
+FORMAT_VERSION = 2
+HTTP_METHODS = ("get", "put", "post", "delete", "options", "head", "patch", "trace")
+
+OperationKey = Tuple[str, str]  # (path as written in the spec, lower-case method)
+
+
+class CompiledSpec(NamedTuple):
+    sha256: str
+    spec: Dict[str, Any]
+    operations: Dict[OperationKey, Dict[str, Any]]
+    cache_hit: bool
+    seconds: float
+
+
+def resolve_ref(spec: Dict[str, Any], ref: str) -> Any:
+    """Target of a local JSON pointer such as ``#/components/schemas/Result``."""
+    if not ref.startswith("#/"):
+        raise ValueError(f"Only local $refs are supported, got {ref!r}")
+    node: Any = spec
+    for part in ref[2:].split("/"):
+        node = node[part.replace("~1", "/").replace("~0", "~")]
+    return node
+
+
+def _deref(spec: Dict[str, Any], node: Any) -> Any:
+    """Follow ``$ref`` chains at the top of ``node`` (nested schemas are left as-is)."""
+    seen = set()
+    while isinstance(node, dict) and "$ref" in node:
+        ref = node["$ref"]
+        if ref in seen:
+            raise ValueError(f"Circular $ref {ref!r}")
+        seen.add(ref)
+        node = resolve_ref(spec, ref)
+    return node
+
+
+def build_operations(spec: Dict[str, Any]) -> Dict[OperationKey, Dict[str, Any]]:
+    """Per-operation table: merged, dereferenced parameters, request body and responses."""
+    operations = {}
+    for path, path_item in spec.get("paths", {}).items():
+        path_item = _deref(spec, path_item)
+        shared = [_deref(spec, p) for p in path_item.get("parameters", [])]
+        for method in HTTP_METHODS:
+            op = path_item.get(method)
+            if not isinstance(op, dict):
+                continue
+            # Operation-level parameters override path-level ones with the same name and
+            # location; a duplicate within one level keeps its first declaration.
+            own = {}
+            for p in op.get("parameters", []):
+                p = _deref(spec, p)
+                if isinstance(p, dict):
+                    own.setdefault((p.get("name"), p.get("in")), p)
+            params = {}
+            for p in shared:
+                if isinstance(p, dict):
+                    params.setdefault((p.get("name"), p.get("in")), p)
+            params.update(own)
+            operations[(path, method)] = {
+                "operationId": op.get("operationId"),
+                "tags": op.get("tags", []),
+                "parameters": list(params.values()),
+                "requestBody": _deref(spec, op.get("requestBody")),
+                "responses": {code: _deref(spec, r) for code, r in op.get("responses", {}).items()},
+            }
+    return operations
+
+
+def cache_enabled() -> bool:
+    return os.getenv("SPEC_CACHE", "true").lower() == "true"
+
+
+def cache_keep() -> int:
+    """Files of one kind kept in the cache directory (``SPEC_CACHE_KEEP``, default 8)."""
+    return max(1, int(os.getenv("SPEC_CACHE_KEEP", "8")))
+
+
+def cache_dir_for(spec_path: str) -> Path:
+    """``SPEC_CACHE_DIR``, or a ``.cache`` directory next to the spec file."""
+    configured = os.getenv("SPEC_CACHE_DIR")
+    return Path(configured) if configured else Path(spec_path).resolve().parent / ".cache"
+
+
+def cache_file_for(spec_path: str, sha256: str) -> Path:
+    # marshal's format is only stable within one Python version
+    stem = Path(spec_path).stem
+    return cache_dir_for(spec_path) / (
+        f"{stem}-{sha256[:24]}-py{sys.version_info[0]}{sys.version_info[1]}-v{FORMAT_VERSION}.bin"
+    )
+
+
+def _read_cache(cache_file: Path, sha256: str, format_version: int = FORMAT_VERSION) -> Optional[Dict[str, Any]]:
+    try:
+        with open(cache_file, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            payload = marshal.loads(mm)
+    except (OSError, ValueError, EOFError, TypeError):
+        return None
+    if not isinstance(payload, dict) or payload.get("sha256") != sha256 or payload.get("format") != format_version:
+        return None
+    try:
+        os.utime(cache_file)  # last used, so eviction keeps the versions still in use
+    except OSError:
+        pass
+    return payload
+
+
+def _mtime(path: Path) -> float:
+    try:
+        return path.stat().st_mtime
+    except OSError:  # removed by another process
+        return 0.0
+
+
+def _write_cache(cache_file: Path, payload: Dict[str, Any], stale_glob: str):
+    """Atomically write ``payload`` and drop all but the most recently used files matching ``stale_glob``.
+
+    A shared ``SPEC_CACHE_DIR`` serves agents and branches on other spec
+    versions, so their files are only evicted beyond ``cache_keep()``.
+    """
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=cache_file.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(marshal.dumps(payload))
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, cache_file)
+        entries = sorted(cache_file.parent.glob(stale_glob), key=_mtime, reverse=True)
+        for stale in entries[cache_keep():]:
+            if stale != cache_file:
+                stale.unlink(missing_ok=True)
+    except OSError:
+        pass  # a read-only checkout still works, just without the cache
+
+
+def load_compiled(spec_path: str) -> CompiledSpec:
+    """Spec and operation table for ``spec_path``, from the binary cache when it is current."""
+    start = time.perf_counter()
+    with open(spec_path, "rb") as f:
+        data = f.read()
+    sha256 = hashlib.sha256(data).hexdigest()
+    cache_file = cache_file_for(spec_path, sha256) if cache_enabled() else None
+    payload = _read_cache(cache_file, sha256) if cache_file is not None else None
+    hit = payload is not None
+    if payload is None:
+        spec = json.loads(data)
+        payload = {"format": FORMAT_VERSION, "sha256": sha256, "spec": spec, "operations": build_operations(spec)}
+        if cache_file is not None:
+            _write_cache(cache_file, payload, f"{Path(spec_path).stem}-*-py*-v*.bin")
+    return CompiledSpec(sha256, payload["spec"], payload["operations"], hit, time.perf_counter() - start)
+
+
+def load_spec(spec_path: str) -> Dict[str, Any]:
+    """Parsed spec for ``spec_path`` (a drop-in for ``json.load`` in scripts)."""
+    return load_compiled(spec_path).spec
@@ -0,0 +1,214 @@
+"""Process-wide registry of the parsed OpenAPI spec and its schemathesis schema.
+
+The spec is loaded once per file on first use (from the binary spec cache when
+it is current) and shared, read-only, by every test class and module; the
+schemathesis schema is built from the same parsed document instead of
+re-reading the file.
+"""
+
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .operation_index import OperationIndex
+from .spec_cache import OperationKey, load_compiled
+
+
+DEFAULT_OPENAPI_PATH = "schema/openapi.json"
+
+
+def _read_only(*_args, **_kwargs):
+    raise TypeError("the shared OpenAPI spec is read-only; copy it before modifying")
+
+
+class FrozenDict(dict):
+    """dict that rejects mutation; repr, equality and JSON encoding are unchanged."""
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _read_only
+    __ior__ = _read_only
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+
+
+class FrozenList(list):
+    """list that rejects mutation; repr, equality and JSON encoding are unchanged."""
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = clear = sort = reverse = _read_only
+
+    def __reduce__(self):
+        return FrozenList, (list(self),)
+
+
+_CONTAINERS = (dict, list, FrozenDict, FrozenList)
+
+
+def freeze(value: Any, _memo: Optional[Dict[int, Any]] = None) -> Any:
+    """Recursively convert parsed JSON into FrozenDict/FrozenList.
+
+    Objects shared within the input stay shared in the output.
+    """
+    memo = {} if _memo is None else _memo
+    frozen = memo.get(id(value))
+    if frozen is not None:
+        return frozen
+    if isinstance(value, dict):
+        frozen = FrozenDict({k: freeze(v, memo) if type(v) in _CONTAINERS else v for k, v in value.items()})
+    elif isinstance(value, list):
+        frozen = FrozenList([freeze(v, memo) if type(v) in _CONTAINERS else v for v in value])
+    else:
+        return value
+    memo[id(value)] = frozen
+    return frozen
+
+
+class SpecRegistry:
+    """Lazily parsed spec and schemathesis schema for one OpenAPI file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.spec_seconds: Optional[float] = None
+        self.schema_seconds: Optional[float] = None
+        self.cache_hit = False
+        self.sha256: Optional[str] = None
+        self.uses = 0
+        self._spec: Optional[FrozenDict] = None
+        self._operations: Optional[FrozenDict] = None
+        self._index: Optional[OperationIndex] = None
+        self._validators = None
+        self._stream_schemas = None
+        self._memo = None
+        self._schema = None
+        self._lock = threading.Lock()
+
+    @property
+    def spec(self) -> FrozenDict:
+        """The raw OpenAPI document (read-only)."""
+        self.uses += 1
+        if self._spec is None:
+            with self._lock:
+                if self._spec is None:
+                    start = time.perf_counter()
+                    compiled = load_compiled(self.path)
+                    memo: Dict[int, Any] = {}
+                    spec = freeze(compiled.spec, memo)
+                    self._operations = freeze(compiled.operations, memo)
+                    self.sha256 = compiled.sha256
+                    self.cache_hit = compiled.cache_hit
+                    self.spec_seconds = time.perf_counter() - start
+                    self._spec = spec
+        return self._spec
+
+    @property
+    def operations(self) -> Dict[OperationKey, FrozenDict]:
+        """Resolved operation table keyed by (path, lower-case method); see spec_cache."""
+        if self._operations is None:
+            self.spec
+        return self._operations
+
+    @property
+    def index(self) -> OperationIndex:
+        """Parameter names, required sets, types/enums and body schema per (path, method)."""
+        if self._index is None:
+            spec, operations = self.spec, self.operations
+            with self._lock:
+                if self._index is None:
+                    self._index = OperationIndex(spec, operations)
+        return self._index
+
+    @property
+    def validators(self):
+        """Compiled response validators (see response_validators), or None when COMPILED_VALIDATORS=false."""
+        from .response_validators import compiled_validation_enabled, load_validators  # needs schemathesis
+
+        if not compiled_validation_enabled():
+            return None
+        if self._validators is None:
+            spec, operations = self.spec, self.operations
+            with self._lock:
+                if self._validators is None:
+                    self._validators = load_validators(self.path, self.sha256, spec, operations)
+        return self._validators
+
+    @property
+    def stream_schemas(self):
+        """Per-response schema graphs for validating streamed bodies (see stream_validator)."""
+        from .stream_validator import StreamSchemas  # needs schemathesis
+
+        if self._stream_schemas is None:
+            spec, operations = self.spec, self.operations
+            with self._lock:
+                if self._stream_schemas is None:
+                    self._stream_schemas = StreamSchemas(spec, operations)
+        return self._stream_schemas
+
+    @property
+    def validation_memo(self):
+        """Stored verdicts for bodies that already passed (see validation_memo), or None when VALIDATION_MEMO=false."""
+        from .validation_memo import ValidationMemo, memo_enabled  # needs schemathesis
+
+        if not memo_enabled():
+            return None
+        if self._memo is None:
+            self.spec
+            with self._lock:
+                if self._memo is None:
+                    self._memo = ValidationMemo(self.path, self.sha256)
+        return self._memo
+
+    def validation_summaries(self) -> List[str]:
+        """One line per response-validation component this registry has used."""
+        return [component.summary() for component in (self._validators, self._stream_schemas, self._memo)
+                if component is not None]
+
+    def save(self):
+        """Persist what the run learned (the validation memo)."""
+        if self._memo is not None:
+            self._memo.save()
+
+    @property
+    def schema(self):
+        """schemathesis schema built from the shared document."""
+        if self._schema is None:
+            spec = self.spec
+            with self._lock:
+                if self._schema is None:
+                    from schemathesis import openapi as st_openapi  # heavy; only when validating
+
+                    start = time.perf_counter()
+                    schema = st_openapi.from_dict(spec, location=Path(self.path).resolve().as_uri())
+                    self.schema_seconds = time.perf_counter() - start
+                    self._schema = schema
+        return self._schema
+
+    def summary(self) -> str:
+        if self.spec_seconds is None:
+            return f"OpenAPI registry: {self.path} not loaded"
+        schema = f", schemathesis schema {self.schema_seconds * 1000:.0f}ms" if self.schema_seconds is not None else ""
+        source = "binary cache" if self.cache_hit else "parsed, cache rebuilt"
+        return (f"OpenAPI registry: {self.path} loaded once in {self.spec_seconds * 1000:.0f}ms "
+                f"({source}){schema}; shared by {self.uses} lookups")
+
+
+_registries: Dict[str, SpecRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_spec_registry(path: Optional[str] = None) -> SpecRegistry:
+    """Shared registry for ``path`` (default ``OPENAPI_PATH``)."""
+    path = path or os.getenv("OPENAPI_PATH", DEFAULT_OPENAPI_PATH)
+    key = os.path.abspath(path)
+    with _registries_lock:
+        registry = _registries.get(key)
+        if registry is None:
+            registry = _registries[key] = SpecRegistry(path)
+        return registry
+
+
+def loaded_registries():
+    """Registries that have parsed their spec, for end-of-run reporting."""
+    return [r for r in _registries.values() if r.spec_seconds is not None]
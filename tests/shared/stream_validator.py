@@ -0,0 +1,591 @@
+"""Schema validation over incremental JSON events, for streamed response bodies.
+
+The response schema of an operation is compiled once into a graph of nodes
+(``$ref``s resolved and converted the way schemathesis converts them), and a
+body is validated by walking the parser's ``start_map``/``map_key``/... events
+against that graph. Nothing but the current path is held, so memory stays flat
+however long a list response is. Only subtrees whose keyword needs the whole
+value (``enum``, ``anyOf``/``oneOf``/``allOf``/``not``, ``uniqueItems``) are
+materialised, one subtree at a time. Errors carry the JSON path of the value,
+e.g. ``$[1532].examinee-id``.
+"""
+
+
+import re
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import jsonschema
+from jsonschema._utils import equal as _equal, uniq as _uniq
+
+from .json_stream import Event, JSONStreamError
+from .response_validators import Unsupported, _convert
+from .spec_cache import OperationKey, resolve_ref
+from .validation_policy import ENVELOPE, FULL, Sampler, ValidationPolicy, _Reducer
+
+
+MAX_ERRORS = 20  # errors kept per body; later ones are only counted
+
+_FORMAT_CHECKER = jsonschema.Draft202012Validator.FORMAT_CHECKER
+_IDENTIFIER = re.compile(r"[A-Za-z_][\w-]*")
+_CONTAINERS = {"start_map": "object", "start_array": "array"}
+_KEYWORDS = set(jsonschema.Draft4Validator.VALIDATORS)
+
+
+def _is_type(value: Any, name: str) -> bool:
+    if name == "object":
+        return isinstance(value, dict)
+    if name == "array":
+        return isinstance(value, list)
+    if name == "string":
+        return isinstance(value, str)
+    if name == "boolean":
+        return isinstance(value, bool)
+    if name == "null":
+        return value is None
+    if name == "integer":
+        return isinstance(value, int) and not isinstance(value, bool)
+    if name == "number":
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    return False
+
+
+def _short(value: Any) -> str:
+    text = repr(value)
+    return text if len(text) <= 80 else text[:77] + "..."
+
+
+def format_path(path: Tuple[Any, ...]) -> str:
+    """``("items", 3, "examinee-id")`` -> ``$.items[3].examinee-id``."""
+    parts = ["$"]
+    for part in path:
+        if isinstance(part, int):
+            parts.append(f"[{part}]")
+        elif _IDENTIFIER.fullmatch(part):
+            parts.append(f".{part}")
+        else:
+            parts.append(f"[{part!r}]")
+    return "".join(parts)
+
+
+class StreamValidationError(NamedTuple):
+    path: Tuple[Any, ...]
+    message: str
+
+    def __str__(self) -> str:
+        return f"{format_path(self.path)}: {self.message}"
+
+
+class _Errors:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.items: List[StreamValidationError] = []
+        self.count = 0
+
+    def add(self, path: Tuple[Any, ...], message: str):
+        self.count += 1
+        if len(self.items) < self.limit:
+            self.items.append(StreamValidationError(path, message))
+
+
+class _Node:
+    """One compiled schema. ``inner`` makes it a wrapper (``$ref`` alias or nullable)."""
+
+    __slots__ = ("inner", "nullable", "types", "enum", "format", "min_length", "max_length", "pattern",
+                 "minimum", "maximum", "exclusive_minimum", "exclusive_maximum", "multiple_of",
+                 "required", "properties", "patterns", "additional", "min_properties", "max_properties",
+                 "items", "item_list", "additional_items", "min_items", "max_items", "unique",
+                 "all_of", "any_of", "one_of", "not_", "buffered", "anything")
+
+    def __init__(self):
+        for slot in self.__slots__:
+            setattr(self, slot, None)
+        self.nullable = self.unique = self.buffered = self.anything = False
+        self.required = ()
+
+
+class _NodeFactory:
+    """Builds the node graph for a spec; shared ``$ref``s become shared nodes."""
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.spec = spec
+        self._refs: Dict[str, _Node] = {}
+        self._unsupported: Dict[str, str] = {}  # ref -> why it cannot be compiled
+
+    def ref(self, ref: str) -> _Node:
+        if ref in self._unsupported:
+            raise Unsupported(self._unsupported[ref])
+        node = self._refs.get(ref)
+        if node is None:
+            try:
+                target = resolve_ref(self.spec, ref)
+            except (KeyError, TypeError, ValueError) as e:
+                raise Unsupported(f"cannot resolve {ref}: {e}") from e
+            registered = len(self._refs)
+            node = self._refs[ref] = _Node()  # registered first so recursive schemas terminate
+            try:
+                self._fill(node, _convert(target))
+            except (Unsupported, re.error, TypeError) as e:
+                # Drop the half-built node and every node built on it meanwhile, so no later root uses them
+                for name in list(self._refs)[registered:]:
+                    del self._refs[name]
+                self._unsupported[ref] = f"{ref}: {e}"
+                raise
+        return node
+
+    def node(self, schema: Any) -> _Node:
+        node = _Node()
+        self._fill(node, schema)
+        return node
+
+    def _fill(self, node: _Node, schema: Any):
+        if not isinstance(schema, dict):
+            raise Unsupported(f"non-object schema {schema!r}")
+        if "$ref" in schema:  # Draft 4 ignores every keyword next to $ref
+            node.inner = self.ref(schema["$ref"])
+            return
+        if "dependencies" in schema or isinstance(schema.get("id"), str):
+            raise Unsupported("dependencies/id")
+        any_of = schema.get("anyOf")
+        if (isinstance(any_of, list) and len(any_of) == 2 and {"type": "null"} in any_of
+                and not (_KEYWORDS & set(schema)) - {"anyOf"}):
+            # ``nullable: true`` as schemathesis rewrites it
+            node.nullable = True
+            node.inner = self.node(next(b for b in any_of if b != {"type": "null"}))
+            return
+
+        types = schema.get("type")
+        if types is not None:
+            node.types = (types,) if isinstance(types, str) else tuple(types)
+        if "enum" in schema:
+            node.enum = tuple(schema["enum"])
+        fmt = schema.get("format")
+        if isinstance(fmt, str) and fmt in _FORMAT_CHECKER.checkers:
+            node.format = fmt
+        node.min_length = schema.get("minLength")
+        node.max_length = schema.get("maxLength")
+        if "pattern" in schema:
+            node.pattern = re.compile(schema["pattern"])
+        node.minimum = schema.get("minimum")
+        node.maximum = schema.get("maximum")
+        node.exclusive_minimum = bool(schema.get("exclusiveMinimum", False))
+        node.exclusive_maximum = bool(schema.get("exclusiveMaximum", False))
+        node.multiple_of = schema.get("multipleOf")
+
+        node.required = tuple(schema.get("required", ()))
+        if "properties" in schema:
+            node.properties = {name: self.node(sub) for name, sub in schema["properties"].items()}
+        if "patternProperties" in schema:
+            node.patterns = [(re.compile(p), self.node(sub)) for p, sub in schema["patternProperties"].items()]
+        additional = schema.get("additionalProperties", True)
+        node.additional = self.node(additional) if isinstance(additional, dict) else (None if additional else False)
+        node.min_properties = schema.get("minProperties")
+        node.max_properties = schema.get("maxProperties")
+
+        items = schema.get("items")
+        if isinstance(items, dict):
+            node.items = self.node(items)
+        elif isinstance(items, list):
+            node.item_list = [self.node(sub) for sub in items]
+            extra = schema.get("additionalItems", True)
+            node.additional_items = self.node(extra) if isinstance(extra, dict) else (None if extra else False)
+        elif items is not None:
+            raise Unsupported(f"items {items!r}")
+        node.min_items = schema.get("minItems")
+        node.max_items = schema.get("maxItems")
+        node.unique = bool(schema.get("uniqueItems", False))
+
+        for keyword, attr in (("allOf", "all_of"), ("anyOf", "any_of"), ("oneOf", "one_of")):
+            if keyword in schema:
+                setattr(node, attr, [self.node(sub) for sub in schema[keyword]])
+        if "not" in schema:
+            node.not_ = self.node(schema["not"])
+
+        node.buffered = bool(node.enum is not None or node.unique or node.all_of or node.any_of
+                             or node.one_of or node.not_ is not None)
+        node.anything = not (node.buffered or node.types or node.format or node.pattern
+                             or node.properties or node.patterns or node.additional is not None
+                             or node.items is not None or node.item_list is not None or node.required
+                             or any(v is not None for v in (node.min_length, node.max_length, node.minimum,
+                                                            node.maximum, node.multiple_of, node.min_properties,
+                                                            node.max_properties, node.min_items, node.max_items)))
+
+
+def _check_scalar(node: _Node, value: Any, path: Tuple[Any, ...], errors: _Errors):
+    """Keywords that apply to strings and numbers."""
+    if node.format is not None and not _FORMAT_CHECKER.conforms(value, node.format):
+        errors.add(path, f"{_short(value)} is not a {node.format!r}")
+    if isinstance(value, str):
+        if node.min_length is not None and len(value) < node.min_length:
+            errors.add(path, f"{_short(value)} is too short")
+        if node.max_length is not None and len(value) > node.max_length:
+            errors.add(path, f"{_short(value)} is too long")
+        if node.pattern is not None and not node.pattern.search(value):
+            errors.add(path, f"{_short(value)} does not match {node.pattern.pattern!r}")
+    elif _is_type(value, "number"):
+        if node.minimum is not None and (value <= node.minimum if node.exclusive_minimum else value < node.minimum):
+            errors.add(path, f"{value!r} is less than the minimum of {node.minimum!r}")
+        if node.maximum is not None and (value >= node.maximum if node.exclusive_maximum else value > node.maximum):
+            errors.add(path, f"{value!r} is greater than the maximum of {node.maximum!r}")
+        if node.multiple_of is not None:
+            quotient = value / node.multiple_of
+            if not float(quotient).is_integer():
+                errors.add(path, f"{value!r} is not a multiple of {node.multiple_of!r}")
+
+
+def _types_error(node: _Node, shown: str) -> str:
+    return f"{shown} is not of type {', '.join(repr(t) for t in node.types)}"
+
+
+def check_value(node: _Node, value: Any, path: Tuple[Any, ...], errors: _Errors):
+    """Validate an already materialised value (a buffered subtree)."""
+    while node.inner is not None:
+        if node.nullable and value is None:
+            return
+        node = node.inner
+    if node.anything:
+        return
+    if node.types and not any(_is_type(value, t) for t in node.types):
+        errors.add(path, _types_error(node, _short(value)))
+        return
+    if node.enum is not None and not any(_equal(e, value) for e in node.enum):
+        errors.add(path, f"{_short(value)} is not one of {_short(list(node.enum))}")
+    if isinstance(value, dict):
+        _check_object(node, value, path, errors)
+    elif isinstance(value, list):
+        _check_array(node, value, path, errors)
+    else:
+        _check_scalar(node, value, path, errors)
+    _check_combinators(node, value, path, errors)
+
+
+def _is_valid(node: _Node, value: Any) -> bool:
+    errors = _Errors(0)
+    check_value(node, value, (), errors)
+    return errors.count == 0
+
+
+def _check_combinators(node: _Node, value: Any, path: Tuple[Any, ...], errors: _Errors):
+    for sub in node.all_of or ():
+        check_value(sub, value, path, errors)
+    if node.any_of and not any(_is_valid(sub, value) for sub in node.any_of):
+        errors.add(path, f"{_short(value)} is not valid under any of the given schemas")
+    if node.one_of:
+        matches = sum(1 for sub in node.one_of if _is_valid(sub, value))
+        if matches != 1:
+            reason = "any" if matches == 0 else "more than one"
+            errors.add(path, f"{_short(value)} is not valid under {reason} of the given schemas (oneOf)")
+    if node.not_ is not None and _is_valid(node.not_, value):
+        errors.add(path, f"{_short(value)} should not be valid under the 'not' schema")
+
+
+def _object_children(node: _Node, key: str, path: Tuple[Any, ...], errors: _Errors) -> List[_Node]:
+    children = []
+    if node.properties and key in node.properties:
+        children.append(node.properties[key])
+    matched = False
+    for rx, sub in node.patterns or ():
+        if rx.search(key):
+            children.append(sub)
+            matched = True
+    if not (node.properties and key in node.properties) and not matched:
+        if node.additional is False:
+            errors.add(path, f"Additional properties are not allowed ({key!r} was unexpected)")
+        elif node.additional is not None:
+            children.append(node.additional)
+    return children
+
+
+def _check_object_end(node: _Node, keys, count: int, path: Tuple[Any, ...], errors: _Errors):
+    for name in node.required:
+        if name not in keys:
+            errors.add(path, f"{name!r} is a required property")
+    if node.min_properties is not None and count < node.min_properties:
+        errors.add(path, f"object has {count} properties, fewer than minProperties {node.min_properties}")
+    if node.max_properties is not None and count > node.max_properties:
+        errors.add(path, f"object has {count} properties, more than maxProperties {node.max_properties}")
+
+
+def _check_object(node: _Node, value: dict, path: Tuple[Any, ...], errors: _Errors):
+    for key, sub in value.items():
+        for child in _object_children(node, key, path, errors):
+            check_value(child, sub, path + (key,), errors)
+    _check_object_end(node, value, len(value), path, errors)
+
+
+def _item_node(node: _Node, index: int, path: Tuple[Any, ...], errors: _Errors) -> Optional[_Node]:
+    if node.items is not None:
+        return node.items
+    if node.item_list is None:
+        return None
+    if index < len(node.item_list):
+        return node.item_list[index]
+    if node.additional_items is False:
+        errors.add(path, f"Additional items are not allowed (index {index})")
+        return None
+    return node.additional_items
+
+
+def _check_array_end(node: _Node, count: int, path: Tuple[Any, ...], errors: _Errors):
+    if node.min_items is not None and count < node.min_items:
+        errors.add(path, f"array of {count} items is too short (minItems {node.min_items})")
+    if node.max_items is not None and count > node.max_items:
+        errors.add(path, f"array of {count} items is too long (maxItems {node.max_items})")
+
+
+def _check_array(node: _Node, value: list, path: Tuple[Any, ...], errors: _Errors):
+    for index, item in enumerate(value):
+        child = _item_node(node, index, path, errors)
+        if child is not None:
+            check_value(child, item, path + (index,), errors)
+    _check_array_end(node, len(value), path, errors)
+    if node.unique and not _uniq(value):
+        errors.add(path, "array has non-unique elements")
+
+
+class StreamResult(NamedTuple):
+    errors: List[StreamValidationError]
+    error_count: int
+    events: int
+    elements: int  # array elements seen
+    checked: int   # array elements validated under the policy
+
+    def describe(self) -> str:
+        more = self.error_count - len(self.errors)
+        lines = [str(e) for e in self.errors]
+        if more > 0:
+            lines.append(f"... and {more} more")
+        return f"{self.error_count} error(s)\n" + "\n".join(lines)
+
+
+class _Walker:
+    """Recursive descent over the event stream; recursion depth is the JSON nesting depth."""
+
+    def __init__(self, events: Iterable[Event], policy: ValidationPolicy, sampler: Sampler, max_errors: int):
+        self.events = self._counting(events)
+        self.policy = policy
+        self.sampler = sampler
+        # Values built in memory are reduced the way buffered validation reduces a whole body
+        self.reducer = _Reducer(policy, sampler)
+        self.errors = _Errors(max_errors)
+        self.event_count = 0
+        self.elements = 0
+        self.checked = 0
+
+    def _counting(self, events: Iterable[Event]) -> Iterator[Event]:
+        for event in events:
+            self.event_count += 1
+            yield event
+
+    def run(self, root: _Node) -> StreamResult:
+        first = next(self.events, None)
+        if first is None:
+            raise JSONStreamError("empty body")
+        self.walk(root, first[0], first[1], ())
+        for _ in self.events:  # let the parser reject trailing data
+            pass
+        return StreamResult(self.errors.items, self.errors.count, self.event_count,
+                            self.elements + self.reducer.elements, self.checked + self.reducer.checked)
+
+    def walk(self, node: Optional[_Node], event: str, value: Any, path: Tuple[Any, ...]):
+        while node is not None and node.inner is not None:
+            if node.nullable and event == "null":
+                return
+            node = node.inner
+        if node is None or node.anything:
+            self.skip(event)
+            return
+        if node.buffered:
+            check_value(node, self.build_reduced(event, value, path), path, self.errors)
+            return
+        kind = _CONTAINERS.get(event)
+        if node.types:
+            ok = kind in node.types if kind else any(_is_type(value, t) for t in node.types)
+            if not ok:
+                self.errors.add(path, _types_error(node, f"an {kind}" if kind else _short(value)))
+                self.skip(event)
+                return
+        if event == "start_map":
+            self.walk_object(node, path)
+        elif event == "start_array":
+            self.walk_array(node, path)
+        else:
+            _check_scalar(node, value, path, self.errors)
+
+    def walk_object(self, node: _Node, path: Tuple[Any, ...]):
+        track = bool(node.required) or node.min_properties is not None or node.max_properties is not None
+        seen = set() if node.required else None
+        count = 0
+        for event, key in self.events:
+            if event == "end_map":
+                break
+            count += 1
+            if seen is not None and key in node.required:
+                seen.add(key)
+            children = _object_children(node, key, path, self.errors)
+            event, value = next(self.events)
+            if not children:
+                self.skip(event)
+            elif len(children) == 1:
+                self.walk(children[0], event, value, path + (key,))
+            else:
+                built = self.build_reduced(event, value, path + (key,))
+                for child in children:
+                    check_value(child, built, path + (key,), self.errors)
+        if track:
+            _check_object_end(node, seen or (), count, path, self.errors)
+
+    def walk_array(self, node: _Node, path: Tuple[Any, ...]):
+        level = self.policy.level
+        first = self.policy.first
+        # The elements after the first N are sampled exactly as the buffered reducer samples them
+        reservoir = self.sampler.reservoir(self.policy.sample, path)
+        index = 0
+        for event, value in self.events:
+            if event == "end_array":
+                break
+            self.elements += 1
+            child = _item_node(node, index, path, self.errors)
+            if level == ENVELOPE:
+                self.skip(event)
+            elif level == FULL or index < first:
+                if child is None:
+                    self.skip(event)
+                else:
+                    self.checked += 1
+                    self.walk(child, event, value, path + (index,))
+            else:
+                slot = reservoir.slot()  # offered even without an item schema, to keep the draws aligned
+                if slot is not None and child is not None:
+                    reservoir.put(slot, (index, child, self.build(event, value)))
+                else:
+                    if slot is not None:
+                        reservoir.put(slot, (index, None, None))
+                    self.skip(event)
+            index += 1
+        for item_index, child, item in sorted(reservoir.items, key=lambda entry: entry[0]):
+            if child is not None:
+                self.checked += 1
+                self.walk_value(child, item, path + (item_index,))
+        _check_array_end(node, index, path, self.errors)
+
+    def walk_value(self, node: _Node, value: Any, path: Tuple[Any, ...]):
+        """``walk`` over a value already built, so its arrays are sampled and its errors located as if streamed."""
+        events = self.events
+        self.events = _events_of(value)
+        try:
+            event, value = next(self.events)
+            self.walk(node, event, value, path)
+        finally:
+            self.events = events
+
+    def skip(self, event: str):
+        if event not in _CONTAINERS:
+            return
+        depth = 1
+        for event, _ in self.events:
+            if event in _CONTAINERS:
+                depth += 1
+            elif event in ("end_map", "end_array"):
+                depth -= 1
+                if depth == 0:
+                    return
+
+    def build_reduced(self, event: str, value: Any, path: Tuple[Any, ...]) -> Any:
+        """``build``, with the arrays inside sampled or emptied as the policy says."""
+        built = self.build(event, value)
+        return built if self.policy.level == FULL else self.reducer.reduce(built, path)
+
+    def build(self, event: str, value: Any) -> Any:
+        if event == "start_map":
+            result = {}
+            for event, key in self.events:
+                if event == "end_map":
+                    return result
+                event, value = next(self.events)
+                result[key] = self.build(event, value)
+        if event == "start_array":
+            items = []
+            for event, value in self.events:
+                if event == "end_array":
+                    return items
+                items.append(self.build(event, value))
+        return value
+
+
+def _events_of(value: Any) -> Iterator[Event]:
+    """Parse events for a decoded value, in the order the parser would emit them."""
+    if isinstance(value, dict):
+        yield "start_map", None
+        for key, item in value.items():
+            yield "map_key", key
+            yield from _events_of(item)
+        yield "end_map", None
+    elif isinstance(value, list):
+        yield "start_array", None
+        for item in value:
+            yield from _events_of(item)
+        yield "end_array", None
+    elif value is None:
+        yield "null", None
+    elif isinstance(value, bool):
+        yield "boolean", value
+    elif isinstance(value, str):
+        yield "string", value
+    else:
+        yield "number", value
+
+
+def validate_stream(root: _Node, events: Iterable[Event], policy: Optional[ValidationPolicy] = None,
+                    sampler: Optional[Sampler] = None, max_errors: int = MAX_ERRORS) -> StreamResult:
+    """Validate a JSON event stream against ``root``; raises JSONStreamError for malformed JSON."""
+    walker = _Walker(events, policy or ValidationPolicy(), sampler or Sampler("0"), max_errors)
+    return walker.run(root)
+
+
+class StreamSchemas:
+    """Compiled stream-validation roots per (path, method, status), built on first use."""
+
+    def __init__(self, spec: Dict[str, Any], operations: Dict[OperationKey, Dict[str, Any]]):
+        self._operations = operations
+        self._factory = _NodeFactory(spec)
+        self._roots: Dict[Tuple[str, str, str], Optional[_Node]] = {}
+        self._lock = threading.Lock()
+        self.validated = 0
+        self.unvalidated = 0
+        self.events = 0
+        self.failed = 0
+
+    def root_for(self, path: str, method: str, status: int) -> Optional[_Node]:
+        """Schema root for a response, or None when there is nothing (or nothing supported) to check."""
+        op = self._operations.get((path, method.lower()))
+        if op is None:
+            return None
+        responses = op.get("responses", {})
+        key = str(status) if str(status) in responses else "default"
+        if key not in responses:
+            return None
+        cache_key = (path, method.lower(), key)
+        with self._lock:
+            if cache_key not in self._roots:
+                option = next(iter((responses[key].get("content") or {}).values()), None)
+                schema = _convert(option["schema"]) if option and "schema" in option else None
+                try:
+                    self._roots[cache_key] = self._factory.node(schema) if schema else None
+                except (Unsupported, re.error, TypeError):
+                    self._roots[cache_key] = None
+            return self._roots[cache_key]
+
+    def record(self, result: Optional[StreamResult]):
+        with self._lock:
+            if result is None:
+                self.unvalidated += 1
+                return
+            self.validated += 1
+            self.events += result.events
+            self.failed += result.error_count > 0
+
+    def summary(self) -> str:
+        return (f"Streaming validation: {self.validated} bodies validated against the schema "
+                f"({self.events} JSON events, {self.failed} with errors), "
+                f"{self.unvalidated} checked for well-formed JSON only")
@@ -0,0 +1,115 @@
+"""Streaming response mode: count bytes, parse JSON incrementally, keep a bounded prefix."""
+
+
+import os
+from typing import Iterator, Optional
+
+import requests
+
+from .json_stream import iter_events
+
+
+PREFIX_LIMIT = 2048
+CHUNK_SIZE = 64 * 1024
+
+
+class StreamedResponse:
+    """Wrap a ``stream=True`` response so its body is read exactly once, in chunks.
+
+    Only the first ``prefix_limit`` bytes are kept, for error messages; ``text``
+    returns that prefix so existing ``response.text[:500]`` messages still work.
+    """
+
+    def __init__(self, response: requests.Response, prefix_limit: int = PREFIX_LIMIT,
+                 chunk_size: int = CHUNK_SIZE):
+        self.raw_response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.url = response.url
+        self.retry_history = getattr(response, "retry_history", [])
+        self.timing = getattr(response, "timing", None)
+        self.prefix_limit = prefix_limit
+        self.chunk_size = chunk_size
+        self.bytes_read = 0
+        self.consumed = False
+        self._prefix = bytearray()
+
+    def iter_chunks(self) -> Iterator[bytes]:
+        """Yield body chunks once, counting bytes and capturing the prefix."""
+        if self.consumed:
+            raise RuntimeError("streamed response body was already consumed")
+        self.consumed = True
+        try:
+            for chunk in self.raw_response.iter_content(self.chunk_size):
+                self.bytes_read += len(chunk)
+                room = self.prefix_limit - len(self._prefix)
+                if room > 0:
+                    self._prefix += chunk[:room]
+                yield chunk
+        finally:
+            self.raw_response.close()
+            timing = getattr(self.raw_response, "timing", None)
+            if timing is not None:
+                timing.finish()
+
+    def consume(self) -> int:
+        """Drain any unread body; returns the total byte count."""
+        if not self.consumed:
+            for _ in self.iter_chunks():
+                pass
+        return self.bytes_read
+
+    def json_events(self):
+        """Incremental JSON parse events over the body."""
+        return iter_events(self.iter_chunks())
+
+    def check_json(self) -> int:
+        """Parse the whole body as JSON without materialising it; returns the event count."""
+        count = 0
+        for _ in self.json_events():
+            count += 1
+        return count
+
+    @property
+    def prefix(self) -> bytes:
+        return bytes(self._prefix)
+
+    @property
+    def text(self) -> str:
+        """Decoded body prefix (the full body is never held in memory)."""
+        if not self.consumed:
+            # Read just enough for an error message, then drain the rest to count it.
+            chunks = self.iter_chunks()
+            for _ in chunks:
+                if len(self._prefix) >= self.prefix_limit:
+                    break
+            for _ in chunks:
+                pass
+        return self.prefix.decode("utf-8", errors="replace")
+
+    def close(self):
+        self.raw_response.close()
+
+
+def stream_paths() -> Optional[set]:
+    """Paths configured for streaming via ``STREAM_RESPONSES``.
+
+    ``all`` streams every response; otherwise a comma-separated list of paths.
+    Returns ``None`` for all, an empty set when streaming is off.
+    """
+    raw = os.getenv("STREAM_RESPONSES", "").strip()
+    if raw.lower() in ("all", "true", "1"):
+        return None
+    return {p.strip().lower() for p in raw.split(",") if p.strip()}
+
+
+def should_stream(path: str) -> bool:
+    paths = stream_paths()
+    return paths is None or path.split("?")[0].lower() in paths
+
+
+def response_size(response) -> int:
+    """Body size in bytes for either a buffered or a streamed response."""
+    if isinstance(response, StreamedResponse):
+        return response.consume()
+    return len(response.content)
@@ -0,0 +1,303 @@
+"""Run the ``tests/<resource>/`` suites concurrently, one pytest process per suite.
+
+The suites are independent, so wall time can approach the slowest suite
+instead of the sum of all of them. Each suite runs in its own pytest
+subprocess and writes its own JUnit file (the ``--junitxml`` format the Azure
+pipelines publish). The processes share the warm on-disk caches: the runner
+loads the spec, compiled validators and a token once before starting them.
+HTTP connections cannot cross processes, so each suite pre-warms its own.
+
+Suites with write tests (POST/PATCH/DELETE calls in the test code) lock the
+top-level API resources they write to, e.g. ``/examinee/...`` -> ``examinee``.
+Two suites holding the same lock never run at the same time, while read-only
+suites run at any time.
+
+Suites start longest-first by their recorded durations (see duration_store),
+and ``--shard K/N`` splits them across CI agents with the same estimates::
+
+    python -m tests.shared.suite_runner -j 8
+    python -m tests.shared.suite_runner examinee remote form -- -k query
+    python -m tests.shared.suite_runner --shard 2/4
+    python -m tests.shared.suite_runner --changed-since origin/main
+"""
+
+
+import argparse
+import ast
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Sequence, Set
+
+from .duration_store import Estimator, get_duration_store, pack
+
+TESTS_DIR = Path(__file__).resolve().parent.parent
+NOT_SUITES = ("shared", "unit", "__pycache__")  # helpers and offline unit tests, not API resources
+WRITE_METHODS = {"make_post_request": "POST", "make_patch_request": "PATCH", "make_delete_request": "DELETE"}
+EXIT_OK = (0, 5)  # pytest: all passed / nothing collected
+
+
+class Suite(NamedTuple):
+    name: str                       # directory under tests/
+    files: List[Path]
+    functions: Dict[str, List[str]]  # test node id (without parameters) -> paths it calls
+    locks: FrozenSet[str]           # resources its write tests touch
+
+    @property
+    def tests(self) -> int:
+        return len(self.functions)
+
+
+class SuiteResult(NamedTuple):
+    suite: Suite
+    returncode: int
+    seconds: float
+    junit: Path
+    log: Path
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode in EXIT_OK
+
+
+def _test_functions(tree: ast.Module) -> Dict[str, ast.FunctionDef]:
+    """Test functions by their node id suffix (``Class::test_x`` or ``test_x``)."""
+    functions = {}
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and node.name.startswith("Test"):
+            functions.update({f"{node.name}::{fn.name}": fn for fn in node.body
+                              if isinstance(fn, ast.FunctionDef) and fn.name.startswith("test_")})
+        elif isinstance(node, ast.FunctionDef) and node.name.startswith("test_"):
+            functions[node.name] = node
+    return functions
+
+
+def _paths(fn: ast.FunctionDef) -> List[str]:
+    """API paths a test assigns to ``path`` (the convention every resource test follows)."""
+    return ["/" + n.value.value.lstrip("/") for n in ast.walk(fn) if isinstance(n, ast.Assign)
+            and isinstance(n.value, ast.Constant) and isinstance(n.value.value, str)
+            and any(getattr(t, "id", None) == "path" for t in n.targets)]
+
+
+def _write_locks(fn: ast.FunctionDef, suite: str) -> Set[str]:
+    """Top-level resources written by one test function."""
+    if not any(isinstance(n, ast.Call) and isinstance(n.func, ast.Attribute) and n.func.attr in WRITE_METHODS
+               for n in ast.walk(fn)):
+        return set()
+    segments = {p.strip("/").split("/")[0].lower() for p in _paths(fn) if p.strip("/")}
+    # A write to an unknown path locks the suite itself
+    return segments or {suite}
+
+
+def discover_suites(tests_dir: Path = TESTS_DIR, names: Optional[Sequence[str]] = None) -> List[Suite]:
+    """Every ``tests/<resource>/`` package with test files, or just ``names``."""
+    suites = []
+    for directory in sorted(p for p in tests_dir.iterdir() if p.is_dir()):
+        if directory.name in NOT_SUITES or (names and directory.name not in names):
+            continue
+        files = sorted(directory.glob("test_*.py"))
+        if not files:
+            continue
+        locks: Set[str] = set()
+        functions: Dict[str, List[str]] = {}
+        for file in files:
+            relative = file.relative_to(tests_dir.parent).as_posix()
+            for name, fn in _test_functions(ast.parse(file.read_text(encoding="utf-8"))).items():
+                functions[f"{relative}::{name}"] = _paths(fn)
+                locks |= _write_locks(fn, directory.name)
+        suites.append(Suite(directory.name, files, functions, frozenset(locks)))
+    if names:
+        unknown = set(names) - {s.name for s in suites}
+        if unknown:
+            raise SystemExit(f"Unknown resource suites: {', '.join(sorted(unknown))}")
+    return suites
+
+
+def warm_caches():
+    """Fill the on-disk spec, validator and token caches before the suites start."""
+    from .spec_registry import get_spec_registry
+    from .token_provider import get_token_provider
+
+    registry = get_spec_registry()
+    registry.spec
+    try:
+        registry.validators
+    except ImportError:
+        pass  # schemathesis missing: each suite will report it
+    try:
+        provider = get_token_provider()
+        provider.token()
+        provider.close()
+    except Exception as e:
+        print(f"Token not pre-fetched ({e}); each suite will request its own", flush=True)
+
+
+class SuiteEstimate(NamedTuple):
+    seconds: float
+    from_history: int  # tests estimated from their own history; the rest from response sizes
+
+
+def estimate_suites(suites: List[Suite], estimator: Optional[Estimator]) -> Dict[str, SuiteEstimate]:
+    """Expected duration of each suite, from the duration history (see duration_store)."""
+    estimates = {}
+    for suite in suites:
+        if estimator is None:
+            estimates[suite.name] = SuiteEstimate(float(suite.tests), 0)
+            continue
+        parts = [estimator.test(nodeid, paths) for nodeid, paths in suite.functions.items()]
+        estimates[suite.name] = SuiteEstimate(sum(seconds for seconds, _ in parts),
+                                              sum(known for _, known in parts))
+    return estimates
+
+
+class Scheduler:
+    """Hands out suites to worker threads, never running two that share a lock."""
+
+    def __init__(self, suites: List[Suite], estimates: Dict[str, float]):
+        # Longest first, so a slow suite does not start last and set the wall time alone
+        self.pending = sorted(suites, key=lambda s: -estimates.get(s.name, 0.0))
+        self.held: Set[str] = set()
+        self.cond = threading.Condition()
+
+    def take(self) -> Optional[Suite]:
+        with self.cond:
+            while self.pending:
+                suite = next((s for s in self.pending if not s.locks & self.held), None)
+                if suite is not None:
+                    self.pending.remove(suite)
+                    self.held |= suite.locks
+                    return suite
+                self.cond.wait()
+            return None
+
+    def release(self, suite: Suite):
+        with self.cond:
+            self.held -= suite.locks
+            self.cond.notify_all()
+
+
+def run_suite(suite: Suite, junit_dir: Path, pytest_args: Sequence[str], env: Dict[str, str]) -> SuiteResult:
+    junit = junit_dir / f"{suite.name}.xml"
+    log = junit_dir / f"{suite.name}.log"
+    cmd = [sys.executable, "-m", "pytest", str(TESTS_DIR / suite.name), f"--junitxml={junit}",
+           "-o", f"junit_suite_name={suite.name}", *pytest_args]
+    start = time.perf_counter()
+    with open(log, "wb") as out:
+        returncode = subprocess.call(cmd, stdout=out, stderr=subprocess.STDOUT, env=env,
+                                     cwd=TESTS_DIR.parent)
+    return SuiteResult(suite, returncode, time.perf_counter() - start, junit, log)
+
+
+def run_suites(suites: List[Suite], workers: int, junit_dir: Path, pytest_args: Sequence[str] = (),
+               estimates: Optional[Dict[str, float]] = None) -> List[SuiteResult]:
+    junit_dir = junit_dir.resolve()
+    junit_dir.mkdir(parents=True, exist_ok=True)
+    env = dict(os.environ)
+    scheduler = Scheduler(suites, estimates or {})
+    results: List[SuiteResult] = []
+    lock = threading.Lock()
+
+    def worker():
+        while (suite := scheduler.take()) is not None:
+            try:
+                result = run_suite(suite, junit_dir, pytest_args, env)
+            finally:
+                scheduler.release(suite)
+            with lock:
+                results.append(result)
+                status = "ok" if result.ok else f"FAILED (exit {result.returncode})"
+                print(f"[{len(results):>2}/{len(suites)}] {suite.name:<40} {status:<18} "
+                      f"{result.seconds:6.1f}s", flush=True)
+
+    threads = [threading.Thread(target=worker, name=f"suite-{i}") for i in range(min(workers, len(suites)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the tests/<resource>/ suites concurrently")
+    parser.add_argument("resources", nargs="*", help="suite directories to run (default: all)")
+    parser.add_argument("-j", "--workers", type=int, default=int(os.getenv("SUITE_WORKERS", str(os.cpu_count() or 4))),
+                        help="suites run at once (default SUITE_WORKERS or the CPU count)")
+    parser.add_argument("--junit-dir", default=os.getenv("SUITE_JUNIT_DIR", "reports/junit"),
+                        help="one <resource>.xml and <resource>.log per suite")
+    parser.add_argument("--shard", help="K/N: run only the K-th of N shards, packed longest-first by history")
+    parser.add_argument("--changed-since", metavar="REF", default=os.getenv("IMPACT_BASE"),
+                        help="run only the tests changes since git REF can affect, skipping untouched suites")
+    parser.add_argument("--list", action="store_true",
+                        help="show the suites, their estimates and write locks, then exit")
+    argv = list(sys.argv[1:] if argv is None else argv)
+    pytest_args = argv[argv.index("--") + 1:] if "--" in argv else []
+    args = parser.parse_args(argv[:argv.index("--")] if "--" in argv else argv)
+    if args.shard:
+        index, _, count = args.shard.partition("/")
+        if not (index.isdigit() and count.isdigit() and 1 <= int(index) <= int(count)):
+            parser.error(f"--shard must be K/N with 1 <= K <= N, not {args.shard!r}")
+
+    suites = discover_suites(names=args.resources)
+    if args.changed_since:
+        from .impact import analyse
+
+        try:
+            impact = analyse(args.changed_since)
+        except subprocess.CalledProcessError as e:
+            raise SystemExit(f"--changed-since {args.changed_since}: {e.stderr.strip() or e}")
+        print("Changes since {}: {}".format(args.changed_since, "; ".join(impact.describe())), flush=True)
+        suites = [suite for suite in suites if any(impact.selects(nodeid) for nodeid in suite.functions)]
+        pytest_args = ["--changed-since", args.changed_since, *pytest_args]
+    store = get_duration_store()
+    estimates = estimate_suites(suites, store.estimator() if store is not None else None)
+    seconds = {name: estimate.seconds for name, estimate in estimates.items()}
+    if args.shard:
+        shard = pack(seconds, int(count))[int(index) - 1]
+        suites = [suite for suite in suites if suite.name in shard]
+    if args.list:
+        for suite in sorted(suites, key=lambda s: -seconds[s.name]):
+            estimate = estimates[suite.name]
+            print(f"{suite.name:<40} {suite.tests:>3} tests  ~{estimate.seconds:6.1f}s "
+                  f"({estimate.from_history}/{suite.tests} from history)  "
+                  f"locks: {', '.join(sorted(suite.locks)) or '-'}")
+        return 0
+    predicted = max((sum(seconds[name] for name in group)
+                     for group in pack({s.name: seconds[s.name] for s in suites}, max(1, args.workers))),
+                    default=0.0)
+    print(f"{len(suites)} suites, estimated {sum(seconds[s.name] for s in suites):.0f}s in total, "
+          f"~{predicted:.0f}s wall on {args.workers} workers (write locks may add to that)", flush=True)
+
+    server = None
+    if os.getenv("LOCAL_TOKEN_SERVER", "false").lower() == "true":
+        # One token server for every suite instead of one each
+        from .token_server import from_env
+
+        server = from_env().start()
+        os.environ.update(TOKEN_URL=server.url, LOCAL_TOKEN_SERVER="false")
+        os.environ.setdefault("CLIENT_ID", "local-client")
+        os.environ.setdefault("CLIENT_SECRET", "local-secret")
+    try:
+        start = time.perf_counter()
+        warm_caches()
+        results = run_suites(suites, max(1, args.workers), Path(args.junit_dir), pytest_args, seconds)
+        wall = time.perf_counter() - start
+    finally:
+        if server is not None:
+            server.stop()
+
+    failed = sorted(r.suite.name for r in results if not r.ok)
+    total = sum(r.seconds for r in results)
+    slowest = max(results, key=lambda r: r.seconds, default=None)
+    print(f"\n{len(results)} suites in {wall:.1f}s wall ({total:.1f}s summed"
+          + (f", slowest {slowest.suite.name} {slowest.seconds:.1f}s" if slowest else "") + f"); "
+          f"JUnit files in {args.junit_dir}/")
+    if failed:
+        print(f"Failed: {', '.join(failed)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+"""Per-request timing breakdown: DNS, TCP connect, TLS, time to first byte, download."""
+
+
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+
+from .warmup import ResumingSSLContext, dns_cache
+
+
+@dataclass
+class RequestTiming:
+    """Phase durations in seconds for one attempt.
+
+    Setup phases are zero when the attempt reused a pooled connection.
+    """
+    dns: float = 0.0
+    connect: float = 0.0
+    tls: float = 0.0
+    ttfb: float = 0.0
+    download: float = 0.0
+    total: float = 0.0
+    reused_connection: bool = True
+    # Internal markers (perf_counter timestamps), not reported.
+    _sent_at: float = 0.0
+    _connected_at: float = 0.0
+    _headers_at: float = 0.0
+
+    def mark_headers(self):
+        self._headers_at = time.perf_counter()
+        self.ttfb = self._headers_at - max(self._sent_at, self._connected_at)
+
+    def finish(self, end: Optional[float] = None):
+        end = end or time.perf_counter()
+        if self._headers_at:
+            self.download = end - self._headers_at
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Milliseconds per phase, for report output."""
+        data = {k: round(v * 1000, 2) for k, v in asdict(self).items()
+                if not k.startswith("_") and isinstance(v, float)}
+        data["reused_connection"] = self.reused_connection
+        return data
+
+
+_local = threading.local()
+
+
+def current() -> Optional[RequestTiming]:
+    """Timing record of the attempt running on this thread, if any."""
+    return getattr(_local, "timing", None)
+
+
+@contextmanager
+def measure():
+    """Make a fresh RequestTiming current for the duration of one attempt."""
+    timing = RequestTiming()
+    previous = current()
+    _local.timing = timing
+    start = time.perf_counter()
+    timing._sent_at = start
+    try:
+        yield timing
+    finally:
+        timing.total = time.perf_counter() - start
+        _local.timing = previous
+
+
+class _TimedConnectionMixin:
+    """Split socket setup into DNS and TCP connect, and mark request/response points."""
+
+    def _new_conn(self) -> socket.socket:
+        timing = current()
+        start = time.perf_counter()
+        try:
+            addresses = dns_cache.resolve(self._dns_host, self.port)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        resolved = time.perf_counter()
+        if timing is not None:
+            timing.reused_connection = False
+            timing.dns = resolved - start
+        original = self._dns_host
+        last_error = None
+        try:
+            for address in addresses:
+                self._dns_host = address
+                try:
+                    sock = super()._new_conn()
+                    break
+                # urllib3 wraps socket errors in NewConnectionError / ConnectTimeoutError, which are
+                # not OSErrors; try the next address (e.g. IPv4 after an unreachable ::1)
+                except (OSError, NewConnectionError, ConnectTimeoutError) as e:
+                    last_error = e
+            else:
+                if last_error is None:
+                    raise NameResolutionError(self.host, self, socket.gaierror(f"no addresses for {self.host}"))
+                raise last_error
+        finally:
+            self._dns_host = original
+        if timing is not None:
+            timing.connect = time.perf_counter() - resolved
+        return sock
+
+    def connect(self):
+        timing = current()
+        start = time.perf_counter()
+        super().connect()
+        if timing is not None and not timing.reused_connection:
+            timing._connected_at = time.perf_counter()
+            if isinstance(self, HTTPSConnection):
+                timing.tls = max(0.0, timing._connected_at - start - timing.dns - timing.connect)
+
+    def request(self, *args, **kwargs):
+        timing = current()
+        if timing is not None:
+            timing._sent_at = time.perf_counter()
+        return super().request(*args, **kwargs)
+
+    def getresponse(self):
+        response = super().getresponse()
+        if isinstance(getattr(self, "ssl_context", None), ResumingSSLContext):
+            self.ssl_context.remember(self.sock)  # TLS 1.3 tickets arrive with the response
+        timing = current()
+        if timing is not None:
+            timing.mark_headers()
+        return response
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+def httpx_trace(timing: RequestTiming):
+    """httpx ``trace`` extension callback that fills ``timing`` for the HTTP/2 transport.
+
+    httpx reports DNS and TCP connect as one step, so it is recorded as connect.
+    """
+    starts: Dict[str, float] = {}
+
+    def trace(event_name: str, info: Dict[str, Any]):
+        now = time.perf_counter()
+        step, _, state = event_name.rpartition(".")
+        if state == "started":
+            starts[step] = now
+            if step.endswith("send_request_headers"):
+                timing._sent_at = now
+            return
+        if state != "complete":
+            return
+        began = starts.get(step, now)
+        if step == "connection.connect_tcp":
+            timing.reused_connection = False
+            timing.connect = now - began
+        elif step == "connection.start_tls":
+            timing.tls = now - began
+            timing._connected_at = now
+        elif step.endswith("receive_response_headers"):
+            timing.mark_headers()
+
+    return trace
+
+
+class TimingCollector:
+    """Timings gathered for the currently running test item."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Optional[List[Dict[str, Any]]] = None
+        self._paused = 0
+
+    def start(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._entries = []
+            return self._entries
+
+    def stop(self):
+        with self._lock:
+            self._entries = None
+
+    @contextmanager
+    def paused(self):
+        """Don't attribute requests made in this block (e.g. prefetching) to the current test.
+
+        Applies to every thread, so calls dispatched to worker threads are covered too.
+        """
+        with self._lock:
+            self._paused += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._paused -= 1
+
+    def add(self, method: str, url: str, status: Optional[int], attempt: int, timing: RequestTiming,
+            force: bool = False, size: Optional[int] = None):
+        entry = {"method": method, "url": url, "status": status, "attempt": attempt, **timing.as_dict(),
+                 "bytes": size}
+        with self._lock:
+            if self._entries is not None and (force or not self._paused):
+                self._entries.append(entry)
+
+    def add_response(self, response):
+        """Attribute an already received response (e.g. a prefetched one) to the current test."""
+        timing = getattr(response, "timing", None)
+        if timing is None:
+            return
+        request = getattr(response, "request", None)
+        method = getattr(request, "method", None) or "GET"
+        history = getattr(response, "retry_history", None) or []
+        attempt = history[-1].attempt if history else 1
+        self.add(method, response.url.split("?")[0], response.status_code, attempt, timing, force=True,
+                 size=body_size(response))
+
+
+def body_size(response) -> Optional[int]:
+    """Response size in bytes without reading an unread (streamed) body; None if unknown."""
+    if response is None:
+        return None
+    content = getattr(response, "_content", None)
+    if isinstance(content, bytes):
+        return len(content)
+    length = response.headers.get("Content-Length", "")
+    return int(length) if length.isdigit() else None
+
+
+collector = TimingCollector()
@@ -0,0 +1,440 @@
+"""OAuth client-credentials token provider with a cross-process on-disk cache.
+
+Tokens are cached in memory and in a file per (token URL, client id, scope)
+under ``TOKEN_CACHE_DIR``, guarded by an exclusive file lock, so parallel
+workers and back-to-back runs on the same agent share one token instead of
+each calling the identity server. Client secrets are never written to disk.
+
+A background thread renews the token ahead of expiry and publishes it by
+swapping one immutable snapshot and updating the ``AuthHeaders`` dicts handed
+out by ``headers()`` in place, so requests never wait on the identity server.
+"""
+
+
+import hashlib
+import itertools
+import json
+import os
+import tempfile
+import threading
+import time
+import warnings
+from contextlib import contextmanager
+from typing import List, NamedTuple, Optional, Tuple, Union
+from weakref import WeakValueDictionary
+
+import requests
+
+from . import warmup
+from .retry import PATH_POLICIES, parse_retry_after
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "its-api-tokens")
+
+_token_session: Optional[requests.Session] = None
+_token_session_lock = threading.Lock()
+
+
+def _identity_session() -> requests.Session:
+    """Keep-alive session for token requests, separate from the API session manager.
+
+    Token calls go to the identity server, so they must not take flow-control
+    slots, spend the API retry budget, trip its circuit breaker or appear in
+    request timings and the duration history. They are retried by
+    ``_post_token`` under the ``/connect/token`` retry policy instead.
+    """
+    global _token_session
+    with _token_session_lock:
+        if _token_session is None:
+            _token_session = requests.Session()
+        return _token_session
+
+
+def prewarm_identity(token_url: str, connections: int) -> str:
+    """Open ``connections`` keep-alive connections to the identity server; returns a one-line summary."""
+    return warmup.prewarm(_identity_session(), [token_url], connections, label="token connections")
+
+
+def _post_token(url: str, data: dict) -> requests.Response:
+    """POST a token request, retrying throttling, gateway errors and transport failures."""
+    policy = PATH_POLICIES["/connect/token"]
+    for attempt in range(1, policy.max_attempts + 1):
+        last = attempt == policy.max_attempts
+        try:
+            r = _identity_session().post(url, data=data, timeout=policy.timeout or 20)
+        except policy.retry_errors:
+            if last:
+                raise
+            time.sleep(policy.backoff(attempt))
+            continue
+        if r.status_code not in policy.retry_statuses or last:
+            return r
+        retry_after = parse_retry_after(r.headers.get("Retry-After"))
+        time.sleep(min(retry_after, policy.backoff_max) if retry_after is not None else policy.backoff(attempt))
+
+
+@contextmanager
+def _file_lock(path: str):
+    """Exclusive advisory lock on ``path`` held for the duration of the block."""
+    with open(path, "a+b") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class AuthHeaders(dict):
+    """``{"Authorization": "Bearer ..."}`` that the provider rewrites on every renewal.
+
+    Session-scoped fixtures hold one of these, so requests (including ones
+    dispatched to worker threads) always send the current token. The session
+    manager calls ``for_request`` per attempt, which lets a ``TokenPool``
+    choose the client; copies keep that link.
+    """
+
+    def __init__(self, *args, source=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.source = source
+
+    def copy(self) -> "AuthHeaders":
+        return AuthHeaders(self, source=self.source)
+
+    def for_request(self) -> dict:
+        """Plain headers carrying the token chosen for one request."""
+        if self.source is None:
+            return dict(self)
+        return {**self, "Authorization": f"Bearer {self.source.request_token()}"}
+
+
+class _Published(NamedTuple):
+    token: str
+    expires_at: float
+    lifetime: float
+    refresh_at: float
+
+
+class TokenProvider:
+    """Fetches, caches and shares bearer tokens for one client.
+
+    A token is renewed ``margin`` seconds before it expires (at most half its
+    lifetime, so short-lived tokens are still cached). With background refresh
+    on, renewal happens on a daemon thread and callers keep using the current
+    token until it actually expires.
+    """
+
+    def __init__(self, token_url: str, client_id: str, client_secret: str,
+                 scope: Optional[str] = None, margin: Optional[float] = None,
+                 cache_dir: Optional[str] = None, disk_cache: Optional[bool] = None,
+                 background_refresh: Optional[bool] = None):
+        self.token_url = token_url
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.scope = scope or None
+        self.margin = margin if margin is not None else float(os.getenv("TOKEN_EXPIRY_MARGIN", "300"))
+        if disk_cache is None:
+            disk_cache = os.getenv("TOKEN_CACHE", "true").lower() == "true"
+        if background_refresh is None:
+            background_refresh = os.getenv("TOKEN_BACKGROUND_REFRESH", "true").lower() == "true"
+        self.background_refresh = background_refresh
+        self.cache_dir = (cache_dir or os.getenv("TOKEN_CACHE_DIR") or DEFAULT_CACHE_DIR) if disk_cache else None
+        key = hashlib.sha256(f"{token_url}|{client_id}|{self.scope or ''}".encode()).hexdigest()[:24]
+        self.cache_file = os.path.join(self.cache_dir, f"{key}.json") if self.cache_dir else None
+        self.fetched = 0
+        self.disk_hits = 0
+        self.memory_hits = 0
+        self.background_refreshes = 0
+        self.refresh_failures = 0
+        self.rejected = 0
+        self.requests = 0
+        self.last_used = 0.0
+        self._current: Optional[_Published] = None
+        self._headers: "WeakValueDictionary[int, AuthHeaders]" = WeakValueDictionary()
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()  # counters only; ``_lock`` is held across token fetches
+        self._stop = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+
+    def token(self) -> str:
+        """A valid access token; only blocks when no usable token is cached anywhere."""
+        current = self._current
+        if current is not None:
+            now = time.time()
+            if now < current.refresh_at or (self._refresher_alive() and now < current.expires_at):
+                with self._stats_lock:
+                    self.memory_hits += 1
+                return current.token
+        with self._lock:
+            current = self._current
+            if current is not None and time.time() < current.refresh_at:
+                with self._stats_lock:
+                    self.memory_hits += 1  # renewed by another thread while we waited
+            else:
+                self._renew()
+            self._start_refresher()
+            return self._current.token
+
+    def request_token(self) -> str:
+        """``token()`` for one outgoing request, counted per client."""
+        token = self.token()
+        with self._stats_lock:
+            self.requests += 1
+            self.last_used = time.monotonic()
+        return token
+
+    def headers(self, source=None) -> AuthHeaders:
+        """Authorization headers kept current by later renewals."""
+        headers = AuthHeaders(Authorization=f"Bearer {self.token()}", source=source or self)
+        self._headers[id(headers)] = headers
+        return headers
+
+    def invalidate(self, token: Optional[str] = None):
+        """Forget the cached token so the next call fetches a new one.
+
+        The session manager calls this with the token a server rejected with
+        401; when that token has already been replaced nothing happens, so a
+        burst of rejected requests causes one renewal rather than one each.
+        """
+        with self._lock:
+            if token is not None and (self._current is None or self._current.token != token):
+                return
+            self.rejected += token is not None
+            self._current = None
+            if self.cache_file is not None:
+                with _file_lock(self.cache_file + ".lock"):
+                    cached = self._read_disk()
+                    if token is not None and cached is not None and cached[0] != token:
+                        return  # another process already cached a fresh token
+                    try:
+                        os.remove(self.cache_file)
+                    except FileNotFoundError:
+                        pass
+
+    def close(self):
+        """Stop the background refresher."""
+        self._stop.set()
+        if self._refresher is not None:
+            self._refresher.join(timeout=5)
+
+    def _renew(self):
+        """Adopt a fresher token from disk or fetch one, then publish it. Caller holds ``_lock``."""
+        if self.cache_file is None:
+            self._publish(*self._fetch())
+            return
+        os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+        with _file_lock(self.cache_file + ".lock"):
+            cached = self._read_disk()
+            if cached is not None:
+                self.disk_hits += 1
+                self._publish(*cached)
+            else:
+                self._publish(*self._fetch())
+                self._write_disk()
+
+    def _publish(self, token: str, expires_at: float, lifetime: float):
+        self._current = _Published(token, expires_at, lifetime, expires_at - min(self.margin, lifetime / 2))
+        value = f"Bearer {token}"
+        for headers in list(self._headers.values()):
+            headers["Authorization"] = value
+
+    def _refresher_alive(self) -> bool:
+        return self._refresher is not None and self._refresher.is_alive()
+
+    def _start_refresher(self):
+        if self.background_refresh and not self._refresher_alive() and not self._stop.is_set():
+            self._refresher = threading.Thread(target=self._refresh_loop, name="token-refresh", daemon=True)
+            self._refresher.start()
+
+    def _refresh_loop(self):
+        retry_in = 0.0
+        while True:
+            current = self._current
+            due = current.refresh_at - time.time() if current is not None else 0.0
+            if self._stop.wait(max(due, retry_in, 0.0)):
+                return
+            try:
+                with self._lock:
+                    current = self._current
+                    if current is None or time.time() >= current.refresh_at:
+                        self._renew()
+                        self.background_refreshes += 1
+                retry_in = 0.0
+            except Exception as e:  # keep serving the current token and try again shortly
+                self.refresh_failures += 1
+                remaining = (current.expires_at - time.time()) if current is not None else 0.0
+                retry_in = min(30.0, max(1.0, remaining / 4))
+                warnings.warn(f"Background token refresh failed ({e}); retrying in {retry_in:.0f}s")
+
+    def _fetch(self) -> Tuple[str, float, float]:
+        data = {
+            "grant_type": "client_credentials",
+            "client_id": self.client_id,
+            "client_secret": self.client_secret,
+        }
+        if self.scope:
+            data["scope"] = self.scope
+        r = _post_token(self.token_url, data)
+        if r.status_code >= 400:
+            raise RuntimeError(f"Token request failed {r.status_code}: {r.text[:400]}")
+        p = r.json()
+        tok = p.get("access_token")
+        if not tok:
+            raise RuntimeError(f"No access_token in response: {p}")
+        self.fetched += 1
+        ttl = float(p.get("expires_in", 3600))
+        return tok, time.time() + ttl, ttl
+
+    def _read_disk(self) -> Optional[Tuple[str, float, float]]:
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            token, expires_at, lifetime = entry["access_token"], entry["expires_at"], entry["lifetime"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if time.time() >= expires_at - min(self.margin, lifetime / 2):
+            return None
+        return token, expires_at, lifetime
+
+    def _write_disk(self):
+        entry = {
+            "access_token": self._current.token,
+            "expires_at": self._current.expires_at,
+            "lifetime": self._current.lifetime,
+        }
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp, self.cache_file)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+    def summary(self) -> str:
+        where = self.cache_dir or "disk cache off"
+        return (f"Tokens: {self.fetched} fetched, {self.disk_hits} from disk cache, "
+                f"{self.memory_hits} from memory, {self.background_refreshes} background refreshes"
+                f" ({self.refresh_failures} failed), {self.rejected} rejected with 401 ({where})")
+
+
+ROUND_ROBIN = "round_robin"
+LRU = "lru"
+
+
+class TokenPool:
+    """Spread requests over several clients, each with its own cached, refreshed token.
+
+    Used for load generation, where per-client rate limits would otherwise cap
+    throughput. ``round_robin`` cycles through the clients; ``lru`` picks the
+    one that has gone longest without a request.
+    """
+
+    def __init__(self, providers: List[TokenProvider], strategy: str = ROUND_ROBIN):
+        if not providers:
+            raise ValueError("TokenPool needs at least one client")
+        if strategy not in (ROUND_ROBIN, LRU):
+            raise ValueError(f"Unknown TOKEN_POOL_STRATEGY: {strategy!r}")
+        self.providers = providers
+        self.strategy = strategy
+        self._cycle = itertools.cycle(providers)
+        self._lock = threading.Lock()
+
+    def pick(self) -> TokenProvider:
+        with self._lock:
+            if self.strategy == LRU:
+                provider = min(self.providers, key=lambda p: p.last_used)
+                provider.last_used = time.monotonic()  # so concurrent picks spread out
+                return provider
+            return next(self._cycle)
+
+    def token(self) -> str:
+        return self.pick().token()
+
+    def request_token(self) -> str:
+        return self.pick().request_token()
+
+    def headers(self) -> AuthHeaders:
+        """Headers whose token is chosen per request by the session manager."""
+        return self.providers[0].headers(source=self)
+
+    def invalidate(self, token: Optional[str] = None):
+        """Forget ``token`` in whichever client issued it, or every client's token."""
+        for provider in self.providers:
+            provider.invalidate(token)
+
+    def close(self):
+        for provider in self.providers:
+            provider.close()
+
+    def summary(self) -> str:
+        counts = ", ".join(f"{p.client_id} {p.requests}" for p in self.providers)
+        fetched = sum(p.fetched for p in self.providers)
+        disk = sum(p.disk_hits for p in self.providers)
+        refreshes = sum(p.background_refreshes for p in self.providers)
+        return (f"Token pool ({self.strategy}, {len(self.providers)} clients): requests per client {counts}; "
+                f"{fetched} fetched, {disk} from disk cache, {refreshes} background refreshes")
+
+
+def parse_client_credentials(raw: str) -> List[Tuple[str, str]]:
+    """Parse ``CLIENT_CREDENTIALS`` (``id1:secret1,id2:secret2``; split on the first ``:``)."""
+    credentials = []
+    for item in raw.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        client_id, sep, secret = item.partition(":")
+        if not sep or not client_id.strip():
+            raise ValueError(f"CLIENT_CREDENTIALS entries must be client_id:client_secret, got {client_id!r}")
+        credentials.append((client_id.strip(), secret))
+    return credentials
+
+
+_provider: Optional[Union[TokenProvider, TokenPool]] = None
+_provider_lock = threading.Lock()
+
+
+def get_token_provider() -> Union[TokenProvider, TokenPool]:
+    """Process-wide provider for TOKEN_URL / CLIENT_ID / CLIENT_SECRET / SCOPE.
+
+    When ``CLIENT_CREDENTIALS`` lists several clients, a ``TokenPool`` over
+    them is returned instead (strategy from ``TOKEN_POOL_STRATEGY``).
+    """
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            credentials = parse_client_credentials(os.getenv("CLIENT_CREDENTIALS", ""))
+            if credentials:
+                _provider = TokenPool(
+                    [TokenProvider(os.environ["TOKEN_URL"], cid, secret, os.getenv("SCOPE"))
+                     for cid, secret in credentials],
+                    strategy=os.getenv("TOKEN_POOL_STRATEGY", ROUND_ROBIN).lower(),
+                )
+            else:
+                _provider = TokenProvider(
+                    os.environ["TOKEN_URL"],
+                    os.environ["CLIENT_ID"],
+                    os.environ["CLIENT_SECRET"],
+                    os.getenv("SCOPE"),
+                )
+        return _provider
+
+
+def active_token_provider() -> Optional[Union[TokenProvider, TokenPool]]:
+    """The process-wide provider if anything has requested a token yet."""
+    return _provider
@@ -0,0 +1,219 @@
+"""Local OAuth2 client-credentials token endpoint for offline runs and benchmarks.
+
+Issues HS256-signed JWTs with a configurable ``expires_in``, response latency
+and failure rate, so token caching and refresh can be exercised without the
+real identity server. Start it from pytest (``LOCAL_TOKEN_SERVER=true`` or the
+``token_server`` fixture) or from the command line::
+
+    python -m tests.shared.token_server --port 8700 --expires-in 60 --latency 0.2 --failure-rate 0.1
+"""
+
+
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import os
+import random
+import secrets
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs
+
+
+TOKEN_PATH = "/connect/token"
+
+
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64url_decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+class LocalTokenServer:
+    """Threaded token endpoint on ``127.0.0.1`` serving ``POST /connect/token``.
+
+    ``clients`` maps client id to secret; when omitted any client is accepted.
+    A ``failure_rate`` fraction of requests is answered with ``failure_status``
+    after the configured latency, like an overloaded identity server.
+    """
+
+    def __init__(self, port: int = 0, expires_in: int = 3600, latency: float = 0.0,
+                 latency_jitter: float = 0.0, failure_rate: float = 0.0, failure_status: int = 503,
+                 clients: Optional[Dict[str, str]] = None, signing_key: Optional[bytes] = None,
+                 seed: Optional[int] = None):
+        self.expires_in = expires_in
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.clients = clients
+        self.signing_key = signing_key or secrets.token_bytes(32)
+        self.issued = 0
+        self.failed = 0
+        self.rejected = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._httpd.server_address[1]
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}{TOKEN_PATH}"
+
+    def start(self) -> "LocalTokenServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="token-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> "LocalTokenServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def issue(self, client_id: str, scope: Optional[str] = None) -> str:
+        """Signed JWT for ``client_id`` valid for ``expires_in`` seconds."""
+        now = int(time.time())
+        header = {"alg": "HS256", "typ": "JWT"}
+        claims = {
+            "iss": f"http://127.0.0.1:{self.port}",
+            "sub": client_id,
+            "client_id": client_id,
+            "iat": now,
+            "nbf": now,
+            "exp": now + self.expires_in,
+            "jti": uuid.uuid4().hex,
+        }
+        if scope:
+            claims["scope"] = scope
+        signing_input = ".".join(_b64url(json.dumps(part, separators=(",", ":")).encode())
+                                 for part in (header, claims))
+        signature = hmac.new(self.signing_key, signing_input.encode("ascii"), hashlib.sha256).digest()
+        return f"{signing_input}.{_b64url(signature)}"
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """Claims of a token this server issued; ``ValueError`` if forged or expired."""
+        try:
+            signing_input, _, signature = token.rpartition(".")
+            expected = hmac.new(self.signing_key, signing_input.encode("ascii"), hashlib.sha256).digest()
+            if not signing_input or not hmac.compare_digest(expected, _b64url_decode(signature)):
+                raise ValueError("bad signature")
+            claims = json.loads(_b64url_decode(signing_input.split(".")[1]))
+        except (ValueError, IndexError, UnicodeError) as e:
+            raise ValueError(f"invalid token: {e}") from e
+        if claims["exp"] <= time.time():
+            raise ValueError("token expired")
+        return claims
+
+    def summary(self) -> str:
+        return (f"Local token server: {self.issued} tokens issued, {self.failed} injected failures, "
+                f"{self.rejected} rejected (expires_in {self.expires_in}s, latency {self.latency * 1000:.0f}ms)")
+
+    def _respond(self, form: Dict[str, str]):
+        """Status and JSON body for one token request."""
+        delay = self.latency + (self._random.uniform(-1, 1) * self.latency_jitter if self.latency_jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+        with self._lock:
+            if self.failure_rate and self._random.random() < self.failure_rate:
+                self.failed += 1
+                return self.failure_status, {"error": "temporarily_unavailable"}
+            if form.get("grant_type") != "client_credentials":
+                self.rejected += 1
+                return 400, {"error": "unsupported_grant_type"}
+            client_id = form.get("client_id", "")
+            if not client_id or (self.clients is not None
+                                 and self.clients.get(client_id) != form.get("client_secret")):
+                self.rejected += 1
+                return 401, {"error": "invalid_client"}
+            self.issued += 1
+        scope = form.get("scope")
+        body = {"access_token": self.issue(client_id, scope), "token_type": "Bearer",
+                "expires_in": self.expires_in}
+        if scope:
+            body["scope"] = scope
+        return 200, body
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                if self.path.split("?")[0] != TOKEN_PATH:
+                    self._send(404, {"error": "not_found"})
+                    return
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length).decode("utf-8", errors="replace")
+                form = {k: v[0] for k, v in parse_qs(raw).items()}
+                self._send(*server._respond(form))
+
+            def _send(self, status: int, body: Dict[str, Any]):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def from_env() -> LocalTokenServer:
+    """Server configured from ``TOKEN_SERVER_*`` environment variables (not started)."""
+    return LocalTokenServer(
+        port=int(os.getenv("TOKEN_SERVER_PORT", "0")),
+        expires_in=int(os.getenv("TOKEN_SERVER_EXPIRES_IN", "3600")),
+        latency=float(os.getenv("TOKEN_SERVER_LATENCY", "0")),
+        failure_rate=float(os.getenv("TOKEN_SERVER_FAILURE_RATE", "0")),
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local OAuth2 client-credentials token server")
+    parser.add_argument("--port", type=int, default=8700)
+    parser.add_argument("--expires-in", type=int, default=3600, help="token lifetime in seconds")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to wait before answering")
+    parser.add_argument("--latency-jitter", type=float, default=0.0, help="+/- seconds of random jitter")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument("--failure-status", type=int, default=503)
+    args = parser.parse_args(argv)
+
+    server = LocalTokenServer(port=args.port, expires_in=args.expires_in, latency=args.latency,
+                              latency_jitter=args.latency_jitter, failure_rate=args.failure_rate,
+                              failure_status=args.failure_status)
+    print(f"Token endpoint: {server.url}  (set TOKEN_URL to this; any CLIENT_ID/CLIENT_SECRET is accepted)")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+        print(server.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Selectable HTTP/1.1 and HTTP/2 transports behind the shared session."""
+
+
+import datetime
+import itertools
+import threading
+import warnings
+from typing import Any, Dict, Iterator, List, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from .timing import httpx_trace
+
+try:
+    import httpx
+    import h2  # noqa: F401  (httpx needs it for http2=True)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    httpx = None
+    HTTP2_AVAILABLE = False
+
+
+HTTP1 = "http1"
+HTTP2 = "http2"
+
+
+class TransportStats:
+    """Per-transport request counts, latency and negotiated protocol versions."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: Dict[str, int] = {}
+        self.latency: Dict[str, float] = {}
+        self.protocols: Dict[str, Dict[str, int]] = {}
+
+    def record(self, transport: str, protocol: str, latency: float):
+        with self._lock:
+            self.requests[transport] = self.requests.get(transport, 0) + 1
+            self.latency[transport] = self.latency.get(transport, 0.0) + latency
+            seen = self.protocols.setdefault(transport, {})
+            seen[protocol] = seen.get(protocol, 0) + 1
+
+    def summary(self) -> str:
+        parts = []
+        for name, count in sorted(self.requests.items()):
+            mean_ms = self.latency[name] / count * 1000
+            protocols = ", ".join(f"{p} x{n}" for p, n in sorted(self.protocols[name].items()))
+            parts.append(f"{name}: {count} requests, mean {mean_ms:.0f}ms ({protocols})")
+        return "Transports: " + ("; ".join(parts) if parts else "no requests")
+
+
+class Http2Transport:
+    """httpx client with HTTP/2 enabled, returning ``requests.Response`` objects.
+
+    ALPN negotiates the protocol per connection, so a server that only speaks
+    HTTP/1.1 is served over HTTP/1.1 by the same client. Responses are adapted
+    to ``requests.Response`` and httpx errors to ``requests`` exceptions so
+    callers, retries and schemathesis validation work unchanged.
+    """
+
+    def __init__(self, pool_size: int, keep_alive: bool = True):
+        limits = httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size if keep_alive else 0,
+        )
+        self._client = httpx.Client(http2=True, limits=limits)
+
+    def request(self, method: str, url: str, headers=None, params=None, json=None, data=None,
+                timeout=None, timing=None, stream: bool = False, allow_redirects: bool = True,
+                **kwargs) -> requests.Response:
+        """Send one request; ``stream=True`` leaves the body unread, as with ``requests``."""
+        if kwargs:
+            raise TypeError(f"HTTP/2 transport does not support: {', '.join(sorted(kwargs))}")
+        if isinstance(timeout, tuple):
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+        extensions = {"trace": httpx_trace(timing)} if timing is not None else None
+        try:
+            raw = self._client.build_request(
+                method, url, headers=headers, params=params, json=json, data=data,
+                timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+                extensions=extensions,
+            )
+            raw = self._client.send(raw, stream=stream, follow_redirects=allow_redirects)
+        except (httpx.HTTPError, httpx.InvalidURL) as e:
+            raise _to_requests_error(e) from e
+        return _to_requests_response(raw, stream)
+
+    def close(self):
+        self._client.close()
+
+
+# Most specific first: httpx's hierarchy nests these under TransportError / HTTPError
+_ERRORS = () if httpx is None else (
+    (httpx.ConnectTimeout, requests.exceptions.ConnectTimeout),
+    (httpx.TimeoutException, requests.exceptions.ReadTimeout),
+    (httpx.ProxyError, requests.exceptions.ProxyError),
+    (httpx.UnsupportedProtocol, requests.exceptions.InvalidSchema),
+    (httpx.TransportError, requests.exceptions.ConnectionError),
+    (httpx.TooManyRedirects, requests.exceptions.TooManyRedirects),
+    (httpx.DecodingError, requests.exceptions.ContentDecodingError),
+    (httpx.InvalidURL, requests.exceptions.InvalidURL),
+    (httpx.HTTPError, requests.exceptions.RequestException),
+)
+
+
+def _to_requests_error(error: Exception) -> requests.exceptions.RequestException:
+    """The ``requests`` exception matching an httpx one, so retries and error handling see the usual types."""
+    for httpx_type, requests_type in _ERRORS:
+        if isinstance(error, httpx_type):
+            return requests_type(str(error))
+    return requests.exceptions.RequestException(str(error))
+
+
+class _StreamedBody:
+    """``Response.raw`` for a streamed httpx response: what ``iter_content`` and ``close`` use."""
+
+    def __init__(self, raw: "httpx.Response"):
+        self._raw = raw
+
+    def stream(self, chunk_size: int, decode_content: bool = True) -> Iterator[bytes]:
+        try:
+            yield from self._raw.iter_bytes(chunk_size)
+        except httpx.HTTPError as e:
+            raise _to_requests_error(e) from e
+
+    def close(self):
+        self._raw.close()
+
+
+def _to_requests_response(raw: "httpx.Response", stream: bool = False) -> requests.Response:
+    response = requests.Response()
+    response.status_code = raw.status_code
+    response.headers = CaseInsensitiveDict(raw.headers.multi_items())
+    if stream:
+        response.raw = _StreamedBody(raw)
+    else:
+        response._content = raw.content
+        response._content_consumed = True
+    response.encoding = raw.encoding
+    response.reason = raw.reason_phrase
+    response.url = str(raw.url)
+    # httpx only sets ``elapsed`` once the body is read
+    response.elapsed = datetime.timedelta(seconds=raw.elapsed.total_seconds() if not stream else 0.0)
+    response.request = requests.Request(
+        raw.request.method, str(raw.request.url), headers=dict(raw.request.headers),
+    ).prepare()
+    response.http_version = raw.http_version
+    return response
+
+
+def parse_transports(raw: str) -> List[str]:
+    """Parse ``HTTP_TRANSPORT`` (``http1``, ``http2`` or ``http1,http2``).
+
+    HTTP/2 is dropped with a warning when httpx/h2 are not installed.
+    """
+    names = [n.strip().lower() for n in raw.split(",") if n.strip()] or [HTTP1]
+    unknown = [n for n in names if n not in (HTTP1, HTTP2)]
+    if unknown:
+        raise ValueError(f"Unknown HTTP_TRANSPORT value(s): {unknown}")
+    if HTTP2 in names and not HTTP2_AVAILABLE:
+        warnings.warn("HTTP_TRANSPORT requests http2 but httpx[http2] is not installed; using http1")
+        names = [n for n in names if n != HTTP2] or [HTTP1]
+    return list(dict.fromkeys(names))
+
+
+class TransportSelector:
+    """Round-robin over the configured transports so both can run in one session."""
+
+    def __init__(self, names: List[str]):
+        self.names = names
+        self._cycle = itertools.cycle(names)
+        self._lock = threading.Lock()
+
+    def next(self, requested: Optional[str] = None) -> str:
+        if requested:
+            if requested == HTTP2 and not HTTP2_AVAILABLE:
+                return HTTP1
+            return requested
+        with self._lock:
+            return next(self._cycle)
+
+
+def protocol_of(response: Any) -> str:
+    """Negotiated protocol of a response from either transport."""
+    version = getattr(response, "http_version", None)
+    if version:
+        return version
+    raw_version = getattr(getattr(response, "raw", None), "version", None)
+    return {10: "HTTP/1.0", 11: "HTTP/1.1"}.get(raw_version, "HTTP/1.1")
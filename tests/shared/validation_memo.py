@@ -0,0 +1,115 @@
+"""Persistent memo of response bodies that passed schema validation.
+
+Many GET endpoints return byte-identical bodies run after run. A verdict is
+keyed by the operation, status, content type, validation level and a hash of
+the body bytes, and the memo file by the spec's SHA-256 and the validation
+toolchain, so editing the spec or upgrading schemathesis starts a fresh memo.
+Only passes are stored: a failing body is validated every time, so its error
+message always comes from the current run.
+"""
+
+
+import hashlib
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict
+
+from .response_validators import _fingerprint
+from .spec_cache import _read_cache, _write_cache, cache_dir_for, cache_enabled
+from .token_provider import _file_lock
+
+
+MEMO_FORMAT_VERSION = 2  # 2: sampled elements chosen per array by reservoir sampling
+
+
+def memo_enabled() -> bool:
+    return os.getenv("VALIDATION_MEMO", "true").lower() == "true"
+
+
+def _python_tag() -> str:
+    # marshal's format is only stable within one Python version
+    return f"py{sys.version_info[0]}{sys.version_info[1]}"
+
+
+def memo_file_for(spec_path: str, sha256: str) -> Path:
+    stem = Path(spec_path).stem
+    return cache_dir_for(spec_path) / f"{stem}.memo-{sha256[:24]}-{_python_tag()}-v{MEMO_FORMAT_VERSION}.bin"
+
+
+class ValidationMemo:
+    """Digests of validated responses, with the time each was last seen."""
+
+    def __init__(self, spec_path: str, sha256: str, persist: bool = True):
+        self.sha256 = sha256
+        self.fingerprint = _fingerprint()
+        self.max_entries = int(os.getenv("VALIDATION_MEMO_MAX", "200000"))
+        self.file = memo_file_for(spec_path, sha256) if persist and cache_enabled() else None
+        self._lock_file = cache_dir_for(spec_path) / f"{Path(spec_path).stem}.memo.lock"
+        # Older memos for this Python only: agents sharing a cache directory may run other versions
+        self._stale_glob = f"{Path(spec_path).stem}.memo-*-{_python_tag()}-v*.bin"
+        self._verdicts: Dict[bytes, float] = self._load()
+        self.loaded = len(self._verdicts)
+        self.hits = 0
+        self.misses = 0
+        self.added = 0
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[bytes, float]:
+        payload = _read_cache(self.file, self.sha256, MEMO_FORMAT_VERSION) if self.file is not None else None
+        if payload is None or payload.get("fingerprint") != self.fingerprint:
+            return {}
+        return dict(payload["verdicts"])
+
+    @staticmethod
+    def key(path: str, method: str, response, level: str) -> bytes:
+        """Digest of the operation, status, content type, validation level and body bytes."""
+        digest = hashlib.blake2b(digest_size=16)
+        content_type = response.headers.get("Content-Type", "")
+        digest.update(f"{method.upper()} {path}\n{response.status_code}\n{content_type}\n{level}\n".encode())
+        digest.update(response.content)
+        return digest.digest()
+
+    def seen(self, key: bytes) -> bool:
+        """True when an identical response has already passed validation."""
+        with self._lock:
+            if key in self._verdicts:
+                self._verdicts[key] = time.time()
+                self.hits += 1
+                return True
+            self.misses += 1
+            return False
+
+    def add(self, key: bytes):
+        with self._lock:
+            if key not in self._verdicts:
+                self.added += 1
+            self._verdicts[key] = time.time()
+
+    def save(self):
+        """Merge this run's verdicts into the memo file, keeping the most recently seen entries."""
+        if self.file is None or not self.added and not self.hits:
+            return
+        try:
+            self.file.parent.mkdir(parents=True, exist_ok=True)
+            # Held across read, merge and write so concurrent workers never drop each other's verdicts
+            with _file_lock(str(self._lock_file)), self._lock:
+                verdicts = self._load()
+                for key, seen in self._verdicts.items():
+                    verdicts[key] = max(seen, verdicts.get(key, 0.0))
+                if len(verdicts) > self.max_entries:
+                    newest = sorted(verdicts.items(), key=lambda item: item[1], reverse=True)[:self.max_entries]
+                    verdicts = dict(newest)
+                payload = {"format": MEMO_FORMAT_VERSION, "sha256": self.sha256, "fingerprint": self.fingerprint,
+                           "verdicts": verdicts}
+                _write_cache(self.file, payload, self._stale_glob)
+        except OSError:
+            pass  # a read-only checkout still works, just without the memo
+
+    def summary(self) -> str:
+        lookups = self.hits + self.misses
+        rate = f"{self.hits / lookups:.0%}" if lookups else "n/a"
+        return (f"Validation memo: {self.hits}/{lookups} responses matched a stored verdict ({rate} hit rate), "
+                f"{self.added} new; {self.loaded} loaded from disk")
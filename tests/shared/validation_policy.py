@@ -0,0 +1,265 @@
+"""How much of a response body is schema-validated: full, sampled or envelope-only.
+
+Large list responses spend more time in validation than on the wire. A path
+can instead validate its arrays by sample (the first N elements plus a random
+sample of the rest) or validate only the envelope (every array treated as
+empty). Samples are drawn by reservoir sampling from a generator seeded with
+``VALIDATION_SEED``, the method, the path and the array's JSON path, so a run
+with the same seed and the same data checks the same elements, whether the
+body is buffered or streamed (``stream_validator``).
+"""
+
+
+import json
+import os
+import random
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import requests
+
+
+FULL = "full"
+SAMPLE = "sample"
+ENVELOPE = "envelope"
+LEVELS = (FULL, SAMPLE, ENVELOPE)
+
+
+@dataclass(frozen=True)
+class ValidationPolicy:
+    """Validation level for one kind of response."""
+    level: str = FULL
+    first: int = 20   # SAMPLE: leading elements of each array that are always checked
+    sample: int = 20  # SAMPLE: further elements drawn at random from the rest
+
+    def describe(self) -> str:
+        if self.level == SAMPLE:
+            return f"sample (first {self.first} + {self.sample} random)"
+        return self.level
+
+
+# Per-path defaults, matched as a case-insensitive suffix of the path.
+PATH_POLICIES: Dict[str, ValidationPolicy] = {
+    # Unbounded list endpoints: thousands of elements with one item schema.
+    "/examinee/query": ValidationPolicy(SAMPLE),
+    "/message-history/query": ValidationPolicy(SAMPLE),
+    "/Test/Query": ValidationPolicy(SAMPLE),
+}
+
+
+def _parse_policy(spec: str) -> ValidationPolicy:
+    """``full``, ``envelope``, ``sample`` or ``sample:<first>:<sample>``."""
+    level, _, counts = spec.strip().lower().partition(":")
+    if level not in LEVELS:
+        raise ValueError(f"Unknown validation level {level!r}; expected one of {', '.join(LEVELS)}")
+    if level != SAMPLE or not counts:
+        return ValidationPolicy(level)
+    first, _, sample = counts.partition(":")
+    return ValidationPolicy(level, int(first), int(sample or first))
+
+
+def _parse_policies(raw: str) -> Dict[str, ValidationPolicy]:
+    """Parse ``/examinee/query=sample:50:50,/Test/Query=envelope``."""
+    policies = {}
+    for item in filter(None, (part.strip() for part in raw.split(","))):
+        path, _, spec = item.partition("=")
+        policies[path.strip()] = _parse_policy(spec)
+    return policies
+
+
+def response_with_body(response: requests.Response, data: Any) -> requests.Response:
+    """Copy of ``response`` whose body is ``data`` serialised as JSON."""
+    clone = requests.Response()
+    clone.status_code = response.status_code
+    clone.headers = response.headers
+    clone.url = response.url
+    clone.request = response.request
+    clone.reason = response.reason
+    clone.encoding = "utf-8"
+    clone._content = json.dumps(data).encode("utf-8")
+    return clone
+
+
+class Reduction(NamedTuple):
+    policy: ValidationPolicy
+    body: Any                 # what gets validated
+    elements: Optional[int]   # array elements in the original body (None under FULL)
+    checked: Optional[int]    # array elements kept in ``body``
+
+
+class Reservoir:
+    """Uniform sample of up to ``size`` elements of an array read once, front to back."""
+
+    def __init__(self, size: int, rng: random.Random):
+        self.size = size
+        self.rng = rng
+        self.items: List[Any] = []
+        self.offered = 0
+
+    def slot(self) -> Optional[int]:
+        """Position for the next element, or None when it is left out of the sample."""
+        self.offered += 1
+        if len(self.items) < self.size:
+            return len(self.items)
+        slot = self.rng.randrange(self.offered)
+        return slot if slot < self.size else None
+
+    def put(self, slot: int, item: Any):
+        if slot == len(self.items):
+            self.items.append(item)
+        else:
+            self.items[slot] = item
+
+
+class Sampler:
+    """Reservoirs for the arrays of one response, each seeded by its JSON path.
+
+    A generator per array makes the choice independent of the order arrays are
+    reached in, which differs between the buffered and the streaming validator.
+    """
+
+    def __init__(self, seed: str):
+        self.seed = seed
+
+    def reservoir(self, size: int, path: Tuple[Any, ...]) -> Reservoir:
+        return Reservoir(size, random.Random(f"{self.seed}:{'/'.join(map(str, path))}"))
+
+
+class _Reducer:
+    """Builds the part of a body a policy validates, counting array elements."""
+
+    def __init__(self, policy: ValidationPolicy, sampler: Sampler):
+        self.policy = policy
+        self.sampler = sampler
+        self.elements = 0
+        self.checked = 0
+
+    def reduce(self, value: Any, path: Tuple[Any, ...] = ()) -> Any:
+        if isinstance(value, dict):
+            return {k: self.reduce(v, path + (k,)) for k, v in value.items()}
+        if not isinstance(value, list):
+            return value
+        self.elements += len(value)
+        if self.policy.level == ENVELOPE:
+            return []
+        first, sample = self.policy.first, self.policy.sample
+        if len(value) <= first + sample:
+            self.checked += len(value)
+            return [self.reduce(v, path + (i,)) for i, v in enumerate(value)]
+        reservoir = self.sampler.reservoir(sample, path)
+        for index in range(first, len(value)):
+            slot = reservoir.slot()
+            if slot is not None:
+                reservoir.put(slot, index)
+        chosen = list(range(first)) + sorted(reservoir.items)
+        self.checked += len(chosen)
+        return [self.reduce(value[i], path + (i,)) for i in chosen]
+
+
+class ValidationPolicies:
+    """Resolves the policy for a path and reduces bodies accordingly; reports per run.
+
+    Precedence: ``VALIDATION_POLICIES`` entries, then ``VALIDATION_LEVEL`` for
+    every path, then ``PATH_POLICIES``, then full validation.
+    """
+
+    def __init__(self, path_policies: Optional[Dict[str, ValidationPolicy]] = None,
+                 default: Optional[ValidationPolicy] = None, seed: Optional[int] = None):
+        level = os.getenv("VALIDATION_LEVEL")
+        self.default = default or (_parse_policy(level) if level else ValidationPolicy())
+        policies = {} if level else dict(PATH_POLICIES)
+        policies.update(path_policies if path_policies is not None
+                        else _parse_policies(os.getenv("VALIDATION_POLICIES", "")))
+        self.path_policies = {k.lower(): v for k, v in policies.items()}
+        self.seed = seed if seed is not None else int(os.getenv("VALIDATION_SEED", "0"))
+        self.counts: Counter = Counter()
+        self.elements: Counter = Counter()
+        self.checked: Counter = Counter()
+        self._entries: Optional[List[Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+
+    def policy_for(self, path: str) -> ValidationPolicy:
+        lowered = path.split("?")[0].lower()
+        return next((p for suffix, p in self.path_policies.items() if lowered.endswith(suffix)), self.default)
+
+    def memo_level(self, path: str) -> str:
+        """The path's policy as a memo key: what is validated, including which elements are sampled."""
+        policy = self.policy_for(path)
+        if policy.level == SAMPLE:
+            return f"{SAMPLE}:{policy.first}:{policy.sample}:{self.seed}"
+        return policy.level
+
+    def reduce(self, method: str, path: str, data: Any) -> Reduction:
+        """The part of ``data`` the path's policy validates; a FULL policy keeps ``data`` itself."""
+        policy = self.policy_for(path)
+        if policy.level == FULL:
+            return Reduction(policy, data, None, None)
+        reducer = _Reducer(policy, self.sampler_for(method, path))
+        reduced = reducer.reduce(data)
+        return Reduction(policy, reduced, reducer.elements, reducer.checked)
+
+    def apply(self, method: str, path: str, data: Any) -> Tuple[ValidationPolicy, Any]:
+        """(policy, body to validate), recorded for the run summary."""
+        reduction = self.reduce(method, path, data)
+        self.record(method, path, reduction.policy, reduction.elements, reduction.checked)
+        return reduction.policy, reduction.body
+
+    def sampler_for(self, method: str, path: str) -> Sampler:
+        """Array sampler for one response, seeded by the run seed, method and path."""
+        return Sampler(f"{self.seed}:{method.upper()} {path}")
+
+    def record(self, method: str, path: str, policy: ValidationPolicy,
+                elements: Optional[int], checked: Optional[int]):
+        entry = {"method": method.upper(), "path": path, "level": policy.level}
+        if policy.level == SAMPLE:
+            entry.update(first=policy.first, sample=policy.sample, seed=self.seed)
+        if elements is not None:
+            entry.update(array_elements=elements, elements_checked=checked)
+        with self._lock:
+            self.counts[policy.level] += 1
+            self.elements[policy.level] += elements or 0
+            self.checked[policy.level] += checked or 0
+            if self._entries is not None:
+                self._entries.append(entry)
+
+    def start(self) -> List[Dict[str, Any]]:
+        """Collect the validation level of each response for the current test item."""
+        with self._lock:
+            self._entries = []
+            return self._entries
+
+    def stop(self):
+        with self._lock:
+            self._entries = None
+
+    def summary(self) -> str:
+        parts = [f"{self.counts[FULL]} full"]
+        if self.counts[SAMPLE]:
+            parts.append(f"{self.counts[SAMPLE]} sampled ({self.checked[SAMPLE]} of "
+                         f"{self.elements[SAMPLE]} array elements checked, seed {self.seed})")
+        if self.counts[ENVELOPE]:
+            parts.append(f"{self.counts[ENVELOPE]} envelope-only ({self.elements[ENVELOPE]} array elements skipped)")
+        configured = ", ".join(f"{path}={policy.describe()}" for path, policy in self.path_policies.items())
+        default = "" if self.default.level == FULL else f"; default {self.default.describe()}"
+        return (f"Response validation: {', '.join(parts)}"
+                f"{default}{f'; paths: {configured}' if configured else ''}")
+
+
+_policies: Optional[ValidationPolicies] = None
+_policies_lock = threading.Lock()
+
+
+def get_validation_policies() -> ValidationPolicies:
+    """Process-wide policies configured from the environment."""
+    global _policies
+    with _policies_lock:
+        if _policies is None:
+            _policies = ValidationPolicies()
+        return _policies
+
+
+def active_validation_policies() -> Optional[ValidationPolicies]:
+    """The policies if any response has been validated in this process."""
+    return _policies if _policies is not None and _policies.counts else None
@@ -0,0 +1,201 @@
+"""Response validation in worker processes, for the concurrent light run.
+
+JSON decoding and schema validation are CPU-bound and hold the GIL, so with
+many requests in flight they compete with the threads reading responses.
+With ``VALIDATION_WORKERS`` set, a response's raw bytes and its operation key
+are sent to a pool of worker processes instead. Each worker loads the spec
+registry once (compiled validators come from their on-disk cache) and returns
+a ``ValidationResult``.
+
+At most ``VALIDATION_MAX_PENDING`` bodies wait for a worker. ``submit`` blocks
+beyond that, which holds the sending thread's concurrency slot and so slows
+the request scheduler down to the rate the workers can validate.
+"""
+
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
+from typing import Any, Dict, NamedTuple, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from .spec_registry import get_spec_registry
+from .validation_policy import ValidationPolicies, ValidationPolicy, get_validation_policies
+
+
+class ValidationJob(NamedTuple):
+    path: str      # operation path as written in the spec
+    method: str
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+    url: str
+
+
+class ValidationResult(NamedTuple):
+    path: str
+    method: str
+    ok: bool
+    kind: Optional[str]    # "json" or "schema" when not ok
+    error: Optional[str]
+    policy: ValidationPolicy
+    elements: Optional[int]
+    checked: Optional[int]
+    seconds: float         # time spent in the worker
+
+
+def validation_workers() -> int:
+    """``VALIDATION_WORKERS``: a process count, ``auto`` for one per core, or 0 (default) for in-process."""
+    raw = os.getenv("VALIDATION_WORKERS", "0").strip().lower()
+    if raw == "auto":
+        return os.cpu_count() or 1
+    try:
+        return max(0, int(raw))
+    except ValueError:
+        return 0
+
+
+# State of one worker process, set up by _init_worker
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(spec_path: str):
+    registry = get_spec_registry(spec_path)
+    registry.validators  # load the compiled validators before the first job arrives
+    _worker["registry"] = registry
+    _worker["policies"] = ValidationPolicies()
+
+
+def _rebuild_response(job: ValidationJob) -> requests.Response:
+    response = requests.Response()
+    response.status_code = job.status
+    response.headers = CaseInsensitiveDict(job.headers)
+    response.url = job.url
+    response._content = job.body
+    return response
+
+
+def _validate(job: ValidationJob) -> ValidationResult:
+    from .response_validators import validate_response
+
+    start = time.perf_counter()
+    registry, policies = _worker["registry"], _worker["policies"]
+    response = _rebuild_response(job)
+    policy = policies.policy_for(job.path)
+    try:
+        data = response.json()
+    except requests.exceptions.JSONDecodeError as e:
+        return ValidationResult(job.path, job.method, False, "json", str(e), policy, None, None,
+                                time.perf_counter() - start)
+    reduction = policies.reduce(job.method, job.path, data)
+    kind = error = None
+    try:
+        validate_response(registry.schema, registry.validators, job.path, job.method, response,
+                          data, reduction.body)
+    except Exception as e:
+        kind, error = "schema", str(e)
+    return ValidationResult(job.path, job.method, error is None, kind, error, reduction.policy,
+                            reduction.elements, reduction.checked, time.perf_counter() - start)
+
+
+class ValidationPool:
+    """Worker processes that decode and schema-validate response bodies."""
+
+    def __init__(self, spec_path: str, workers: int, max_pending: Optional[int] = None):
+        self.spec_path = spec_path
+        self.workers = workers
+        self.max_pending = max_pending or int(os.getenv("VALIDATION_MAX_PENDING", str(workers * 4)))
+        # spawn: the parent has live threads (pre-warming, token refresh) that must not be forked
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker, initargs=(os.path.abspath(spec_path),),
+        )
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.failed = 0
+        self.blocked = 0
+        self.blocked_seconds = 0.0
+        self.worker_seconds = 0.0
+
+    def submit(self, path: str, method: str, response: requests.Response) -> Future:
+        """Queue ``response`` for validation; blocks while ``max_pending`` bodies are outstanding.
+
+        A body that matches a stored verdict (see validation_memo) resolves at once.
+        """
+        policies = get_validation_policies()
+        memo = get_spec_registry(self.spec_path).validation_memo
+        memo_key = memo.key(path, method, response, policies.memo_level(path)) if memo is not None else None
+        if memo_key is not None and memo.seen(memo_key):
+            future = Future()
+            future.set_result(ValidationResult(path, method.lower(), True, None, None,
+                                               policies.policy_for(path), None, None, 0.0))
+            return future
+        job = ValidationJob(path, method.lower(), response.status_code, dict(response.headers),
+                            response.content, response.url)
+        if not self._slots.acquire(blocking=False):
+            start = time.perf_counter()
+            self._slots.acquire()
+            with self._lock:
+                self.blocked += 1
+                self.blocked_seconds += time.perf_counter() - start
+        try:
+            future = self._executor.submit(_validate, job)
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self.submitted += 1
+        future.add_done_callback(partial(self._done, memo, memo_key))
+        return future
+
+    def _done(self, memo, memo_key: Optional[bytes], future: Future):
+        self._slots.release()
+        if future.cancelled() or future.exception() is not None:
+            return
+        result = future.result()
+        with self._lock:
+            self.failed += not result.ok
+            self.worker_seconds += result.seconds
+        if result.ok and memo_key is not None:
+            memo.add(memo_key)
+
+    def result(self, future: Future) -> ValidationResult:
+        """Wait for a submitted body and record its validation level against the current test."""
+        result = future.result()
+        get_validation_policies().record(result.method, result.path, result.policy,
+                                         result.elements, result.checked)
+        return result
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def summary(self) -> str:
+        mean = self.worker_seconds / self.submitted * 1000 if self.submitted else 0.0
+        return (f"Validation pool: {self.workers} worker processes, {self.submitted} bodies validated "
+                f"({self.failed} failed, {mean:.1f}ms mean in worker); submit blocked {self.blocked} times "
+                f"({self.blocked_seconds:.2f}s) at {self.max_pending} pending")
+
+
+_pool: Optional[ValidationPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_validation_pool(spec_path: str) -> Optional[ValidationPool]:
+    """Process-wide pool, or None when ``VALIDATION_WORKERS`` is unset or 0."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = validation_workers()
+            if workers:
+                _pool = ValidationPool(spec_path, workers)
+        return _pool
+
+
+def active_validation_pool() -> Optional[ValidationPool]:
+    return _pool
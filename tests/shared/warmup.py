@@ -0,0 +1,188 @@
+"""Session-start connection pre-warming: DNS cache, warm pooled connections, TLS resumption."""
+
+
+import os
+import socket
+import ssl
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import requests
+from requests.utils import DEFAULT_CA_BUNDLE_PATH
+from urllib3.util.wait import wait_for_read
+
+
+class DNSCache:
+    """getaddrinfo results cached per (host, port) for ``ttl`` seconds."""
+
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = ttl if ttl is not None else float(os.getenv("DNS_CACHE_TTL", "300"))
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[Tuple[str, int], Tuple[float, List[str]]] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, host: str, port: int) -> List[str]:
+        """IP addresses for ``host`` in getaddrinfo order."""
+        key = (host, port)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+        infos = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        with self._lock:
+            self.misses += 1
+            if self.ttl > 0:
+                self._entries[key] = (now + self.ttl, addresses)
+        return addresses
+
+
+dns_cache = DNSCache()
+
+
+class ResumingSSLContext(ssl.SSLContext):
+    """SSLContext that offers the last session seen for a host on new connections.
+
+    TLS 1.2 sessions are available right after the handshake; TLS 1.3 tickets
+    arrive with the first response, so connections also call ``remember``
+    after reading response headers.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self.sessions: Dict[str, ssl.SSLSession] = {}
+        self.handshakes = 0
+        self.resumed = 0
+        self._lock = threading.Lock()
+
+    def wrap_socket(self, sock, server_side=False, do_handshake_on_connect=True,
+                    suppress_ragged_eofs=True, server_hostname=None, session=None):
+        if session is None and server_hostname:
+            session = self.sessions.get(server_hostname)
+        try:
+            wrapped = super().wrap_socket(
+                sock, server_side=server_side, do_handshake_on_connect=do_handshake_on_connect,
+                suppress_ragged_eofs=suppress_ragged_eofs, server_hostname=server_hostname,
+                session=session,
+            )
+        except ValueError:
+            # A cached session the server side no longer matches; handshake from scratch.
+            wrapped = super().wrap_socket(
+                sock, server_side=server_side, do_handshake_on_connect=do_handshake_on_connect,
+                suppress_ragged_eofs=suppress_ragged_eofs, server_hostname=server_hostname,
+            )
+        with self._lock:
+            self.handshakes += 1
+            if wrapped.session_reused:
+                self.resumed += 1
+        self.remember(wrapped)
+        return wrapped
+
+    def remember(self, sock):
+        """Store the socket's TLS session for reuse by later connections to the same host."""
+        if not isinstance(sock, ssl.SSLSocket) or not sock.server_hostname:
+            return
+        session = sock.session
+        if session is not None and (session.has_ticket or session.id):
+            with self._lock:
+                self.sessions[sock.server_hostname] = session
+
+
+def make_ssl_context() -> ResumingSSLContext:
+    """urllib3-equivalent client context, with session tickets left enabled."""
+    context = ResumingSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.minimum_version = ssl.TLSVersion.TLSv1_2
+    context.options |= ssl.OP_NO_COMPRESSION
+    context.verify_mode = ssl.CERT_REQUIRED
+    context.check_hostname = True
+    context.hostname_checks_common_name = False
+    if getattr(context, "post_handshake_auth", None) is not None:
+        context.post_handshake_auth = True
+    context.load_verify_locations(DEFAULT_CA_BUNDLE_PATH)
+    return context
+
+
+def warm_pool(session: requests.Session, url: str, connections: int) -> int:
+    """Open up to ``connections`` sockets in the pool requests will use for ``url``.
+
+    Returns how many connections were established and returned to the pool.
+    """
+    adapter = session.get_adapter(url)
+    prepared = requests.Request("GET", url).prepare()
+    # Same verify value Session.request will use, so the pool key matches.
+    settings = session.merge_environment_settings(url, {}, None, None, None)
+    pool = adapter.get_connection_with_tls_context(prepared, verify=settings["verify"], cert=settings["cert"])
+    conns = [pool._get_conn() or pool._new_conn() for _ in range(min(connections, pool.pool.maxsize))]
+
+    def open_one(conn):
+        try:
+            if conn.is_closed:
+                conn.connect()
+            return _absorb_session_tickets(conn)
+        except OSError:
+            return False
+
+    with ThreadPoolExecutor(max_workers=len(conns) or 1) as executor:
+        opened = list(executor.map(open_one, conns))
+    for conn in conns:
+        pool._put_conn(conn)
+    return sum(opened)
+
+
+def _absorb_session_tickets(conn, wait: float = 0.2) -> bool:
+    """Read the TLS 1.3 session tickets a server sends right after the handshake.
+
+    Unread tickets leave the idle socket readable, which urllib3 treats as a
+    dropped connection and would discard. Returns False if the connection is
+    unusable and was closed.
+    """
+    sock = conn.sock
+    if not isinstance(sock, ssl.SSLSocket) or sock.version() != "TLSv1.3":
+        return True
+    if not wait_for_read(sock, timeout=wait):
+        return True
+    timeout = sock.gettimeout()
+    sock.setblocking(False)
+    try:
+        sock.recv(1)
+        conn.close()  # unsolicited application data or EOF: not reusable
+        return False
+    except ssl.SSLWantReadError:
+        pass
+    finally:
+        if conn.sock is not None:
+            sock.settimeout(timeout)
+    if isinstance(sock.context, ResumingSSLContext):
+        sock.context.remember(sock)
+    return True
+
+
+def prewarm(session: requests.Session, urls: Iterable[str], connections: int, label: str = "connections") -> str:
+    """Resolve and connect ahead of the first test; returns a one-line summary."""
+    start = time.perf_counter()
+    parts = []
+    origins = {}
+    for url in filter(None, urls):
+        parsed = requests.utils.urlparse(url)
+        origins.setdefault((parsed.scheme, parsed.hostname, parsed.port), url)
+    for url in origins.values():
+        try:
+            opened = warm_pool(session, url, connections)
+            parts.append(f"{requests.utils.urlparse(url).hostname} x{opened}")
+        except Exception as e:
+            parts.append(f"{requests.utils.urlparse(url).hostname} failed ({e.__class__.__name__})")
+    elapsed = (time.perf_counter() - start) * 1000
+    return f"Pre-warmed {label}: {', '.join(parts) or 'none'} in {elapsed:.0f}ms"
+
+
+def summary(context: Optional[ResumingSSLContext]) -> str:
+    """DNS cache and TLS resumption counters for the end-of-run report."""
+    tls = "no TLS handshakes"
+    if context is not None and context.handshakes:
+        tls = f"TLS resumed {context.resumed}/{context.handshakes} handshakes"
+    return f"Connection setup: DNS cache {dns_cache.hits} hits / {dns_cache.misses} lookups, {tls}"
@@ -12,20 +12,6 @@ class TestTestEndpoints(APITestBase):
         """Get all GET endpoints for this resource."""
         return ['/test/forms/Query', '/test/pretest-references/Query', '/Test/Query']
     
-    def get_endpoint_params(self, path: str) -> list:
-        """Get query parameters for a specific endpoint."""
-        params = []
-        path_spec = self.spec['paths'].get(path, {})
-        op_spec = path_spec.get('get', {})
-        
-        # Collect parameters from both path and operation levels
-        for param_source in [path_spec.get('parameters', []), op_spec.get('parameters', [])]:
-            for param in param_source:
-                if isinstance(param, dict) and param.get('in') == 'query':
-                    params.append(param['name'])
-        
-        return params
-
     def test_test_forms_query(self, auth_headers):
         """Test /test/forms/Query endpoint."""
         path = "/test/forms/Query"
@@ -48,7 +34,7 @@ class TestTestEndpoints(APITestBase):
         self.assert_response_success(response, path, expected_status)
         
         # Log the response for debugging
-        print(f"\n{path}: {response.status_code} - {len(response.text)} chars")
+        print(f"\n{path}: {response.status_code} - {self.response_size(response)} bytes")
 
     def test_test_pretest_references_query(self, auth_headers):
         """Test /test/pretest-references/Query endpoint."""
@@ -72,7 +58,7 @@ class TestTestEndpoints(APITestBase):
         self.assert_response_success(response, path, expected_status)
         
         # Log the response for debugging
-        print(f"\n{path}: {response.status_code} - {len(response.text)} chars")
+        print(f"\n{path}: {response.status_code} - {self.response_size(response)} bytes")
 
     def test_test_query(self, auth_headers):
         """Test /Test/Query endpoint."""
@@ -96,4 +82,4 @@ class TestTestEndpoints(APITestBase):
         self.assert_response_success(response, path, expected_status)
         
         # Log the response for debugging
-        print(f"\n{path}: {response.status_code} - {len(response.text)} chars")
+        print(f"\n{path}: {response.status_code} - {self.response_size(response)} bytes")
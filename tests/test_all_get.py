@@ -1,27 +1,25 @@
 # tests/test_all_get.py  (v4-compatible)
-import os, json
-import schemathesis as st
+import os
+
+from tests.shared.spec_registry import get_spec_registry
 
 OPENAPI_PATH = os.getenv("OPENAPI_PATH", "schema/openapi.json")
 BASE_URL     = os.environ["BASE_URL"]
 PROGRAM_ID   = os.getenv("PROGRAM_ID")
 
-# Load the raw spec to inspect required / allowed params
-with open(OPENAPI_PATH, "r", encoding="utf-8") as f:
-    RAW_SPEC = json.load(f)
-
-# v4: loaders live under schemathesis.openapi
-schema = st.openapi.from_path(OPENAPI_PATH)
+# Raw spec (to inspect required / allowed params) and schemathesis schema,
+# both from the process-wide registry so the file is parsed only once
+RAW_SPEC = get_spec_registry(OPENAPI_PATH).spec
+OPERATIONS = get_spec_registry(OPENAPI_PATH).index
+schema = get_spec_registry(OPENAPI_PATH).schema
 schema_get = schema.include(method="GET")  # v4: filter first, then parametrize
 
 def _op_params(case):
     """Return (all_query_names, required_path_names) for this operation."""
-    path_item = RAW_SPEC["paths"].get(case.path, {})
-    op_spec = path_item.get(case.method.lower(), {})
-    params = [p for p in (path_item.get("parameters", []) + op_spec.get("parameters", [])) if isinstance(p, dict)]
-    all_q = [p["name"] for p in params if p.get("in") == "query"]
-    req_path = [p["name"] for p in params if p.get("in") == "path" and p.get("required")]
-    return all_q, req_path
+    info = OPERATIONS.get(case.path, case.method)
+    if info is None:
+        return [], []
+    return list(info.query_names), list(info.required_path)
 
 # If you already have a token helper in conftest.py, you can import it:
 # from tests.conftest import _get_token
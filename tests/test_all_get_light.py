@@ -1,5 +1,5 @@
 # tests/test_all_gets.py
-import os, json, re
+import os, re
 
 # --- Load .env early so os.environ is populated for both collection and runtime ---
 # Option A: python-dotenv (works anywhere)
@@ -64,6 +64,14 @@ ENV_TO_QUERY = {
 
 import pytest, requests
 
+from tests.shared.concurrent_runner import get_concurrency, run_concurrently
+from tests.shared.duration_store import get_duration_store
+from tests.shared.http_session import get_session_manager
+from tests.shared.spec_registry import get_spec_registry
+from tests.shared.timing import collector as timing_collector
+from tests.shared.token_provider import get_token_provider
+from tests.shared.validation_pool import get_validation_pool
+
 # --- Load .env early so os.environ is populated for both collection and runtime ---
 # Option A: python-dotenv (works anywhere)
 try:
@@ -106,22 +114,8 @@ EXPECTED_STATUS = {
 
 @pytest.fixture(scope="session")
 def auth_headers():
-    # Client-credentials flow; assumes these envs are present.
-    data = {
-        "grant_type": "client_credentials",
-        "client_id": os.environ["CLIENT_ID"],
-        "client_secret": os.environ["CLIENT_SECRET"],
-        "scope": os.environ["SCOPE"],
-    }
-    r = requests.post(os.environ["TOKEN_URL"], data=data, timeout=20)
-    r.raise_for_status()
-    tok = r.json()["access_token"]
-    return {"Authorization": f"Bearer {tok}"}
-
-
-def _load_spec():
-    with open(OPENAPI, "r", encoding="utf-8") as f:
-        return json.load(f)
+    # Client-credentials flow via the shared, disk-cached token provider.
+    return get_token_provider().headers()
 
 
 def _list_get_ops(spec):
@@ -134,22 +128,6 @@ def _list_get_ops(spec):
     return out
 
 
-def _collect_params(path_spec, op_spec):
-    """Flatten path-level + op-level parameters."""
-    params = []
-    for src in (path_spec.get("parameters", []), op_spec.get("parameters", [])):
-        params.extend([p for p in src if isinstance(p, dict)])
-    return params
-
-
-def _required_names(params, where):
-    return [p["name"] for p in params if p.get("in") == where and p.get("required")]
-
-
-def _all_query_names(params):
-    return [p["name"] for p in params if p.get("in") == "query"]
-
-
 def _fill_path(path: str, seeds: dict):
     """Substitute {param} segments using provided seeds."""
     def repl(m):
@@ -308,21 +286,15 @@ def _apply_endpoint_rules(path: str, q: dict, all_q: list[str]) -> dict:
     return q
 
 
-# ---- Spec + param list (computed at import to parametrize the test) ----
-spec = _load_spec()
-GET_OPS = _list_get_ops(spec)
-
+def _plan_request(path):
+    """Build (url_path, query) for one GET operation.
 
-@pytest.mark.parametrize(
-    "path,op,path_spec",
-    GET_OPS,
-    ids=lambda x: x if isinstance(x, str) else x[0] if isinstance(x, tuple) else str(x),
-)
-def test_all_gets(path, op, path_spec, auth_headers):
-    params = _collect_params(path_spec, op)
-    req_q   = _required_names(params, "query")
-    req_p   = _required_names(params, "path")
-    all_q   = _all_query_names(params)
+    Returns (None, None, reason) when required params cannot be seeded.
+    """
+    info    = get_spec_registry(OPENAPI).index[path, "get"]
+    req_q   = list(info.required_query)
+    req_p   = list(info.required_path)
+    all_q   = list(info.query_names)
 
     # Override required parameters for specific endpoints where OpenAPI spec is incorrect
     if path == "/examinee/audit/query":
@@ -334,7 +306,7 @@ def test_all_gets(path, op, path_spec, auth_headers):
     if req_p:
         seeds = PATH_PARAM_SEEDS.get(path)
         if not seeds or any(name not in seeds for name in req_p):
-            pytest.skip(f"Skipping {path}: required path params {req_p} not seeded")
+            return None, None, f"Skipping {path}: required path params {req_p} not seeded"
         url_path = _fill_path(path, seeds)
     else:
         url_path = path
@@ -360,10 +332,78 @@ def test_all_gets(path, op, path_spec, auth_headers):
     # If there are required query params still unseeded, skip with a precise message
     unseeded = [n for n in req_q if n not in q or q[n] in ("", None)]
     if unseeded:
-        pytest.skip(f"Skipping {path}: required query params {unseeded} not seeded")
+        return None, None, f"Skipping {path}: required query params {unseeded} not seeded"
+
+    return url_path, q, None
+
+
+def _send(url_path, q, auth_headers):
+    return get_session_manager().get(f"{BASE_URL}{url_path}", headers=auth_headers, params=q, timeout=30)
+
+
+# ---- Spec + param list (computed at import to parametrize the test) ----
+spec = get_spec_registry(OPENAPI).spec
+GET_OPS = _list_get_ops(spec)
+
+# Max GETs in flight at once; 1 keeps the original one-after-another behaviour.
+CONCURRENCY = get_concurrency("LIGHT_CONCURRENCY")
+
+
+@pytest.fixture(scope="module")
+def prefetched(request, auth_headers):
+    """In concurrent mode, send the GETs of the selected tests up front and keep outcomes by path."""
+    if CONCURRENCY <= 1:
+        return {}
+    # The adaptive limit starts at LIGHT_CONCURRENCY and backs off from there
+    get_session_manager().flow.request_concurrency(CONCURRENCY)
+    # With VALIDATION_WORKERS set, bodies are decoded and validated in worker processes as they
+    # arrive; a full pool queue holds the sending thread, so requests slow to the validation rate
+    pool = get_validation_pool(OPENAPI)
+
+    def send(path, url_path, q):
+        resp = _send(url_path, q, auth_headers)
+        if pool is not None and "json" in resp.headers.get("Content-Type", ""):
+            resp.validation = pool.submit(path, "get", resp)
+        return resp
+
+    # Only the operations this run will test: -k, --changed-since and node ids narrow the plan
+    selected = [item.callspec.params["path"] for item in request.session.items
+                if item.module is request.module and getattr(item, "originalname", None) == "test_all_gets"]
+    plan = {}
+    for path in dict.fromkeys(selected):
+        url_path, q, skip_reason = _plan_request(path)
+        if skip_reason is None:
+            plan[path] = (lambda p=path, u=url_path, q=q: send(p, u, q))
+    # Slowest operations first (from the duration history), so none of them starts last
+    store = get_duration_store()
+    if store is not None:
+        estimator = store.estimator()
+        plan = {path: plan[path] for path in sorted(plan, key=lambda p: -estimator.request("GET", p))}
+    # Timings are attached to each operation's own test when it reads its outcome
+    with timing_collector.paused():
+        return run_concurrently(plan, CONCURRENCY)
+
+
+@pytest.mark.parametrize(
+    "path,op,path_spec",
+    GET_OPS,
+    ids=lambda x: x if isinstance(x, str) else x[0] if isinstance(x, tuple) else str(x),
+)
+def test_all_gets(path, op, path_spec, auth_headers, prefetched):
+    url_path, q, skip_reason = _plan_request(path)
+    if skip_reason:
+        pytest.skip(skip_reason)
 
     # ----- Call & Assert -----
-    resp = requests.get(f"{BASE_URL}{url_path}", headers=auth_headers, params=q, timeout=30)
+    if path in prefetched:
+        resp = prefetched[path].result()
+        timing_collector.add_response(resp)
+    else:
+        resp = _send(url_path, q, auth_headers)
+        # Sequential runs apply the same schema check as concurrent ones when the pool is on
+        pool = get_validation_pool(OPENAPI)
+        if pool is not None and "json" in resp.headers.get("Content-Type", ""):
+            resp.validation = pool.submit(path, "get", resp)
 
     if path in EXPECTED_STATUS:
         exp = EXPECTED_STATUS[path]
@@ -380,4 +420,13 @@ def test_all_gets(path, op, path_spec, auth_headers):
 
     ctype = resp.headers.get("Content-Type", "")
     if "json" in ctype:
-        _ = resp.json()
+        validation = getattr(resp, "validation", None)
+        if validation is None:
+            _ = resp.json()
+        else:
+            result = get_validation_pool(OPENAPI).result(validation)
+            problem = "invalid JSON" if result.kind == "json" else "a body that fails its schema"
+            assert result.ok, (
+                f"GET {url_path} returned {problem}: {result.error}\n"
+                f"Query={q}\nBody={resp.text[:800]}"
+            )
@@ -0,0 +1,157 @@
+"""Create -> update -> delete lifecycles of the write endpoints, with ids threaded between steps.
+
+Each chain creates its own records (named after a per-run tag), reads or
+updates them through the id the create call returned, and always deletes or
+closes what it created. The chains are independent, so they run concurrently
+before the tests read their outcomes (see tests/shared/lifecycle.py).
+
+Chains that need seed data are skipped without it: ``TEST_ID`` for forms,
+``PACKAGE_CODE`` for events and orders. ``EVENT_ID``, when set, attaches the
+session to an event.
+"""
+
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from tests.shared import APITestBase
+from tests.shared.concurrent_runner import get_concurrency
+from tests.shared.lifecycle import Lifecycle, LifecycleRunner, Step, run_lifecycles
+from tests.shared.timing import collector as timing_collector
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+DELETE_REASON = "Automated lifecycle test cleanup"
+
+
+def _window(ctx) -> dict:
+    return {"start-utc": ctx["start-utc"], "end-utc": ctx["end-utc"]}
+
+
+FORM = Lifecycle("form", [
+    Step("create", "POST", "/Form/Create",
+         body=lambda ctx: {"form-name": f"{ctx['run']}-FORM", "test-id": int(ctx["test-id"]),
+                           "description": f"{ctx['run']} lifecycle form", "language": "en"},
+         captures={"form-id": "form-id"}),
+    Step("query", "GET", "/Form/Query", after=("create",),
+         query=lambda ctx: {"form-id": ctx["form-id"], "limit": 1},
+         captures={"queried-form-id": "0/form-id"}),
+    Step("update", "PATCH", "/Form/Update", after=("query",),
+         body=lambda ctx: {"form-id": ctx["form-id"], "description": f"{ctx['run']} lifecycle form (updated)"}),
+    Step("delete", "DELETE", "/Form/Delete", after=("update",), cleanup=True,
+         query=lambda ctx: {"form-id": ctx["form-id"]}),
+], requires=("test-id",))
+
+SESSION = Lifecycle("session", [
+    Step("create", "POST", "/session/create",
+         body=lambda ctx: {"session-code": ctx["run"], "description": f"{ctx['run']} lifecycle session",
+                           **_window(ctx), **({"event-id": int(ctx["event-id"])} if ctx.get("event-id") else {})},
+         captures={"session-code": "session-code"}),
+    Step("update", "PATCH", "/session/update", after=("create",),
+         body=lambda ctx: {"session-code": ctx["session-code"],
+                           "description": f"{ctx['run']} lifecycle session (updated)"}),
+    Step("delete", "DELETE", "/session/delete", after=("update",), cleanup=True,
+         query=lambda ctx: {"session-code": ctx["session-code"]}),
+])
+
+EVENT = Lifecycle("event", [
+    Step("create", "POST", "/event/create",
+         body=lambda ctx: [{"event-description": f"{ctx['run']} lifecycle event",
+                            "package-code": ctx["package-code"], **_window(ctx)}],
+         captures={"event-id": "0/event-id"}),
+    Step("update", "PUT", "/event/update", after=("create",),
+         body=lambda ctx: [{"event-id": ctx["event-id"], "event-description": f"{ctx['run']} lifecycle event (updated)",
+                            "package-code": ctx["package-code"], **_window(ctx)}]),
+    Step("close", "DELETE", "/event/close", after=("update",), cleanup=True,
+         query=lambda ctx: {"event-id": ctx["event-id"]}),
+], requires=("package-code",))
+
+ORDER = Lifecycle("order", [
+    Step("create", "POST", "/order/Create",
+         body=lambda ctx: {"orders": [{"order-code": f"{ctx['run']}-ORDER",
+                                       "packages": [{"package-code": ctx["package-code"], "quantity": 1}]}]},
+         captures={"order-id": "0/order-id"}),
+    Step("delete", "DELETE", "/order/Delete", after=("create",), cleanup=True,
+         body=lambda ctx: {"order-id": ctx["order-id"], "delete-reason": DELETE_REASON}),
+], requires=("package-code",))
+
+LIFECYCLES = [FORM, SESSION, EVENT, ORDER]
+
+# Chains in flight at once; by default all of them, so the run takes as long as the longest chain
+CONCURRENCY = get_concurrency("LIFECYCLE_CONCURRENCY", len(LIFECYCLES))
+
+
+def _seed_context() -> dict:
+    """Per-run values the chains build their payloads from."""
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    return {
+        "run": f"LC{uuid.uuid4().hex[:8].upper()}",  # unique per run, so parallel runs never collide
+        "start-utc": now.isoformat().replace("+00:00", "Z"),
+        "end-utc": (now + timedelta(days=1)).isoformat().replace("+00:00", "Z"),
+        "test-id": os.getenv("TEST_ID"),
+        "package-code": os.getenv("PACKAGE_CODE"),
+        "event-id": os.getenv("EVENT_ID"),
+    }
+
+
+def _missing(lifecycle: Lifecycle, context: dict) -> list:
+    return [key for key in lifecycle.requires if not context.get(key)]
+
+
+def _has_json_body(registry, step: Step, response) -> bool:
+    """The spec documents a JSON schema for this response and the API sent a JSON body."""
+    if not response.content or "json" not in response.headers.get("Content-Type", ""):
+        return False  # e.g. a DELETE or close answered with an empty or plain-text body
+    method = step.method.lower()
+    operation = next((op for (path, m), op in registry.operations.items()
+                      if m == method and path.lower() == step.path.lower()), None)
+    documented = ((operation or {}).get("responses") or {}).get(str(response.status_code)) or {}
+    return any("json" in media_type and (media or {}).get("schema")
+               for media_type, media in (documented.get("content") or {}).items())
+
+
+@pytest.fixture(scope="module")
+def lifecycle_context():
+    return _seed_context()
+
+
+@pytest.fixture(scope="module")
+def lifecycle_results(auth_headers, lifecycle_context):
+    """Run every seeded lifecycle concurrently, once for the module."""
+    runnable = [lc for lc in LIFECYCLES if not _missing(lc, lifecycle_context)]
+    runner = LifecycleRunner(os.environ["BASE_URL"], auth_headers, {"program-id": os.getenv("PROGRAM_ID")},
+                             lifecycle_context)
+    # Timings are attached to each lifecycle's own test when it reads its outcome
+    with timing_collector.paused():
+        return run_lifecycles(runnable, runner, CONCURRENCY)
+
+
+class TestLifecycles(APITestBase):
+    """Create, update and delete records through ids returned by the API."""
+
+    @pytest.mark.parametrize("lifecycle", LIFECYCLES, ids=lambda lc: lc.name)
+    def test_lifecycle(self, lifecycle, lifecycle_context, lifecycle_results):
+        missing = _missing(lifecycle, lifecycle_context)
+        if missing:
+            pytest.skip(f"Skipping {lifecycle.name} lifecycle: no {', '.join(missing)} seeded "
+                        f"(set {', '.join(key.upper().replace('-', '_') for key in missing)})")
+        result = lifecycle_results[lifecycle.name]
+        for outcome in result.outcomes.values():
+            if outcome.response is not None:
+                timing_collector.add_response(outcome.response)
+
+        assert result.cleaned_up, f"{lifecycle.name} lifecycle left data behind: {result.describe()}"
+        assert result.ok, f"{lifecycle.name} lifecycle: {result.describe()}"
+        # Every step passed; check the bodies the spec documents as JSON against it too
+        for outcome in result.outcomes.values():
+            if _has_json_body(self.spec_registry, outcome.step, outcome.response):
+                self.assert_response_success(outcome.response, outcome.step.path,
+                                             outcome.response.status_code, outcome.step.method)
+        print(f"\n{lifecycle.name}: {len(result.outcomes)} steps in {result.seconds:.2f}s "
+              f"(run tag {result.context['run']})")
@@ -1,8 +1,9 @@
 # tests/test_smoke.py
 import os
-import requests
 import pytest
 
+from tests.shared.http_session import get_session_manager
+
 def _q(d):
     return {k: v for k, v in d.items() if v not in (None, "", [], {})}
 
@@ -16,18 +17,18 @@ def _cfg():
 
 def test_examinee_query(auth_headers, _cfg):
     params = _q({"program-id": _cfg["PROGRAM_ID"], "limit": 1})
-    r = requests.get(f"{_cfg['BASE']}/examinee/query", headers=auth_headers, params=params, timeout=30)
+    r = get_session_manager().get(f"{_cfg['BASE']}/examinee/query", headers=auth_headers, params=params, timeout=30)
     assert r.status_code == 200
     assert isinstance(r.json(), list)
 
 def test_event_query(auth_headers, _cfg):
     params = _q({"program-id": _cfg["PROGRAM_ID"], "limit": 1})
-    r = requests.get(f"{_cfg['BASE']}/event/query", headers=auth_headers, params=params, timeout=30)
+    r = get_session_manager().get(f"{_cfg['BASE']}/event/query", headers=auth_headers, params=params, timeout=30)
     assert r.status_code == 200
     assert isinstance(r.json(), list)
 
 def test_result_query(auth_headers, _cfg):
     params = _q({"program-id": _cfg["PROGRAM_ID"], "limit": 1})
-    r = requests.get(f"{_cfg['BASE']}/result/query", headers=auth_headers, params=params, timeout=30)
+    r = get_session_manager().get(f"{_cfg['BASE']}/result/query", headers=auth_headers, params=params, timeout=30)
     assert r.status_code == 200
     assert isinstance(r.json(), list)
@@ -0,0 +1 @@
+# Make package importable
@@ -0,0 +1,146 @@
+# tests/unit/conftest.py
+# Offline unit tests of tests/shared: no BASE_URL, no credentials, nothing beyond 127.0.0.1.
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pytest
+
+from tests.shared import json_stream
+from tests.shared.http_session import SessionManager
+
+Reply = Tuple[int, Dict[str, str], bytes]
+
+# Settings that tune the code under test; a developer's shell or .env must not change the results
+TUNING_PREFIXES = ("FLOW_", "RETRY_", "CIRCUIT_BREAKER", "HTTP_", "VALIDATION_", "TOKEN_")
+
+
+class FakeClock:
+    """Stands in for the ``time`` module: ``sleep`` moves the clock instead of waiting."""
+
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+        self.slept: List[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    perf_counter = monotonic
+    time = monotonic
+
+    def sleep(self, seconds: float):
+        self.slept.append(seconds)
+        self.now += seconds
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+class LocalAPI:
+    """Threaded HTTP server on 127.0.0.1 that answers from a script.
+
+    Replies queued with ``reply`` are sent in order and the last one repeats;
+    set ``respond`` to compute replies from the request instead.
+    """
+
+    def __init__(self):
+        self.requests: List[Tuple[str, str, Dict[str, str]]] = []  # method, path, headers
+        self.script: List[Reply] = []
+        self.respond: Optional[Callable[[str, str, Dict[str, str]], Reply]] = None
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, args=(0.05,), name="local-api", daemon=True)
+
+    def url(self, path: str = "/") -> str:
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}{path}"
+
+    def reply(self, status: int, body=None, headers: Optional[Dict[str, str]] = None) -> "LocalAPI":
+        payload = body if isinstance(body, bytes) else json.dumps({} if body is None else body).encode()
+        self.script.append((status, {"Content-Type": "application/json", **(headers or {})}, payload))
+        return self
+
+    def start(self) -> "LocalAPI":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._thread.join(timeout=5)
+
+    def _next(self, method: str, path: str, headers: Dict[str, str]) -> Reply:
+        with self._lock:
+            self.requests.append((method, path, headers))
+            if self.respond is not None:
+                return self.respond(method, path, headers)
+            return self.script.pop(0) if len(self.script) > 1 else self.script[0]
+
+    def _handler_class(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _serve(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                status, headers, body = api._next(self.command, self.path, dict(self.headers))
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = _serve
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+@pytest.fixture(autouse=True)
+def _default_settings(monkeypatch):
+    for name in [n for n in os.environ if n.startswith(TUNING_PREFIXES)]:
+        monkeypatch.delenv(name)
+
+
+@pytest.fixture(params=["python", "ijson"])
+def json_backend(request, monkeypatch) -> str:
+    """Parse streamed bodies with the built-in parser, then with ijson when it is installed."""
+    if request.param == "ijson":
+        monkeypatch.setattr(json_stream, "ijson", pytest.importorskip("ijson"))
+    else:
+        monkeypatch.setattr(json_stream, "ijson", None)
+    return request.param
+
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    """``fake_clock(module, ...)`` patches ``time`` in those modules with one FakeClock and returns it."""
+    clock = FakeClock()
+
+    def install(*modules) -> FakeClock:
+        for module in modules:
+            monkeypatch.setattr(module, "time", clock)
+        return clock
+
+    return install
+
+
+@pytest.fixture
+def local_api():
+    api = LocalAPI().start()
+    yield api
+    api.stop()
+
+
+@pytest.fixture
+def session_manager():
+    """A private SessionManager, so tests never share breaker, retry or flow state with the global one."""
+    manager = SessionManager()
+    yield manager
+    manager.close()
@@ -0,0 +1,186 @@
+"""Circuit breaker transitions closed -> open -> half-open -> closed/open, on a fake clock."""
+
+from urllib.parse import urlparse
+
+import pytest
+import requests
+
+from tests.shared import circuit_breaker
+from tests.shared.circuit_breaker import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, _describe, _parse_statuses,
+)
+
+URL = "https://api.example/v1/Form/Query"
+REFUSED = requests.exceptions.ConnectionError("HTTPSConnectionPool(host='api.example', port=443): "
+                                              "Max retries exceeded (Caused by NewConnectionError("
+                                              "'<conn>: Failed to establish a new connection: "
+                                              "[Errno 111] Connection refused'))")
+
+
+@pytest.fixture
+def clock(fake_clock):
+    return fake_clock(circuit_breaker)
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker(enabled=True, threshold=3, cooldown=30)
+
+
+def _fail(breaker, times=1, status=503, url=URL):
+    for _ in range(times):
+        probe = breaker.before(url)
+        breaker.record(url, status, None, probe)
+
+
+def _state(breaker, url=URL):
+    return breaker._circuits[urlparse(url).netloc].state
+
+
+class TestClosed:
+
+    def test_opens_after_threshold_consecutive_failures(self, breaker):
+        _fail(breaker, times=2)
+        assert _state(breaker) == CLOSED
+        _fail(breaker)
+        assert _state(breaker) == OPEN
+        with pytest.raises(CircuitOpenError, match=r"after 3 consecutive failures \(last: HTTP 503\)"):
+            breaker.before(URL)
+
+    def test_success_resets_the_count(self, breaker):
+        _fail(breaker, times=2)
+        breaker.record(URL, 200, None)
+        _fail(breaker, times=2)
+        assert _state(breaker) == CLOSED
+
+    def test_transport_errors_count(self, breaker):
+        for _ in range(3):
+            breaker.record(URL, None, REFUSED)
+        with pytest.raises(CircuitOpenError, match=r"last: ConnectionError: \[Errno 111\] Connection refused\)"):
+            breaker.before(URL)
+
+    def test_plain_500_and_client_errors_are_not_failures(self, breaker):
+        for status in (500, 500, 500, 404, 429):
+            breaker.record(URL, status, None)
+        breaker.record(URL, None, requests.exceptions.InvalidURL("bad"))
+        assert _state(breaker) == CLOSED
+
+    def test_status_set_is_configurable(self, monkeypatch, clock):
+        monkeypatch.setenv("CIRCUIT_BREAKER_STATUSES", "5xx")
+        breaker = CircuitBreaker(enabled=True, threshold=1)
+        breaker.record(URL, 500, None)
+        assert _state(breaker) == OPEN
+
+    def test_hosts_have_their_own_circuits(self, breaker):
+        _fail(breaker, times=3)
+        assert breaker.before("https://other.example/v1/Form/Query") is False
+        with pytest.raises(CircuitOpenError):
+            breaker.before(URL)
+
+
+class TestOpen:
+
+    def test_fails_fast_until_the_cooldown(self, breaker, clock):
+        _fail(breaker, times=3)
+        clock.advance(29)
+        with pytest.raises(CircuitOpenError, match="next probe in 1s"):
+            breaker.before(URL)
+        assert breaker._circuits["api.example"].fast_failed == 1
+
+    def test_open_error_is_a_connection_error(self):
+        assert issubclass(CircuitOpenError, requests.exceptions.ConnectionError)
+
+    def test_late_failures_do_not_restart_the_cooldown(self, breaker, clock):
+        _fail(breaker, times=3)
+        clock.advance(20)
+        breaker.record(URL, 503, None)  # an attempt admitted before the circuit opened
+        clock.advance(10)
+        assert breaker.before(URL) is True
+
+
+class TestHalfOpen:
+
+    def test_one_probe_after_the_cooldown(self, breaker, clock):
+        _fail(breaker, times=3)
+        clock.advance(30)
+        assert breaker.before(URL) is True
+        assert _state(breaker) == HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before(URL)
+
+    def test_successful_probe_closes_the_circuit(self, breaker, clock):
+        _fail(breaker, times=3)
+        clock.advance(30)
+        breaker.record(URL, 200, None, probe=breaker.before(URL))
+        assert _state(breaker) == CLOSED
+        assert breaker.before(URL) is False
+        circuit = breaker._circuits["api.example"]
+        assert (circuit.trips, circuit.recoveries, circuit.failures) == (1, 1, 0)
+
+    def test_failed_probe_reopens_for_another_cooldown(self, breaker, clock):
+        _fail(breaker, times=3)
+        clock.advance(30)
+        breaker.record(URL, 503, None, probe=breaker.before(URL))
+        assert _state(breaker) == OPEN
+        clock.advance(29)
+        with pytest.raises(CircuitOpenError):
+            breaker.before(URL)
+        clock.advance(1)
+        assert breaker.before(URL) is True
+        assert breaker._circuits["api.example"].trips == 1
+
+    def test_success_of_a_non_probe_does_not_close_it(self, breaker, clock):
+        _fail(breaker, times=3)
+        clock.advance(30)
+        breaker.before(URL)
+        breaker.record(URL, 200, None)  # a request admitted before the circuit opened
+        assert _state(breaker) == HALF_OPEN
+
+    def test_lost_probe_is_given_up_after_a_cooldown(self, breaker, clock):
+        _fail(breaker, times=3)
+        clock.advance(30)
+        assert breaker.before(URL) is True  # never reports back
+        clock.advance(29)
+        with pytest.raises(CircuitOpenError):
+            breaker.before(URL)
+        clock.advance(1)
+        assert breaker.before(URL) is True
+
+
+class TestReporting:
+
+    def test_summary(self, breaker, clock):
+        assert breaker.summary() == "Circuit breaker: never tripped (threshold 3 consecutive failures)"
+        _fail(breaker, times=3)
+        with pytest.raises(CircuitOpenError):
+            breaker.before(URL)
+        assert breaker.summary() == ("Circuit breaker: api.example open, tripped 1x, 1 requests failed fast, "
+                                     "recovered 0x (last cause: HTTP 503)")
+
+    def test_disabled(self):
+        breaker = CircuitBreaker(enabled=False, threshold=1)
+        _fail(breaker, times=5)
+        assert breaker.before(URL) is False
+        assert breaker.summary() == "Circuit breaker: disabled"
+
+    def test_describe(self):
+        assert _describe(REFUSED) == "ConnectionError: [Errno 111] Connection refused"
+        assert _describe(requests.exceptions.ReadTimeout("Read timed out. (read timeout=5)")) == (
+            "ReadTimeout: Read timed out. (read timeout=5)")
+        assert _describe(requests.exceptions.ConnectionError()) == "ConnectionError"
+
+    def test_parse_statuses(self):
+        assert _parse_statuses("502, 503,") == {502, 503}
+        assert _parse_statuses("5XX") == set(range(500, 600))
+        assert _parse_statuses("") == frozenset()
+
+
+def test_open_circuit_stops_requests_reaching_the_server(local_api, session_manager):
+    session_manager.breaker = CircuitBreaker(enabled=True, threshold=2, cooldown=60)
+    session_manager.retry.max_attempts_override = "1"
+    local_api.reply(503)
+    url = local_api.url("/v1/Form/Query")
+    assert [session_manager.get(url, timeout=5).status_code for _ in range(2)] == [503, 503]
+    with pytest.raises(CircuitOpenError):
+        session_manager.get(url, timeout=5)
+    assert len(local_api.requests) == 2
@@ -0,0 +1,143 @@
+"""Duration history: recording runs, estimates from history and response sizes, and packing."""
+
+import pytest
+
+from tests.shared import duration_store
+from tests.shared.duration_store import (
+    DEFAULT_TEST_SECONDS, HISTORY_RUNS, DurationStore, Estimator, RequestDuration, function_id,
+    get_duration_store, pack, request_durations,
+)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = DurationStore(tmp_path / "durations.sqlite")
+    yield store
+    store.close()
+
+
+def _tests(*entries):
+    return [duration_store.TestDuration(nodeid, "passed", seconds) for nodeid, seconds in entries]
+
+
+class TestHistory:
+
+    def test_mean_of_the_recent_runs(self, store):
+        for seconds in [100.0] + [float(s) for s in range(1, HISTORY_RUNS + 1)]:
+            store.record_run(_tests(("tests/a.py::test_x", seconds)), [])
+        recent = sum(range(1, HISTORY_RUNS + 1)) / HISTORY_RUNS  # the 100s run has aged out
+        assert store.test_estimates() == {"tests/a.py::test_x": pytest.approx(recent)}
+
+    def test_parametrized_cases_are_summed_per_run(self, store):
+        store.record_run(_tests(("tests/a.py::test_x[1]", 1.0), ("tests/a.py::test_x[2]", 2.0)), [])
+        store.record_run(_tests(("tests/a.py::test_x[1]", 5.0)), [])
+        assert store.test_estimates() == {"tests/a.py::test_x": pytest.approx(4.0)}
+
+    def test_prefix_is_matched_literally(self, store):
+        store.record_run(_tests(("tests/a_b/t.py::test_x", 1.0), ("tests/aXb/t.py::test_x", 2.0)), [])
+        assert store.test_estimates("tests/a_b/") == {"tests/a_b/t.py::test_x": 1.0}
+
+    def test_request_estimates_by_method_and_path(self, store):
+        for seconds in (1.0, 3.0):
+            store.record_run([], [RequestDuration("get", "/form/query", 200, seconds, 100),
+                                  RequestDuration("GET", "/form/query", 200, seconds, 100),
+                                  RequestDuration("POST", "/form/query", 201, 9.0, None)])
+        assert store.request_estimates() == {("GET", "/form/query"): pytest.approx(2.0),
+                                             ("POST", "/form/query"): pytest.approx(9.0)}
+        assert store.typical_sizes() == {"/form/query": pytest.approx(100.0)}
+
+    def test_size_model_fits_seconds_per_byte(self, store):
+        store.record_run([], [RequestDuration("GET", f"/p{n}", 200, 0.1 + 0.001 * n, n) for n in (0, 100, 400)])
+        base, per_byte = store.size_model()
+        assert base == pytest.approx(0.1) and per_byte == pytest.approx(0.001)
+
+    def test_size_model_without_sizes(self, store):
+        assert store.size_model() == (DEFAULT_TEST_SECONDS, 0.0)
+
+    def test_history_is_shared_between_stores(self, tmp_path, store):
+        store.record_run(_tests(("tests/a.py::test_x", 2.0)), [], base_url="https://api.example")
+        other = DurationStore(tmp_path / "durations.sqlite")
+        try:
+            assert other.test_estimates() == {"tests/a.py::test_x": 2.0}
+        finally:
+            other.close()
+
+
+class TestEstimator:
+
+    @pytest.fixture
+    def estimator(self):
+        return Estimator(tests={"tests/a.py::test_known": 7.0},
+                         requests={("GET", "/form/query"): 0.5, ("POST", "/form/query"): 2.0},
+                         sizes={"/Examinee/Query": 1000.0, "/form/query": 10.0},
+                         size_model=(0.2, 0.001))
+
+    def test_own_history_first(self, estimator):
+        assert estimator.test("tests/a.py::test_known[case]", ["/form/query"]) == (7.0, True)
+
+    def test_slowest_recorded_method_of_each_path(self, estimator):
+        assert estimator.test("tests/a.py::test_new", ["/form/query"]) == (2.0, False)
+
+    def test_response_size_for_paths_without_timings(self, estimator):
+        assert estimator.test("tests/a.py::test_new", ["/examinee/query"]) == (pytest.approx(1.2), False)
+        assert estimator.request("GET", "/unknown") == 0.2
+
+    def test_sums_the_paths_a_test_calls(self, estimator):
+        seconds, _ = estimator.test("tests/a.py::test_new", ["/form/query", "/Examinee/Query", "/unknown"])
+        assert seconds == pytest.approx(2.0 + 1.2 + 0.2)
+
+    def test_no_paths_no_history(self, estimator):
+        assert estimator.test("tests/a.py::test_new") == (DEFAULT_TEST_SECONDS, False)
+
+    def test_from_a_store(self, store):
+        store.record_run(_tests(("tests/a.py::test_x", 3.0)), [RequestDuration("GET", "/x", 200, 0.4, 50)])
+        estimator = store.estimator()
+        assert estimator.test("tests/a.py::test_x") == (3.0, True)
+        assert estimator.request("get", "/x") == pytest.approx(0.4)
+
+
+class TestPack:
+
+    def test_longest_processing_time_first(self):
+        assert pack({"a": 9.0, "b": 7.0, "c": 5.0, "d": 4.0, "e": 2.0}, 2) == [["a", "d"], ["b", "c", "e"]]
+
+    def test_balances_better_than_round_robin(self):
+        estimates = {f"t{i}": float(i) for i in range(1, 21)}
+        loads = [sum(estimates[key] for key in group) for group in pack(estimates, 4)]
+        round_robin = [sum(range(20 - i, 0, -4)) for i in range(4)]
+        assert sum(loads) == sum(estimates.values())
+        assert max(loads) < max(round_robin)
+        assert max(loads) - min(loads) <= max(estimates.values())
+
+    def test_more_bins_than_items(self):
+        assert pack({"a": 1.0}, 3) == [["a"], [], []]
+        assert pack({}, 2) == [[], []]
+
+
+def test_function_id():
+    assert function_id("tests/a.py::TestX::test_y[GET /x]") == "tests/a.py::TestX::test_y"
+
+
+def test_request_durations_are_relative_to_the_base_url():
+    rows = request_durations([
+        {"method": "GET", "url": "https://api.example/v1/form/query?x=1", "status": 200, "total": 250.0, "bytes": 9},
+        {"method": "POST", "url": "https://other.example/token", "total": 100.0},
+        {"method": "GET", "url": "https://api.example/v1", "status": 204, "total": 10.0},
+    ], "https://api.example/v1/")
+    assert rows == [RequestDuration("GET", "/form/query", 200, 0.25, 9),
+                    RequestDuration("POST", "/token", None, 0.1, None),
+                    RequestDuration("GET", "/", 204, 0.01, None)]
+
+
+def test_store_is_off_when_history_is_disabled(monkeypatch, tmp_path):
+    monkeypatch.setattr(duration_store, "_store", None)
+    monkeypatch.setenv("DURATION_HISTORY", "false")
+    assert get_duration_store() is None
+    monkeypatch.setenv("DURATION_HISTORY", "true")
+    monkeypatch.setenv("DURATION_DB", str(tmp_path / "history" / "durations.sqlite"))
+    store = get_duration_store()
+    try:
+        assert store is get_duration_store()
+        assert store.path == tmp_path / "history" / "durations.sqlite" and store.path.exists()
+    finally:
+        store.close()
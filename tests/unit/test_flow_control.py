@@ -0,0 +1,234 @@
+"""AIMD limiter, token buckets and the flow controller, on a fake clock."""
+
+import threading
+
+import pytest
+
+from tests.shared import flow_control
+from tests.shared.flow_control import AIMDLimiter, FlowController, TokenBucket, _parse_buckets
+
+
+def _finish(limiter: AIMDLimiter, status=200, latency=0.1, path="/x/query", times=1):
+    for _ in range(times):
+        limiter.acquire()
+        limiter.release(path, status, latency)
+
+
+class TestTokenBucket:
+
+    def test_burst_is_free_then_waits_for_refill(self, fake_clock):
+        clock = fake_clock(flow_control)
+        bucket = TokenBucket(rate=2.0, burst=3)
+        assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert bucket.acquire() == pytest.approx(0.5)
+        assert clock.slept == [pytest.approx(0.5)]
+
+    def test_steady_rate_after_the_burst(self, fake_clock):
+        clock = fake_clock(flow_control)
+        bucket = TokenBucket(rate=4.0, burst=1)
+        waited = sum(bucket.acquire() for _ in range(9))
+        assert waited == pytest.approx(2.0)  # 8 tokens at 4/s
+        assert clock.now - 1_000_000.0 == pytest.approx(2.0)
+
+    def test_refill_is_capped_at_burst(self, fake_clock):
+        clock = fake_clock(flow_control)
+        bucket = TokenBucket(rate=1.0, burst=2)
+        bucket.acquire()
+        bucket.acquire()
+        clock.advance(60)
+        assert [bucket.acquire() for _ in range(2)] == [0.0, 0.0]
+        assert bucket.acquire() == pytest.approx(1.0)
+
+    def test_burst_of_zero_still_admits_one(self, fake_clock):
+        fake_clock(flow_control)
+        assert TokenBucket(rate=1.0, burst=0).acquire() == 0.0
+
+
+class TestAIMDLimiter:
+
+    def test_grows_about_one_slot_per_window_of_successes(self, fake_clock):
+        fake_clock(flow_control)
+        limiter = AIMDLimiter(initial=4)
+        _finish(limiter, times=4)
+        assert int(limiter.limit) == 4
+        _finish(limiter)
+        assert int(limiter.limit) == 5
+
+    def test_never_exceeds_max_limit(self, fake_clock):
+        fake_clock(flow_control)
+        limiter = AIMDLimiter(initial=2, max_limit=3)
+        _finish(limiter, times=50)
+        assert limiter.limit == 3
+
+    def test_429_halves_the_limit(self, fake_clock):
+        fake_clock(flow_control)
+        limiter = AIMDLimiter(initial=8)
+        _finish(limiter, status=429)
+        assert limiter.limit == 4
+        assert limiter.decreases == 1
+
+    def test_decreases_are_spaced_by_the_cooldown(self, fake_clock):
+        clock = fake_clock(flow_control)
+        limiter = AIMDLimiter(initial=16, cooldown=1.0)
+        _finish(limiter, status=429, times=3)
+        assert (limiter.limit, limiter.decreases) == (8, 1)
+        clock.advance(1.0)
+        _finish(limiter, status=429)
+        assert (limiter.limit, limiter.decreases) == (4, 2)
+
+    def test_limit_floor(self, fake_clock):
+        clock = fake_clock(flow_control)
+        limiter = AIMDLimiter(initial=2, min_limit=1)
+        for _ in range(5):
+            _finish(limiter, status=429)
+            clock.advance(2)
+        assert limiter.limit == 1
+
+    def test_5xx_rate_over_threshold_is_congestion(self, fake_clock):
+        fake_clock(flow_control)
+        limiter = AIMDLimiter(initial=8, error_threshold=0.2, window=20)
+        _finish(limiter, times=3)
+        _finish(limiter, status=500)
+        assert limiter.decreases == 0  # fewer than 5 responses in the window
+        _finish(limiter, status=500)
+        assert limiter.decreases == 1
+
+    def test_transport_errors_count_as_failures(self, fake_clock):
+        fake_clock(flow_control)
+        limiter = AIMDLimiter(initial=8)
+        _finish(limiter, status=None, times=5)
+        assert limiter.decreases == 1
+
+    def test_latency_spike_against_the_moving_average(self, fake_clock):
+        fake_clock(flow_control)
+        limiter = AIMDLimiter(initial=8, latency_tolerance=3.0, latency_samples=5)
+        _finish(limiter, latency=0.1, times=5)
+        _finish(limiter, latency=0.25)
+        assert limiter.decreases == 0
+        _finish(limiter, latency=0.5)
+        assert limiter.decreases == 1
+
+    def test_no_latency_signal_before_enough_samples(self, fake_clock):
+        fake_clock(flow_control)
+        limiter = AIMDLimiter(initial=8, latency_samples=5)
+        _finish(limiter, latency=0.01, times=4)
+        _finish(limiter, latency=1.0)
+        assert limiter.decreases == 0
+
+    def test_one_fast_response_does_not_make_normal_ones_spikes(self, fake_clock):
+        fake_clock(flow_control)
+        limiter = AIMDLimiter(initial=8)
+        _finish(limiter, latency=0.2, times=10)
+        _finish(limiter, latency=0.001)
+        _finish(limiter, latency=0.2, times=10)
+        assert limiter.decreases == 0
+
+    def test_baseline_follows_a_sustained_slowdown(self, fake_clock):
+        clock = fake_clock(flow_control)
+        limiter = AIMDLimiter(initial=8)
+        _finish(limiter, latency=0.1, times=10)
+        for _ in range(30):
+            _finish(limiter, latency=0.28)
+            clock.advance(2)
+        decreases = limiter.decreases
+        _finish(limiter, latency=0.6)  # ~2x the new normal
+        assert limiter.decreases == decreases
+
+    def test_baselines_are_per_path(self, fake_clock):
+        fake_clock(flow_control)
+        limiter = AIMDLimiter(initial=8)
+        _finish(limiter, path="/fast", latency=0.01, times=5)
+        _finish(limiter, path="/slow", latency=2.0, times=5)
+        assert limiter.decreases == 0
+
+    def test_server_errors_do_not_feed_the_baseline(self, fake_clock):
+        fake_clock(flow_control)
+        limiter = AIMDLimiter(initial=8, error_threshold=1.0)
+        _finish(limiter, status=503, latency=0.001, times=5)
+        _finish(limiter, latency=0.5)
+        assert limiter.decreases == 0
+
+    def test_raise_to_lifts_but_never_lowers(self):
+        limiter = AIMDLimiter(initial=4, max_limit=10)
+        limiter.raise_to(8)
+        assert limiter.limit == 8
+        limiter.raise_to(2)
+        assert limiter.limit == 8
+        limiter.raise_to(50)
+        assert limiter.limit == 10
+
+    def test_acquire_waits_for_a_free_slot(self):
+        limiter = AIMDLimiter(initial=1)
+        limiter.acquire()
+        admitted = threading.Event()
+        waiter = threading.Thread(target=lambda: (limiter.acquire(), admitted.set()))
+        waiter.start()
+        assert not admitted.wait(0.2)
+        limiter.release("/x", 200, 0.1)
+        waiter.join(timeout=5)
+        assert admitted.is_set()
+        assert limiter.held == 1
+        assert limiter.peak_in_flight == 1
+
+
+class TestFlowController:
+
+    def test_token_bucket_wait_is_reported(self, fake_clock):
+        fake_clock(flow_control)
+        controller = FlowController(enabled=True, limiter=AIMDLimiter(), buckets={"/result/query": (1.0, 1)})
+        for _ in range(3):
+            with controller.slot("https://api.example/v1/Result/Query?x=1") as record:
+                record(200)
+        assert controller.throttled_seconds == pytest.approx(2.0)
+        assert "2.0s waiting on token buckets" in controller.summary()
+
+    def test_slot_reports_the_status_to_the_limiter(self, fake_clock):
+        fake_clock(flow_control)
+        controller = FlowController(enabled=True, limiter=AIMDLimiter(initial=8), buckets={})
+        with controller.slot("https://api.example/x") as record:
+            record(429)
+        assert controller.limiter.limit == 4
+
+    def test_slot_without_a_status_counts_as_a_transport_error(self, fake_clock):
+        fake_clock(flow_control)
+        controller = FlowController(enabled=True, limiter=AIMDLimiter(initial=8), buckets={})
+        for _ in range(5):
+            with pytest.raises(OSError):
+                with controller.slot("https://api.example/x"):
+                    raise OSError("connection reset")
+        assert controller.limiter.decreases == 1
+        assert controller.limiter.in_flight == 0
+
+    def test_disabled_controller_does_nothing(self):
+        controller = FlowController(enabled=False, limiter=AIMDLimiter(initial=1), buckets={"/x": (0.001, 1)})
+        for _ in range(3):
+            with controller.slot("https://api.example/x") as record:
+                record(429)
+        assert controller.limiter.limit == 1
+        assert controller.summary() == "Flow control: disabled"
+
+    def test_limit_starts_at_the_requested_concurrency(self):
+        controller = FlowController(enabled=True, buckets={})
+        controller.request_concurrency(12)
+        assert controller.limiter.limit == 12
+
+    def test_explicit_initial_limit_is_kept_and_reported(self, monkeypatch):
+        monkeypatch.setenv("FLOW_INITIAL_LIMIT", "1")
+        controller = FlowController(enabled=True, buckets={})
+        controller.request_concurrency(12)
+        assert controller.limiter.limit == 1
+        controller.limiter.acquire()
+        waiter = threading.Thread(target=controller.limiter.acquire)
+        waiter.start()
+        while controller.limiter.held == 0:
+            waiter.join(0.01)
+        controller.limiter.release("/x", 200, 0.1)
+        waiter.join(timeout=5)
+        assert "held back 1 requests below the configured concurrency of 12" in controller.summary()
+
+
+def test_parse_buckets():
+    assert _parse_buckets(" /result/query=1:2, /examinee/audit/query=0.5 ,") == {
+        "/result/query": (1.0, 2),
+        "/examinee/audit/query": (0.5, 1),
+    }
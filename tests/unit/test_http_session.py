@@ -0,0 +1,43 @@
+"""Connection stats: reuse counting, with pre-warmed connections kept apart."""
+
+import threading
+
+from tests.shared.http_session import ConnectionStats
+
+
+def test_reuse_ratio():
+    stats = ConnectionStats()
+    assert stats.reuse_ratio == 0.0
+    for _ in range(4):
+        stats.record_request()
+    stats.record_connection()
+    assert stats.reuse_ratio == 0.75
+
+
+def test_prewarming_counts_only_this_threads_connections():
+    stats = ConnectionStats()
+    with stats.prewarming():
+        stats.record_connection()
+        other = threading.Thread(target=stats.record_connection)
+        other.start()
+        other.join()
+    stats.record_connection()
+    assert (stats.prewarmed, stats.connections) == (1, 2)
+
+
+def test_prewarmed_connections_are_left_out_of_the_reuse_ratio():
+    stats = ConnectionStats()
+    with stats.prewarming():
+        stats.record_connection()
+        stats.record_connection()
+    for _ in range(3):
+        stats.record_request()  # all served on the warm connections
+    assert stats.reuse_ratio == 1.0
+    assert stats.as_dict() == {"requests": 3, "connections": 0, "prewarmed": 2, "reuse_ratio": 1.0}
+
+
+def test_session_prewarm_is_reported_apart(local_api, session_manager):
+    assert session_manager.prewarm([local_api.url("/")], 2).startswith("Pre-warmed connections: 127.0.0.1 x2")
+    assert (session_manager.stats.prewarmed, session_manager.stats.connections) == (2, 0)
+    assert session_manager.summary().startswith(
+        "HTTP connections: 0 requests over 0 connections + 2 pre-warmed (reuse ratio 0%")
@@ -0,0 +1,319 @@
+"""Change-impact analysis: spec diffs, rule and test mapping, and the git diff it starts from."""
+
+import ast
+import json
+import subprocess
+import textwrap
+from types import SimpleNamespace
+
+import pytest
+
+from tests.shared import impact
+from tests.shared.impact import (
+    FileChange, Impact, _module_paths, analyse, changed_functions, changed_operations, git_changes, rule_changes,
+)
+
+SPEC = {
+    "paths": {
+        "/Form/Query": {
+            "parameters": [{"$ref": "#/components/parameters/ProgramId"}],
+            "get": {"responses": {"200": {"content": {"application/json": {
+                "schema": {"type": "array", "items": {"$ref": "#/components/schemas/Form"}}}}}}},
+        },
+        "/Form/Create": {"post": {"requestBody": {"content": {"application/json": {
+            "schema": {"$ref": "#/components/schemas/NewForm"}}}}, "responses": {"200": {}}}},
+        "/session/query": {"get": {"responses": {"200": {}}}},
+    },
+    "components": {
+        "parameters": {"ProgramId": {"name": "program-id", "in": "query", "schema": {"type": "integer"}}},
+        "schemas": {
+            "Form": {"type": "object", "properties": {"form-id": {"type": "integer"},
+                                                      "owner": {"$ref": "#/components/schemas/Owner"}}},
+            "NewForm": {"type": "object", "properties": {"form-name": {"type": "string"}}},
+            "Owner": {"type": "object", "properties": {"name": {"type": "string"}}},
+        },
+    },
+}
+
+RULES = textwrap.dedent('''\
+    class APITestBase:
+        def apply_path_specific_rules(self, path, data):
+            """Adjust the data for paths with known quirks."""
+            if path == "/Form/Query":
+                data = data[:10]
+            if path in ["/session/query", "/event/query"]:
+                data = [d for d in data if d]
+            data = list(data)
+            return data
+
+        def get_expected_status_codes(self, path):
+            return {
+                "/Form/Create": [200, 400],
+                "/order/Delete": [200, 404],
+            }
+
+        def helper(self):
+            return 1
+    ''')
+
+TESTS = textwrap.dedent('''\
+    import pytest
+
+    BASE = "https://api.example/v1"
+
+
+    class TestForms:
+        def test_query(self):
+            path = "/Form/Query"
+            return path
+
+        @pytest.mark.slow
+        def test_create(self):
+            return f"{BASE}/form/create?program-id=1"
+
+
+    def test_sessions():
+        return "/session/query"
+
+
+    def test_full_url():
+        return "https://api.example.com/v1/Session/Query?limit=1"
+
+
+    def test_unknown_url():
+        return "https://api.example.com/v1/health"
+    ''')
+
+
+def _line(source: str, marker: str) -> int:
+    return next(n for n, text in enumerate(source.splitlines(), 1) if marker in text)
+
+
+def _copy(spec=SPEC):
+    return json.loads(json.dumps(spec))
+
+
+class TestChangedOperations:
+
+    def test_identical_specs(self):
+        assert changed_operations(SPEC, _copy()) == {}
+
+    def test_direct_change(self):
+        new = _copy()
+        new["paths"]["/Form/Create"]["post"]["responses"]["400"] = {}
+        assert changed_operations(SPEC, new) == {("/Form/Create", "POST"): "changed"}
+
+    def test_added_and_removed(self):
+        new = _copy()
+        del new["paths"]["/session/query"]
+        new["paths"]["/Form/Create"]["delete"] = {"responses": {"200": {}}}
+        assert changed_operations(SPEC, new) == {("/session/query", "GET"): "removed",
+                                                 ("/Form/Create", "DELETE"): "added"}
+
+    def test_change_through_a_ref_chain(self):
+        new = _copy()
+        new["components"]["schemas"]["Owner"]["required"] = ["name"]
+        assert changed_operations(SPEC, new) == {("/Form/Query", "GET"): "via Owner"}
+
+    def test_path_level_parameters(self):
+        new = _copy()
+        new["components"]["parameters"]["ProgramId"]["required"] = True
+        assert changed_operations(SPEC, new) == {("/Form/Query", "GET"): "via ProgramId"}
+        new = _copy()
+        new["paths"]["/Form/Query"]["parameters"].append({"name": "limit", "in": "query"})
+        assert changed_operations(SPEC, new) == {("/Form/Query", "GET"): "changed"}
+
+    def test_dropped_ref_still_counts(self):
+        new = _copy()
+        new["paths"]["/Form/Query"]["get"]["responses"]["200"] = {}
+        new["components"]["schemas"]["Owner"]["type"] = "string"
+        del new["components"]["schemas"]["Form"]
+        assert changed_operations(SPEC, new)[("/Form/Query", "GET")] == "changed"
+
+    def test_unused_component(self):
+        new = _copy()
+        new["components"]["schemas"]["Unused"] = {"type": "string"}
+        assert changed_operations(SPEC, new) == {}
+
+
+class TestRuleChanges:
+
+    @pytest.fixture(scope="class")
+    def tree(self):
+        return ast.parse(RULES)
+
+    def test_equality_branch(self, tree):
+        assert rule_changes(tree, {_line(RULES, "data[:10]")}) == ({"/Form/Query"}, False)
+
+    def test_membership_branch(self, tree):
+        assert rule_changes(tree, {_line(RULES, 'path in [')}) == ({"/session/query", "/event/query"}, False)
+
+    def test_status_code_entries(self, tree):
+        lines = {_line(RULES, '"/order/Delete"'), _line(RULES, '"/Form/Create": [')}
+        assert rule_changes(tree, lines) == ({"/order/Delete", "/Form/Create"}, False)
+
+    def test_statement_outside_a_branch_affects_every_path(self, tree):
+        assert rule_changes(tree, {_line(RULES, "data = list(data)")})[1] is True
+
+    def test_docstring_affects_every_path(self, tree):
+        assert rule_changes(tree, {_line(RULES, "known quirks")})[1] is True
+
+    def test_other_methods_affect_every_path(self, tree):
+        assert rule_changes(tree, {_line(RULES, "def helper")}) == (set(), True)
+
+    def test_no_lines(self, tree):
+        assert rule_changes(tree, set()) == (set(), False)
+
+    def test_unparsable_file(self):
+        assert rule_changes(None, {1}) == (set(), True)
+        assert rule_changes(None, set()) == (set(), False)
+
+
+class TestChangedFunctions:
+
+    @pytest.fixture(scope="class")
+    def tree(self):
+        return ast.parse(TESTS)
+
+    def test_lines_inside_tests(self, tree):
+        lines = {_line(TESTS, 'path = "/Form/Query"'), _line(TESTS, 'return "/session/query"')}
+        assert changed_functions(tree, lines) == {"TestForms::test_query", "test_sessions"}
+
+    def test_decorator_belongs_to_its_test(self, tree):
+        assert changed_functions(tree, {_line(TESTS, "@pytest.mark.slow")}) == {"TestForms::test_create"}
+
+    def test_module_level_change_selects_the_whole_file(self, tree):
+        assert changed_functions(tree, {_line(TESTS, "BASE =")}) is None
+        assert changed_functions(None, {1}) is None
+
+    def test_no_lines(self, tree):
+        assert changed_functions(tree, set()) == set()
+
+
+class TestModulePaths:
+
+    @pytest.fixture(scope="class")
+    def paths(self):
+        return _module_paths(ast.parse(TESTS), {path.lower(): path for path in SPEC["paths"]})
+
+    def test_exact_constants(self, paths):
+        assert paths["TestForms::test_query"] == {"/form/query"}
+        assert paths["test_sessions"] == {"/session/query"}
+
+    def test_f_string_parts(self, paths):
+        assert paths["TestForms::test_create"] == {"/form/create"}
+
+    def test_full_urls(self, paths):
+        assert paths["test_full_url"] == {"/session/query"}
+        assert paths["test_unknown_url"] == set()
+
+
+class TestImpact:
+
+    def _impact(self, **fields):
+        defaults = dict(base="HEAD", everything=None, operations={}, rule_paths=set(), test_files={},
+                        known_paths={path.lower(): path for path in SPEC["paths"]})
+        return Impact(**{**defaults, **fields})
+
+    def test_everything(self):
+        assert self._impact(everything="tests/conftest.py changed").selects("tests/test_x.py::test_y")
+
+    def test_changed_test_functions(self):
+        result = self._impact(test_files={"tests/test_x.py": {"TestA::test_b"}, "tests/test_z.py": None})
+        assert result.selects("tests/test_x.py::TestA::test_b[case]")
+        assert not result.selects("tests/test_x.py::TestA::test_c")
+        assert result.selects("tests/test_z.py::anything")
+
+    def test_case_ids_match_method_and_path(self):
+        result = self._impact(operations={("/Form/Query", "GET"): "changed"})
+        assert result.selects("tests/test_all_get.py::test_get[GET /form/query]")
+        assert not result.selects("tests/test_all_get.py::test_get[POST /form/query]")
+        assert result.selects("tests/test_all_get.py::test_get[/Form/Query]")
+
+    def test_rule_paths_match_any_method(self):
+        result = self._impact(rule_paths={"/Form/Create"})
+        assert result.selects("tests/test_forms.py::test_x[POST /Form/Create]")
+        assert not result.selects("tests/test_forms.py::test_x[POST /Form/Delete]")
+
+    def test_params(self):
+        result = self._impact(operations={("/session/query", "GET"): "changed"})
+        assert result.selects("tests/test_light.py::test_path[3]", {"path": "/session/query"})
+        steps = [SimpleNamespace(path="/session/create", method="POST"), SimpleNamespace(path="/session/query",
+                                                                                         method="get")]
+        assert result.item_calls("x::y", {"lifecycle": SimpleNamespace(steps=steps)}) == {
+            ("/session/create", "POST"), ("/session/query", "GET")}
+        assert result.selects("tests/test_lifecycles.py::test_lifecycle[session]",
+                              {"lifecycle": SimpleNamespace(steps=steps)})
+
+    def test_describe(self):
+        result = self._impact(operations={("/Form/Query", "GET"): "via Owner"}, rule_paths={"/Form/Create"},
+                              test_files={"tests/test_x.py": set()})
+        assert result.describe() == ["GET /Form/Query: via Owner", f"rules for /Form/Create in {impact.RULES_FILE}",
+                                     "tests/test_x.py: no tests"]
+        assert self._impact().describe() == ["nothing under tests/ or in the spec"]
+
+
+class TestGitDiff:
+
+    @pytest.fixture
+    def repo(self, tmp_path, monkeypatch):
+        """A scratch repository holding a spec, the rules file and one test file, committed as HEAD."""
+        def git(*args):
+            subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@example.com", *args],
+                           cwd=tmp_path, check=True, capture_output=True)
+
+        def write(name, text):
+            (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / name).write_text(text, encoding="utf-8")
+
+        write(impact.SPEC_PATH, json.dumps(SPEC, indent=2))
+        write(impact.RULES_FILE, RULES)
+        write("tests/test_forms.py", TESTS)
+        git("init", "-q")
+        git("add", ".")
+        git("commit", "-q", "-m", "base")
+        monkeypatch.setattr(impact, "REPO_ROOT", tmp_path)
+        monkeypatch.delenv("OPENAPI_PATH", raising=False)
+        monkeypatch.setattr(impact, "_paths_by_file", {})
+        impact._file_tree.cache_clear()
+        yield SimpleNamespace(path=tmp_path, write=write)
+        impact._file_tree.cache_clear()
+
+    def test_changed_lines_and_untracked_files(self, repo):
+        repo.write("tests/test_forms.py", TESTS.replace('"/Form/Query"', '"/Form/Query?limit=1"'))
+        repo.write("tests/test_new.py", "def test_new():\n    pass\n")
+        line = _line(TESTS, 'path = "/Form/Query"')
+        assert git_changes("HEAD") == {
+            "tests/test_forms.py": FileChange({line}, {line}, False),
+            "tests/test_new.py": FileChange(set(), set(), True),
+        }
+
+    def test_pure_insertions_and_deletions(self, repo):
+        repo.write("tests/test_forms.py", TESTS.replace("import pytest\n", "import pytest\nimport os\n"))
+        assert git_changes("HEAD")["tests/test_forms.py"] == FileChange(set(), {2}, False)
+        repo.write("tests/test_forms.py", TESTS.replace("import pytest\n", ""))
+        assert git_changes("HEAD")["tests/test_forms.py"] == FileChange({1}, set(), False)
+
+    def test_analyse(self, repo):
+        spec = _copy()
+        spec["components"]["schemas"]["NewForm"]["required"] = ["form-name"]
+        repo.write(impact.SPEC_PATH, json.dumps(spec, indent=2))
+        repo.write(impact.RULES_FILE, RULES.replace("data[:10]", "data[:20]"))
+        repo.write("tests/test_forms.py", TESTS.replace('return "/session/query"', 'return "/session/query?x"'))
+        result = analyse("HEAD")
+        assert result.everything is None
+        assert result.operations == {("/Form/Create", "POST"): "via NewForm"}
+        assert result.rule_paths == {"/Form/Query"}
+        assert result.test_files == {"tests/test_forms.py": {"test_sessions"}}
+        assert result.selects("tests/test_forms.py::TestForms::test_query")   # calls /Form/Query
+        assert result.selects("tests/test_forms.py::TestForms::test_create")  # calls /Form/Create
+        assert not result.selects("tests/test_other.py::test_get[GET /session/query]")
+
+    def test_shared_code_selects_everything(self, repo):
+        repo.write("tests/shared/helpers.py", "X = 1\n")
+        assert analyse("HEAD").everything == "tests/shared/helpers.py changed"
+
+    def test_files_outside_the_tests_select_nothing(self, repo):
+        repo.write("docs/notes.md", "notes\n")
+        result = analyse("HEAD")
+        assert (result.everything, result.operations, result.rule_paths, result.test_files) == (None, {}, set(), {})
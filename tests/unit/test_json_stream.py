@@ -0,0 +1,96 @@
+"""The pure-Python incremental JSON parser, fed whole and in every possible split."""
+
+import pytest
+
+from tests.shared.json_stream import JSONStreamError, iter_events
+
+DOCUMENT = '{"id": 7, "name": "caf\\u00e9 \\"A\\"", "tags": ["x", "ü€"], "score": -1.5e2, "ok": true, "gone": null, "nested": [{}, []]}'
+
+EVENTS = [
+    ("start_map", None),
+    ("map_key", "id"), ("number", 7),
+    ("map_key", "name"), ("string", 'café "A"'),
+    ("map_key", "tags"), ("start_array", None), ("string", "x"), ("string", "ü€"), ("end_array", None),
+    ("map_key", "score"), ("number", -150.0),
+    ("map_key", "ok"), ("boolean", True),
+    ("map_key", "gone"), ("null", None),
+    ("map_key", "nested"), ("start_array", None), ("start_map", None), ("end_map", None),
+    ("start_array", None), ("end_array", None), ("end_array", None),
+    ("end_map", None),
+]
+
+
+pytestmark = pytest.mark.usefixtures("json_backend")
+
+
+def _events(*chunks: bytes):
+    return list(iter_events(chunks))
+
+
+def test_events_of_a_whole_document():
+    assert _events(DOCUMENT.encode()) == EVENTS
+
+
+def test_every_two_way_split_gives_the_same_events():
+    body = DOCUMENT.encode()  # multi-byte characters get split between chunks too
+    for cut in range(len(body) + 1):
+        assert _events(body[:cut], body[cut:]) == EVENTS, f"split at byte {cut}"
+
+
+def test_one_byte_chunks():
+    body = DOCUMENT.encode()
+    assert _events(*(body[i:i + 1] for i in range(len(body)))) == EVENTS
+
+
+def test_integers_stay_integers():
+    events = _events(b"[0, -3, 12, 1.0, 2e3, 1E-2]")
+    values = [value for kind, value in events if kind == "number"]
+    assert values == [0, -3, 12, 1.0, 2000.0, 0.01]
+    assert [type(v) for v in values] == [int, int, int, float, float, float]
+
+
+@pytest.mark.parametrize("body", [b"12", b"1.25", b"true", b"null", b'"s"'])
+def test_top_level_scalars_split_anywhere(body):
+    expected = _events(body)
+    assert len(expected) == 1
+    for cut in range(1, len(body)):
+        assert _events(body[:cut], body[cut:]) == expected
+
+
+def test_whitespace_and_empty_chunks():
+    assert _events(b"", b" \n[", b"", b"\t1 ", b"]\r\n", b"") == [
+        ("start_array", None), ("number", 1), ("end_array", None)]
+
+
+def test_escaped_backslash_before_a_closing_quote():
+    assert _events(b'["a\\\\", "b"]') == [
+        ("start_array", None), ("string", "a\\"), ("string", "b"), ("end_array", None)]
+
+
+@pytest.mark.parametrize("body", [
+    b"", b"   ", b"[", b'{"a": 1', b'"unterminated',
+    b"[1,]", b"[,1]", b"[1 2]", b'{"a" 1}', b'{"a":}', b'{"a":1,}', b"{1: 2}", b'{"a": 1]', b"]",
+    b"01", b"1.", b"-", b"1e", b"+1",
+    b"nul", b"True", b"truex", b"1 2", b"{} []",
+    b'"tab\there"', b'"\\x"', b"\xff", b'"\xe2\x82"',
+])
+def test_malformed_bodies_raise(body):
+    with pytest.raises(JSONStreamError):
+        _events(body)
+
+
+def test_error_names_the_offset(json_backend):
+    if json_backend != "python":
+        pytest.skip("ijson reports positions in its own format")
+    with pytest.raises(JSONStreamError, match="offset 3"):
+        _events(b"[1,,2]")
+
+
+def test_events_arrive_before_the_body_ends():
+    def chunks():
+        yield b'[{"a": 1}, '
+        raise AssertionError("parser read ahead of the events it could already emit")
+
+    events = iter_events(chunks())
+    assert [next(events) for _ in range(5)] == [
+        ("start_array", None), ("start_map", None), ("map_key", "a"), ("number", 1), ("end_map", None)]
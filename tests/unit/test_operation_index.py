@@ -0,0 +1,150 @@
+"""Operation index lookups, checked against walking the raw spec the way tests used to."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from tests.shared.operation_index import OperationIndex
+from tests.shared.spec_cache import HTTP_METHODS, build_operations, resolve_ref
+
+REPO_SPEC = Path(__file__).resolve().parents[2] / "schema" / "openapi.json"
+
+SPEC = {
+    "openapi": "3.0.1",
+    "paths": {
+        "/v1/Result/Query": {
+            "parameters": [
+                {"name": "programId", "in": "query", "required": True, "schema": {"type": "integer"}},
+                {"name": "status", "in": "query", "schema": {"type": "string"}},
+            ],
+            "get": {
+                "operationId": "queryResults",
+                "parameters": [
+                    {"$ref": "#/components/parameters/Status"},
+                    {"name": "ids", "in": "query", "schema": {"type": "array", "items": {"$ref": "#/components/schemas/Id"}}},
+                    {"name": "resultId", "in": "path", "required": True, "schema": {"type": "string", "format": "uuid"}},
+                    {"name": "X-Trace", "in": "header", "schema": {"type": "string", "default": "off"}},
+                    {"$ref": "#/components/parameters/Missing-name"},
+                ],
+                "responses": {"200": {"description": "ok"}},
+            },
+            "post": {
+                "requestBody": {"required": True, "content": {
+                    "text/plain": {"schema": {"type": "string"}},
+                    "application/json": {"schema": {"$ref": "#/components/schemas/Query"}},
+                }},
+                "responses": {"200": {"description": "ok"}},
+            },
+            "put": {
+                "requestBody": {"content": {"text/csv": {"schema": {"type": "string"}}}},
+                "responses": {"200": {"description": "ok"}},
+            },
+        },
+    },
+    "components": {
+        "parameters": {
+            "Status": {"name": "status", "in": "query", "required": True, "schema": {"$ref": "#/components/schemas/Status"}},
+            "Missing-name": {"in": "query", "schema": {"type": "string"}},
+        },
+        "schemas": {
+            "Status": {"type": "string", "enum": ["open", "closed"]},
+            "Id": {"type": "integer", "enum": [1, 2, 3]},
+            "Query": {"type": "object", "required": ["programId"]},
+        },
+    },
+}
+
+
+@pytest.fixture(scope="module")
+def index():
+    return OperationIndex(SPEC, build_operations(SPEC))
+
+
+class TestOperationIndex:
+
+    def test_operation_level_parameters_win(self, index):
+        info = index.get("/v1/Result/Query", "get")
+        status = info.param("status")
+        assert (status.required, status.type, status.enum) == (True, "string", ("open", "closed"))
+        assert info.query_names == ("programId", "status", "ids")
+        assert info.required_query == ("programId", "status")
+        assert info.required_query_set == frozenset({"programId", "status"})
+
+    def test_parameter_facts(self, index):
+        info = index.get("/v1/Result/Query", "get")
+        ids = info.param("ids")
+        assert (ids.type, ids.item_type, ids.item_enum, ids.required) == ("array", "integer", (1, 2, 3), False)
+        assert info.param("resultId", "path").format == "uuid"
+        assert (info.path_names, info.required_path) == (("resultId",), ("resultId",))
+        assert info.param("X-Trace", "header").default == "off"
+        assert info.param("X-Trace") is None  # looked up in the query by default
+        assert info.operation_id == "queryResults"
+
+    def test_request_body_prefers_json(self, index):
+        post = index.get("/v1/Result/Query", "POST")
+        assert post.request_body_schema == SPEC["components"]["schemas"]["Query"]
+        assert post.request_body_required
+        put = index.get("/v1/Result/Query", "put")
+        assert (put.request_body_schema, put.request_body_required) == ({"type": "string"}, False)
+        get = index.get("/v1/Result/Query", "get")
+        assert (get.request_body_schema, get.request_body_required) == (None, False)
+
+    def test_case_insensitive_fallback(self, index):
+        assert index.get("/v1/result/query") is index.get("/v1/Result/Query")
+        assert ("/V1/RESULT/QUERY", "GET") in index
+        assert index.get("/v1/Result/Query", "delete") is None
+        with pytest.raises(KeyError):
+            index[("/v1/Result/Missing", "get")]
+
+    def test_iterates_every_operation(self, index):
+        assert len(index) == 3
+        assert {(info.path, info.method) for info in index} == {
+            ("/v1/Result/Query", "get"), ("/v1/Result/Query", "post"), ("/v1/Result/Query", "put")}
+
+
+def _walk(spec, path, method):
+    """Parameters of one operation from the raw spec.
+
+    The operation level overrides the path level; within a level the first
+    declaration of a name wins (the spec repeats ``program-id`` on one query).
+    """
+    path_item = spec["paths"][path]
+    params = {}
+    for level in (path_item, path_item[method]):
+        declared = {}
+        for raw in level.get("parameters", []):
+            if "$ref" in raw:
+                raw = resolve_ref(spec, raw["$ref"])
+            declared.setdefault((raw["name"], raw["in"]), raw)
+        params.update(declared)
+    return params
+
+
+def _schema(spec, raw):
+    schema = raw.get("schema", {})
+    return resolve_ref(spec, schema["$ref"]) if "$ref" in schema else schema
+
+
+@pytest.mark.skipif(not REPO_SPEC.is_file(), reason="schema/openapi.json is not checked out")
+def test_repo_spec_matches_a_walk_of_the_raw_document():
+    spec = json.loads(REPO_SPEC.read_text())
+    index = OperationIndex(spec, build_operations(spec))
+    expected_ops = {(path, method) for path, item in spec["paths"].items() for method in HTTP_METHODS if method in item}
+    assert {(info.path, info.method) for info in index} == expected_ops
+    for path, method in expected_ops:
+        info = index[(path, method)]
+        walked = _walk(spec, path, method)
+        assert set(info.params) == set(walked), (path, method)
+        assert set(info.query_names) == {name for name, location in walked if location == "query"}
+        assert set(info.required_query) == {name for (name, location), raw in walked.items()
+                                            if location == "query" and raw.get("required")}
+        assert set(info.required_path) == {name for (name, location), raw in walked.items()
+                                           if location == "path" and raw.get("required")}
+        for key, raw in walked.items():
+            param = info.params[key]
+            schema = _schema(spec, raw)
+            assert (param.type, param.format, param.default) == (
+                schema.get("type"), schema.get("format"), schema.get("default")), (path, method, key)
+            assert param.enum == (tuple(schema["enum"]) if "enum" in schema else None), (path, method, key)
+        assert index.get(path.lower(), method.upper()) is info
@@ -0,0 +1,229 @@
+"""Compiled response validators against schemathesis' own validation of the same responses.
+
+The compiled path may only answer "valid" for a body schemathesis accepts, and
+for every schema it compiles it should answer "valid" for every body
+schemathesis accepts, or it saves nothing.
+"""
+
+import json
+
+import pytest
+import requests
+import schemathesis
+from hypothesis import HealthCheck, given, settings, strategies as st
+from hypothesis_jsonschema import from_schema
+
+from tests.shared.response_validators import (
+    FALLBACK, ResponseValidators, _convert, compile_validators, validate_response,
+)
+from tests.shared.spec_cache import build_operations
+
+
+def _json(schema: dict) -> dict:
+    return {"description": "ok", "content": {"application/json": {"schema": schema}}}
+
+
+SCHEMAS = {
+    "Node": {  # recursive through $ref
+        "type": "object",
+        "required": ["id"],
+        "additionalProperties": False,
+        "properties": {
+            "id": {"type": "integer", "minimum": 1},
+            "name": {"type": "string", "minLength": 1, "maxLength": 8, "pattern": "^[a-z]+$"},
+            "email": {"type": "string", "format": "email", "nullable": True},
+            "children": {"type": "array", "items": {"$ref": "#/components/schemas/Node"}, "maxItems": 3},
+        },
+    },
+    "Event": {
+        "type": "object",
+        "required": ["kind", "at"],
+        "properties": {
+            "kind": {"type": "string", "enum": ["start", "stop"]},
+            "at": {"type": "string", "format": "date-time"},
+            "day": {"type": "string", "format": "date", "nullable": True},
+            "id": {"type": "string", "format": "uuid"},
+            "score": {"type": "number", "minimum": 0, "maximum": 1, "exclusiveMaximum": True},
+            "tags": {"type": "array", "items": {"type": "string"}, "uniqueItems": True},
+            "extra": {"type": "object", "additionalProperties": {"type": "integer"}},
+        },
+    },
+    "Payment": {
+        "oneOf": [
+            {"type": "object", "required": ["card"], "properties": {"card": {"type": "string"}}},
+            {"type": "object", "required": ["iban"], "properties": {"iban": {"type": "string"}}},
+        ],
+    },
+    "Code": {"anyOf": [{"type": "integer"}, {"type": "string", "maxLength": 3}]},
+    "Nested": {"allOf": [{"$ref": "#/components/schemas/Code"}, {"not": {"type": "string", "enum": ["bad"]}}]},
+}
+
+SPEC = {
+    "openapi": "3.0.1",
+    "info": {"title": "validators", "version": "1"},
+    "paths": {
+        f"/{name.lower()}": {"get": {"responses": {
+            "200": _json({"$ref": f"#/components/schemas/{name}"}),
+            "201": _json({"type": "array", "items": {"$ref": f"#/components/schemas/{name}"}}),
+        }}} for name in SCHEMAS
+    },
+    "components": {"schemas": SCHEMAS},
+}
+SPEC["paths"]["/untyped"] = {"get": {"responses": {"200": {"description": "no body"},
+                                                   "default": _json({"type": "object", "required": ["error"]}),
+                                                   "202": _json({"type": "string", "multipleOf": 2})}}}
+
+CASES = {
+    "/node": [
+        {"id": 1},
+        {"id": 1, "name": "abc", "email": None, "children": [{"id": 2, "email": "a@example.com"}]},
+        {"id": 1, "children": [{"id": 2, "children": [{"id": 3, "children": [{"id": 0}]}]}]},
+        {"id": "1"}, {"id": 0}, {"id": True}, {"name": "abc"}, {"id": 1, "unknown": 1},
+        {"id": 1, "name": ""}, {"id": 1, "name": "ABC"}, {"id": 1, "name": "abcdefghi"},
+        {"id": 1, "email": "not an email"}, {"id": 1, "email": 5},
+        {"id": 1, "children": [{"id": 2}] * 4}, {"id": 1, "children": {"id": 2}}, [], None,
+    ],
+    "/event": [
+        {"kind": "start", "at": "2024-05-01T10:00:00Z"},
+        {"kind": "stop", "at": "2024-05-01T10:00:00+02:00", "day": None, "score": 0,
+         "id": "9b2f8f4e-6c1d-4a8e-9a57-3d1c2b7f0e11", "tags": ["a", "b"], "extra": {"x": 1}},
+        {"kind": "pause", "at": "2024-05-01T10:00:00Z"}, {"kind": "start", "at": "yesterday"},
+        {"kind": "start", "at": "2024-05-01T10:00:00Z", "day": "2024-13-01"},
+        {"kind": "start", "at": "2024-05-01T10:00:00Z", "id": "not-a-uuid"},
+        {"kind": "start", "at": "2024-05-01T10:00:00Z", "score": 1},
+        {"kind": "start", "at": "2024-05-01T10:00:00Z", "score": -0.5},
+        {"kind": "start", "at": "2024-05-01T10:00:00Z", "tags": ["a", "a"]},
+        {"kind": "start", "at": "2024-05-01T10:00:00Z", "extra": {"x": "1"}},
+        {"kind": "start"},
+    ],
+    "/payment": [{"card": "4111"}, {"iban": "DE00"}, {"card": "4111", "iban": "DE00"}, {}, {"card": 4111}],
+    "/code": [7, "abc", "abcd", 1.5, None, True],
+    "/nested": [7, "ok", "bad", "long", []],
+    "/untyped": [{"error": "x"}, {}, "text"],
+}
+
+
+def _response(path: str, body, status: int = 200, content_type: str = "application/json"):
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps(body).encode()
+    response.encoding = "utf-8"
+    if content_type is not None:
+        response.headers["Content-Type"] = content_type
+    response.request = requests.Request("GET", f"http://127.0.0.1{path}").prepare()
+    return response
+
+
+@pytest.fixture(scope="module")
+def validators():
+    source, table = compile_validators(SPEC, build_operations(SPEC))
+    return ResponseValidators(table, compile(source, "<validators>", "exec"), False, 0.0)
+
+
+@pytest.fixture(scope="module")
+def schema():
+    return schemathesis.from_dict(SPEC)
+
+
+def _schemathesis_accepts(schema, path: str, response) -> bool:
+    try:
+        schema[path]["get"].validate_response(response)
+    except (AssertionError, ExceptionGroup):  # CheckFailed, or several of them at once
+        return False
+    return True
+
+
+def _compare(validators, schema, path: str, body, status: int = 200, content_type: str = "application/json"):
+    response = _response(path, body, status, content_type)
+    return validators.check(path, "GET", response, body), _schemathesis_accepts(schema, path, response)
+
+
+def test_every_test_schema_compiles(validators):
+    compiled = {path for (path, _), statuses in validators._table.items()
+                for status, function in statuses.items() if function and function != FALLBACK}
+    assert compiled == {f"/{name.lower()}" for name in SCHEMAS} | {"/untyped"}
+    assert validators._table[("/untyped", "get")]["202"] == FALLBACK  # multipleOf is left to schemathesis
+    assert validators._table[("/untyped", "get")]["200"] is None
+
+
+@pytest.mark.parametrize("path, body", [(path, body) for path, bodies in CASES.items() for body in bodies],
+                         ids=lambda value: json.dumps(value)[:40])
+@pytest.mark.parametrize("status", [200, 201])
+def test_same_verdict_as_schemathesis(validators, schema, path, body, status):
+    if status == 201:
+        body = [body, body] if path != "/untyped" else body
+    compiled, expected = _compare(validators, schema, path, body, status)
+    assert compiled == expected
+
+
+@pytest.mark.parametrize("status, body, content_type, decided", [
+    (404, {"error": "x"}, "application/json", True),   # falls back to the default response
+    (404, {}, "application/json", True),
+    (200, "anything", "application/json", True),        # documented without a body
+    (404, {}, "text/plain", True),                      # not JSON: schemathesis does not check the body
+    (202, "ab", "application/json", False),             # not compiled: always handed to schemathesis
+    (404, {}, None, False),                             # no Content-Type: left to schemathesis' own checks
+])
+def test_statuses_and_content_types(validators, schema, status, body, content_type, decided):
+    compiled, expected = _compare(validators, schema, "/untyped", body, status, content_type)
+    if decided:
+        assert compiled == expected
+    else:
+        assert compiled is False
+
+
+def test_unknown_operation_is_handed_to_schemathesis(validators):
+    assert validators.check("/missing", "GET", _response("/missing", {}), {}) is False
+
+
+def test_validate_response_raises_schemathesis_errors(validators, schema):
+    body = {"id": "1"}
+    response = _response("/node", body)
+    with pytest.raises(AssertionError) as compiled_error:
+        validate_response(schema, validators, "/node", "GET", response, body, body)
+    with pytest.raises(AssertionError) as expected_error:
+        schema["/node"]["get"].validate_response(response)
+    assert str(compiled_error.value) == str(expected_error.value)
+    passed = validators.passed
+    validate_response(schema, validators, "/node", "GET", _response("/node", {"id": 1}), {"id": 1}, {"id": 1})
+    assert validators.passed == passed + 1
+
+
+JSON = st.recursive(
+    st.none() | st.booleans() | st.integers(-3, 3) | st.floats(-2, 2, allow_nan=False)
+    | st.sampled_from(["", "abc", "start", "a@example.com", "2024-05-01T10:00:00Z", "bad", "4111"]),
+    lambda children: st.lists(children, max_size=4)
+    | st.dictionaries(st.sampled_from(["id", "name", "email", "children", "kind", "at", "card", "iban",
+                                       "tags", "score", "extra"]), children, max_size=5),
+    max_leaves=12,
+)
+PROPERTY_SETTINGS = settings(max_examples=150, derandomize=True, database=None, deadline=None,
+                             suppress_health_check=list(HealthCheck))
+
+
+@pytest.mark.parametrize("name", sorted(SCHEMAS))
+def test_arbitrary_json_gets_the_same_verdict(validators, schema, name):
+    path = f"/{name.lower()}"
+
+    @PROPERTY_SETTINGS
+    @given(JSON)
+    def check(body):
+        compiled, expected = _compare(validators, schema, path, body)
+        assert compiled == expected
+
+    check()
+
+
+@pytest.mark.parametrize("name", sorted(set(SCHEMAS) - {"Node"}))  # the generator cannot follow recursive $refs
+def test_schema_generated_bodies_get_the_same_verdict(validators, schema, name):
+    path = f"/{name.lower()}"
+    resolved = {**_convert(SCHEMAS[name]), "components": {"schemas": {
+        key: _convert(value) for key, value in SCHEMAS.items()}}}
+
+    @PROPERTY_SETTINGS
+    @given(from_schema(resolved))
+    def check(body):
+        compiled, expected = _compare(validators, schema, path, body)
+        assert compiled == expected
+
+    check()
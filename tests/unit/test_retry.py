@@ -0,0 +1,172 @@
+"""Retry policies: backoff, Retry-After, the retry budget and the retry loop against a local server."""
+
+import types
+from email.utils import formatdate
+
+import pytest
+import requests
+
+from tests.shared import http_session, retry
+from tests.shared.retry import (
+    METHOD_POLICIES, Attempt, AttemptLog, RetryBudget, RetryEngine, RetryPolicy, parse_retry_after,
+)
+
+
+@pytest.fixture
+def upper_jitter(monkeypatch):
+    """Full jitter that always draws its upper bound, so backoff delays are exact."""
+    monkeypatch.setattr(retry, "random", types.SimpleNamespace(uniform=lambda low, high: high))
+
+
+@pytest.fixture
+def recorded_sleeps(monkeypatch):
+    """Sleeps of the retry loop, recorded instead of waited."""
+    slept = []
+    monkeypatch.setattr(http_session, "time", types.SimpleNamespace(
+        perf_counter=http_session.time.perf_counter, sleep=slept.append))
+    return slept
+
+
+class TestBackoff:
+
+    def test_doubles_per_attempt_up_to_the_cap(self, upper_jitter):
+        policy = RetryPolicy(backoff_base=0.5, backoff_max=8.0)
+        assert [policy.backoff(n) for n in range(1, 7)] == [0.5, 1.0, 2.0, 4.0, 8.0, 8.0]
+
+    def test_jitter_stays_within_the_window(self):
+        policy = RetryPolicy(backoff_base=0.5, backoff_max=8.0)
+        delays = [policy.backoff(3) for _ in range(200)]
+        assert all(0 <= d <= 2.0 for d in delays)
+        assert len(set(delays)) > 1
+
+
+class TestRetryAfter:
+
+    @pytest.mark.parametrize("value, expected", [("3", 3.0), (" 10 ", 10.0), ("0", 0.0)])
+    def test_delta_seconds(self, value, expected):
+        assert parse_retry_after(value) == expected
+
+    @pytest.mark.parametrize("value", [None, "", "soon", "-5", "1.5"])
+    def test_unusable_values(self, value):
+        assert parse_retry_after(value) is None
+
+    def test_http_date(self, fake_clock):
+        clock = fake_clock(retry)
+        assert parse_retry_after(formatdate(clock.now + 30, usegmt=True)) == pytest.approx(30)
+
+    def test_http_date_in_the_past_means_now(self, fake_clock):
+        clock = fake_clock(retry)
+        assert parse_retry_after(formatdate(clock.now - 30, usegmt=True)) == 0.0
+
+    def test_delay_prefers_retry_after_but_caps_it(self, upper_jitter):
+        engine = RetryEngine()
+        policy = RetryPolicy(backoff_max=8.0)
+        response = requests.Response()
+        response.headers["Retry-After"] = "3"
+        assert engine.delay_for(policy, 1, response) == 3.0
+        response.headers["Retry-After"] = "120"
+        assert engine.delay_for(policy, 1, response) == 8.0
+        del response.headers["Retry-After"]
+        assert engine.delay_for(policy, 2, response) == 1.0
+        assert engine.delay_for(policy, 3, None) == 2.0
+
+
+class TestRetryBudget:
+
+    def test_minimum_is_always_available(self):
+        budget = RetryBudget(ratio=0.0, min_retries=2)
+        assert [budget.try_spend() for _ in range(3)] == [True, True, False]
+        assert (budget.retries, budget.denied) == (2, 1)
+
+    def test_grows_with_first_attempts(self):
+        budget = RetryBudget(ratio=0.5, min_retries=0)
+        assert not budget.try_spend()
+        for _ in range(4):
+            budget.record_request()
+        assert [budget.try_spend() for _ in range(3)] == [True, True, False]
+
+
+class TestPolicyFor:
+
+    def test_method_policies(self):
+        engine = RetryEngine()
+        assert engine.policy_for("get", "https://api.example/v1/Form/Query") is METHOD_POLICIES["GET"]
+        post = engine.policy_for("POST", "https://api.example/v1/Form/Create")
+        assert post.retry_statuses == frozenset({429})
+        assert post.retry_errors == (requests.exceptions.ConnectTimeout,)
+
+    def test_unknown_method_is_not_retried(self):
+        assert RetryEngine().policy_for("PUT", "https://api.example/v1/event/update").max_attempts == 1
+
+    def test_path_suffix_wins_over_the_method(self):
+        policy = RetryEngine().policy_for("GET", "https://api.example/v1/Examinee/Audit/Query?x=1")
+        assert (policy.max_attempts, policy.timeout) == (2, 45)
+
+    def test_environment_overrides_max_attempts(self, monkeypatch):
+        monkeypatch.setenv("RETRY_MAX_ATTEMPTS", "7")
+        engine = RetryEngine()
+        assert engine.policy_for("GET", "https://api.example/x").max_attempts == 7
+        assert engine.policy_for("PUT", "https://api.example/x").max_attempts == 7
+
+
+class TestAttemptLog:
+
+    def test_counts_everything_but_keeps_a_bounded_sample(self):
+        log = AttemptLog(keep=10)
+        for n in range(1000):
+            log.record(Attempt("GET", "/x", 1, float(n)))
+            log.record(Attempt("GET", "/x", 2, 0.0, status=503))
+        assert (log.first_attempt_count, log.retry_count) == (1000, 1000)
+        assert len(log.first_attempt_latencies()) == 10 and len(log.retries) == 10
+        assert set(log.first_attempt_latencies()) <= {float(n) for n in range(1000)}
+
+    def test_summary_counts_beyond_the_sample(self, monkeypatch):
+        monkeypatch.setenv("RETRY_LOG_SAMPLE", "5")
+        engine = RetryEngine()
+        for _ in range(20):
+            engine.log.record(Attempt("GET", "/x", 1, 0.1))
+        engine.log.record(Attempt("GET", "/x", 3, 0.2))
+        assert engine.summary().startswith(
+            "Retries: 1 retried attempts over 20 requests, 0 denied by budget; first-attempt latency p50 100ms")
+
+
+class TestRetryLoop:
+
+    def test_retries_after_the_server_asked_to_wait(self, local_api, session_manager, recorded_sleeps):
+        local_api.reply(503, headers={"Retry-After": "2"}).reply(503, headers={"Retry-After": "2"}).reply(200, [])
+        response = session_manager.get(local_api.url("/v1/Form/Query"), timeout=5)
+        assert response.status_code == 200
+        assert [a.status for a in response.retry_history] == [503, 503, 200]
+        assert [a.attempt for a in response.retry_history] == [1, 2, 3]
+        assert recorded_sleeps == [2.0, 2.0]
+        assert len(session_manager.retry.log.retries) == 2
+
+    def test_gives_up_after_max_attempts(self, local_api, session_manager, recorded_sleeps):
+        local_api.reply(503, headers={"Retry-After": "1"})
+        response = session_manager.get(local_api.url("/v1/Form/Query"), timeout=5)
+        assert response.status_code == 503
+        assert len(response.retry_history) == METHOD_POLICIES["GET"].max_attempts
+        assert len(local_api.requests) == METHOD_POLICIES["GET"].max_attempts
+
+    def test_writes_are_not_retried_on_gateway_errors(self, local_api, session_manager, recorded_sleeps):
+        local_api.reply(503)
+        response = session_manager.post(local_api.url("/v1/Form/Create"), json={}, timeout=5)
+        assert response.status_code == 503
+        assert len(local_api.requests) == 1
+        assert recorded_sleeps == []
+
+    def test_exhausted_budget_returns_the_first_response(self, local_api, session_manager, recorded_sleeps):
+        session_manager.retry.budget = RetryBudget(ratio=0.0, min_retries=0)
+        local_api.reply(503, headers={"Retry-After": "1"})
+        response = session_manager.get(local_api.url("/v1/Form/Query"), timeout=5)
+        assert response.status_code == 503
+        assert len(local_api.requests) == 1
+        assert session_manager.retry.budget.denied == 1
+        assert recorded_sleeps == []
+
+    def test_connection_errors_are_retried_then_raised(self, session_manager, recorded_sleeps):
+        session_manager.breaker.enabled = False
+        with pytest.raises(requests.exceptions.ConnectionError):
+            session_manager.get("http://127.0.0.1:9/v1/Form/Query", timeout=5)
+        assert len(session_manager.retry.log.retries) == METHOD_POLICIES["GET"].max_attempts - 1
+        assert len(recorded_sleeps) == METHOD_POLICIES["GET"].max_attempts - 1
@@ -0,0 +1,186 @@
+"""Binary spec cache: misses, hits, invalidation and the resolved operation table."""
+
+import json
+import os
+
+import pytest
+
+from tests.shared import spec_cache
+from tests.shared.spec_cache import build_operations, cache_file_for, load_compiled, load_spec, resolve_ref
+
+SPEC = {
+    "openapi": "3.0.1",
+    "info": {"title": "cache", "version": "1"},
+    "paths": {
+        "/v1/Form/{formId}": {
+            "parameters": [
+                {"$ref": "#/components/parameters/FormId"},
+                {"name": "verbose", "in": "query", "schema": {"type": "boolean"}},
+            ],
+            "get": {
+                "operationId": "getForm",
+                "tags": ["form"],
+                "parameters": [
+                    {"name": "verbose", "in": "query", "required": True, "schema": {"type": "boolean"}},
+                    {"name": "verbose", "in": "query", "schema": {"type": "string"}},
+                    {"name": "verbose", "in": "header", "schema": {"type": "string"}},
+                ],
+                "responses": {"200": {"$ref": "#/components/responses/Form"}},
+            },
+            "post": {
+                "requestBody": {"$ref": "#/components/requestBodies/Form"},
+                "responses": {"201": {"description": "created"}},
+            },
+        },
+        "/v1/a~b/c": {"$ref": "#/x-paths/shared"},
+    },
+    "x-paths": {"shared": {"delete": {"responses": {"204": {"description": "gone"}}}}},
+    "components": {
+        "parameters": {"FormId": {"name": "formId", "in": "path", "required": True, "schema": {"type": "integer"}}},
+        "responses": {"Form": {"description": "a form"}},
+        "requestBodies": {"Form": {"content": {"application/json": {"schema": {"type": "object"}}}}},
+        "schemas": {"a/b": {"type": "string"}, "c~d": {"type": "integer"}},
+    },
+}
+
+
+@pytest.fixture
+def spec_file(tmp_path, monkeypatch):
+    monkeypatch.setenv("SPEC_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.delenv("SPEC_CACHE", raising=False)
+    path = tmp_path / "openapi.json"
+    path.write_text(json.dumps(SPEC))
+    return path
+
+
+class TestLoadCompiled:
+
+    def test_miss_writes_the_cache_and_the_next_load_hits(self, spec_file):
+        first = load_compiled(str(spec_file))
+        assert not first.cache_hit
+        assert cache_file_for(str(spec_file), first.sha256).is_file()
+        second = load_compiled(str(spec_file))
+        assert second.cache_hit
+        assert (second.sha256, second.spec, second.operations) == (first.sha256, first.spec, first.operations)
+        assert second.spec == SPEC
+
+    def test_editing_the_spec_invalidates_the_cache(self, spec_file):
+        first = load_compiled(str(spec_file))
+        edited = {**SPEC, "info": {"title": "cache", "version": "2"}}
+        spec_file.write_text(json.dumps(edited))
+        second = load_compiled(str(spec_file))
+        assert not second.cache_hit
+        assert second.sha256 != first.sha256
+        assert second.spec == edited
+        assert load_compiled(str(spec_file)).cache_hit
+
+    @pytest.mark.parametrize("content", [b"", b"not marshal data", b"\x00" * 64])
+    def test_corrupt_cache_is_rebuilt(self, spec_file, content):
+        sha256 = load_compiled(str(spec_file)).sha256
+        cache_file = cache_file_for(str(spec_file), sha256)
+        cache_file.write_bytes(content)
+        rebuilt = load_compiled(str(spec_file))
+        assert not rebuilt.cache_hit and rebuilt.spec == SPEC
+        assert load_compiled(str(spec_file)).cache_hit
+
+    def test_other_format_version_is_a_miss(self, spec_file):
+        sha256 = load_compiled(str(spec_file)).sha256
+        cache_file = cache_file_for(str(spec_file), sha256)
+        assert spec_cache._read_cache(cache_file, sha256) is not None
+        assert spec_cache._read_cache(cache_file, sha256, format_version=spec_cache.FORMAT_VERSION + 1) is None
+        assert spec_cache._read_cache(cache_file, "0" * 64) is None
+
+    def test_disabled_cache_parses_every_time(self, spec_file, tmp_path, monkeypatch):
+        monkeypatch.setenv("SPEC_CACHE", "false")
+        assert not load_compiled(str(spec_file)).cache_hit
+        assert not load_compiled(str(spec_file)).cache_hit
+        assert not (tmp_path / "cache").exists()
+
+    def test_unwritable_cache_dir_still_loads(self, spec_file, tmp_path, monkeypatch):
+        blocker = tmp_path / "not-a-dir"
+        blocker.write_text("")
+        monkeypatch.setenv("SPEC_CACHE_DIR", str(blocker))
+        compiled = load_compiled(str(spec_file))
+        assert not compiled.cache_hit and compiled.spec == SPEC
+
+    def test_default_cache_dir_is_next_to_the_spec(self, spec_file, monkeypatch):
+        monkeypatch.delenv("SPEC_CACHE_DIR")
+        compiled = load_compiled(str(spec_file))
+        assert cache_file_for(str(spec_file), compiled.sha256).parent == spec_file.parent / ".cache"
+        assert load_spec(str(spec_file)) == SPEC
+
+
+class TestEviction:
+
+    @staticmethod
+    def _other_versions(spec_file, count):
+        """Cache files for ``count`` other spec versions, last used 1..count hours ago."""
+        files = []
+        for age in range(1, count + 1):
+            other = cache_file_for(str(spec_file), str(age) * 64)
+            other.parent.mkdir(parents=True, exist_ok=True)
+            other.write_bytes(b"")
+            os.utime(other, (other.stat().st_atime, other.stat().st_mtime - age * 3600))
+            files.append(other)
+        return files
+
+    def test_other_versions_are_kept(self, spec_file):
+        others = self._other_versions(spec_file, 3)
+        load_compiled(str(spec_file))
+        assert all(other.exists() for other in others)
+
+    def test_only_the_most_recently_used_are_kept(self, spec_file, monkeypatch):
+        monkeypatch.setenv("SPEC_CACHE_KEEP", "3")
+        others = self._other_versions(spec_file, 4)
+        compiled = load_compiled(str(spec_file))
+        assert cache_file_for(str(spec_file), compiled.sha256).exists()
+        assert [other.exists() for other in others] == [True, True, False, False]
+
+    def test_a_hit_counts_as_a_use(self, spec_file, monkeypatch):
+        monkeypatch.setenv("SPEC_CACHE_KEEP", "1")
+        sha256 = load_compiled(str(spec_file)).sha256
+        cache_file = cache_file_for(str(spec_file), sha256)
+        os.utime(cache_file, (0, 0))
+        assert load_compiled(str(spec_file)).cache_hit
+        assert cache_file.stat().st_mtime > 0
+
+
+class TestBuildOperations:
+
+    def test_operation_parameters_override_path_parameters(self):
+        operation = build_operations(SPEC)[("/v1/Form/{formId}", "get")]
+        params = {(p["name"], p["in"]): p for p in operation["parameters"]}
+        assert set(params) == {("formId", "path"), ("verbose", "query"), ("verbose", "header")}
+        assert params[("formId", "path")]["schema"] == {"type": "integer"}  # dereferenced
+        # the operation's first declaration wins over the path level and its own duplicate
+        assert params[("verbose", "query")] == {"name": "verbose", "in": "query", "required": True,
+                                                "schema": {"type": "boolean"}}
+
+    def test_request_bodies_responses_and_path_items_are_dereferenced(self):
+        operations = build_operations(SPEC)
+        assert set(operations) == {("/v1/Form/{formId}", "get"), ("/v1/Form/{formId}", "post"),
+                                   ("/v1/a~b/c", "delete")}
+        get = operations[("/v1/Form/{formId}", "get")]
+        assert (get["operationId"], get["tags"]) == ("getForm", ["form"])
+        assert get["responses"] == {"200": {"description": "a form"}}
+        assert get["requestBody"] is None
+        post = operations[("/v1/Form/{formId}", "post")]
+        assert post["requestBody"] == SPEC["components"]["requestBodies"]["Form"]
+        assert [p["name"] for p in post["parameters"]] == ["formId", "verbose"]
+        assert operations[("/v1/a~b/c", "delete")]["responses"] == {"204": {"description": "gone"}}
+
+    def test_circular_refs_are_reported(self):
+        spec = {"paths": {"/x": {"$ref": "#/a"}}, "a": {"$ref": "#/b"}, "b": {"$ref": "#/a"}}
+        with pytest.raises(ValueError, match="Circular"):
+            build_operations(spec)
+
+
+class TestResolveRef:
+
+    def test_json_pointer_escapes(self):
+        assert resolve_ref(SPEC, "#/components/schemas/a~1b") == {"type": "string"}
+        assert resolve_ref(SPEC, "#/components/schemas/c~0d") == {"type": "integer"}
+
+    def test_only_local_refs(self):
+        with pytest.raises(ValueError, match="local"):
+            resolve_ref(SPEC, "other.json#/components/schemas/x")
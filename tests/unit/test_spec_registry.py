@@ -0,0 +1,153 @@
+"""The shared spec registry: one parse per file, and a spec nobody can modify."""
+
+import copy
+import json
+import pickle
+import threading
+
+import pytest
+
+from tests.shared import spec_registry
+from tests.shared.spec_registry import FrozenDict, FrozenList, SpecRegistry, freeze, get_spec_registry
+
+SPEC = {
+    "openapi": "3.0.1",
+    "info": {"title": "registry", "version": "1"},
+    "paths": {"/v1/Form/Query": {"get": {
+        "parameters": [{"name": "formId", "in": "query", "schema": {"type": "integer"}}],
+        "responses": {"200": {"description": "ok"}},
+    }}},
+}
+
+
+@pytest.fixture
+def spec_file(tmp_path, monkeypatch):
+    monkeypatch.setenv("SPEC_CACHE_DIR", str(tmp_path / "cache"))
+    path = tmp_path / "openapi.json"
+    path.write_text(json.dumps(SPEC))
+    return path
+
+
+@pytest.fixture
+def counted_loads(monkeypatch):
+    """Paths passed to ``load_compiled``, in call order."""
+    loads = []
+    real = spec_registry.load_compiled
+
+    def load(path):
+        loads.append(path)
+        return real(path)
+
+    monkeypatch.setattr(spec_registry, "load_compiled", load)
+    return loads
+
+
+class TestFreeze:
+
+    @pytest.mark.parametrize("mutate", [
+        lambda spec: spec.__setitem__("openapi", "3.1.0"),
+        lambda spec: spec["info"].update(title="changed"),
+        lambda spec: spec["info"].pop("title"),
+        lambda spec: spec["paths"]["/v1/Form/Query"]["get"].setdefault("deprecated", True),
+        lambda spec: spec["paths"]["/v1/Form/Query"]["get"]["parameters"].append({}),
+        lambda spec: spec["paths"]["/v1/Form/Query"]["get"]["parameters"][0].clear(),
+        lambda spec: spec["paths"]["/v1/Form/Query"]["get"]["parameters"].sort(),
+    ])
+    def test_nested_mutation_is_rejected(self, mutate):
+        frozen = freeze(copy.deepcopy(SPEC))
+        with pytest.raises(TypeError, match="read-only"):
+            mutate(frozen)
+        assert frozen == SPEC
+
+    def test_augmented_assignment_is_rejected(self):
+        frozen = freeze({"tags": ["a"], "info": {}})
+        tags = frozen["tags"]
+        with pytest.raises(TypeError):
+            tags += ["b"]
+        info = frozen["info"]
+        with pytest.raises(TypeError):
+            info |= {"x": 1}
+
+    def test_reads_like_the_parsed_json(self):
+        frozen = freeze(copy.deepcopy(SPEC))
+        assert isinstance(frozen, dict) and isinstance(frozen["paths"], FrozenDict)
+        assert isinstance(frozen["paths"]["/v1/Form/Query"]["get"]["parameters"], FrozenList)
+        assert json.loads(json.dumps(frozen)) == SPEC
+        assert repr(frozen) == repr(SPEC)
+
+    def test_shared_objects_stay_shared(self):
+        shared = {"type": "string"}
+        frozen = freeze({"a": shared, "b": [shared]})
+        assert frozen["a"] is frozen["b"][0]
+
+    def test_copies_are_mutable(self):
+        frozen = freeze(copy.deepcopy(SPEC))
+        thawed = copy.deepcopy(dict(frozen))
+        thawed["openapi"] = "3.1.0"
+        assert frozen["openapi"] == "3.0.1"
+
+    def test_pickles_for_worker_processes(self):
+        frozen = freeze(copy.deepcopy(SPEC))
+        restored = pickle.loads(pickle.dumps(frozen))
+        assert restored == SPEC
+        assert isinstance(restored["paths"]["/v1/Form/Query"]["get"]["parameters"], FrozenList)
+        with pytest.raises(TypeError):
+            restored["info"]["title"] = "changed"
+
+
+class TestSpecRegistry:
+
+    def test_parses_once_however_often_it_is_read(self, spec_file, counted_loads):
+        registry = SpecRegistry(str(spec_file))
+        assert registry.summary().endswith("not loaded")
+        first = registry.spec
+        assert all(registry.spec is first for _ in range(5))
+        assert counted_loads == [str(spec_file)]
+        assert registry.uses == 6
+        assert "loaded once" in registry.summary() and "shared by 6 lookups" in registry.summary()
+
+    def test_spec_and_operations_are_frozen(self, spec_file):
+        registry = SpecRegistry(str(spec_file))
+        assert registry.spec == SPEC
+        with pytest.raises(TypeError):
+            registry.spec["paths"]["/v1/Form/Query"]["get"]["parameters"].append({})
+        operation = registry.operations[("/v1/Form/Query", "get")]
+        with pytest.raises(TypeError):
+            operation["parameters"][0]["name"] = "changed"
+        # the operation table points into the spec rather than holding a second copy
+        assert operation["parameters"][0] is registry.spec["paths"]["/v1/Form/Query"]["get"]["parameters"][0]
+
+    def test_concurrent_first_reads_parse_once(self, spec_file, counted_loads):
+        registry = SpecRegistry(str(spec_file))
+        barrier = threading.Barrier(8)
+        seen = []
+
+        def read():
+            barrier.wait()
+            seen.append(registry.spec)
+
+        threads = [threading.Thread(target=read) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+        assert len(counted_loads) == 1
+        assert len(seen) == 8 and all(spec is seen[0] for spec in seen)
+
+    def test_one_registry_per_file(self, spec_file, tmp_path, monkeypatch):
+        monkeypatch.setattr(spec_registry, "_registries", {})
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("OPENAPI_PATH", "openapi.json")
+        registry = get_spec_registry()
+        assert get_spec_registry(str(spec_file)) is registry
+        assert get_spec_registry("./openapi.json") is registry
+        other = tmp_path / "other.json"
+        other.write_text(json.dumps(SPEC))
+        assert get_spec_registry(str(other)) is not registry
+
+    def test_only_loaded_registries_are_reported(self, spec_file, monkeypatch):
+        monkeypatch.setattr(spec_registry, "_registries", {})
+        registry = get_spec_registry(str(spec_file))
+        assert spec_registry.loaded_registries() == []
+        registry.spec
+        assert spec_registry.loaded_registries() == [registry]
@@ -0,0 +1,197 @@
+"""Streaming schema validation: error paths, limits, malformed bodies and sampling."""
+
+import json
+
+import pytest
+
+from tests.shared.json_stream import JSONStreamError, iter_events
+from tests.shared.spec_cache import build_operations
+from tests.shared.stream_validator import StreamSchemas, format_path, validate_stream
+from tests.shared.validation_policy import ENVELOPE, SAMPLE, ValidationPolicies, ValidationPolicy
+
+SPEC = {
+    "openapi": "3.0.1",
+    "paths": {
+        "/examinee/query": {"get": {"responses": {"200": {"content": {"application/json": {
+            "schema": {"type": "array", "items": {"$ref": "#/components/schemas/Examinee"}}}}}}}},
+        "/examinee/get": {"get": {"responses": {"200": {"content": {"application/json": {
+            "schema": {"$ref": "#/components/schemas/Examinee"}}}}}}},
+        "/numbers": {"get": {"responses": {"200": {"content": {"application/json": {
+            "schema": {"type": "array", "items": {"type": "string"}}}}}}}},
+        "/fallback": {"get": {"responses": {"default": {"content": {"application/json": {
+            "schema": {"type": "object", "required": ["message"]}}}}}}},
+        "/no-body": {"delete": {"responses": {"204": {"description": "deleted"}}}},
+    },
+    "components": {"schemas": {
+        "Examinee": {
+            "type": "object",
+            "required": ["examinee-id", "name"],
+            "additionalProperties": False,
+            "properties": {
+                "examinee-id": {"type": "integer", "minimum": 1},
+                "name": {"type": "string", "minLength": 1},
+                "status": {"type": "string", "enum": ["active", "closed"]},
+                "email": {"type": "string", "nullable": True},
+                "tags": {"type": "array", "items": {"type": "string"}, "minItems": 1, "maxItems": 2},
+            },
+        },
+    }},
+}
+
+
+pytestmark = pytest.mark.usefixtures("json_backend")
+
+
+@pytest.fixture(scope="module")
+def schemas():
+    return StreamSchemas(SPEC, build_operations(SPEC))
+
+
+def _validate(schemas, path, body, policy=None, sampler=None, max_errors=20, method="get", status=200):
+    root = schemas.root_for(path, method, status)
+    return validate_stream(root, iter_events([json.dumps(body).encode()]), policy, sampler, max_errors)
+
+
+def _get(component: str) -> dict:
+    """A GET operation answering 200 with ``component``."""
+    return {"get": {"responses": {"200": {"content": {"application/json": {
+        "schema": {"$ref": f"#/components/schemas/{component}"}}}}}}}
+
+
+def _messages(result):
+    return [str(e) for e in result.errors]
+
+
+class TestErrors:
+
+    def test_valid_body(self, schemas):
+        body = [{"examinee-id": 1, "name": "A", "status": "active", "email": None, "tags": ["x"]}]
+        result = _validate(schemas, "/examinee/query", body)
+        assert (result.error_count, result.errors) == (0, [])
+        assert (result.elements, result.checked) == (2, 2)  # the list and its tags
+
+    def test_type_errors_carry_the_json_path(self, schemas):
+        result = _validate(schemas, "/examinee/query", [{"examinee-id": 1, "name": "A"},
+                                                        {"examinee-id": "2", "name": 3}])
+        assert _messages(result) == ["$[1].examinee-id: '2' is not of type 'integer'",
+                                     "$[1].name: 3 is not of type 'string'"]
+
+    def test_required_and_additional_properties(self, schemas):
+        result = _validate(schemas, "/examinee/get", {"name": "A", "extra key": 1})
+        assert _messages(result) == ["$: Additional properties are not allowed ('extra key' was unexpected)",
+                                     "$: 'examinee-id' is a required property"]
+
+    def test_array_length_and_scalar_keywords(self, schemas):
+        result = _validate(schemas, "/examinee/get", {"examinee-id": 0, "name": "", "tags": ["a", "b", 3]})
+        assert _messages(result) == [
+            "$.examinee-id: 0 is less than the minimum of 1",
+            "$.name: '' is too short",
+            "$.tags[2]: 3 is not of type 'string'",
+            "$.tags: array of 3 items is too long (maxItems 2)",
+        ]
+        assert _messages(_validate(schemas, "/examinee/get", {"examinee-id": 1, "name": "A", "tags": []})) == [
+            "$.tags: array of 0 items is too short (minItems 1)"]
+
+    def test_enum_and_nullable(self, schemas):
+        result = _validate(schemas, "/examinee/get", {"examinee-id": 1, "name": "A", "status": "gone", "email": None})
+        assert _messages(result) == ["$.status: 'gone' is not one of ['active', 'closed']"]
+        result = _validate(schemas, "/examinee/get", {"examinee-id": 1, "name": "A", "status": None})
+        assert _messages(result) == ["$.status: None is not of type 'string'"]
+
+    def test_wrong_container_type(self, schemas):
+        assert _messages(_validate(schemas, "/examinee/query", {"examinee-id": 1})) == [
+            "$: an object is not of type 'array'"]
+        assert _messages(_validate(schemas, "/examinee/get", [1])) == ["$: an array is not of type 'object'"]
+        assert _messages(_validate(schemas, "/examinee/get", "x")) == ["$: 'x' is not of type 'object'"]
+
+    def test_errors_past_the_limit_are_counted(self, schemas):
+        result = _validate(schemas, "/numbers", list(range(30)), max_errors=5)
+        assert result.error_count == 30
+        assert [e.path for e in result.errors] == [(i,) for i in range(5)]
+        assert result.describe().splitlines()[0] == "30 error(s)"
+        assert result.describe().splitlines()[-1] == "... and 25 more"
+
+
+class TestMalformedBodies:
+
+    @pytest.mark.parametrize("body", [b"", b"[1, 2", b'["a"] ["b"]', b"[01]"])
+    def test_raise_json_stream_error(self, schemas, body):
+        root = schemas.root_for("/numbers", "get", 200)
+        with pytest.raises(JSONStreamError):
+            validate_stream(root, iter_events([body]))
+
+    def test_errors_before_the_bad_byte_do_not_hide_it(self, schemas):
+        root = schemas.root_for("/numbers", "get", 200)
+        with pytest.raises(JSONStreamError):
+            validate_stream(root, iter_events([b"[1, 2, ", b"oops]"]))
+
+
+class TestRoots:
+
+    def test_unknown_operation_or_status(self, schemas):
+        assert schemas.root_for("/missing", "get", 200) is None
+        assert schemas.root_for("/examinee/query", "get", 500) is None
+        assert schemas.root_for("/no-body", "delete", 204) is None
+
+    def test_default_response_is_the_fallback(self, schemas):
+        result = _validate(schemas, "/fallback", {"code": 1}, status=418)
+        assert _messages(result) == ["$: 'message' is a required property"]
+
+    def test_unsupported_components_are_never_reused_half_built(self):
+        spec = {
+            "paths": {"/parent": _get("Parent"), "/child": _get("Child"), "/again": _get("Parent"),
+                      "/ok": _get("Ok")},
+            "components": {"schemas": {
+                # Child is complete once built, but it points at Parent, which fails after it
+                "Parent": {"type": "object", "required": ["id"],
+                           "properties": {"child": {"$ref": "#/components/schemas/Child"},
+                                          "code": {"type": "string", "pattern": "("}}},
+                "Child": {"type": "object", "properties": {"parent": {"$ref": "#/components/schemas/Parent"}}},
+                "Ok": {"type": "object", "properties": {"child": {"$ref": "#/components/schemas/Child"}}},
+            }},
+        }
+        schemas = StreamSchemas(spec, build_operations(spec))
+        assert schemas.root_for("/parent", "get", 200) is None
+        assert schemas.root_for("/again", "get", 200) is None
+        assert schemas.root_for("/child", "get", 200) is None
+        assert schemas.root_for("/ok", "get", 200) is None
+
+    def test_roots_are_compiled_once(self, schemas):
+        assert schemas.root_for("/examinee/get", "GET", 200) is schemas.root_for("/examinee/get", "get", 200)
+
+
+def test_format_path():
+    assert format_path(()) == "$"
+    assert format_path(("items", 3, "examinee-id")) == "$.items[3].examinee-id"
+    assert format_path(("a b", 0)) == "$['a b'][0]"
+
+
+class TestPolicies:
+
+    def test_envelope_skips_array_elements(self, schemas):
+        result = _validate(schemas, "/numbers", list(range(50)), ValidationPolicy(ENVELOPE))
+        assert (result.error_count, result.elements, result.checked) == (0, 50, 0)
+
+    @pytest.mark.parametrize("seed", [0, 1, 42])
+    @pytest.mark.parametrize("length", [5, 40, 41, 500])
+    def test_sample_checks_the_same_elements_as_buffered_validation(self, schemas, seed, length):
+        policy = ValidationPolicy(SAMPLE, first=10, sample=30)
+        policies = ValidationPolicies(path_policies={"/numbers": policy}, seed=seed)
+        body = list(range(length))  # every element fails, so its error names the index checked
+        reduction = policies.reduce("GET", "/numbers", body)
+
+        result = _validate(schemas, "/numbers", body, policy, policies.sampler_for("GET", "/numbers"),
+                           max_errors=length)
+        assert [e.path[0] for e in result.errors] == reduction.body
+        assert (result.elements, result.checked) == (reduction.elements, reduction.checked)
+
+    def test_nested_arrays_are_sampled_by_path(self, schemas):
+        policy = ValidationPolicy(SAMPLE, first=1, sample=2)
+        policies = ValidationPolicies(path_policies={"/examinee/get": policy}, seed=7)
+        body = {"examinee-id": 1, "name": "A", "tags": list(range(20))}
+        reduction = policies.reduce("GET", "/examinee/get", body)
+
+        result = _validate(schemas, "/examinee/get", body, policy, policies.sampler_for("GET", "/examinee/get"))
+        assert [e.path for e in result.errors if e.path[-1] != "tags"] == [
+            ("tags", i) for i in reduction.body["tags"]]
+        assert (result.elements, result.checked) == (reduction.elements, reduction.checked)
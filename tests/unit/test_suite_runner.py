@@ -0,0 +1,168 @@
+"""Suite runner: discovering write locks, scheduling around them, and --shard packing."""
+
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from tests.shared import suite_runner
+from tests.shared.suite_runner import Scheduler, Suite, SuiteResult, discover_suites
+
+READ_ONLY = '''
+class TestForm:
+    def test_query(self):
+        path = "/form/query"
+        self.make_get_request(path)
+'''
+
+WRITES_EXAMINEE = '''
+class TestExaminee:
+    def test_create(self):
+        path = "examinee/create"
+        self.make_post_request(path, {})
+
+    def test_query(self):
+        path = "/examinee/query"
+        self.make_get_request(path)
+
+
+def test_delete_audit():
+    path = "/examinee/audit/delete"
+    make_delete_request(path)
+'''
+
+WRITES_UNKNOWN_PATH = '''
+class TestRemote:
+    def test_update(self):
+        self.make_patch_request(build_path(), {})
+'''
+
+
+def _suite(name: str, *locks: str, tests: int = 1) -> Suite:
+    return Suite(name, [], {f"tests/{name}/test_{name}.py::test_{i}": [] for i in range(tests)}, frozenset(locks))
+
+
+@pytest.fixture
+def tests_dir(tmp_path) -> Path:
+    for name, source in [("form", READ_ONLY), ("examinee", WRITES_EXAMINEE), ("remote", WRITES_UNKNOWN_PATH),
+                         ("shared", WRITES_EXAMINEE), ("unit", READ_ONLY)]:
+        (tmp_path / "tests" / name).mkdir(parents=True)
+        (tmp_path / "tests" / name / f"test_{name}.py").write_text(source)
+    (tmp_path / "tests" / "empty").mkdir()
+    return tmp_path / "tests"
+
+
+class TestDiscoverSuites:
+
+    def test_suites_and_their_write_locks(self, tests_dir):
+        suites = {suite.name: suite for suite in discover_suites(tests_dir)}
+        assert set(suites) == {"examinee", "form", "remote"}
+        assert suites["form"].locks == frozenset()
+        assert suites["examinee"].locks == frozenset({"examinee"})
+        assert suites["remote"].locks == frozenset({"remote"})  # a write to an unknown path locks the suite
+
+    def test_test_functions_and_the_paths_they_call(self, tests_dir):
+        examinee = {suite.name: suite for suite in discover_suites(tests_dir)}["examinee"]
+        assert examinee.functions == {
+            "tests/examinee/test_examinee.py::TestExaminee::test_create": ["/examinee/create"],
+            "tests/examinee/test_examinee.py::TestExaminee::test_query": ["/examinee/query"],
+            "tests/examinee/test_examinee.py::test_delete_audit": ["/examinee/audit/delete"],
+        }
+        assert examinee.tests == 3
+
+    def test_selected_suites(self, tests_dir):
+        assert [suite.name for suite in discover_suites(tests_dir, ["form"])] == ["form"]
+        with pytest.raises(SystemExit, match="Unknown resource suites: nope"):
+            discover_suites(tests_dir, ["form", "nope"])
+
+
+class TestScheduler:
+
+    def test_longest_first(self):
+        scheduler = Scheduler([_suite("a"), _suite("b"), _suite("c")], {"a": 1.0, "b": 9.0, "c": 5.0})
+        assert [scheduler.take().name for _ in range(3)] == ["b", "c", "a"]
+        assert scheduler.take() is None
+
+    def test_skips_past_a_suite_whose_lock_is_held(self):
+        scheduler = Scheduler([_suite("a", "examinee"), _suite("b", "examinee"), _suite("c")],
+                              {"a": 3.0, "b": 2.0, "c": 1.0})
+        first = scheduler.take()
+        assert first.name == "a"
+        assert scheduler.take().name == "c"  # b waits for a's lock
+        scheduler.release(first)
+        assert scheduler.take().name == "b"
+
+    def test_take_waits_for_the_lock_to_be_released(self):
+        scheduler = Scheduler([_suite("a", "x"), _suite("b", "x", "y")], {"a": 2.0, "b": 1.0})
+        first = scheduler.take()
+        taken = []
+        waiter = threading.Thread(target=lambda: taken.append(scheduler.take()))
+        waiter.start()
+        waiter.join(0.2)
+        assert waiter.is_alive() and taken == []
+        scheduler.release(first)
+        waiter.join(timeout=5)
+        assert [suite.name for suite in taken] == ["b"]
+        assert scheduler.held == {"x", "y"}
+
+    def test_suites_sharing_a_lock_never_overlap(self, tmp_path, monkeypatch):
+        suites = [_suite(f"w{i}", "examinee" if i % 2 else "form") for i in range(8)] + \
+                 [_suite(f"r{i}") for i in range(4)]
+        running = {}  # name -> suite
+        overlaps = []
+        peak = []
+        guard = threading.Lock()
+
+        def fake_run(suite, junit_dir, pytest_args, env):
+            with guard:
+                overlaps.extend(name for name, other in running.items() if other.locks & suite.locks)
+                running[suite.name] = suite
+                peak.append(len(running))
+            time.sleep(0.02)
+            with guard:
+                del running[suite.name]
+            return SuiteResult(suite, 0, 0.02, junit_dir / f"{suite.name}.xml", junit_dir / f"{suite.name}.log")
+
+        monkeypatch.setattr(suite_runner, "run_suite", fake_run)
+        results = suite_runner.run_suites(suites, 6, tmp_path / "junit")
+        assert sorted(r.suite.name for r in results) == sorted(s.name for s in suites)
+        assert overlaps == []
+        assert max(peak) > 2  # read-only suites still ran alongside the writers
+
+
+class TestShard:
+
+    @pytest.fixture
+    def listed(self, monkeypatch, capsys):
+        """``listed(*argv)``: names of the suites ``--list`` prints for those arguments."""
+        suites = [_suite("a", tests=9), _suite("b", tests=7), _suite("c", tests=5), _suite("d", tests=4),
+                  _suite("e", tests=2)]
+        monkeypatch.setattr(suite_runner, "discover_suites", lambda names=None: list(suites))
+        monkeypatch.setattr(suite_runner, "get_duration_store", lambda: None)  # one second per test
+
+        def run(*argv):
+            assert suite_runner.main([*argv, "--list"]) == 0
+            return [line.split()[0] for line in capsys.readouterr().out.splitlines()]
+
+        return run
+
+    def test_shards_split_the_suites_longest_first(self, listed):
+        assert listed("--shard", "1/2") == ["a", "d"]       # 9 + 4 tests
+        assert listed("--shard", "2/2") == ["b", "c", "e"]  # 7 + 5 + 2 tests
+
+    def test_shards_cover_every_suite_once(self, listed):
+        shards = [listed("--shard", f"{k}/3") for k in (1, 2, 3)]
+        names = [name for shard in shards for name in shard]
+        assert sorted(names) == ["a", "b", "c", "d", "e"]
+        assert all(shards)
+
+    def test_without_shard_every_suite_runs(self, listed):
+        assert listed() == ["a", "b", "c", "d", "e"]
+
+    @pytest.mark.parametrize("shard", ["0/2", "3/2", "2", "1/0", "a/b", "1/2/3", " 1/2"])
+    def test_malformed_or_out_of_range_shards_are_usage_errors(self, listed, capsys, shard):
+        with pytest.raises(SystemExit) as exc:
+            listed("--shard", shard)
+        assert exc.value.code == 2
+        assert f"--shard must be K/N with 1 <= K <= N, not {shard!r}" in capsys.readouterr().err
@@ -0,0 +1,139 @@
+"""Token renewal on 401, against the local token server and a local API that revokes tokens."""
+
+import threading
+
+import pytest
+
+from tests.shared import http_session
+from tests.shared.retry import PATH_POLICIES, RetryPolicy
+from tests.shared.timing import collector
+from tests.shared.token_provider import TokenPool, TokenProvider, prewarm_identity
+from tests.shared.token_server import LocalTokenServer
+
+
+@pytest.fixture
+def token_server():
+    with LocalTokenServer(expires_in=3600) as server:
+        yield server
+
+
+@pytest.fixture
+def revoked(local_api, token_server):
+    """Bearer tokens the local API answers with 401; it accepts any other token the server issued."""
+    tokens = set()
+
+    def respond(method, path, headers):
+        token = headers.get("Authorization", "").partition(" ")[2]
+        try:
+            token_server.verify(token)
+        except ValueError:
+            return 401, {}, b""
+        return (401, {}, b"") if token in tokens else (200, {"Content-Type": "application/json"}, b"[]")
+
+    local_api.respond = respond
+    return tokens
+
+
+def _provider(token_server, client_id="client-a"):
+    return TokenProvider(token_server.url, client_id, "secret", disk_cache=False, background_refresh=False)
+
+
+def _token(headers):
+    return headers["Authorization"].partition(" ")[2]
+
+
+def test_401_renews_the_token_and_resends_once(local_api, session_manager, token_server, revoked):
+    provider = _provider(token_server)
+    headers = provider.headers()
+    revoked.add(_token(headers))
+    response = session_manager.get(local_api.url("/v1/Form/Query"), headers=headers, timeout=5)
+    assert response.status_code == 200
+    assert [a.status for a in response.retry_history] == [401, 200]
+    assert (provider.rejected, token_server.issued) == (1, 2)
+    assert _token(headers) not in revoked  # shared headers carry the renewed token
+
+
+def test_a_second_401_is_returned(local_api, session_manager, token_server, revoked):
+    provider = _provider(token_server)
+    local_api.respond = lambda method, path, headers: (401, {}, b"")
+    response = session_manager.get(local_api.url("/v1/Form/Query"), headers=provider.headers(), timeout=5)
+    assert response.status_code == 401
+    assert len(local_api.requests) == 2
+    assert provider.rejected == 1
+
+
+def test_plain_headers_are_not_resent(local_api, session_manager, token_server, revoked):
+    provider = _provider(token_server)
+    headers = dict(provider.headers())
+    revoked.add(_token(headers))
+    assert session_manager.get(local_api.url("/v1/Form/Query"), headers=headers, timeout=5).status_code == 401
+    assert len(local_api.requests) == 1
+    assert provider.rejected == 0
+
+
+def test_concurrent_401s_cause_one_renewal(local_api, session_manager, token_server, revoked):
+    provider = _provider(token_server)
+    headers = provider.headers()
+    revoked.add(_token(headers))
+    statuses = []
+    threads = [threading.Thread(target=lambda: statuses.append(
+        session_manager.get(local_api.url("/v1/Form/Query"), headers=headers.copy(), timeout=5).status_code))
+        for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    assert statuses == [200] * 8
+    assert (provider.rejected, token_server.issued) == (1, 2)
+
+
+def test_stale_invalidation_keeps_the_current_token(token_server):
+    provider = _provider(token_server)
+    first = provider.token()
+    provider.invalidate(first)
+    second = provider.token()
+    provider.invalidate(first)  # a late 401 for the token already replaced
+    assert provider.token() == second
+    assert (provider.rejected, provider.fetched) == (1, 2)
+
+
+def test_pool_invalidates_only_the_client_that_issued_the_token(token_server):
+    a, b = _provider(token_server, "client-a"), _provider(token_server, "client-b")
+    pool = TokenPool([a, b])
+    token_a, token_b = a.token(), b.token()
+    pool.invalidate(token_a)
+    assert a.token() != token_a
+    assert b.token() == token_b
+    assert (a.rejected, b.rejected) == (1, 0)
+
+
+def test_token_requests_bypass_the_api_session(token_server, session_manager, monkeypatch):
+    monkeypatch.setattr(http_session, "_manager", session_manager)
+    entries = collector.start()
+    try:
+        provider = _provider(token_server)
+        provider.token()
+        provider.invalidate()
+        provider.token()
+    finally:
+        collector.stop()
+    assert token_server.issued == 2
+    assert entries == []  # not in http_timings or the duration history
+    assert session_manager.stats.requests == 0
+    assert session_manager.retry.budget.requests == 0
+    assert session_manager.flow.limiter.peak_in_flight == 0
+
+
+def test_token_requests_are_retried_on_5xx(token_server, monkeypatch):
+    monkeypatch.setitem(PATH_POLICIES, "/connect/token", RetryPolicy(backoff_base=0.01))
+    token_server.failure_rate = 1.0
+    with pytest.raises(RuntimeError, match="Token request failed 503"):
+        _provider(token_server).token()
+    assert (token_server.failed, token_server.issued) == (3, 0)
+
+
+def test_identity_connections_are_prewarmed_on_the_token_session(token_server, session_manager, monkeypatch):
+    monkeypatch.setattr(http_session, "_manager", session_manager)
+    assert prewarm_identity(token_server.url, 1).startswith("Pre-warmed token connections: 127.0.0.1 x1")
+    assert session_manager.stats.prewarmed == 0
+    assert _provider(token_server).token()
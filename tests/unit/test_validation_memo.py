@@ -0,0 +1,168 @@
+"""Validation memo: keys, hits across runs, and merging runs that share a memo file."""
+
+import json
+import types
+
+import pytest
+import requests
+
+from tests.shared import spec_registry, validation_memo, validation_policy
+from tests.shared.validation_memo import ValidationMemo, memo_file_for
+from tests.shared.validation_pool import ValidationPool
+
+SHA = "ab" * 32
+
+
+def _response(body=b'{"id": 1}', status: int = 200, content_type: str = "application/json") -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response.headers["Content-Type"] = content_type
+    response._content = body
+    return response
+
+
+KEY = ValidationMemo.key("/v1/Form/Query", "get", _response(), "full")
+
+
+@pytest.fixture
+def spec_path(tmp_path, monkeypatch):
+    monkeypatch.setenv("SPEC_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.delenv("SPEC_CACHE", raising=False)
+    return str(tmp_path / "openapi.json")
+
+
+class TestKey:
+
+    @pytest.mark.parametrize("path, method, response, level", [
+        ("/v1/Form/Other", "get", _response(), "full"),
+        ("/v1/Form/Query", "post", _response(), "full"),
+        ("/v1/Form/Query", "get", _response(status=201), "full"),
+        ("/v1/Form/Query", "get", _response(content_type="text/json"), "full"),
+        ("/v1/Form/Query", "get", _response(), "sample:20:20:0"),
+        ("/v1/Form/Query", "get", _response(b'{"id": 2}'), "full"),
+    ])
+    def test_every_input_changes_the_key(self, path, method, response, level):
+        assert ValidationMemo.key(path, method, response, level) != KEY
+
+    def test_method_case_does_not(self):
+        assert ValidationMemo.key("/v1/Form/Query", "GET", _response(), "full") == KEY
+
+
+class TestHits:
+
+    def test_miss_then_hit(self, spec_path):
+        memo = ValidationMemo(spec_path, SHA)
+        assert not memo.seen(KEY)
+        memo.add(KEY)
+        assert memo.seen(KEY)
+        assert (memo.hits, memo.misses, memo.added) == (1, 1, 1)
+        assert memo.summary().startswith("Validation memo: 1/2 responses matched a stored verdict (50% hit rate), 1 new")
+
+    def test_verdicts_survive_the_run(self, spec_path):
+        first = ValidationMemo(spec_path, SHA)
+        first.add(KEY)
+        first.save()
+        second = ValidationMemo(spec_path, SHA)
+        assert second.loaded == 1
+        assert second.seen(KEY)
+
+    def test_other_spec_or_toolchain_starts_fresh(self, spec_path, monkeypatch):
+        memo = ValidationMemo(spec_path, SHA)
+        memo.add(KEY)
+        memo.save()
+        assert ValidationMemo(spec_path, "cd" * 32).loaded == 0
+        monkeypatch.setattr(validation_memo, "_fingerprint", lambda: "schemathesis-0.0")
+        assert ValidationMemo(spec_path, SHA).loaded == 0
+
+    def test_nothing_is_written_without_new_verdicts_or_hits(self, spec_path):
+        ValidationMemo(spec_path, SHA).save()
+        assert not memo_file_for(spec_path, SHA).exists()
+
+    def test_disabled_persistence(self, spec_path, monkeypatch):
+        memo = ValidationMemo(spec_path, SHA, persist=False)
+        memo.add(KEY)
+        memo.save()
+        assert not memo_file_for(spec_path, SHA).exists()
+        monkeypatch.setenv("SPEC_CACHE", "false")
+        assert ValidationMemo(spec_path, SHA).file is None
+
+    def test_registry_memo_follows_the_setting(self, spec_path, monkeypatch):
+        monkeypatch.setattr(spec_registry, "_registries", {})
+        with open(spec_path, "w") as f:
+            json.dump({"openapi": "3.0.1", "paths": {}}, f)
+        registry = spec_registry.get_spec_registry(spec_path)
+        monkeypatch.setenv("VALIDATION_MEMO", "false")
+        assert registry.validation_memo is None
+        monkeypatch.setenv("VALIDATION_MEMO", "true")
+        memo = registry.validation_memo
+        assert memo is registry.validation_memo and memo.sha256 == registry.sha256
+
+    def test_pool_resolves_a_hit_without_a_worker(self, spec_path, monkeypatch):
+        monkeypatch.setattr(spec_registry, "_registries", {})
+        monkeypatch.setattr(validation_policy, "_policies", None)
+        with open(spec_path, "w") as f:
+            json.dump({"openapi": "3.0.1", "paths": {}}, f)
+        response = _response()
+        memo = spec_registry.get_spec_registry(spec_path).validation_memo
+        memo.add(ValidationMemo.key("/v1/Form/Query", "get", response, "full"))
+        pool = ValidationPool(spec_path, 1)
+        try:
+            future = pool.submit("/v1/Form/Query", "GET", response)
+            assert future.done() and future.result().ok
+            assert pool.submitted == 0 and memo.hits == 1
+        finally:
+            pool.close()
+
+
+class TestMerge:
+
+    def test_concurrent_runs_keep_each_others_verdicts(self, spec_path):
+        other = ValidationMemo.key("/v1/Form/Query", "get", _response(b"[]"), "full")
+        first, second = ValidationMemo(spec_path, SHA), ValidationMemo(spec_path, SHA)
+        first.add(KEY)
+        second.add(other)
+        first.save()
+        second.save()
+        merged = ValidationMemo(spec_path, SHA)
+        assert merged.loaded == 2
+        assert merged.seen(KEY) and merged.seen(other)
+
+    def test_merge_keeps_the_latest_sighting(self, spec_path, monkeypatch):
+        monkeypatch.setattr(validation_memo, "time", types.SimpleNamespace(time=iter([100.0, 50.0]).__next__))
+        first, second = ValidationMemo(spec_path, SHA), ValidationMemo(spec_path, SHA)
+        first.add(KEY)   # seen at 100
+        second.add(KEY)  # seen at 50
+        first.save()
+        second.save()
+        assert ValidationMemo(spec_path, SHA)._verdicts == {KEY: 100.0}
+
+    def test_oldest_verdicts_are_dropped_beyond_the_limit(self, spec_path, monkeypatch):
+        monkeypatch.setenv("VALIDATION_MEMO_MAX", "2")
+        monkeypatch.setattr(validation_memo, "time", types.SimpleNamespace(time=iter(range(1, 100)).__next__))
+        keys = [ValidationMemo.key("/v1/Form/Query", "get", _response(str(i).encode()), "full") for i in range(3)]
+        memo = ValidationMemo(spec_path, SHA)
+        for key in keys:
+            memo.add(key)
+        memo.seen(keys[0])  # seen again: now the most recent
+        memo.save()
+        assert set(ValidationMemo(spec_path, SHA)._verdicts) == {keys[0], keys[2]}
+
+    def test_other_pythons_memos_are_kept(self, spec_path):
+        memo = ValidationMemo(spec_path, SHA)
+        memo.add(KEY)
+        memo.save()
+        other_python = memo.file.with_name(memo.file.name.replace(validation_memo._python_tag(), "py27"))
+        other_python.write_bytes(b"")
+        newer = ValidationMemo(spec_path, "cd" * 32)
+        newer.add(KEY)
+        newer.save()
+        assert other_python.exists()
+
+    def test_other_spec_versions_memos_are_kept(self, spec_path):
+        memo = ValidationMemo(spec_path, SHA)
+        memo.add(KEY)
+        memo.save()
+        newer = ValidationMemo(spec_path, "cd" * 32)
+        newer.add(KEY)
+        newer.save()
+        assert memo.file.exists() and newer.file.exists()  # another agent may still be on the old spec
@@ -0,0 +1,173 @@
+"""Validation levels: which policy a path gets and what part of a body each level keeps."""
+
+import random
+from collections import Counter
+
+import pytest
+import requests
+
+from tests.shared.validation_policy import (
+    ENVELOPE, FULL, PATH_POLICIES, SAMPLE, Reservoir, ValidationPolicies, ValidationPolicy,
+    _parse_policies, _parse_policy, response_with_body,
+)
+
+LIST = {"total": 100, "items": [{"id": i, "tags": list(range(i % 7))} for i in range(100)]}
+
+
+class TestParsing:
+
+    @pytest.mark.parametrize("raw, expected", [
+        ("full", ValidationPolicy(FULL)),
+        (" Envelope ", ValidationPolicy(ENVELOPE)),
+        ("sample", ValidationPolicy(SAMPLE, 20, 20)),
+        ("sample:5:10", ValidationPolicy(SAMPLE, 5, 10)),
+        ("sample:7", ValidationPolicy(SAMPLE, 7, 7)),
+    ])
+    def test_policy(self, raw, expected):
+        assert _parse_policy(raw) == expected
+
+    def test_unknown_level(self):
+        with pytest.raises(ValueError, match="Unknown validation level 'some'"):
+            _parse_policy("some")
+
+    def test_policies(self):
+        assert _parse_policies(" /examinee/query=sample:50:50, ,/Test/Query=envelope,") == {
+            "/examinee/query": ValidationPolicy(SAMPLE, 50, 50),
+            "/Test/Query": ValidationPolicy(ENVELOPE),
+        }
+
+
+class TestPolicyFor:
+
+    def test_built_in_paths_then_full(self):
+        policies = ValidationPolicies()
+        assert policies.policy_for("/examinee/query") == PATH_POLICIES["/examinee/query"]
+        assert policies.policy_for("https://api.example/v1/TEST/QUERY?page=2").level == SAMPLE
+        assert policies.policy_for("/examinee/query/detail").level == FULL
+        assert policies.policy_for("/v1/Form/Query") == ValidationPolicy()
+
+    def test_configured_paths_win_over_the_built_in_ones(self, monkeypatch):
+        monkeypatch.setenv("VALIDATION_POLICIES", "/examinee/query=envelope,/form/query=sample:1:2")
+        policies = ValidationPolicies()
+        assert policies.policy_for("/examinee/query").level == ENVELOPE
+        assert policies.policy_for("/v1/Form/Query") == ValidationPolicy(SAMPLE, 1, 2)
+        assert policies.policy_for("/Test/Query").level == SAMPLE  # still the built-in default
+
+    def test_level_applies_everywhere_but_configured_paths(self, monkeypatch):
+        monkeypatch.setenv("VALIDATION_LEVEL", "envelope")
+        monkeypatch.setenv("VALIDATION_POLICIES", "/form/query=full")
+        policies = ValidationPolicies()
+        assert policies.policy_for("/examinee/query").level == ENVELOPE  # built-ins give way to the level
+        assert policies.policy_for("/v1/Form/Query").level == FULL
+
+    def test_memo_level_names_what_is_validated(self, monkeypatch):
+        monkeypatch.setenv("VALIDATION_SEED", "7")
+        policies = ValidationPolicies(path_policies={"/a": ValidationPolicy(SAMPLE, 3, 4),
+                                                     "/b": ValidationPolicy(ENVELOPE)})
+        assert policies.memo_level("/x/a") == "sample:3:4:7"
+        assert policies.memo_level("/x/b") == ENVELOPE
+        assert policies.memo_level("/x/c") == FULL
+
+
+def _policies(policy: ValidationPolicy, seed: int = 0) -> ValidationPolicies:
+    return ValidationPolicies(path_policies={"/list": policy}, seed=seed)
+
+
+class TestReduce:
+
+    def test_full_keeps_the_body_itself(self):
+        reduction = _policies(ValidationPolicy(FULL)).reduce("GET", "/list", LIST)
+        assert reduction.body is LIST
+        assert (reduction.elements, reduction.checked) == (None, None)
+
+    def test_envelope_empties_every_array(self):
+        body = {"items": [1, 2, 3], "page": {"links": ["a", "b"]}, "count": 3}
+        reduction = _policies(ValidationPolicy(ENVELOPE)).reduce("GET", "/list", body)
+        assert reduction.body == {"items": [], "page": {"links": []}, "count": 3}
+        assert (reduction.elements, reduction.checked) == (5, 0)
+        assert body["items"] == [1, 2, 3]  # the response data is not modified
+
+    def test_sample_keeps_the_first_elements_and_a_sorted_sample(self):
+        reduction = _policies(ValidationPolicy(SAMPLE, 5, 10)).reduce("GET", "/list", LIST)
+        ids = [item["id"] for item in reduction.body["items"]]
+        assert ids[:5] == [0, 1, 2, 3, 4]
+        assert len(ids) == 15 and ids == sorted(set(ids)) and min(ids[5:]) >= 5
+        assert reduction.body["total"] == 100
+        # nested arrays of the kept elements are reduced too; the skipped ones are not counted
+        assert reduction.elements == 100 + sum(i % 7 for i in ids)
+        assert reduction.checked == 15 + sum(i % 7 for i in ids)
+
+    def test_short_arrays_are_checked_whole(self):
+        body = {"items": list(range(15))}
+        reduction = _policies(ValidationPolicy(SAMPLE, 5, 10)).reduce("GET", "/list", body)
+        assert reduction.body == body
+        assert (reduction.elements, reduction.checked) == (15, 15)
+
+    def test_same_seed_same_sample(self):
+        policy = ValidationPolicy(SAMPLE, 2, 5)
+        first = _policies(policy, seed=1).reduce("GET", "/list", LIST).body
+        assert _policies(policy, seed=1).reduce("GET", "/list", LIST).body == first
+        assert _policies(policy, seed=2).reduce("GET", "/list", LIST).body != first
+        assert _policies(policy, seed=1).reduce("POST", "/list", LIST).body != first
+
+    def test_each_array_draws_from_its_own_generator(self):
+        policy = ValidationPolicy(SAMPLE, 0, 3)
+        alone = _policies(policy).reduce("GET", "/list", {"b": list(range(50))}).body
+        together = _policies(policy).reduce("GET", "/list", {"a": list(range(50)), "b": list(range(50))}).body
+        assert together["b"] == alone["b"]
+
+
+class TestReservoir:
+
+    def test_fills_then_replaces(self):
+        reservoir = Reservoir(3, random.Random(0))
+        for item in range(10):
+            slot = reservoir.slot()
+            if slot is not None:
+                reservoir.put(slot, item)
+        assert reservoir.offered == 10
+        assert len(reservoir.items) == 3 and len(set(reservoir.items)) == 3
+
+    def test_every_element_is_equally_likely(self):
+        picks = Counter()
+        rng = random.Random(42)
+        for _ in range(4000):
+            reservoir = Reservoir(2, rng)
+            for item in range(8):
+                slot = reservoir.slot()
+                if slot is not None:
+                    reservoir.put(slot, item)
+            picks.update(reservoir.items)
+        assert all(abs(count / 4000 - 2 / 8) < 0.03 for count in picks.values())
+
+
+class TestReporting:
+
+    def test_apply_records_levels_for_the_summary_and_the_current_item(self):
+        policies = ValidationPolicies(path_policies={"/list": ValidationPolicy(SAMPLE, 5, 10),
+                                                     "/env": ValidationPolicy(ENVELOPE)}, seed=3)
+        expected = policies.reduce("GET", "/v1/list", LIST)
+        entries = policies.start()
+        policies.apply("get", "/v1/list", LIST)
+        policies.apply("GET", "/v1/env", {"items": [1, 2]})
+        policies.stop()
+        policies.apply("GET", "/v1/other", {"items": [1, 2]})
+        assert [e["level"] for e in entries] == [SAMPLE, ENVELOPE]
+        assert entries[0]["method"] == "GET" and entries[0]["seed"] == 3
+        assert entries[1] == {"method": "GET", "path": "/v1/env", "level": ENVELOPE,
+                              "array_elements": 2, "elements_checked": 0}
+        summary = policies.summary()
+        assert summary.startswith(f"Response validation: 1 full, 1 sampled ({expected.checked} of "
+                                  f"{expected.elements} array elements checked, seed 3)")
+        assert "1 envelope-only (2 array elements skipped)" in summary
+        assert "/list=sample (first 5 + 10 random)" in summary
+
+    def test_response_with_body(self):
+        response = requests.Response()
+        response.status_code = 200
+        response.headers["Content-Type"] = "application/json"
+        response._content = b'{"items": [1, 2, 3]}'
+        clone = response_with_body(response, {"items": []})
+        assert clone.json() == {"items": []}
+        assert (clone.status_code, clone.headers) == (200, response.headers)
+        assert response.json() == {"items": [1, 2, 3]}
@@ -0,0 +1,196 @@
+"""Validation pool: results from the workers and backpressure on submitters."""
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from tests.shared import spec_registry, validation_policy, validation_pool
+from tests.shared.validation_pool import ValidationPool, get_validation_pool, validation_workers
+
+PATH = "/v1/Form/Query"
+SPEC = {
+    "openapi": "3.0.1",
+    "info": {"title": "pool", "version": "1"},
+    "paths": {PATH: {"get": {"responses": {"200": {
+        "description": "forms",
+        "content": {"application/json": {"schema": {"type": "array", "items": {
+            "type": "object", "required": ["id"], "properties": {"id": {"type": "integer"}}}}}},
+    }}}}},
+}
+
+
+def _response(body, status: int = 200) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response.headers["Content-Type"] = "application/json"
+    response._content = body if isinstance(body, bytes) else json.dumps(body).encode()
+    response.url = f"http://127.0.0.1{PATH}"
+    return response
+
+
+@pytest.fixture
+def spec_path(tmp_path, monkeypatch):
+    """A spec file with a private cache, registry and validation policies; memo off."""
+    monkeypatch.setenv("SPEC_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("VALIDATION_MEMO", "false")
+    monkeypatch.setattr(spec_registry, "_registries", {})
+    monkeypatch.setattr(validation_policy, "_policies", None)
+    path = tmp_path / "openapi.json"
+    path.write_text(json.dumps(SPEC))
+    return str(path)
+
+
+@pytest.fixture
+def gate(monkeypatch):
+    """Workers wait for ``gate.set()`` before validating."""
+    event = threading.Event()
+    validate = validation_pool._validate
+
+    def gated(job):
+        assert event.wait(10)
+        return validate(job)
+
+    monkeypatch.setattr(validation_pool, "_validate", gated)
+    return event
+
+
+@pytest.fixture
+def threaded_pool(spec_path, monkeypatch):
+    """``threaded_pool(workers, max_pending)``: a pool whose workers are threads of this process."""
+    monkeypatch.setattr(validation_pool, "_worker", {})
+    pools = []
+
+    def make(workers: int = 1, max_pending: int = 4) -> ValidationPool:
+        validation_pool._init_worker(spec_path)  # reads the environment, as a spawned worker would
+        pool = ValidationPool(spec_path, workers, max_pending)
+        pool._executor.shutdown()
+        pool._executor = ThreadPoolExecutor(workers)
+        pools.append(pool)
+        return pool
+
+    yield make
+    for pool in pools:
+        pool.close()
+
+
+@pytest.mark.parametrize("raw, expected", [(None, 0), ("0", 0), ("3", 3), (" 2 ", 2), ("-1", 0), ("many", 0)])
+def test_validation_workers(monkeypatch, raw, expected):
+    if raw is not None:
+        monkeypatch.setenv("VALIDATION_WORKERS", raw)
+    assert validation_workers() == expected
+
+
+def test_auto_is_one_worker_per_core(monkeypatch):
+    monkeypatch.setenv("VALIDATION_WORKERS", "auto")
+    monkeypatch.setattr(validation_pool.os, "cpu_count", lambda: 6)
+    assert validation_workers() == 6
+
+
+def test_no_pool_without_workers(spec_path, monkeypatch):
+    monkeypatch.setattr(validation_pool, "_pool", None)
+    assert get_validation_pool(spec_path) is None
+    assert validation_pool.active_validation_pool() is None
+
+
+class TestResults:
+
+    def test_valid_body(self, threaded_pool):
+        pool = threaded_pool()
+        result = pool.result(pool.submit(PATH, "GET", _response([{"id": 1}, {"id": 2}])))
+        assert (result.ok, result.kind, result.error, result.method) == (True, None, None, "get")
+        assert result.policy.level == "full"
+        assert (pool.submitted, pool.failed) == (1, 0)
+
+    def test_schema_failure(self, threaded_pool):
+        pool = threaded_pool()
+        result = pool.result(pool.submit(PATH, "get", _response([{"id": "1"}])))
+        assert (result.ok, result.kind) == (False, "schema")
+        assert result.error.startswith("Response violates schema")
+        assert pool.failed == 1
+
+    def test_undecodable_body(self, threaded_pool):
+        pool = threaded_pool()
+        result = pool.result(pool.submit(PATH, "get", _response(b"[{")))
+        assert (result.ok, result.kind) == (False, "json")
+
+    def test_results_are_recorded_against_the_current_test(self, threaded_pool, monkeypatch):
+        monkeypatch.setenv("VALIDATION_POLICIES", f"{PATH}=envelope")
+        pool = threaded_pool()
+        policies = validation_policy.get_validation_policies()
+        entries = policies.start()
+        future = pool.submit(PATH, "get", _response([{"id": "not checked"}]))
+        assert entries == []  # recorded when the test collects the result, not by the worker
+        result = pool.result(future)
+        assert result.ok and (result.elements, result.checked) == (1, 0)
+        assert entries == [{"method": "GET", "path": PATH, "level": "envelope",
+                            "array_elements": 1, "elements_checked": 0}]
+
+    def test_worker_errors_free_their_slot(self, threaded_pool, monkeypatch):
+        def broken(job):
+            raise RuntimeError("worker died")
+
+        monkeypatch.setattr(validation_pool, "_validate", broken)
+        pool = threaded_pool(max_pending=1)
+        errors = []
+
+        def submit_three():
+            for _ in range(3):
+                try:
+                    pool.result(pool.submit(PATH, "get", _response([])))
+                except RuntimeError as e:
+                    errors.append(e)
+
+        thread = threading.Thread(target=submit_three)
+        thread.start()
+        thread.join(timeout=10)
+        assert not thread.is_alive(), "a failed job kept its pending slot"
+        assert len(errors) == 3
+
+    def test_worker_processes(self, spec_path):
+        pool = ValidationPool(spec_path, 2)
+        try:
+            futures = [pool.submit(PATH, "get", _response(body)) for body in ([{"id": 1}], [{"id": None}], b"{")]
+            results = [pool.result(future) for future in futures]
+        finally:
+            pool.close()
+        assert [(r.ok, r.kind) for r in results] == [(True, None), (False, "schema"), (False, "json")]
+        assert all(r.seconds > 0 for r in results)
+        assert pool.summary().startswith("Validation pool: 2 worker processes, 3 bodies validated (2 failed,")
+
+
+class TestBackpressure:
+
+    def test_submit_blocks_at_max_pending(self, threaded_pool, gate):
+        pool = threaded_pool(workers=1, max_pending=2)
+        futures = [pool.submit(PATH, "get", _response([{"id": i}])) for i in range(2)]
+        submitted = threading.Event()
+
+        def third():
+            futures.append(pool.submit(PATH, "get", _response([{"id": 3}])))
+            submitted.set()
+
+        thread = threading.Thread(target=third)
+        thread.start()
+        assert not submitted.wait(0.3)  # both slots are taken until a worker finishes
+        assert pool.submitted == 2
+        gate.set()
+        thread.join(timeout=10)
+        assert submitted.is_set()
+        assert all(pool.result(future).ok for future in futures)
+        assert pool.blocked == 1 and pool.blocked_seconds >= 0.2
+        assert "submit blocked 1 times" in pool.summary() and "at 2 pending" in pool.summary()
+
+    def test_no_blocking_below_max_pending(self, threaded_pool, gate):
+        pool = threaded_pool(workers=1, max_pending=3)
+        futures = [pool.submit(PATH, "get", _response([])) for _ in range(3)]
+        gate.set()
+        assert all(pool.result(future).ok for future in futures)
+        assert (pool.submitted, pool.blocked) == (3, 0)
+
+    def test_default_max_pending_scales_with_workers(self, spec_path):
+        pool = ValidationPool(spec_path, 3)
+        pool.close()
+        assert pool.max_pending == 12